@@ -0,0 +1,134 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from dataclasses import dataclass
+import random
+from typing import Any, Dict, List
+
+from faker import Faker
+
+from core.config import ColumnConfig
+from core.config import RuleConfig
+from data.helpers import Config
+from data.helpers import generate_row
+
+from .fake_client import Row
+from .fake_client import to_bq_value
+
+
+@dataclass
+class BenchmarkCase:
+    """
+    Parser & rules of a column to benchmark, with a value violating them.
+
+    Args:
+        * name: Name of the case
+        * column_config: ColumnConfig of a column of the data config
+        * violating_value: Value injected at the benchmarked violation rates
+    """
+    name: str
+    column_config: ColumnConfig
+    violating_value: Any
+
+    @property
+    def column(self) -> str:
+        return self.column_config['column']
+
+
+# Cases for the columns of the cm360_floodlight_report data config
+CASES: List[BenchmarkCase] = [
+    BenchmarkCase(
+        'int_not_negative',
+        ColumnConfig(column='total_conversions',
+                     parser='parse_int',
+                     rules=[RuleConfig(rule='is_not_negative')]), -1),
+    BenchmarkCase(
+        'int_three_rules',
+        ColumnConfig(column='custom_variable_integer',
+                     parser='parse_int',
+                     rules=[
+                         RuleConfig(rule='is_not_negative'),
+                         RuleConfig(rule='is_within_strict_int_range',
+                                    args={
+                                        'lower_bound': -1,
+                                        'upper_bound': 10000
+                                    }),
+                         RuleConfig(rule='is_not_approx_zero')
+                     ]), -5),
+    BenchmarkCase(
+        'float_not_approx_zero',
+        ColumnConfig(column='custom_variable_float',
+                     parser='parse_float',
+                     rules=[RuleConfig(rule='is_not_approx_zero')]), 0.0),
+    BenchmarkCase(
+        'str_regexes',
+        ColumnConfig(column='activity',
+                     parser='parse_str',
+                     rules=[
+                         RuleConfig(rule='fully_matches_regex',
+                                    args={'regex': '[a-z ]+'}),
+                         RuleConfig(rule='contains_regex',
+                                    args={'regex': '^[a-z]'})
+                     ]), 'Bad-Value_1'),
+]
+
+VIOLATION_RATES = [0.0, 0.01, 0.1]
+
+
+def generate_rows(config: Config, nrows: int, seed: int = 0) -> List[Row]:
+    """
+    Generate reproducible rows of Faker data conforming to the config, with
+    the values BigQuery would return once loaded.
+
+    Args:
+        * config: Config from the data.configs.CONFIGS dictionary
+        * nrows: number of rows to generate
+        * seed: Seed of the Faker instance
+
+    Returns:
+        * List of rows
+    """
+    fake = Faker(use_weighting=False)
+    fake.seed_instance(seed)
+
+    types = {column.bq_name: column.bq_type for column in config}
+    return [{
+        column: to_bq_value(types[column], value)
+        for column, value in generate_row(fake, config).items()
+    }
+            for _ in range(nrows)]
+
+
+def inject_violations(rows: List[Row],
+                      case: BenchmarkCase,
+                      rate: float,
+                      seed: int = 0) -> List[Row]:
+    """
+    Copy the rows, replacing the value of the column of a case by its
+    violating value in a random fraction of rows.
+
+    Args:
+        * rows: List of rows
+        * case: BenchmarkCase
+        * rate: Fraction of rows to violate the rules of the case
+        * seed: Seed of the random rows
+
+    Returns:
+        * List of rows, with injected violations
+    """
+    rng = random.Random(seed)
+    violated: Dict[str, Any] = {case.column: case.violating_value}
+    return [(row | violated) if rng.random() < rate else row for row in rows]
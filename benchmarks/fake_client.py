@@ -0,0 +1,215 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from datetime import date
+from datetime import datetime
+from io import BytesIO
+import json
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+from fastavro import parse_schema
+from fastavro import schemaless_writer
+from google.cloud.bigquery_storage import ReadSession
+from google.cloud.bigquery_storage_v1 import types
+from google.cloud.bigquery_storage_v1.reader import ReadRowsStream
+import pyarrow as pa
+
+from core.bigquery import DataFormat
+
+# Rows per ReadRowsResponse, i.e. per page
+DEFAULT_PAGE_SIZE = 1000
+
+AVRO_TYPES: Dict[str, Any] = {
+    'INT64': 'long',
+    'FLOAT64': 'double',
+    'STRING': 'string',
+    'DATE': {
+        'type': 'int',
+        'logicalType': 'date'
+    },
+    'DATETIME': {
+        'type': 'string',
+        'logicalType': 'datetime'
+    },
+}
+
+ARROW_TYPES: Dict[str, pa.DataType] = {
+    'INT64': pa.int64(),
+    'FLOAT64': pa.float64(),
+    'STRING': pa.string(),
+    'DATE': pa.date32(),
+    'DATETIME': pa.timestamp('us'),
+}
+
+Row = Dict[str, Any]
+
+
+def to_bq_value(bq_type: str, value: Any) -> Any:
+    """
+    Convert a generated value to the Python type BigQuery would return,
+    e.g. ISO 8601 strings of DATE columns to dates.
+
+    Args:
+        * bq_type: BigQuery data type of the column
+        * value: generated value
+
+    Returns:
+        * Converted value
+    """
+    if value is None or not isinstance(value, str):
+        return value
+    elif bq_type == 'DATE':
+        return date.fromisoformat(value)
+    elif bq_type == 'DATETIME':
+        return datetime.fromisoformat(value)
+    return value
+
+
+def _encode_avro(
+        schema: Dict[str, str],
+        rows: Sequence[Row]) -> Tuple[str, List[types.ReadRowsResponse]]:
+    """
+    Encode rows as BigQuery Storage API Avro pages.
+    """
+    avro_schema = {
+        'type':
+            'record',
+        'name':
+            '__root__',
+        'fields': [{
+            'name': column,
+            'type': ['null', AVRO_TYPES[bq_type]]
+        } for column, bq_type in schema.items()]
+    }
+    parsed_schema = parse_schema(avro_schema)
+
+    responses = []
+    for start in range(0, len(rows), DEFAULT_PAGE_SIZE):
+        page = rows[start:start + DEFAULT_PAGE_SIZE]
+        buffer = BytesIO()
+        for row in page:
+            schemaless_writer(
+                buffer, parsed_schema, {
+                    column: (row[column].isoformat() if isinstance(
+                        row[column], datetime) else row[column])
+                    for column in schema
+                })
+        responses.append(
+            types.ReadRowsResponse(avro_rows=types.AvroRows(
+                serialized_binary_rows=buffer.getvalue()),
+                                   row_count=len(page)))
+    return json.dumps(avro_schema), responses
+
+
+def _encode_arrow(
+        schema: Dict[str, str],
+        rows: Sequence[Row]) -> Tuple[bytes, List[types.ReadRowsResponse]]:
+    """
+    Encode rows as BigQuery Storage API Arrow pages.
+    """
+    arrow_schema = pa.schema([
+        (column, ARROW_TYPES[bq_type]) for column, bq_type in schema.items()
+    ])
+
+    responses = []
+    for start in range(0, len(rows), DEFAULT_PAGE_SIZE):
+        page = rows[start:start + DEFAULT_PAGE_SIZE]
+        batch = pa.RecordBatch.from_pylist(list(page), schema=arrow_schema)
+        responses.append(
+            types.ReadRowsResponse(arrow_record_batch=types.ArrowRecordBatch(
+                serialized_record_batch=batch.serialize().to_pybytes()),
+                                   row_count=len(page)))
+    return arrow_schema.serialize().to_pybytes(), responses
+
+
+class _FakeGapicClient:
+    """
+    Replays the pages of each stream, as the GAPIC client used by
+    ReadRowsStream would stream them.
+    """
+
+    def __init__(self, streams: Dict[str, List[types.ReadRowsResponse]]):
+        self.streams = streams
+
+    def read_rows(self, read_stream: str, offset: int,
+                  **kwargs: Any) -> Iterator[types.ReadRowsResponse]:
+        return iter(self.streams[read_stream])
+
+
+class FakeReadClient:
+    """
+    Local fake of the BigQuery Storage API Read client, replaying Avro or
+    Arrow pages encoded from in-memory rows, so reads can be benchmarked
+    offline through the real decoding path.
+
+    Pages are encoded once per set of selected columns & data format, so
+    only decoding is measured after a first read.
+
+    Note: Row restrictions are ignored.
+
+    Args:
+        * schema: BigQuery data type of each column
+        * rows: List of rows, with values of the Python types BigQuery
+            returns for each column
+    """
+
+    def __init__(self, schema: Dict[str, str], rows: Sequence[Row]) -> None:
+        self.schema = schema
+        self.rows = rows
+        self._sessions: Dict[Tuple, ReadSession] = {}
+        self._gapic_client = _FakeGapicClient({})
+
+    def create_read_session(self, parent: str, read_session: ReadSession,
+                            max_stream_count: int) -> ReadSession:
+        columns = tuple(read_session.read_options.selected_fields or
+                        self.schema)
+        data_format = DataFormat(read_session.data_format)
+        stream_count = max(max_stream_count, 1)
+        key = (columns, data_format, stream_count)
+        if key not in self._sessions:
+            self._sessions[key] = self._create_session(
+                read_session.table,
+                {column: self.schema[column] for column in columns},
+                data_format, stream_count)
+        return self._sessions[key]
+
+    def _create_session(self, table: str, schema: Dict[str, str],
+                        data_format: DataFormat,
+                        stream_count: int) -> ReadSession:
+        rows = [{column: row[column] for column in schema} for row in self.rows]
+        session = ReadSession(name=f'{table}/sessions/{len(self._sessions)}',
+                              table=table,
+                              data_format=data_format.value)
+        if data_format == DataFormat.ARROW:
+            arrow_schema, pages = _encode_arrow(schema, rows)
+            session.arrow_schema = types.ArrowSchema(
+                serialized_schema=arrow_schema)
+        else:
+            avro_schema, pages = _encode_avro(schema, rows)
+            session.avro_schema = types.AvroSchema(schema=avro_schema)
+
+        # Split the pages in contiguous streams, e.g. for parallel reads
+        pages_per_stream = -(-len(pages) // stream_count)
+        for i in range(min(stream_count, len(pages))):
+            name = f'{session.name}/streams/{i}'
+            session.streams.append(types.ReadStream(name=name))
+            self._gapic_client.streams[name] = pages[i *
+                                                     pages_per_stream:(i + 1) *
+                                                     pages_per_stream]
+        return session
+
+    def read_rows(self, name: str, offset: int = 0) -> ReadRowsStream:
+        return ReadRowsStream(self._gapic_client, name, offset, {})
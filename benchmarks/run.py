@@ -0,0 +1,474 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from dataclasses import asdict
+from dataclasses import dataclass
+from datetime import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import (Any, Callable, cast, Dict, Iterable, Iterator, List,
+                    Optional, Tuple)
+
+from google.cloud.bigquery_storage import BigQueryReadClient
+
+from core.bigquery import DataFormat
+from core.bigquery import get_cells_batches_iterator
+from core.bigquery import get_cells_iterator
+from core.bigquery import TableMetadata
+from core.config import ReadConfig
+from core.helpers import Buffer
+from core.logging import Logger
+from core.logging import LogMessage
+from core.validation import ColumnValidator
+from data.configs import CONFIGS
+
+from .cases import BenchmarkCase
+from .cases import CASES
+from .cases import generate_rows
+from .cases import inject_violations
+from .cases import VIOLATION_RATES
+from .fake_client import FakeReadClient
+from .fake_client import Row
+
+# Rows per timed chunk, for latency percentiles
+CHUNK_SIZE = 1000
+
+DEFAULT_CONFIG = 'cm360_floodlight_report'
+DEFAULT_NROWS = 10000
+DEFAULT_REPEAT = 3
+
+# Throughput drop from the baseline reported as a regression
+REGRESSION_THRESHOLD = 0.1
+
+TABLE = TableMetadata('benchmark', 'benchmark', 'table')
+
+DATA_FORMATS = [DataFormat.AVRO, DataFormat.ARROW]
+
+# Yields the number of rows processed per chunk
+ChunkRunner = Callable[[], Iterable[int]]
+
+
+@dataclass
+class BenchmarkResult:
+    """
+    Measurements of a benchmark, for the fastest of its timed runs.
+
+    Args:
+        * benchmark: Name of the benchmark
+        * params: Parameters of the benchmark, e.g. its data format
+        * rows: Number of rows processed per run
+        * seconds: Duration of the run
+        * rows_per_second: Throughput of the run
+        * latency_p50_ms, latency_p90_ms, latency_p99_ms: Percentiles of the
+            duration of a chunk of 1000 rows
+        * peak_memory_bytes: Peak memory allocated by a run
+    """
+    benchmark: str
+    params: Dict[str, Any]
+    rows: int
+    seconds: float
+    rows_per_second: float
+    latency_p50_ms: float
+    latency_p90_ms: float
+    latency_p99_ms: float
+    peak_memory_bytes: int
+
+    @property
+    def key(self) -> str:
+        params = ', '.join(
+            f'{name}={value}' for name, value in sorted(self.params.items()))
+        return f'{self.benchmark} ({params})'
+
+
+class DiscardLogger(Logger):
+    """
+    Logger discarding the log messages, to benchmark their buffering.
+    """
+
+    DEFAULT_BATCH_SIZE = 1000
+
+    def send_log_messages(self, messages: List[LogMessage]) -> None:
+        pass
+
+    def send_log_message(self, message: LogMessage) -> None:
+        pass
+
+
+def percentile(values: List[float], q: float) -> float:
+    """
+    Get the nearest-rank percentile of values.
+
+    Args:
+        * values: List of values
+        * q: Percentile, between 0 and 100
+
+    Returns:
+        * Percentile of the values, or 0 if there are none
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(round(q / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def _time_chunks(run: ChunkRunner) -> Tuple[int, float, List[float]]:
+    """
+    Time a run, and each chunk of rows it processes.
+    """
+    rows = 0
+    latencies = []
+    start = previous = time.perf_counter()
+    for count in run():
+        now = time.perf_counter()
+        latencies.append(now - previous)
+        previous = now
+        rows += count
+    return rows, time.perf_counter() - start, latencies
+
+
+def measure(benchmark: str,
+            params: Dict[str, Any],
+            run: ChunkRunner,
+            repeat: int = DEFAULT_REPEAT) -> BenchmarkResult:
+    """
+    Measure the throughput, chunk latencies and peak memory of a benchmark.
+
+    A first run traces memory allocations, which also warms up caches,
+    e.g. the pages encoded by the fake read client. The fastest of the
+    following timed runs is kept.
+
+    Args:
+        * benchmark: Name of the benchmark
+        * params: Parameters of the benchmark
+        * run: ChunkRunner of the benchmark
+        * repeat: Number of timed runs
+
+    Returns:
+        * BenchmarkResult
+    """
+    tracemalloc.start()
+    try:
+        _time_chunks(run)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    rows, seconds, latencies = min(
+        (_time_chunks(run) for _ in range(max(repeat, 1))),
+        key=lambda timed: timed[1])
+
+    return BenchmarkResult(benchmark=benchmark,
+                           params=params,
+                           rows=rows,
+                           seconds=seconds,
+                           rows_per_second=rows / seconds if seconds else 0.0,
+                           latency_p50_ms=percentile(latencies, 50) * 1000,
+                           latency_p90_ms=percentile(latencies, 90) * 1000,
+                           latency_p99_ms=percentile(latencies, 99) * 1000,
+                           peak_memory_bytes=peak_memory)
+
+
+def get_fake_client(schema: Dict[str, str],
+                    rows: List[Row]) -> BigQueryReadClient:
+    """
+    Get a FakeReadClient of rows, typed as the client it stands in for.
+    """
+    return cast(BigQueryReadClient, FakeReadClient(schema, rows))
+
+
+def _count_chunks(items: Iterable[Any],
+                  process: Callable[[Any], Any]) -> Iterator[int]:
+    """
+    Process items one by one, yielding the count of each chunk of items.
+    """
+    count = 0
+    for item in items:
+        process(item)
+        count += 1
+        if count == CHUNK_SIZE:
+            yield count
+            count = 0
+    if count:
+        yield count
+
+
+def read_cells(client: BigQueryReadClient, column: str,
+               data_format: DataFormat) -> ChunkRunner:
+    """
+    Benchmark reading the cells of a column, as process_column does.
+    """
+    read_config = ReadConfig(data_format=data_format.name)
+
+    def run() -> Iterator[int]:
+        if data_format == DataFormat.ARROW:
+            for (cells,) in get_cells_batches_iterator(client, TABLE, [column],
+                                                       read_config):
+                yield len(cells)
+        else:
+            yield from _count_chunks(
+                get_cells_iterator(client, TABLE, column, read_config),
+                lambda cell: None)
+
+    return run
+
+
+def validate_cells(client: BigQueryReadClient, case: BenchmarkCase,
+                   data_format: DataFormat) -> ChunkRunner:
+    """
+    Benchmark reading & validating the cells of a column, logging the
+    failures to a DiscardLogger, as process_column does.
+    """
+    read_config = ReadConfig(data_format=data_format.name)
+
+    def run() -> Iterator[int]:
+        logger = DiscardLogger()
+        validator = ColumnValidator(case.column_config, logger)
+        if data_format == DataFormat.ARROW:
+            for (cells,) in get_cells_batches_iterator(client, TABLE,
+                                                       [case.column],
+                                                       read_config):
+                validator.validate_batch(cells)
+                yield len(cells)
+        else:
+            yield from _count_chunks(
+                get_cells_iterator(client, TABLE, case.column, read_config),
+                validator.validate)
+        validator.flush()
+        logger.flush(force=True)
+
+    return run
+
+
+def log_messages(nrows: int) -> ChunkRunner:
+    """
+    Benchmark queueing rule failures with a Logger.
+    """
+
+    def run() -> Iterator[int]:
+        logger = DiscardLogger()
+        logger.set_base_log('benchmark', 'benchmark', TABLE, datetime.utcnow())
+        yield from _count_chunks(
+            range(nrows), lambda value: logger.rule(
+                'column', 'rule', 'Rule failed.', value, {'arg': 1}))
+        logger.flush(force=True)
+
+    return run
+
+
+def push_buffer(nrows: int) -> ChunkRunner:
+    """
+    Benchmark pushing items to a Buffer.
+    """
+
+    def run() -> Iterator[int]:
+        buffer = Buffer[int]([], CHUNK_SIZE, lambda items: None)
+        yield from _count_chunks(range(nrows), buffer.push)
+        buffer.flush(force=True)
+
+    return run
+
+
+def run_benchmarks(config_name: str = DEFAULT_CONFIG,
+                   nrows: int = DEFAULT_NROWS,
+                   repeat: int = DEFAULT_REPEAT) -> List[BenchmarkResult]:
+    """
+    Run all benchmarks offline, on rows generated for a data config.
+
+    Reads are benchmarked per column & data format, and validation per
+    parser/rules case, violation rate & data format.
+
+    Args:
+        * config_name: Key of the data.configs.CONFIGS dictionary
+        * nrows: Number of rows to generate
+        * repeat: Number of timed runs per benchmark
+
+    Returns:
+        * List of BenchmarkResults
+    """
+    config = CONFIGS[config_name]
+    schema = {column.bq_name: column.bq_type for column in config}
+    rows = generate_rows(config, nrows)
+    cases = [case for case in CASES if case.column in schema]
+
+    results = []
+    client = get_fake_client(schema, rows)
+    for column in sorted({case.column for case in cases}):
+        for data_format in DATA_FORMATS:
+            results.append(
+                measure('read', {
+                    'column': column,
+                    'data_format': data_format.name
+                }, read_cells(client, column, data_format), repeat))
+
+    for case in cases:
+        for rate in VIOLATION_RATES:
+            client = get_fake_client(schema,
+                                     inject_violations(rows, case, rate))
+            for data_format in DATA_FORMATS:
+                results.append(
+                    measure(
+                        'validate', {
+                            'case':
+                                case.name,
+                            'parser':
+                                case.column_config['parser'],
+                            'rules':
+                                ','.join(rule_config['rule'] for rule_config in
+                                         case.column_config['rules']),
+                            'violation_rate':
+                                rate,
+                            'data_format':
+                                data_format.name
+                        }, validate_cells(client, case, data_format), repeat))
+
+    results.append(measure('logger', {}, log_messages(nrows), repeat))
+    results.append(measure('buffer', {}, push_buffer(nrows), repeat))
+    return results
+
+
+def get_commit() -> str:
+    """
+    Get the short hash of the checked out commit, to label results.
+
+    Returns:
+        * Commit hash, or "unknown" outside of a git repository
+    """
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                              capture_output=True,
+                              check=True,
+                              text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def save_results(filename: str, results: List[BenchmarkResult],
+                 **metadata: Any) -> None:
+    """
+    Save results as JSON, with metadata of the run, e.g. the commit.
+
+    Args:
+        * filename: Path to the JSON file
+        * results: List of BenchmarkResults
+        * metadata: Values describing the run
+
+    Returns:
+        * None
+    """
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(filename, 'w') as f:
+        json.dump(metadata |
+                  {'results': [asdict(result) for result in results]},
+                  f,
+                  indent=2)
+
+
+def load_results(filename: str) -> List[BenchmarkResult]:
+    """
+    Load results saved by save_results.
+
+    Args:
+        * filename: Path to the JSON file
+
+    Returns:
+        * List of BenchmarkResults
+    """
+    with open(filename) as f:
+        return [BenchmarkResult(**result) for result in json.load(f)['results']]
+
+
+def compare_results(
+        baseline: List[BenchmarkResult],
+        results: List[BenchmarkResult],
+        threshold: float = REGRESSION_THRESHOLD) -> Tuple[List[str], int]:
+    """
+    Compare the throughput of results with baseline results, e.g. of the
+    previous commit.
+
+    Args:
+        * baseline: List of BenchmarkResults to compare against
+        * results: List of BenchmarkResults
+        * threshold: Relative throughput drop reported as a regression
+
+    Returns:
+        * Tuple of a line per benchmark in both lists, and the number of
+            regressions
+    """
+    baseline_results = {result.key: result for result in baseline}
+    lines = []
+    regressions = 0
+    for result in results:
+        base: Optional[BenchmarkResult] = baseline_results.get(result.key)
+        if base is None or not base.rows_per_second:
+            continue
+        change = result.rows_per_second / base.rows_per_second - 1
+        regression = change < -threshold
+        regressions += regression
+        lines.append(f'{result.key}: {change:+.1%} rows/s'
+                     f'{" REGRESSION" if regression else ""}')
+    return lines, regressions
+
+
+def describe_result(result: BenchmarkResult) -> str:
+    """
+    Summarize a result as a human readable line.
+
+    Args:
+        * result: BenchmarkResult
+
+    Returns:
+        * Summary line
+    """
+    return (f'{result.key}: {result.rows_per_second:,.0f} rows/s, '
+            f'p50={result.latency_p50_ms:.2f}ms '
+            f'p90={result.latency_p90_ms:.2f}ms '
+            f'p99={result.latency_p99_ms:.2f}ms per {CHUNK_SIZE} rows, '
+            f'peak={result.peak_memory_bytes / 2**20:.1f}MiB')
+
+
+if __name__ == "__main__":
+    config_name = os.getenv('CONFIG') or DEFAULT_CONFIG
+    nrows = int(os.getenv('NROWS') or DEFAULT_NROWS)
+    commit = get_commit()
+
+    results = run_benchmarks(config_name, nrows,
+                             int(os.getenv('REPEAT') or DEFAULT_REPEAT))
+    for result in results:
+        print(describe_result(result))
+
+    outfile = os.getenv('OUTFILE') or f'benchmarks/results/{commit}.json'
+    save_results(outfile,
+                 results,
+                 commit=commit,
+                 python=platform.python_version(),
+                 created_at=datetime.utcnow().isoformat(),
+                 config=config_name,
+                 nrows=nrows)
+    print(f'Saved results to {outfile}.')
+
+    if os.getenv('BASELINE'):
+        lines, regressions = compare_results(
+            load_results(os.getenv('BASELINE', '')), results)
+        print('\n'.join(lines))
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,209 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from dataclasses import dataclass
+from dataclasses import field
+import json
+from typing import Any, cast, Dict, Hashable, Tuple
+
+from core.config import AggregationConfig
+from core.helpers import SpaceSaving
+from core.http import MalformedConfigError
+from core.logging import Logger
+from core.logging import LogType
+
+DEFAULT_TOP_K = 10
+
+# Distinct items counted per top-K item, so the counts of the most
+# frequent items stay accurate for skewed data
+CAPACITY_FACTOR = 10
+
+
+def _to_hashable(value: Any) -> Hashable:
+    """
+    Get a hashable key for a cell value, e.g. nested records and arrays.
+    """
+    try:
+        hash(value)
+    except TypeError:
+        return json.dumps(value, default=str, sort_keys=True)
+    return cast(Hashable, value)
+
+
+@dataclass
+class _FailureGroup:
+    """
+    Failures of a parser or rule of a column.
+    """
+    log_type: LogType
+    name: str
+    rule_params: dict
+    partition_id: str | None
+    capacity: int
+
+    errors: SpaceSaving[str] = field(init=False)
+    values: SpaceSaving[Tuple[str, Hashable]] = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.errors = SpaceSaving(self.capacity)
+        self.values = SpaceSaving(self.capacity)
+
+
+class ViolationAggregator:
+    """
+    Drop-in replacement of a Logger for the failures of a column, counting
+    them instead of logging one row per failing cell, so the number of logs
+    is bounded however dirty the data is.
+
+    Once flushed, it logs for each parser or rule of the column:
+        * a parser_summary or rule_summary row per most frequent error,
+            with its violation_count
+        * a row per most frequent failing value, with its error and
+            violation_count
+
+    Note: If there are more than top_k * CAPACITY_FACTOR distinct errors or
+    values, counts are upper bounds.
+
+    Args:
+        * logger: Logger to log the aggregated failures to
+        * aggregation_config: AggregationConfig of the column
+
+    Raises:
+        * MalformedConfigError: if top_k is not a positive integer
+    """
+
+    logger: Logger
+    top_k: int
+
+    _groups: Dict[Tuple[LogType, str, str, str, str | None], _FailureGroup]
+
+    def __init__(self, logger: Logger,
+                 aggregation_config: AggregationConfig) -> None:
+        self.logger = logger
+        self.top_k = aggregation_config.get('top_k', DEFAULT_TOP_K)
+        if not isinstance(self.top_k, int) or self.top_k < 1:
+            raise MalformedConfigError(
+                f'top_k must be a positive integer, not {self.top_k!r}.')
+        self._groups = {}
+
+    def _add(self, log_type: LogType, column: str, name: str, error: str,
+             value: Any, rule_params: dict, partition_id: str | None) -> None:
+        """
+        Count a failure of a parser or rule.
+        """
+        key = (log_type, column, name, json.dumps(rule_params,
+                                                  sort_keys=True), partition_id)
+        group = self._groups.get(key)
+        if group is None:
+            group = _FailureGroup(log_type, name, rule_params, partition_id,
+                                  self.top_k * CAPACITY_FACTOR)
+            self._groups[key] = group
+
+        group.errors.add(error)
+        group.values.add((error, _to_hashable(value)))
+
+    def parser(self,
+               column: str,
+               parser: str,
+               error: str,
+               value: Any,
+               row_offset: int | None = None,
+               partition_id: str | None = None) -> None:
+        """
+        Count a parser failure.
+
+        Args:
+            * column: column where the rule is applied
+            * parser: parser function that failed
+            * error: error that occurred
+            * value: value that fails to parse
+            * row_offset: optional, position of the failing row, which is
+                not logged once aggregated
+            * partition_id: optional, partition of the failing row
+
+        Returns:
+            * None
+        """
+        self._add(LogType.PARSER, column, parser, error, value, {},
+                  partition_id)
+
+    def rule(self,
+             column: str,
+             rule: str,
+             error: str,
+             value: Any,
+             rule_params: dict = {},
+             row_offset: int | None = None,
+             partition_id: str | None = None) -> None:
+        """
+        Count a rule violation.
+
+        Args:
+            * column: column where the rule is applied
+            * rule: rule that is violated
+            * error: error that occurred
+            * value: value that violates the rule
+            * rule_params: optional, parameters set for the rule
+            * row_offset: optional, position of the failing row, which is
+                not logged once aggregated
+            * partition_id: optional, partition of the failing row
+
+        Returns:
+            * None
+        """
+        self._add(LogType.RULE, column, rule, error, value, rule_params,
+                  partition_id)
+
+    def flush(self) -> None:
+        """
+        Log the aggregated failures counted so far, and reset the counts.
+
+        Returns:
+            * None
+        """
+        for (log_type, column, _, _, _), group in self._groups.items():
+            for error, count in group.errors.most_common(self.top_k):
+                if log_type == LogType.PARSER:
+                    self.logger.parser_summary(column,
+                                               group.name,
+                                               error,
+                                               count,
+                                               partition_id=group.partition_id)
+                else:
+                    self.logger.rule_summary(column,
+                                             group.name,
+                                             error,
+                                             count,
+                                             group.rule_params,
+                                             partition_id=group.partition_id)
+
+            for (error, value), count in group.values.most_common(self.top_k):
+                if log_type == LogType.PARSER:
+                    self.logger.parser(column,
+                                       group.name,
+                                       error,
+                                       value,
+                                       violation_count=count,
+                                       partition_id=group.partition_id)
+                else:
+                    self.logger.rule(column,
+                                     group.name,
+                                     error,
+                                     value,
+                                     group.rule_params,
+                                     violation_count=count,
+                                     partition_id=group.partition_id)
+        self._groups.clear()
@@ -15,19 +15,33 @@ limitations under the License.
 """
 from __future__ import annotations
 
-from typing import List, Union
+from datetime import datetime
+from datetime import timedelta
+from threading import Lock
+from typing import List, Optional, Union
 
 from google.auth import default
 from google.auth.impersonated_credentials import \
     Credentials as ImpersonatedCredentials
+from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials as OAuthCredentials
 from typing_extensions import NotRequired
 from typing_extensions import TypedDict
 
+from core.cache import LRUCache
+
 Credentials = Union[OAuthCredentials, ImpersonatedCredentials]
 
 GCP_SCOPES = ['https://www.googleapis.com/auth/cloud-platform']
 
+# Refresh cached credentials this long before they expire, i.e. before the
+# clients using them would, so tokens are refreshed between invocations
+# rather than while reading a table
+CREDENTIALS_REFRESH_MARGIN = timedelta(minutes=5)
+
+_credentials_cache: LRUCache[Credentials] = LRUCache()
+_refresh_lock = Lock()
+
 
 class AuthConfig(TypedDict):
     service_account_email: NotRequired[str]
@@ -76,11 +90,60 @@ def get_service_account_credentials(
                                    target_scopes=GCP_SCOPES + scopes)
 
 
+def refresh_credentials(credentials: Credentials) -> None:
+    """
+    Refresh credentials which expire within the refresh margin.
+
+    Credentials without a token yet are left to the clients to refresh.
+
+    Args:
+        * credentials: Default or Impersonated Credentials
+
+    Returns:
+        * None
+    """
+    with _refresh_lock:
+        expiry = credentials.expiry
+        if (credentials.token is not None and expiry is not None and
+                expiry - datetime.utcnow() < CREDENTIALS_REFRESH_MARGIN):
+            credentials.refresh(Request())
+
+
+def create_credentials(service_account_email: Optional[str],
+                       scopes: List[str]) -> Credentials:
+    """
+    Create default credentials, or impersonated credentials if a service
+    account is provided, with the given scopes.
+
+    Args:
+        * service_account_email: Email address of service account, if any
+        * scopes: List containing valid OAuth 2.0
+            [scopes](https://developers.google.com/identity/protocols/oauth2/scopes)
+
+    Returns:
+        * Default or Impersonated Credentials
+    """
+    default_credentials = get_default_credentials(scopes)
+
+    credentials: Credentials
+    if service_account_email:
+        credentials = get_service_account_credentials(default_credentials,
+                                                      service_account_email,
+                                                      scopes)
+    else:
+        credentials = default_credentials
+
+    return credentials
+
+
 def get_credentials(auth_config: AuthConfig | None) -> Credentials:
     """
     Get default credentials, or impersonated credentials if a service account
     is provided, with the given scopes.
 
+    Credentials are cached per service account & scopes for the lifetime of
+    the process, and refreshed shortly before they expire.
+
     Args: AuthConfig, with:
         * service_account_email (optional): Email address of service account
         * scopes (optional): List containing valid OAuth 2.0
@@ -90,19 +153,14 @@ def get_credentials(auth_config: AuthConfig | None) -> Credentials:
         * Default or Impersonated Credentials
     """
     service_account_email = None
-    scopes = []
+    scopes: List[str] = []
     if auth_config:
         service_account_email = auth_config.get('service_account_email', '')
         scopes = auth_config.get('scopes', [])
 
-    default_credentials = get_default_credentials(scopes)
-
-    credentials: Credentials
-    if service_account_email:
-        credentials = get_service_account_credentials(default_credentials,
-                                                      service_account_email,
-                                                      scopes)
-    else:
-        credentials = default_credentials
+    credentials = _credentials_cache.get(
+        (service_account_email or None, tuple(sorted(set(scopes)))),
+        lambda: create_credentials(service_account_email, scopes))
+    refresh_credentials(credentials)
 
     return credentials
@@ -19,20 +19,49 @@ from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
 import re
-from typing import Any, cast, Dict, Generator, Iterable, List, Mapping
+from typing import (Any, Callable, cast, Dict, Generator, Iterable, List,
+                    Mapping, Sequence, Tuple, Type, Union)
 
+from google.cloud.bigquery import ArrayQueryParameter
 from google.cloud.bigquery import Client as BigQueryLegacyClient
+from google.cloud.bigquery import QueryJobConfig
+from google.cloud.bigquery import ScalarQueryParameter
 from google.cloud.bigquery import SchemaField
 from google.cloud.bigquery import Table
 from google.cloud.bigquery_storage import BigQueryReadClient
+from google.cloud.bigquery_storage import BigQueryWriteClient
+from google.cloud.bigquery_storage import ReadRowsResponse
 from google.cloud.bigquery_storage import ReadSession
+from google.cloud.bigquery_storage_v1 import types as write_types
+from google.cloud.bigquery_storage_v1.reader import ReadRowsIterable
+from google.cloud.bigquery_storage_v1.reader import ReadRowsPage
+from google.cloud.bigquery_storage_v1.writer import AppendRowsStream
 from google.cloud.exceptions import NotFound
+# No protobuf stubs in requirements-dev.txt
+from google.protobuf import descriptor_pb2  # type: ignore[import]
+from google.protobuf import descriptor_pool
+from google.protobuf import message_factory
+import pyarrow as pa
 
 from core.auth import Credentials
+from core.cache import LRUCache
+from core.config import ReadConfig
+from core.helpers import iterate_in_parallel
 from core.helpers import parse_column_path
+from core.tracing import get_context
+from core.tracing import start_detached_span
+from core.tracing import start_span
 
 BQ_SCOPES = ['https://www.googleapis.com/auth/bigquery']
 
+# Logged by runs whose retries may log their failures with other insert IDs
+UNSTABLE_ROW_ORDER_MESSAGE = (
+    'Rows are read from multiple streams, in an order which may differ '
+    'between runs, so a retry of this run may log its failures again.')
+
+# Clients per type, project & credentials, reused across invocations
+_clients_cache: LRUCache[Any] = LRUCache()
+
 
 @dataclass
 class TableMetadata:
@@ -51,6 +80,10 @@ class TableMetadata:
     # projects/project_id/datasets/dataset_id/tables/table_name
     table_path: str = ''
 
+    # Storage API row restriction of the partitions to read, if not all
+    # e.g. `day` = CAST('2023-01-02' AS DATE)
+    partition_filter: str = ''
+
     def __post_init__(self) -> None:
         if not self.full_table_id:
             self.full_table_id = (f"{self.project_id}"
@@ -123,10 +156,17 @@ def get_bq_legacy_client(project_id: str,
         * credentials: Credentials for User having
             "BigQuery Data Viewer" permission
 
+    Note: Clients are cached per project & credentials, keeping their HTTP
+    sessions alive across invocations.
+
     Returns:
         * BigQuery API client
     """
-    return BigQueryLegacyClient(project=project_id, credentials=credentials)
+    client = _clients_cache.get(
+        (BigQueryLegacyClient, project_id, credentials),
+        lambda: BigQueryLegacyClient(project=project_id,
+                                     credentials=credentials))
+    return cast(BigQueryLegacyClient, client)
 
 
 def get_bq_read_client(credentials: Credentials) -> BigQueryReadClient:
@@ -138,10 +178,37 @@ def get_bq_read_client(credentials: Credentials) -> BigQueryReadClient:
         * credentials: Credentials for User having
             "BigQuery Data Viewer" & "BigQuery Read Session User" permissions
 
+    Note: Clients are cached per credentials, keeping their gRPC channels
+    alive across invocations.
+
     Returns:
         * BigQuery Storage API Read client
     """
-    return BigQueryReadClient(credentials=credentials)
+    client = _clients_cache.get(
+        (BigQueryReadClient, None, credentials),
+        lambda: BigQueryReadClient(credentials=credentials))
+    return cast(BigQueryReadClient, client)
+
+
+def get_bq_write_client(credentials: Credentials) -> BigQueryWriteClient:
+    """
+    Get an authenticated BigQuery Storage API Write client, as per the
+    [docs](https://cloud.google.com/bigquery/docs/write-api).
+
+    Args:
+        * credentials: Credentials for User having
+            "BigQuery Data Editor" permission
+
+    Note: Clients are cached per credentials, keeping their gRPC channels
+    alive across invocations.
+
+    Returns:
+        * BigQuery Storage API Write client
+    """
+    client = _clients_cache.get(
+        (BigQueryWriteClient, None, credentials),
+        lambda: BigQueryWriteClient(credentials=credentials))
+    return cast(BigQueryWriteClient, client)
 
 
 class DataFormat(Enum):
@@ -155,15 +222,211 @@ class DataFormat(Enum):
     ARROW = 2
 
 
-def get_readrows_iterator(
-        bq_read_client: BigQueryReadClient,
-        table_metadata: TableMetadata,
-        columns: Iterable[str] | None = None,
-        data_format: DataFormat = DataFormat.AVRO) -> Iterable[Mapping]:
+def get_data_format(read_config: ReadConfig | None) -> DataFormat:
+    """
+    Get the data format requested in a ReadConfig.
+
+    Args:
+        * read_config: optional, ReadConfig with read options
+
+    Returns:
+        * DataFormat, AVRO by default
+
+    Raises:
+        * ValueError: if an invalid data format is provided
+    """
+    data_format = (read_config or ReadConfig()).get('data_format',
+                                                    DataFormat.AVRO.name)
+    if data_format not in (DataFormat.AVRO.name, DataFormat.ARROW.name):
+        raise ValueError('Invalid data format specified.')
+    return DataFormat[data_format]
+
+
+def has_stable_row_order(read_config: ReadConfig | None) -> bool:
+    """
+    Whether the rows of an unchanged table are read in the same order by
+    every read session, so a retried run finds the same failures at the same
+    row offsets, e.g. to log them with the same insert IDs.
+
+    Each read session may split the rows into multiple streams differently,
+    and unordered reads interleave streams as they return rows, so only
+    single stream reads are stable.
+
+    Args:
+        * read_config: optional, ReadConfig with read options
+
+    Returns:
+        * True if rows are read from a single stream
+    """
+    return (read_config or ReadConfig()).get('max_stream_count', 1) == 1
+
+
+def combine_row_restrictions(*row_restrictions: str) -> str:
+    """
+    Combine row restrictions, so only rows matching all of them are read.
+
+    Args:
+        * row_restrictions: SQL filters, empty ones being ignored
+
+    Returns:
+        * Combined row restriction, or '' to read all rows
+    """
+    non_empty = [r for r in row_restrictions if r]
+    if len(non_empty) <= 1:
+        return ''.join(non_empty)
+    return ' AND '.join(f'({r})' for r in non_empty)
+
+
+def create_read_session(bq_read_client: BigQueryReadClient,
+                        table_metadata: TableMetadata,
+                        columns: Iterable[str] | None = None,
+                        data_format: DataFormat = DataFormat.AVRO,
+                        read_config: ReadConfig | None = None,
+                        row_restriction: str = '') -> ReadSession:
+    """
+    Create a BigQuery Storage API read session for the requested columns
+    of the table.
+
+    Args:
+        * bq_read_client: BigQuery Storage API Read client
+        * table_metadata: TableMetadata object
+        * columns (optional): List of columns to select
+        * data_format: Format to fetch data in
+        * read_config (optional): ReadConfig with read options
+        * row_restriction (optional): SQL filter of the rows to read,
+            similar to a WHERE clause, combined with the partition filter
+            of the table
+
+    Returns:
+        * ReadSession, with up to max_stream_count streams
+    """
+    read_config = read_config or ReadConfig()
+    row_restriction = combine_row_restrictions(table_metadata.partition_filter,
+                                               row_restriction)
+
+    requested_session = ReadSession(table=table_metadata.table_path,
+                                    data_format=data_format.value,
+                                    read_options={
+                                        "selected_fields": columns,
+                                        "row_restriction": row_restriction
+                                    })
+
+    with start_span('create_read_session',
+                    table=table_metadata.full_table_id,
+                    data_format=data_format.name) as span:
+        session = bq_read_client.create_read_session(
+            parent=f"projects/{table_metadata.project_id}",
+            read_session=requested_session,
+            max_stream_count=read_config.get('max_stream_count', 1),
+        )
+        span.set_attribute('streams', len(session.streams))
+    return session
+
+
+PageDecoder = Callable[[ReadRowsPage], Any]
+
+
+def _get_page_bytes(page: ReadRowsPage) -> int:
+    """
+    Get the serialized size of a page, as returned by BigQuery.
+
+    Args:
+        * page: ReadRowsPage
+
+    Returns:
+        * Size in bytes, or 0 if unknown
+    """
+    message = getattr(page, '_message', None)
+    if message is None:
+        return 0
+    return int(ReadRowsResponse.pb(message).ByteSize())
+
+
+def _decode_stream_pages(
+        rows: ReadRowsIterable,
+        decode_page: PageDecoder,
+        stream_name: str = '',
+        trace_context: Any = None) -> Generator[Any, None, None]:
+    """
+    Decode the rows of a stream page by page, so pages can be
+    decoded in the thread reading the stream.
+
+    The stream is traced with a span, child of the span reading the
+    session, counting the rows & bytes read.
+
+    Args:
+        * rows: ReadRowsIterable of a stream
+        * decode_page: Func that decodes a page
+        * stream_name (optional): Name of the stream
+        * trace_context (optional): Trace context of the read, as streams
+            may be read in other threads
+
+    Returns:
+        * Iterator of decoded pages
+    """
+    span = start_detached_span('read_stream', trace_context, stream=stream_name)
+    recording = span.is_recording()
+    total_rows = total_bytes = 0
+    try:
+        for page in rows.pages:
+            if recording:
+                total_rows += page.num_items
+                total_bytes += _get_page_bytes(page)
+            yield decode_page(page)
+    finally:
+        span.set_attributes({'rows': total_rows, 'bytes': total_bytes})
+        span.end()
+
+
+def read_session_pages(bq_read_client: BigQueryReadClient,
+                       session: ReadSession,
+                       decode_page: PageDecoder,
+                       preserve_order: bool = True) -> Iterable[Any]:
+    """
+    Read and decode the pages of all streams of a read session.
+
+    If the session has multiple streams, they are read concurrently and
+    merged, buffering a bounded number of pages per stream.
+
+    Args:
+        * bq_read_client: BigQuery Storage API Read client
+        * session: ReadSession to read
+        * decode_page: Func that decodes a page
+        * preserve_order: If False, yield pages as soon as any stream
+            returns them instead of stream by stream
+
+    Returns:
+        * Iterator of decoded pages
+    """
+    trace_context = get_context()
+    streams = [
+        _decode_stream_pages(
+            bq_read_client.read_rows(stream.name).rows(session), decode_page,
+            stream.name, trace_context) for stream in session.streams
+    ]
+
+    if len(streams) == 0:
+        # BigQuery returns no streams for empty tables
+        return iter([])
+    elif len(streams) == 1:
+        return streams[0]
+    else:
+        return iterate_in_parallel(streams, preserve_order=preserve_order)
+
+
+def get_readrows_iterator(bq_read_client: BigQueryReadClient,
+                          table_metadata: TableMetadata,
+                          columns: Iterable[str] | None = None,
+                          data_format: DataFormat = DataFormat.AVRO,
+                          read_config: ReadConfig | None = None,
+                          row_restriction: str = '') -> Iterable[Mapping]:
     """
     Get an Iterator of row Mappings with the requested columns of the table,
     using an authenticated BigQuery Storage API client.
 
+    If multiple streams are requested, they are read concurrently and merged,
+    buffering a bounded number of pages per stream.
+
     Note: Does NOT support nested columns.
 
     Args:
@@ -173,38 +436,135 @@ def get_readrows_iterator(
         * data_format: Format to fetch data in, one of:
             * DataFormat.AVRO
             * DataFormat.ARROW
+        * read_config (optional): ReadConfig with read options
+        * row_restriction (optional): SQL filter of the rows to read
 
     Defaults:
         * columns: None, i.e. select all columns
         * data_format: AVRO, since it auto-parses to Dict
+        * read_config: None, i.e. read a single stream
+        * row_restriction: '', i.e. read all rows
 
     Returns:
         * Iterator of row Mappings
     """
-    requested_session = ReadSession(table=table_metadata.table_path,
-                                    data_format=data_format.value,
-                                    read_options={"selected_fields": columns})
+    read_config = read_config or ReadConfig()
 
-    session = bq_read_client.create_read_session(
-        parent=f"projects/{table_metadata.project_id}",
-        read_session=requested_session,
-        max_stream_count=1,
-    )
-    # Use 0th stream because because max_stream_count=1
-    stream_name = session.streams[0].name
+    session = create_read_session(bq_read_client, table_metadata, columns,
+                                  data_format, read_config, row_restriction)
 
-    reader = bq_read_client.read_rows(stream_name)
-    rows = reader.rows(session)
+    pages = read_session_pages(bq_read_client,
+                               session,
+                               decode_page=list,
+                               preserve_order=read_config.get(
+                                   'preserve_order', True))
+    rows = (row for page in pages for row in page)
 
     # Docstring return type is Iterable[Mapping]
     # cast for mypy to prevent [no-any-return] error
     return cast(Iterable[Mapping], rows)
 
 
+def get_record_batches_iterator(
+        bq_read_client: BigQueryReadClient,
+        table_metadata: TableMetadata,
+        columns: Iterable[str] | None = None,
+        read_config: ReadConfig | None = None,
+        row_restriction: str = '') -> Iterable[pa.RecordBatch]:
+    """
+    Get an Iterator of Arrow RecordBatches with the requested columns of the
+    table, using an authenticated BigQuery Storage API client.
+
+    Args:
+        * bq_read_client: BigQuery Storage API Read client
+        * table_metadata: TableMetadata object
+        * columns (optional): List of columns to select
+        * read_config (optional): ReadConfig with read options
+        * row_restriction (optional): SQL filter of the rows to read
+
+    Returns:
+        * Iterator of RecordBatches, one per page
+    """
+    read_config = read_config or ReadConfig()
+
+    session = create_read_session(bq_read_client, table_metadata, columns,
+                                  DataFormat.ARROW, read_config,
+                                  row_restriction)
+
+    return read_session_pages(bq_read_client,
+                              session,
+                              decode_page=lambda page: page.to_arrow(),
+                              preserve_order=read_config.get(
+                                  'preserve_order', True))
+
+
+CellExtractor = Callable[[Mapping], Any]
+
+
+def extract_nested_value(row: Mapping, nested_columns: List[Tuple]) -> Any:
+    """
+    Extract a nested cell value from a row, given its parsed column path.
+
+    Args:
+        * row: row Mapping containing the parent column
+        * nested_columns: parsed column path, from parse_column_path
+
+    Returns:
+        * Cell value, or None if the path could not be resolved
+    """
+    current_value: Any = row
+    for column_name, key in nested_columns:
+        if isinstance(current_value, dict):
+            current_value = current_value.get(column_name)
+        elif isinstance(current_value, list) and key:
+            current_value = next(
+                (item for item in current_value
+                 if item.get(column_name) == key),
+                None,
+            )
+
+        if isinstance(current_value, dict) and "value" in current_value:
+            extracted_value = next(
+                (value for key, value in current_value["value"].items()
+                 if value is not None),
+                None,
+            )
+            current_value = (extracted_value
+                             if extracted_value is not None else current_value)
+
+        if current_value is None:
+            break
+    return current_value
+
+
+def get_cell_extractor(column: str) -> Tuple[str, CellExtractor]:
+    """
+    Get the parent column to select and a function extracting the
+    cell value of the given column path from a row.
+
+    Args:
+        * column: column name, supporting nested fields and array keys
+
+    Returns:
+        * Tuple, with
+            * parent column name to select
+            * CellExtractor: Func that extracts the cell from a row Mapping
+    """
+    # Check if the column path indicates a simple column access
+    if "." not in column and "[" not in column:
+        return column, lambda row: row.get(column)
+
+    nested_columns = parse_column_path(column)
+    parent_column = nested_columns[0][0]
+    return parent_column, lambda row: extract_nested_value(row, nested_columns)
+
+
 def get_cells_iterator(
     bq_read_client: BigQueryReadClient,
     table_metadata: TableMetadata,
     column: str,
+    read_config: ReadConfig | None = None,
+    row_restriction: str = '',
 ) -> Generator[Any, None, None]:
     """Retrieves an iterator of cell values for a specified column, optimized
     for both simple and nested column
@@ -217,53 +577,57 @@ def get_cells_iterator(
       table_metadata (TableMetadata): The table's metadata.
       column (str): The column name, supporting nested fields and array indices
         for complex cases.
+      read_config (ReadConfig | None): Optional read options.
+      row_restriction (str): Optional SQL filter of the rows to read.
 
   Returns:
       Generator[Any, None, None]: An iterator over cell values.
   """
-    # Check if the column path indicates a simple column access
-    if "." not in column and "[" not in column:
-        # Optimize data retrieval for simple column access
-        rows = get_readrows_iterator(bq_read_client,
-                                     table_metadata, [column],
-                                     data_format=DataFormat.AVRO)
-        for row in rows:
-            yield row.get(column)
-    else:
-        # Handle nested and special value structures as before
-        nested_columns = parse_column_path(column)
-        parent_column = nested_columns[0][0]
-
-        rows = get_readrows_iterator(
-            bq_read_client,
-            table_metadata,
-            [parent_column],
-            data_format=DataFormat.AVRO,
-        )
+    parent_column, extract_cell = get_cell_extractor(column)
+
+    rows = get_readrows_iterator(bq_read_client,
+                                 table_metadata, [parent_column],
+                                 data_format=DataFormat.AVRO,
+                                 read_config=read_config,
+                                 row_restriction=row_restriction)
+    for row in rows:
+        yield extract_cell(row)
+
+
+def get_row_cells_iterator(
+    bq_read_client: BigQueryReadClient,
+    table_metadata: TableMetadata,
+    columns: List[str],
+    read_config: ReadConfig | None = None,
+    row_restriction: str = '',
+) -> Generator[List[Any], None, None]:
+    """
+    Get an Iterator of cell values for multiple columns, reading the table
+    only once with a single read session for all of them.
 
-        for current_value in rows:
-            for column_name, key in nested_columns:
-                if isinstance(current_value, dict):
-                    current_value = current_value.get(column_name)
-                elif isinstance(current_value, list) and key:
-                    current_value = next(
-                        (item for item in current_value
-                         if item.get(column_name) == key),
-                        None,
-                    )
-
-                if isinstance(current_value, dict) and "value" in current_value:
-                    extracted_value = next(
-                        (value for key, value in current_value["value"].items()
-                         if value is not None),
-                        None,
-                    )
-                    current_value = (extracted_value if extracted_value
-                                     is not None else current_value)
-
-                if current_value is None:
-                    break
-            yield current_value
+    Args:
+        * bq_read_client: BigQuery Storage API Read client
+        * table_metadata: TableMetadata object
+        * columns: List of column names, supporting nested fields
+            and array keys
+        * read_config (optional): ReadConfig with read options
+        * row_restriction (optional): SQL filter of the rows to read
+
+    Returns:
+        * Iterator of Lists of cell values, in the order of columns
+    """
+    extractors = [get_cell_extractor(column) for column in columns]
+    # Deduplicate parent columns, preserving their order
+    parent_columns = list(dict.fromkeys(parent for parent, _ in extractors))
+
+    rows = get_readrows_iterator(bq_read_client,
+                                 table_metadata,
+                                 parent_columns,
+                                 data_format=DataFormat.AVRO,
+                                 read_config=read_config,
+                                 row_restriction=row_restriction)
+    for row in rows:
+        yield [extract_cell(row) for _, extract_cell in extractors]
 
 
 def get_table(bq_legacy_client: BigQueryLegacyClient,
@@ -307,9 +671,82 @@ def create_table(bq_legacy_client: BigQueryLegacyClient,
     return table
 
 
+QueryParameter = Union[ScalarQueryParameter, ArrayQueryParameter]
+
+
+def run_query(
+        bq_legacy_client: BigQueryLegacyClient,
+        query: str,
+        parameters: Sequence[QueryParameter] = (),
+) -> List[Any]:
+    """
+    Run a GoogleSQL query, and wait for its result.
+
+    Args:
+        * bq_legacy_client: BigQuery Legacy API client
+        * query: GoogleSQL query, e.g. a SELECT or a DML statement
+        * parameters (optional): Values of its @parameters
+
+    Returns:
+        * List of result rows
+    """
+    job_config = QueryJobConfig(query_parameters=list(parameters))
+    return list(bq_legacy_client.query(query, job_config=job_config).result())
+
+
+# Maximum bytes of a batch of rows sent to BigQuery, below the 10 MB limit of
+# insertAll and AppendRows requests, as the sizes of rows are estimated
+MAX_REQUEST_BYTES = 9 * 1024 * 1024
+
+# Maximum rows of an insertAll request
+MAX_INSERT_ROWS = 50000
+
+# Reasons of streaming insert errors which may succeed if retried, see
+# https://cloud.google.com/bigquery/docs/error-messages
+RETRYABLE_INSERT_REASONS = frozenset(
+    {'backendError', 'internalError', 'rateLimitExceeded', 'timeout'})
+
+
+def insert_rows(
+        bq_legacy_client: BigQueryLegacyClient,
+        table_metadata: TableMetadata,
+        rows: Sequence[Dict[str, Any]],
+        row_ids: Sequence[str] | None = None
+) -> Dict[int, List[Dict[str, Any]]]:
+    """
+    Insert rows into a BigQuery table with streaming inserts, and get the
+    errors of the rows which failed.
+
+    BigQuery drops rows with the insert ID of a row inserted in the last few
+    minutes, on a best effort basis, so rows can be retried without
+    duplicating them.
+
+    Args:
+        * bq_legacy_client: BigQuery Legacy API client
+        * table_metadata: TableMetadata object
+        * rows: Dict rows to insert
+        * row_ids (optional): Insert ID of each row
+
+    Returns:
+        * Dict of the index of each failed row to its errors
+    """
+    if len(rows) == 0:
+        return {}
+    result = bq_legacy_client.insert_rows_json(table_metadata.full_table_id,
+                                               rows,
+                                               row_ids=row_ids)
+    # result is empty if no errors occurred
+    return {
+        row['index']: row['errors']
+        for row in result
+        if 'errors' in row and len(row['errors']) > 0
+    }
+
+
 def upload_rows(bq_legacy_client: BigQueryLegacyClient,
                 table_metadata: TableMetadata,
-                rows: List[Dict[str, Any]]) -> List[str]:
+                rows: List[Dict[str, Any]],
+                row_ids: Sequence[str] | None = None) -> List[str]:
     """
     Upload a List of Dict rows to a BigQuery table, by appending.
 
@@ -318,21 +755,201 @@ def upload_rows(bq_legacy_client: BigQueryLegacyClient,
     Args:
         * bq_legacy_client: BigQuery Legacy API client
         * table_metadata: TableMetadata object
-        * column: Column name to select
+        * rows: Dict rows to upload
+        * row_ids (optional): Insert ID of each row, to deduplicate retries
 
     Returns:
         * List of errors, if any
     """
-    if len(rows) > 0:
-        result = bq_legacy_client.insert_rows_json(table_metadata.full_table_id,
-                                                   rows)
-        # result is empty if no errors occurred
-        for row in result:
-            # Note:
-            # Failure here usually indicates a BigQuery log table schema issue
-            # We assume all rows will fail with the same error,
-            # so we only log one row to prevent polluting cloud logging
-            # and immediately return to stop processing data further
-            if 'errors' in row and len(row['errors']) > 0:
-                return [str(e) for e in row['errors']]
+    errors = insert_rows(bq_legacy_client, table_metadata, rows, row_ids)
+    for row_errors in errors.values():
+        # Note:
+        # Failure here usually indicates a BigQuery log table schema issue
+        # We assume all rows will fail with the same error,
+        # so we only log one row to prevent polluting cloud logging
+        # and immediately return to stop processing data further
+        return [str(e) for e in row_errors]
     return []
+
+
+CellsBatch = Union[pa.Array, List[Any]]
+
+
+def get_cells_batches_iterator(
+    bq_read_client: BigQueryReadClient,
+    table_metadata: TableMetadata,
+    columns: List[str],
+    read_config: ReadConfig | None = None,
+    row_restriction: str = '',
+) -> Generator[List[CellsBatch], None, None]:
+    """
+    Get an Iterator of batches of cell values for multiple columns, reading
+    the table in Arrow format with a single read session for all of them.
+
+    Simple columns are returned as Arrow arrays, while nested columns are
+    extracted into Lists of cell values.
+
+    Args:
+        * bq_read_client: BigQuery Storage API Read client
+        * table_metadata: TableMetadata object
+        * columns: List of column names, supporting nested fields
+            and array keys
+        * read_config (optional): ReadConfig with read options
+        * row_restriction (optional): SQL filter of the rows to read
+
+    Returns:
+        * Iterator of Lists of batches of cells, in the order of columns
+    """
+    extractors = [get_cell_extractor(column) for column in columns]
+    # Deduplicate parent columns, preserving their order
+    parent_columns = list(dict.fromkeys(parent for parent, _ in extractors))
+
+    batches = get_record_batches_iterator(bq_read_client, table_metadata,
+                                          parent_columns, read_config,
+                                          row_restriction)
+    for batch in batches:
+        yield split_cells_batches(batch, columns, extractors)
+
+
+def split_cells_batches(
+        batch: pa.RecordBatch, columns: List[str],
+        extractors: List[Tuple[str, CellExtractor]]) -> List[CellsBatch]:
+    """
+    Split a RecordBatch of parent columns into batches of cells per column.
+
+    Args:
+        * batch: RecordBatch with the parent column of each column
+        * columns: List of column names, supporting nested fields
+            and array keys
+        * extractors: Parent column & CellExtractor of each column,
+            from get_cell_extractor
+
+    Returns:
+        * List of batches of cells, in the order of columns
+    """
+    cells_batches: List[CellsBatch] = []
+    for column, (parent_column, extract_cell) in zip(columns, extractors):
+        if parent_column == column:
+            cells_batches.append(batch.column(column))
+        else:
+            cells_batches.append([
+                extract_cell({parent_column: value})
+                for value in batch.column(parent_column).to_pylist()
+            ])
+    return cells_batches
+
+
+# Protobuf field types of the Python types of columns
+PROTO_FIELD_TYPES = {
+    str: descriptor_pb2.FieldDescriptorProto.TYPE_STRING,
+    int: descriptor_pb2.FieldDescriptorProto.TYPE_INT64,
+}
+
+
+def build_proto_descriptor(
+        name: str, fields: Mapping[str,
+                                   type]) -> descriptor_pb2.DescriptorProto:
+    """
+    Build a protobuf descriptor for rows of nullable fields, as required by
+    the Storage Write API - str for STRING or JSON columns, int for INT64.
+
+    Args:
+        * name: message name
+        * fields: Mapping of field names, matching the column names,
+            to their Python type
+
+    Returns:
+        * DescriptorProto of the rows
+
+    Raises:
+        * KeyError: if a field type is not supported
+    """
+    descriptor = descriptor_pb2.DescriptorProto(name=name)
+    for number, (field, field_type) in enumerate(fields.items(), start=1):
+        descriptor.field.add(
+            name=field,
+            number=number,
+            type=PROTO_FIELD_TYPES[field_type],
+            label=descriptor_pb2.FieldDescriptorProto.LABEL_OPTIONAL)
+    return descriptor
+
+
+def get_proto_message_class(
+        descriptor: descriptor_pb2.DescriptorProto) -> Type[Any]:
+    """
+    Get a protobuf message class to serialize rows, from their descriptor.
+
+    Args:
+        * descriptor: DescriptorProto of the rows
+
+    Returns:
+        * Message class
+    """
+    file_descriptor = descriptor_pb2.FileDescriptorProto(
+        name=f'{descriptor.name}.proto', syntax='proto2')
+    file_descriptor.message_type.add().CopyFrom(descriptor)
+    pool = descriptor_pool.DescriptorPool()
+    pool.Add(file_descriptor)
+    message_class: Type[Any] = message_factory.GetMessageClass(
+        pool.FindMessageTypeByName(descriptor.name))
+    return message_class
+
+
+def open_append_rows_stream(
+        bq_write_client: BigQueryWriteClient, table_metadata: TableMetadata,
+        descriptor: descriptor_pb2.DescriptorProto) -> AppendRowsStream:
+    """
+    Open a connection to append protobuf rows to the default stream of a
+    table, which commits rows as soon as they are appended.
+
+    Args:
+        * bq_write_client: BigQuery Storage API Write client
+        * table_metadata: TableMetadata object
+        * descriptor: DescriptorProto of the rows
+
+    Returns:
+        * AppendRowsStream
+    """
+    request_template = write_types.AppendRowsRequest(
+        write_stream=f'{table_metadata.table_path}/streams/_default',
+        proto_rows=write_types.AppendRowsRequest.ProtoData(
+            writer_schema=write_types.ProtoSchema(proto_descriptor=descriptor)))
+    return AppendRowsStream(bq_write_client, request_template)
+
+
+def append_rows(append_rows_stream: AppendRowsStream,
+                serialized_rows: List[bytes]) -> List[str]:
+    """
+    Append serialized protobuf rows to a table, in requests of at most
+    MAX_REQUEST_BYTES, waiting until all of them are committed.
+
+    Args:
+        * append_rows_stream: AppendRowsStream of the table
+        * serialized_rows: List of serialized protobuf rows
+
+    Returns:
+        * List of errors, if any
+    """
+    chunks: List[List[bytes]] = []
+    chunk_bytes = 0
+    for row in serialized_rows:
+        if not chunks or chunk_bytes + len(row) > MAX_REQUEST_BYTES:
+            chunks.append([])
+            chunk_bytes = 0
+        chunks[-1].append(row)
+        chunk_bytes += len(row)
+
+    futures = [
+        append_rows_stream.send(
+            write_types.AppendRowsRequest(
+                proto_rows=write_types.AppendRowsRequest.ProtoData(
+                    rows=write_types.ProtoRows(serialized_rows=chunk))))
+        for chunk in chunks
+    ]
+
+    errors: List[str] = []
+    for future in futures:
+        # Raises if the whole request failed
+        response = future.result()
+        errors.extend(error.message for error in response.row_errors)
+    return errors
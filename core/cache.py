@@ -0,0 +1,81 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Generic, Hashable, TypeVar
+
+T = TypeVar('T')
+
+# Default number of entries kept by process-wide caches
+DEFAULT_CACHE_SIZE = 16
+
+
+class LRUCache(Generic[T]):
+    """
+    Thread-safe, size-bounded cache evicting the least recently used entry,
+    to reuse expensive objects (e.g. credentials & clients) across the warm
+    invocations of a Cloud Function.
+
+    Args:
+        * max_size: Maximum number of entries (default: 16)
+    """
+
+    _entries: 'OrderedDict[Hashable, T]'
+    _lock: Lock
+
+    def __init__(self, max_size: int = DEFAULT_CACHE_SIZE) -> None:
+        if max_size < 1:
+            raise ValueError('Cache size must be at least 1.')
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, create: Callable[[], T]) -> T:
+        """
+        Get the cached entry of a key, creating it if missing.
+
+        Args:
+            * key: Hashable key of the entry
+            * create: Function creating the entry
+
+        Returns:
+            * Cached or created entry
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+            # Created under the lock, so concurrent calls create it only once
+            entry = create()
+            self._entries[key] = entry
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            return entry
+
+    def clear(self) -> None:
+        """
+        Remove all the entries.
+
+        Returns:
+            * None
+        """
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,396 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from abc import ABC
+from abc import abstractmethod
+import base64
+from dataclasses import asdict
+from dataclasses import dataclass
+from dataclasses import field
+import json
+import os
+from time import perf_counter
+from typing import (Any, Callable, cast, Dict, Iterable, Iterator, List,
+                    Optional, TypeVar)
+from urllib.parse import quote
+
+from google.auth.transport.requests import AuthorizedSession
+from google.cloud.bigquery_storage import BigQueryReadClient
+from google.cloud.bigquery_storage import ReadSession
+
+from core.auth import Credentials
+from core.config import CheckpointConfig
+from core.incremental import WatermarkStore
+from core.profiling import upload_to_gcs
+
+T = TypeVar('T')
+
+DEFAULT_CHECKPOINT_INTERVAL_SECONDS = 60
+DEFAULT_CHECKPOINT_PREFIX = 'checkpoints'
+
+# Rows between checks of the time since the last checkpoint
+CHECKPOINT_CHECK_ROWS = 1000
+
+GCS_DOWNLOAD_URL = ('https://storage.googleapis.com/storage/v1/b/{bucket}'
+                    '/o/{name}')
+
+# Counters of ColumnStats restored from a checkpoint
+CHECKPOINT_STATS = [
+    'rows', 'parse_failures', 'rule_errors', 'check_violations', 'failed_rows'
+]
+
+
+@dataclass
+class Checkpoint:
+    """
+    Progress of a column scan, saved periodically so a retried request
+    continues where the previous one stopped.
+    """
+    # Serialized ReadSession, base64 encoded, once the session is created
+    session: str = ''
+
+    # Rows of the stream read and validated, with their failures logged
+    offset: int = 0
+
+    # Counters of the ColumnStats of the validated rows
+    stats: Dict[str, int] = field(default_factory=dict)
+
+    # Summary message of the run, once it completed
+    description: Optional[str] = None
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+    @classmethod
+    def from_json(cls, data: str) -> 'Checkpoint':
+        return cls(**json.loads(data))
+
+
+class CheckpointStore(ABC):
+    """
+    Durable store of the checkpoints of column scans.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        """
+        Get the last checkpoint saved for a key.
+
+        Args:
+            * key: Checkpoint key
+
+        Returns:
+            * Checkpoint JSON, or None if none was saved
+        """
+        pass
+
+    @abstractmethod
+    def set(self, key: str, checkpoint: str) -> None:
+        """
+        Save the checkpoint of a key, replacing the previous one.
+
+        Args:
+            * key: Checkpoint key
+            * checkpoint: Checkpoint JSON
+
+        Returns:
+            * None
+        """
+        pass
+
+
+class FileCheckpointStore(CheckpointStore):
+    """
+    Stores checkpoints as JSON files in a local directory, e.g. for tests.
+
+    Args:
+        * directory: Path of the directory, created if it does not exist
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+
+    def _get_path(self, key: str) -> str:
+        return os.path.join(self.directory, quote(key, safe='') + '.json')
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            with open(self._get_path(key), 'r') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def set(self, key: str, checkpoint: str) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._get_path(key)
+        # Replace atomically, so a timeout never leaves a partial file
+        with open(path + '.tmp', 'w') as f:
+            f.write(checkpoint)
+        os.replace(path + '.tmp', path)
+
+
+class GCSCheckpointStore(CheckpointStore):
+    """
+    Stores checkpoints as JSON objects in a GCS bucket, which requires the
+    "Storage Object User" role on the bucket.
+
+    Args:
+        * credentials: Credentials of the GCS client
+        * bucket: Name of the GCS bucket
+        * prefix: Path prefix of the checkpoints
+    """
+
+    def __init__(self, credentials: Credentials, bucket: str,
+                 prefix: str) -> None:
+        self.credentials = credentials
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+
+    def _get_name(self, key: str) -> str:
+        return f'{self.prefix}/{key}.json'
+
+    def get(self, key: str) -> Optional[str]:
+        session = AuthorizedSession(self.credentials)
+        response = session.get(GCS_DOWNLOAD_URL.format(bucket=quote(self.bucket,
+                                                                    safe=''),
+                                                       name=quote(
+                                                           self._get_name(key),
+                                                           safe='')),
+                               params={'alt': 'media'})
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return str(response.text)
+
+    def set(self, key: str, checkpoint: str) -> None:
+        # Object uploads replace the previous object atomically
+        upload_to_gcs(self.credentials, self.bucket, self._get_name(key),
+                      checkpoint.encode())
+
+
+class BigQueryCheckpointStore(CheckpointStore):
+    """
+    Stores checkpoints in the BigQuery state table of the watermarks.
+
+    Args:
+        * store: WatermarkStore of the state table
+    """
+
+    def __init__(self, store: WatermarkStore) -> None:
+        self.store = store
+
+    def get(self, key: str) -> Optional[str]:
+        return self.store.get(f'checkpoint/{key}')
+
+    def set(self, key: str, checkpoint: str) -> None:
+        self.store.set(f'checkpoint/{key}', checkpoint)
+
+
+class _CheckpointReadClient:
+    """
+    BigQuery Storage API Read client, reusing the read session of a
+    checkpoint and reading its stream from the checkpoint offset.
+    """
+
+    def __init__(self, bq_read_client: BigQueryReadClient,
+                 checkpoint: Checkpoint) -> None:
+        self._bq_read_client = bq_read_client
+        self._checkpoint = checkpoint
+        self._offset = checkpoint.offset
+
+    def create_read_session(self, *args: Any, **kwargs: Any) -> ReadSession:
+        if self._checkpoint.session:
+            return cast(
+                ReadSession,
+                ReadSession.deserialize(
+                    base64.b64decode(self._checkpoint.session)))
+        session = self._bq_read_client.create_read_session(*args, **kwargs)
+        self._checkpoint.session = base64.b64encode(
+            ReadSession.serialize(session)).decode()
+        return session
+
+    def read_rows(self, name: str, offset: int = 0, **kwargs: Any) -> Any:
+        return self._bq_read_client.read_rows(name, offset + self._offset,
+                                              **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._bq_read_client, name)
+
+
+class Checkpointer:
+    """
+    Saves the progress of a column scan to a CheckpointStore periodically,
+    and restores it when a request is retried.
+
+    Before each checkpoint, the failures of the validated rows are flushed
+    to the logs, so a retried request continues from the checkpoint offset
+    without logging them twice. Only the rows validated since the last
+    checkpoint are validated again, with their failures logged again.
+
+    Args:
+        * store: CheckpointStore
+        * key: Checkpoint key of the run, e.g. of its workflow execution,
+            table and column
+        * flush: Function flushing the logs of the validated rows
+        * interval_seconds: Seconds between checkpoints
+    """
+
+    def __init__(self, store: CheckpointStore, key: str,
+                 flush: Callable[[], Any], interval_seconds: float) -> None:
+        self.store = store
+        self.key = key
+        self.flush = flush
+        self.interval_seconds = interval_seconds
+
+        data = store.get(key)
+        self.checkpoint = (Checkpoint.from_json(data)
+                           if data is not None else Checkpoint())
+        self.saves = 0
+        self._last_save = perf_counter()
+
+    def restore_stats(self, stats: Any) -> None:
+        """
+        Restore the counters of the validated rows into ColumnStats.
+
+        Args:
+            * stats: ColumnStats of the column
+
+        Returns:
+            * None
+        """
+        for name, value in self.checkpoint.stats.items():
+            setattr(stats, name, value)
+
+    def wrap_read_client(
+            self, bq_read_client: BigQueryReadClient) -> BigQueryReadClient:
+        """
+        Wrap a BigQuery Storage API Read client, to resume reading from the
+        read session & offset of the checkpoint.
+
+        Args:
+            * bq_read_client: BigQuery Storage API Read client
+
+        Returns:
+            * Wrapped BigQuery Storage API Read client
+        """
+        return _CheckpointReadClient(
+            bq_read_client, self.checkpoint)  # type: ignore[return-value]
+
+    def save(self, offset: int, stats: Any) -> None:
+        """
+        Flush the logs of the validated rows, then save a checkpoint.
+
+        Args:
+            * offset: Rows of the stream validated
+            * stats: ColumnStats of the validated rows
+
+        Returns:
+            * None
+        """
+        self.flush()
+        self.checkpoint.offset = offset
+        self.checkpoint.stats = {
+            name: getattr(stats, name) for name in CHECKPOINT_STATS
+        }
+        self.store.set(self.key, self.checkpoint.to_json())
+        self.saves += 1
+        self._last_save = perf_counter()
+
+    def checkpoint_rows(self, iterable: Iterable[T], stats: Any,
+                        get_size: Callable[[T], int]) -> Iterator[T]:
+        """
+        Save checkpoints periodically while iterating over rows: when the
+        next item is requested, all the previous items were validated.
+
+        Args:
+            * iterable: Iterable of cells, or of batches of cells
+            * stats: ColumnStats of the validated rows
+            * get_size: Func returning the number of rows of an item
+
+        Returns:
+            * Iterator of the same items
+        """
+        offset = self.checkpoint.offset
+        next_check = offset + CHECKPOINT_CHECK_ROWS
+        for item in iterable:
+            if offset >= next_check:
+                next_check = offset + CHECKPOINT_CHECK_ROWS
+                if perf_counter() - self._last_save >= self.interval_seconds:
+                    self.save(offset, stats)
+            yield item
+            offset += get_size(item)
+
+    def complete(self, description: str) -> None:
+        """
+        Save the summary message of the completed run, so a retried request
+        returns it without checking the column again.
+
+        Args:
+            * description: Summary message
+
+        Returns:
+            * None
+        """
+        self.checkpoint.description = description
+        self.store.set(self.key, self.checkpoint.to_json())
+
+
+def get_checkpoint_store(
+        checkpoint_config: CheckpointConfig, credentials: Credentials,
+        state_store: Optional[WatermarkStore]) -> CheckpointStore:
+    """
+    Get the CheckpointStore of a CheckpointConfig: a GCS bucket, a local
+    directory, or else the BigQuery state table.
+
+    Args:
+        * checkpoint_config: CheckpointConfig
+        * credentials: Credentials of the GCS client
+        * state_store: optional, WatermarkStore of the state table
+
+    Returns:
+        * CheckpointStore
+
+    Raises:
+        * ValueError: if no store is configured
+    """
+    if 'bucket' in checkpoint_config:
+        return GCSCheckpointStore(
+            credentials, checkpoint_config['bucket'],
+            checkpoint_config.get('prefix', DEFAULT_CHECKPOINT_PREFIX))
+    elif 'directory' in checkpoint_config:
+        return FileCheckpointStore(checkpoint_config['directory'])
+    elif state_store is not None:
+        return BigQueryCheckpointStore(state_store)
+    raise ValueError('A bucket, directory or state_table is required to '
+                     'save checkpoints.')
+
+
+def get_checkpoint_key(workflow_execution_id: str, full_table_id: str,
+                       columns: List[str]) -> str:
+    """
+    Get the checkpoint key of a run, so only retries of the same request of
+    a workflow execution continue from its checkpoints.
+
+    Args:
+        * workflow_execution_id: Workflow execution ID of the request
+        * full_table_id: Full table ID of the source table
+        * columns: Names of the validated columns
+
+    Returns:
+        * Checkpoint key
+    """
+    return f'{workflow_execution_id}/{full_table_id}/' + ','.join(
+        sorted(columns))
@@ -13,13 +13,26 @@ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 See the License for the specific language governing permissions and
 limitations under the License.
 """
-from typing import Any, Dict, List
+from typing import Any, Callable, cast, Dict, List, Optional
 
 from typing_extensions import NotRequired
 from typing_extensions import TypedDict
 
+from rules.common import ArrowRuleChecker
+from rules.common import ArrowRulesMap
 from rules.common import RuleChecker
 from rules.common import RulesMap
+from rules.common import TypeParser
+
+CompiledChecker = Callable[[Any], int]
+"""
+Compiled Checkers
+
+A parser and the rules of a column, fused into a single function returning a
+bitmask of the rules which returned a failure: bit i is set if rule i failed,
+so 0 means the cell passed every rule. It raises any exception of the parser
+or rules, so the cell can be checked again one rule at a time to log it.
+"""
 
 
 class RuleConfig(TypedDict):
@@ -27,10 +40,129 @@ class RuleConfig(TypedDict):
     args: NotRequired[Dict[str, Any]]
 
 
+class AggregationConfig(TypedDict):
+    """
+    Options for logging aggregated failures of a column, instead of one
+    log row per failing cell.
+
+    Args:
+        * top_k: Number of most frequent errors, and of most frequent
+            failing values, logged per parser or rule (default: 10)
+    """
+    top_k: NotRequired[int]
+
+
 class ColumnConfig(TypedDict):
     column: str
     parser: str
     rules: List[RuleConfig]
+    aggregation: NotRequired[AggregationConfig]
+
+
+class ReadConfig(TypedDict):
+    """
+    Options for reading a table with the BigQuery Storage API.
+
+    Args:
+        * max_stream_count: Number of streams to read in parallel,
+            0 lets BigQuery choose (default: 1)
+        * preserve_order: If False, yield rows as soon as any stream
+            returns them instead of stream by stream (default: True)
+        * data_format: AVRO to check values one by one, or ARROW to check
+            record batches with vectorized rules where available
+            (default: AVRO)
+        * pushdown: If True, filter the rows in BigQuery where all rules
+            have a SQL equivalent, so only rows which may fail them are
+            read (default: False)
+        * sample_percentage: Check a random sample of the rows read, each
+            row with this probability in percent
+        * sample_size: Check a random sample of this many of the rows read
+        * sample_seed: Seed of the random sample, for repeatable samples
+        * watermark_column: Only read the rows added since the last run,
+            with a higher value of this column, e.g. an ingestion timestamp
+            (requires a state_table)
+        * check_processes: Check the cells in up to this many worker
+            processes while the request thread reads them, or 0 for one per
+            CPU, e.g. for columns with costly regex rules, at most the CPU
+            count (default: check them in the request thread)
+    """
+    max_stream_count: NotRequired[int]
+    preserve_order: NotRequired[bool]
+    data_format: NotRequired[str]
+    pushdown: NotRequired[bool]
+    sample_percentage: NotRequired[float]
+    sample_size: NotRequired[int]
+    sample_seed: NotRequired[int]
+    watermark_column: NotRequired[str]
+    check_processes: NotRequired[int]
+
+
+class PartitionConfig(TypedDict):
+    """
+    Options for checking the partitions of a partitioned table separately.
+
+    Args:
+        * recent: Only check this many of the most recent partitions
+        * changed: If True, only check the partitions modified since the
+            last run (requires a state_table, default: False)
+        * max_parallel: Number of partitions read in parallel (default: 4)
+    """
+    recent: NotRequired[int]
+    changed: NotRequired[bool]
+    max_parallel: NotRequired[int]
+
+
+class ProfileConfig(TypedDict):
+    """
+    Options for profiling a run with cProfile, e.g. to find why a column is
+    slow to process.
+
+    Args:
+        * bucket: GCS bucket to upload the profile to
+        * prefix: Path prefix of the profile, which is uploaded to
+            <prefix>/<workflow_execution_id>/<column>.prof
+            (default: profiles)
+    """
+    bucket: str
+    prefix: NotRequired[str]
+
+
+class CheckpointConfig(TypedDict):
+    """
+    Options for saving the progress of a column scan periodically, so a
+    retried request with the same workflow_execution_id continues from it,
+    e.g. after a timeout.
+
+    Checkpoints are saved to a GCS bucket if set, else to a local directory
+    if set, else to the state_table.
+
+    Args:
+        * bucket: GCS bucket to save checkpoints to
+        * prefix: Path prefix of the checkpoints in the bucket
+            (default: checkpoints)
+        * directory: Local directory to save checkpoints to, e.g. for tests
+        * interval_seconds: Seconds between checkpoints (default: 60)
+    """
+    bucket: NotRequired[str]
+    prefix: NotRequired[str]
+    directory: NotRequired[str]
+    interval_seconds: NotRequired[float]
+
+
+class LogConfig(TypedDict):
+    """
+    Options for writing logs to the BigQuery log table.
+
+    Args:
+        * backend: STREAMING_INSERT to insert rows with the legacy streaming
+            API, or STORAGE_WRITE to append them with the Storage Write API
+            (default: STREAMING_INSERT)
+        * stream_format: NDJSON or ARROW to stream the logs back in the
+            response while the run continues, instead of writing them to
+            the log table or Cloud Logging
+    """
+    backend: NotRequired[str]
+    stream_format: NotRequired[str]
 
 
 def generate_selected_rules(rule_configs: List[RuleConfig],
@@ -66,3 +198,66 @@ def generate_selected_rules(rule_configs: List[RuleConfig],
         raise ValueError('No rules specified.')
 
     return selected_rules
+
+
+def generate_selected_arrow_rules(
+        rule_configs: List[RuleConfig],
+        arrow_rules: ArrowRulesMap) -> List[Optional[ArrowRuleChecker]]:
+    """
+    Generates vectorized rule checkers from the provided rule configs,
+    where a vectorized version of the rule is available.
+
+    Args:
+        * rule_configs: List of RuleConfigs, with potential args
+        * arrow_rules: ArrowRulesMap
+
+    Returns:
+        * List of ArrowRuleCheckers with args applied, or None for rules
+            without a vectorized version for their args, in the order of
+            rule_configs
+    """
+    selected_rules: List[Optional[ArrowRuleChecker]] = []
+
+    for rule_config in rule_configs:
+        rule_name = rule_config['rule']
+        if rule_name in arrow_rules:
+            args = rule_config.get('args', {})
+            try:
+                selected_rules.append(arrow_rules[rule_name](**args))
+            except NotImplementedError:
+                selected_rules.append(None)
+        else:
+            selected_rules.append(None)
+
+    return selected_rules
+
+
+def compile_rule_checker(parser: TypeParser,
+                         rules: List[RuleChecker]) -> CompiledChecker:
+    """
+    Fuses a parser and its rule checkers into a single generated function,
+    avoiding a Python call & exception handler per rule for every cell.
+
+    Args:
+        * parser: TypeParser of the column
+        * rules: List of RuleCheckers with args applied
+
+    Returns:
+        * CompiledChecker returning the bitmask of failed rules of a cell
+    """
+    names = [f'rule_{i}' for i in range(len(rules))]
+    checks = ['0'] + [
+        f'({name}(value) is not None) << {i}' for i, name in enumerate(names)
+    ]
+
+    # Only indices are interpolated: the parser & rules are bound as
+    # closure variables, which are faster to look up than globals
+    source = (f'def compile_checker(parser, {", ".join(names)}):\n'
+              '    def check(cell):\n'
+              '        value = parser(cell)\n'
+              f'        return {" | ".join(checks)}\n'
+              '    return check\n')
+    namespace: Dict[str, Any] = {}
+    exec(compile(source, f'<compiled rules of {parser.__name__}>', 'exec'),
+         namespace)
+    return cast(CompiledChecker, namespace['compile_checker'](parser, *rules))
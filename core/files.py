@@ -0,0 +1,256 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from enum import Enum
+from itertools import islice
+import json
+import os
+from typing import (Any, Callable, cast, Dict, Generator, Iterable, Iterator,
+                    List, Mapping, Union)
+
+import fastavro
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from core.bigquery import CellsBatch
+from core.bigquery import get_cell_extractor
+from core.bigquery import split_cells_batches
+
+# Rows per batch of Avro, NDJSON and Parquet files
+DEFAULT_FILE_BATCH_SIZE = 10000
+
+# Bytes per block of CSV files, which are read block by block
+DEFAULT_CSV_BLOCK_SIZE = 1 << 22
+
+
+class FileFormat(Enum):
+    CSV = 'CSV'
+    NDJSON = 'NDJSON'
+    AVRO = 'AVRO'
+    PARQUET = 'PARQUET'
+
+
+FILE_EXTENSIONS: Dict[str, FileFormat] = {
+    '.csv': FileFormat.CSV,
+    '.json': FileFormat.NDJSON,
+    '.jsonl': FileFormat.NDJSON,
+    '.ndjson': FileFormat.NDJSON,
+    '.avro': FileFormat.AVRO,
+    '.parquet': FileFormat.PARQUET,
+}
+
+RowsBatch = Union[pa.RecordBatch, List[Mapping]]
+"""
+Rows Batches
+
+A batch of rows read from a file, either as an Arrow RecordBatch for
+columnar formats, or as a List of row Mappings for row formats.
+"""
+
+FileReader = Callable[[str, List[str], int], Iterable[RowsBatch]]
+
+
+def get_file_format(filename: str,
+                    file_format: str | None = None) -> FileFormat:
+    """
+    Get the format of a file, from its extension if not specified.
+
+    Args:
+        * filename: Path to the file
+        * file_format (optional): CSV, NDJSON, AVRO or PARQUET
+
+    Returns:
+        * FileFormat
+
+    Raises:
+        * ValueError: if an invalid or unknown format is provided
+    """
+    if file_format:
+        if file_format not in FileFormat.__members__:
+            raise ValueError('Invalid file format specified.')
+        return FileFormat[file_format]
+
+    _, extension = os.path.splitext(filename)
+    if extension.lower() not in FILE_EXTENSIONS:
+        raise ValueError(f'Unknown format of file {filename}.')
+    return FILE_EXTENSIONS[extension.lower()]
+
+
+def read_csv_batches(filename: str, columns: List[str],
+                     batch_size: int) -> Iterator[pa.RecordBatch]:
+    """
+    Read the columns of a CSV file with a header, block by block from a
+    memory map.
+
+    Values are read as strings, like any CSV value is loaded, so types are
+    not inferred from the first block, and empty values are read as null.
+
+    Args:
+        * filename: Path to the file
+        * columns: List of columns to read
+        * batch_size: unused, as blocks have a fixed size in bytes
+
+    Returns:
+        * Iterator of RecordBatches, one per block
+    """
+    with pa.memory_map(filename) as source:
+        reader = pa_csv.open_csv(
+            source,
+            read_options=pa_csv.ReadOptions(block_size=DEFAULT_CSV_BLOCK_SIZE),
+            convert_options=pa_csv.ConvertOptions(
+                include_columns=columns,
+                column_types={column: pa.string() for column in columns},
+                strings_can_be_null=True))
+        yield from reader
+
+
+def read_ndjson_batches(filename: str, columns: List[str],
+                        batch_size: int) -> Iterator[List[Mapping]]:
+    """
+    Read a newline-delimited JSON file, batch by batch.
+
+    Args:
+        * filename: Path to the file
+        * columns: unused, as lines are parsed in full
+        * batch_size: Number of rows per batch
+
+    Returns:
+        * Iterator of Lists of row Mappings
+    """
+    with open(filename, 'r') as f:
+        rows = (json.loads(line) for line in f if line.strip())
+        while batch := list(islice(rows, batch_size)):
+            yield batch
+
+
+def read_avro_batches(filename: str, columns: List[str],
+                      batch_size: int) -> Iterator[List[Mapping]]:
+    """
+    Read an Avro object container file, batch by batch.
+
+    Args:
+        * filename: Path to the file
+        * columns: unused, as records are decoded in full
+        * batch_size: Number of rows per batch
+
+    Returns:
+        * Iterator of Lists of row Mappings
+    """
+    with open(filename, 'rb') as f:
+        # Records of a table schema are decoded to Dicts
+        rows = iter(fastavro.reader(f))
+        while batch := list(islice(rows, batch_size)):
+            yield cast(List[Mapping], batch)
+
+
+def read_parquet_batches(filename: str, columns: List[str],
+                         batch_size: int) -> Iterator[pa.RecordBatch]:
+    """
+    Read the columns of a Parquet file, batch by batch from a memory map.
+
+    Args:
+        * filename: Path to the file
+        * columns: List of columns to read
+        * batch_size: Number of rows per batch
+
+    Returns:
+        * Iterator of RecordBatches
+    """
+    parquet_file = pq.ParquetFile(filename, memory_map=True)
+    try:
+        yield from parquet_file.iter_batches(batch_size=batch_size,
+                                             columns=columns)
+    finally:
+        parquet_file.close()
+
+
+FILE_READERS: Dict[FileFormat, FileReader] = {
+    FileFormat.CSV: read_csv_batches,
+    FileFormat.NDJSON: read_ndjson_batches,
+    FileFormat.AVRO: read_avro_batches,
+    FileFormat.PARQUET: read_parquet_batches,
+}
+
+
+def get_file_cells_batches_iterator(
+    filename: str,
+    columns: List[str],
+    file_format: str | None = None,
+    batch_size: int = DEFAULT_FILE_BATCH_SIZE,
+) -> Generator[List[CellsBatch], None, None]:
+    """
+    Get an Iterator of batches of cell values for multiple columns of a local
+    or mounted file, like get_cells_batches_iterator for BigQuery tables,
+    e.g. to check a file before loading it into BigQuery.
+
+    Columnar formats (CSV, Parquet) return simple columns as Arrow arrays,
+    while row formats (NDJSON, Avro) and nested columns return Lists of
+    cell values.
+
+    Args:
+        * filename: Path to the file
+        * columns: List of column names, supporting nested fields
+            and array keys
+        * file_format (optional): CSV, NDJSON, AVRO or PARQUET, inferred
+            from the file extension by default
+        * batch_size (optional): Number of rows per batch, except for CSV
+
+    Returns:
+        * Iterator of Lists of batches of cells, in the order of columns
+
+    Raises:
+        * ValueError: if an invalid or unknown format is provided
+    """
+    read_batches = FILE_READERS[get_file_format(filename, file_format)]
+
+    extractors = [get_cell_extractor(column) for column in columns]
+    # Deduplicate parent columns, preserving their order
+    parent_columns = list(dict.fromkeys(parent for parent, _ in extractors))
+
+    for batch in read_batches(filename, parent_columns, batch_size):
+        if isinstance(batch, pa.RecordBatch):
+            yield split_cells_batches(batch, columns, extractors)
+        else:
+            yield [[extract_cell(row)
+                    for row in batch]
+                   for _, extract_cell in extractors]
+
+
+def get_file_cells_iterator(
+    filename: str,
+    column: str,
+    file_format: str | None = None,
+) -> Generator[Any, None, None]:
+    """
+    Get an Iterator of the cell values of a column of a local or mounted
+    file, like get_cells_iterator for BigQuery tables.
+
+    Args:
+        * filename: Path to the file
+        * column: Column name, supporting nested fields and array keys
+        * file_format (optional): CSV, NDJSON, AVRO or PARQUET, inferred
+            from the file extension by default
+
+    Returns:
+        * Iterator of cell values
+
+    Raises:
+        * ValueError: if an invalid or unknown format is provided
+    """
+    for (cells,) in get_file_cells_batches_iterator(filename, [column],
+                                                    file_format):
+        yield from (cells if isinstance(cells, list) else cells.to_pylist())
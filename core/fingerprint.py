@@ -0,0 +1,234 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+import hashlib
+import json
+from typing import List, Optional, Tuple
+
+from google.cloud.bigquery import ArrayQueryParameter
+from google.cloud.bigquery import Client as BigQueryLegacyClient
+from google.cloud.bigquery import ScalarQueryParameter
+from google.cloud.bigquery import SchemaField
+
+from core import __version__
+from core.bigquery import create_table
+from core.bigquery import get_table
+from core.bigquery import run_query
+from core.bigquery import TableMetadata
+from core.config import ColumnConfig
+from core.config import ReadConfig
+
+CACHE_TABLE_SCHEMA = [
+    SchemaField('key', 'STRING', mode='REQUIRED'),
+    SchemaField('last_modified_time', 'TIMESTAMP', mode='REQUIRED'),
+    SchemaField('num_rows', 'INT64', mode='REQUIRED'),
+    SchemaField('config_hash', 'STRING', mode='REQUIRED'),
+    SchemaField('summary', 'STRING', mode='REQUIRED'),
+    SchemaField('updated_at', 'TIMESTAMP', mode='REQUIRED'),
+]
+
+
+def describe_cached(summary: str) -> str:
+    """
+    Mark a summary re-emitted from the cache.
+
+    Args:
+        * summary: Cached summary of a column
+
+    Returns:
+        * Summary message
+    """
+    return f'{summary} (Cached, since the table is unchanged.)'
+
+
+def get_config_hash(column_config: ColumnConfig, read_config: ReadConfig | None,
+                    table_metadata: TableMetadata) -> str:
+    """
+    Hash everything which changes the summary of a column of an unchanged
+    table, including the DQM version.
+
+    Args:
+        * column_config: ColumnConfig of the column
+        * read_config: optional ReadConfig
+        * table_metadata: TableMetadata of the source table
+
+    Returns:
+        * Hex digest
+    """
+    config = {
+        'version': __version__,
+        'column_config': column_config,
+        'read_config': read_config,
+        'partition_filter': table_metadata.partition_filter,
+    }
+    return hashlib.sha256(json.dumps(config,
+                                     sort_keys=True).encode()).hexdigest()
+
+
+@dataclass
+class TableFingerprint:
+    """
+    Metadata of a table which changes whenever its data changes.
+    """
+    last_modified_time: datetime
+    num_rows: int
+
+
+class SummaryCache:
+    """
+    Caches the summaries of the columns of a table in a BigQuery cache
+    table, which is created if it does not exist, so checks are skipped
+    while the table and their configs are unchanged.
+
+    Summaries are keyed by their table, column and config hash, so several
+    configs of the same column are cached separately, whichever requests
+    check them.
+
+    Args:
+        * bq_legacy_client: BigQuery Legacy API client
+        * cache_table: TableMetadata of the cache table
+        * table_metadata: TableMetadata of the source table
+        * fingerprint: TableFingerprint of the source table
+        * config_hashes: List of the column & config hash of each checked
+            column config
+    """
+
+    def __init__(self, bq_legacy_client: BigQueryLegacyClient,
+                 cache_table: TableMetadata, table_metadata: TableMetadata,
+                 fingerprint: TableFingerprint,
+                 config_hashes: List[Tuple[str, str]]) -> None:
+        self.bq_legacy_client = bq_legacy_client
+        self.cache_table = cache_table
+        self.fingerprint = fingerprint
+        self.config_hashes = [config_hash for _, config_hash in config_hashes]
+        self._keys = [
+            f'{table_metadata.full_table_id}/{column}/{config_hash}'
+            for column, config_hash in config_hashes
+        ]
+        if get_table(bq_legacy_client, cache_table) is None:
+            create_table(bq_legacy_client, cache_table, CACHE_TABLE_SCHEMA)
+
+    def get(self) -> Optional[List[str]]:
+        """
+        Get the cached summaries of the column configs.
+
+        Returns:
+            * List of the summary of each column config, or None if any
+                config was not checked since the table changed
+        """
+        rows = run_query(
+            self.bq_legacy_client, 'SELECT key, config_hash, summary '
+            f'FROM `{self.cache_table.full_table_id}` '
+            'WHERE key IN UNNEST(@keys) '
+            'AND last_modified_time = @last_modified_time '
+            'AND num_rows = @num_rows', [
+                ArrayQueryParameter('keys', 'STRING',
+                                    list(dict.fromkeys(self._keys))),
+                ScalarQueryParameter('last_modified_time', 'TIMESTAMP',
+                                     self.fingerprint.last_modified_time),
+                ScalarQueryParameter('num_rows', 'INT64',
+                                     self.fingerprint.num_rows),
+            ])
+
+        config_hashes = dict(zip(self._keys, self.config_hashes))
+        summaries = {
+            row['key']: row['summary']
+            for row in rows
+            if row['config_hash'] == config_hashes[row['key']]
+        }
+        if any(key not in summaries for key in self._keys):
+            return None
+        return [summaries[key] for key in self._keys]
+
+    def set(self, summaries: List[str]) -> None:
+        """
+        Cache the summaries of the column configs, atomically.
+
+        Args:
+            * summaries: List of the summary of each column config
+
+        Returns:
+            * None
+        """
+        # A MERGE fails if several source rows match a row, so identical
+        # configs are only merged once
+        entries = {
+            key: (config_hash, summary) for key, config_hash, summary in zip(
+                self._keys, self.config_hashes, summaries)
+        }
+        run_query(
+            self.bq_legacy_client,
+            f'MERGE `{self.cache_table.full_table_id}` cache '
+            'USING (SELECT key, config_hash, summary '
+            'FROM UNNEST(@keys) AS key WITH OFFSET AS i '
+            'JOIN UNNEST(@config_hashes) AS config_hash WITH OFFSET AS j '
+            'ON i = j '
+            'JOIN UNNEST(@summaries) AS summary WITH OFFSET AS k '
+            'ON i = k) run '
+            'ON cache.key = run.key '
+            'WHEN MATCHED THEN UPDATE SET '
+            'last_modified_time = @last_modified_time, '
+            'num_rows = @num_rows, config_hash = run.config_hash, '
+            'summary = run.summary, updated_at = CURRENT_TIMESTAMP() '
+            'WHEN NOT MATCHED THEN INSERT (key, last_modified_time, '
+            'num_rows, config_hash, summary, updated_at) '
+            'VALUES (run.key, @last_modified_time, @num_rows, '
+            'run.config_hash, run.summary, CURRENT_TIMESTAMP())', [
+                ArrayQueryParameter('keys', 'STRING', list(entries)),
+                ArrayQueryParameter(
+                    'config_hashes', 'STRING',
+                    [config_hash for config_hash, _ in entries.values()]),
+                ArrayQueryParameter(
+                    'summaries', 'STRING',
+                    [summary for _, summary in entries.values()]),
+                ScalarQueryParameter('last_modified_time', 'TIMESTAMP',
+                                     self.fingerprint.last_modified_time),
+                ScalarQueryParameter('num_rows', 'INT64',
+                                     self.fingerprint.num_rows),
+            ])
+
+
+def get_summary_cache(
+        bq_legacy_client: BigQueryLegacyClient, cache_table: TableMetadata,
+        table_metadata: TableMetadata,
+        config_hashes: List[Tuple[str, str]]) -> Optional[SummaryCache]:
+    """
+    Get a SummaryCache of the columns of a table, if its data only changes
+    along with its metadata.
+
+    Note: Tables with a streaming buffer are not cached, since their
+    metadata does not reflect the streamed rows.
+
+    Args:
+        * bq_legacy_client: BigQuery Legacy API client
+        * cache_table: TableMetadata of the cache table
+        * table_metadata: TableMetadata of the source table
+        * config_hashes: List of the column & config hash of each checked
+            column config
+
+    Returns:
+        * SummaryCache, or None if the table cannot be cached
+    """
+    table = get_table(bq_legacy_client, table_metadata)
+    if (table is None or table.modified is None or table.num_rows is None or
+            table.streaming_buffer is not None):
+        return None
+
+    fingerprint = TableFingerprint(last_modified_time=table.modified,
+                                   num_rows=table.num_rows)
+    return SummaryCache(bq_legacy_client, cache_table, table_metadata,
+                        fingerprint, config_hashes)
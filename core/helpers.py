@@ -13,8 +13,20 @@ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 See the License for the specific language governing permissions and
 limitations under the License.
 """
+from collections.abc import Generator
+from collections.abc import Iterable
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+import heapq
+import itertools
+import json
+from operator import itemgetter
+import queue
 import re
-from typing import Any, Callable, Generic, List, NoReturn, TypeVar, Union
+import threading
+from time import perf_counter
+from typing import (Any, Callable, Dict, Generic, Iterator, List, NoReturn,
+                    Tuple, TypeVar, Union)
 
 
 def get_function_name(function: Any) -> str:
@@ -31,6 +43,24 @@ def get_function_name(function: Any) -> str:
     return str(function.__qualname__.split('.')[0])
 
 
+def get_json_size(value: Any) -> int:
+    """
+    Get the bytes of a value once encoded as a JSON string, as sent by the
+    BigQuery clients, without its quotes.
+
+    Non-ASCII & control characters are escaped as \\uXXXX, so this is at
+    least the size of the value encoded as UTF-8.
+
+    Args:
+        * value: str, or value encoded as its str
+
+    Returns:
+        * Bytes of the encoded value
+    """
+    text = value if isinstance(value, str) else str(value)
+    return len(json.dumps(text)) - 2
+
+
 PATTERN = re.compile(r"(^.*?)\[([^\[\]]*?)\](.*?)$")
 
 
@@ -61,6 +91,9 @@ def parse_column_path(column: str) -> list:
 T = TypeVar('T')
 FlushFunction = Callable[[List[T]], Any]
 
+# Default maximum growth of the max_size of an adaptive Buffer
+MAX_SIZE_GROWTH = 10
+
 
 class Buffer(Generic[T]):
     """
@@ -69,21 +102,81 @@ class Buffer(Generic[T]):
 
     It can queue any list of items, e.g. logs, rows, and API calls.
 
+    Optionally, it also flushes before the estimated bytes of the queued
+    items exceed max_bytes, e.g. to stay within the request size limit of an
+    API, and adapts max_size to the time taken to flush: growing it while
+    batches flush faster than target_seconds, and shrinking it while slower,
+    so large items are flushed in smaller batches and tiny ones in larger.
+
     Args:
         * initlist: Initial list of items
-        * max_size: Maximum queue size
+        * max_size: Maximum queue size, the initial one if adapted
         * flusher: Function to be called with list of items
+        * max_bytes: optional, maximum estimated bytes of the queued items
+        * get_size: optional, function estimating the bytes of an item,
+            required with max_bytes
+        * target_seconds: optional, time to flush a batch to adapt max_size
+            to, within 1 and size_limit
+        * size_limit: optional, maximum adapted max_size
+            (default: 10 times max_size)
     """
 
     queue: List[T]
     max_size: int
     flusher: Union[FlushFunction, NoReturn]
 
-    def __init__(self, initlist: List[T], max_size: int,
-                 flusher: FlushFunction) -> None:
+    max_bytes: int | None
+    get_size: Callable[[T], int] | None
+    target_seconds: float | None
+    size_limit: int
+
+    # Estimated bytes of the queued items
+    bytes: int
+
+    def __init__(self,
+                 initlist: List[T],
+                 max_size: int,
+                 flusher: FlushFunction,
+                 max_bytes: int | None = None,
+                 get_size: Callable[[T], int] | None = None,
+                 target_seconds: float | None = None,
+                 size_limit: int | None = None) -> None:
+        if max_bytes is not None and get_size is None:
+            raise ValueError('A get_size function is required with max_bytes.')
         self.queue = initlist
         self.max_size = max_size
         self.flusher = flusher
+        self.max_bytes = max_bytes
+        self.get_size = get_size
+        self.target_seconds = target_seconds
+        self.size_limit = size_limit or max(max_size, 1) * MAX_SIZE_GROWTH
+        self.bytes = 0
+
+    def _adapt(self, count: int, seconds: float) -> None:
+        """
+        Adapt max_size to the time taken to flush a batch of count items,
+        at most halving or doubling it at once.
+        """
+        if self.target_seconds is None or count == 0:
+            return
+        max_size = self.max_size * 2
+        if seconds > 0:
+            max_size = min(int(count * self.target_seconds / seconds), max_size)
+        self.max_size = min(max(max_size, self.max_size // 2, 1),
+                            self.size_limit)
+
+    def _flush_queue(self, full: bool) -> bool | Any:
+        """
+        Empty and consume queue items, adapting max_size if the queue was
+        full, since forced flushes of partial batches are not representative.
+        """
+        start = perf_counter()
+        result = self.flusher(self.queue)
+        if full:
+            self._adapt(len(self.queue), perf_counter() - start)
+        self.queue.clear()
+        self.bytes = 0
+        return result or True
 
     def flush(self, force: bool = False) -> bool | Any:
         """
@@ -97,10 +190,10 @@ class Buffer(Generic[T]):
             * False, if not flushed
             * Error value from consumer, if flushed with errors
         """
-        if force or len(self.queue) > self.max_size:
-            result = self.flusher(self.queue)
-            self.queue.clear()
-            return result or True
+        full = len(self.queue) > self.max_size or (
+            self.max_bytes is not None and self.bytes >= self.max_bytes)
+        if force or full:
+            return self._flush_queue(full)
         else:
             return False
 
@@ -108,6 +201,8 @@ class Buffer(Generic[T]):
         """
         Add item to queue and attempt a flush.
 
+        If the item would exceed max_bytes, the queue is flushed first.
+
         Args:
             * item: Item to add to queue
 
@@ -116,5 +211,284 @@ class Buffer(Generic[T]):
             * False, if not flushed
             * Error value from consumer, if flushed with errors
         """
+        if self.get_size is None:
+            self.queue.append(item)
+            return self.flush()
+
+        result: bool | Any = False
+        size = self.get_size(item)
+        if (self.max_bytes is not None and self.queue and
+                self.bytes + size > self.max_bytes):
+            result = self._flush_queue(full=True)
         self.queue.append(item)
-        return self.flush()
+        self.bytes += size
+        return self.flush() or result
+
+
+# Marks the end of an iterable in iterate_in_parallel queues
+_DONE = object()
+
+# Seconds to wait on a full queue, before checking if the consumer stopped
+_PUT_TIMEOUT = 0.1
+
+QueueEntry = tuple[Any, BaseException | None]
+
+
+def _put_until_stopped(items: queue.Queue[QueueEntry], entry: QueueEntry,
+                       stop: threading.Event) -> bool:
+    """
+    Put an entry on a bounded queue, blocking until there is space
+    or the consumer has stopped.
+
+    Returns:
+        * True, if the entry was queued
+        * False, if the consumer stopped
+    """
+    while not stop.is_set():
+        try:
+            items.put(entry, timeout=_PUT_TIMEOUT)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _produce(iterable: Iterable[T], items: queue.Queue[QueueEntry],
+             stop: threading.Event) -> None:
+    """
+    Queue all items of an iterable, followed by a _DONE entry
+    with the error raised while iterating, if any.
+    """
+    try:
+        for item in iterable:
+            if not _put_until_stopped(items, (item, None), stop):
+                return
+    except BaseException as e:
+        _put_until_stopped(items, (_DONE, e), stop)
+    else:
+        _put_until_stopped(items, (_DONE, None), stop)
+
+
+def _consume(items: queue.Queue[QueueEntry]) -> Generator[Any, None, None]:
+    """
+    Yield queued items until a _DONE entry, re-raising its error if any.
+    """
+    item, error = items.get()
+    while item is not _DONE:
+        yield item
+        item, error = items.get()
+    if error is not None:
+        raise error
+
+
+def iterate_in_parallel(iterables: Sequence[Iterable[T]],
+                        preserve_order: bool = True,
+                        max_buffered: int = 2) -> Generator[T, None, None]:
+    """
+    Iterate over multiple iterables concurrently, each in its own thread,
+    merging their items into a single iterator.
+
+    Memory is bounded, since each thread blocks once max_buffered of its
+    items are waiting to be consumed. Errors raised while iterating are
+    re-raised to the consumer, and closing the iterator stops all threads.
+
+    Args:
+        * iterables: iterables to consume concurrently
+        * preserve_order: if True, yield all items of the first iterable,
+            then the second, etc. - otherwise yield items as they arrive
+        * max_buffered: maximum items buffered per iterable
+
+    Returns:
+        * Iterator of merged items
+    """
+    queues: List[queue.Queue[QueueEntry]]
+    if preserve_order:
+        queues = [queue.Queue(maxsize=max_buffered) for _ in iterables]
+    else:
+        shared_queue: queue.Queue[QueueEntry] = queue.Queue(
+            maxsize=max_buffered * len(iterables))
+        queues = [shared_queue] * len(iterables)
+
+    stop = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=max(len(iterables), 1))
+    try:
+        for iterable, items in zip(iterables, queues):
+            executor.submit(_produce, iterable, items, stop)
+
+        # A shared queue is consumed once per iterable, until each _DONE
+        for items in queues:
+            yield from _consume(items)
+    finally:
+        stop.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+class BackgroundFlusher(Generic[T]):
+    """
+    Flush function wrapper, consuming batches of items in a background thread
+    so the caller can continue while the previous batches are flushed, e.g.
+    as the flusher of a Buffer.
+
+    At most max_pending batches wait to be flushed, after which the caller
+    blocks until a batch is flushed. Errors raised while flushing are
+    re-raised to the caller on its next call or join, and any batches still
+    pending are then dropped.
+
+    Args:
+        * flusher: Function to be called with each list of items
+        * max_pending: Maximum number of batches waiting to be flushed
+    """
+
+    flusher: Union[FlushFunction, NoReturn]
+    max_pending: int
+
+    _batches: queue.Queue[Any]
+    _thread: threading.Thread | None
+    _error: BaseException | None
+
+    def __init__(self, flusher: FlushFunction, max_pending: int = 1) -> None:
+        self.flusher = flusher
+        self.max_pending = max_pending
+        self._batches = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._error = None
+
+    def __call__(self, items: List[T]) -> None:
+        """
+        Queue a copy of the items to be flushed in the background,
+        blocking while max_pending batches are waiting.
+
+        Args:
+            * items: List of items
+
+        Returns:
+            * None
+
+        Raises:
+            * Error raised while flushing a previous batch, if any
+        """
+        self._raise_error()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._flush_batches,
+                                            daemon=True)
+            self._thread.start()
+        # Copy, since the caller may clear the list once queued
+        self._batches.put(list(items))
+
+    def join(self) -> None:
+        """
+        Wait until all queued batches are flushed, and stop the thread.
+
+        Returns:
+            * None
+
+        Raises:
+            * Error raised while flushing a batch, if any
+        """
+        if self._thread is not None:
+            self._batches.put(_DONE)
+            self._thread.join()
+            self._thread = None
+        self._raise_error()
+
+    def _flush_batches(self) -> None:
+        """
+        Flush queued batches until a _DONE entry.
+        """
+        batch = self._batches.get()
+        while batch is not _DONE:
+            if self._error is None:
+                try:
+                    self.flusher(batch)
+                except BaseException as e:
+                    self._error = e
+            batch = self._batches.get()
+
+    def _raise_error(self) -> None:
+        """
+        Re-raise an error raised while flushing, if any.
+        """
+        if self._error is not None:
+            raise self._error
+
+
+class SpaceSaving(Generic[T]):
+    """
+    Bounded counter of the most frequent items, using the Space-Saving
+    algorithm: once capacity distinct items are counted, a new item replaces
+    the least frequent one and inherits its count.
+
+    Counts are exact while at most capacity distinct items were added, and
+    otherwise over-estimate by at most the smallest count - any item more
+    frequent than 1 / capacity of all items is always counted.
+
+    Args:
+        * capacity: Maximum number of distinct items counted
+    """
+
+    capacity: int
+    counts: Dict[T, int]
+
+    # Lazy min-heap of the counted items: an entry per item, with a count
+    # which may be lower than its current one, and an insertion order as a
+    # tie-breaker, since items may not be comparable
+    _heap: List[Tuple[int, int, T]]
+    _order: Iterator[int]
+
+    def __init__(self, capacity: int) -> None:
+        if capacity < 1:
+            raise ValueError('SpaceSaving must count at least one item.')
+        self.capacity = capacity
+        self.counts = {}
+        self._heap = []
+        self._order = itertools.count()
+
+    def add(self, item: T, count: int = 1) -> None:
+        """
+        Count occurrences of an item.
+
+        Evicting the least frequent item costs O(log capacity) amortized,
+        as heap entries are only updated once they reach the top.
+
+        Args:
+            * item: Hashable item
+            * count: Number of occurrences
+
+        Returns:
+            * None
+        """
+        if item in self.counts:
+            self.counts[item] += count
+            return
+        if len(self.counts) >= self.capacity:
+            count += self._evict()
+        self.counts[item] = count
+        heapq.heappush(self._heap, (count, next(self._order), item))
+
+    def _evict(self) -> int:
+        """
+        Remove the least frequent item.
+
+        Returns:
+            * Count of the removed item
+        """
+        while True:
+            count, _, item = heapq.heappop(self._heap)
+            current = self.counts[item]
+            if current == count:
+                del self.counts[item]
+                return count
+            # Counted since its entry was pushed, so push its current count
+            heapq.heappush(self._heap, (current, next(self._order), item))
+
+    def most_common(self, n: int) -> List[Tuple[T, int]]:
+        """
+        Get the most frequent items, with their counts.
+
+        Args:
+            * n: Number of items
+
+        Returns:
+            * List of (item, count) Tuples, by descending count
+        """
+        return heapq.nlargest(n, self.counts.items(), key=itemgetter(1))
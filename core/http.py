@@ -15,7 +15,10 @@ limitations under the License.
 """
 from __future__ import annotations
 
+from typing import Any, Dict, List, Mapping
+
 from flask.typing import ResponseReturnValue
+from typing_extensions import NotRequired
 from typing_extensions import TypedDict
 from werkzeug.exceptions import HTTPException
 
@@ -27,10 +30,15 @@ class DQMResponse(TypedDict):
     Args:
         * message: Response message
         * code: HTTP code
+        * metrics (optional): Timings & counters of the run
+        * results (optional): Responses of the table reads of a batch
     """
     name: str | None
     description: str | None
     code: int
+    metrics: NotRequired[Dict[str, Any]]
+    # DQMResponses, which mypy cannot type recursively
+    results: NotRequired[List[Mapping[str, Any]]]
 
 
 class MalformedConfigError(ValueError):
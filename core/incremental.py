@@ -0,0 +1,322 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+from dataclasses import dataclass
+from datetime import date
+from datetime import datetime
+from decimal import Decimal
+import math
+import re
+from typing import Any, cast, List, Optional
+
+from google.cloud.bigquery import Client as BigQueryLegacyClient
+from google.cloud.bigquery import ScalarQueryParameter
+from google.cloud.bigquery import SchemaField
+
+from core.bigquery import combine_row_restrictions
+from core.bigquery import create_table
+from core.bigquery import get_table
+from core.bigquery import run_query
+from core.bigquery import TableMetadata
+from core.http import MalformedConfigError
+from rules.sql.literals import MAX_INT64
+from rules.sql.literals import MIN_INT64
+from rules.sql.literals import numeric_literal
+from rules.sql.literals import string_literal
+
+# Digits of NUMERIC values after the decimal point, and before it
+NUMERIC_SCALE = 9
+NUMERIC_INTEGER_DIGITS = 29
+
+# Response of runs without rows added since the last run
+NO_NEW_ROWS_MESSAGE = 'DQM found no new rows since the last run.'
+
+STATE_TABLE_SCHEMA = [
+    SchemaField('key', 'STRING', mode='REQUIRED'),
+    SchemaField('watermark', 'STRING', mode='REQUIRED'),
+    SchemaField('updated_at', 'TIMESTAMP', mode='REQUIRED'),
+]
+
+
+def watermark_literal(value: Any) -> str:
+    """
+    Format a watermark value as a BigQuery SQL literal, which compares
+    against the watermark column like the value does.
+
+    Args:
+        * value: Value of the watermark column, as returned by BigQuery
+
+    Returns:
+        * SQL literal
+
+    Raises:
+        * MalformedConfigError: for unsupported column types
+    """
+    # The Storage API only supports typed literals as CASTs
+    if isinstance(value, datetime):
+        column_type = 'DATETIME' if value.tzinfo is None else 'TIMESTAMP'
+        return f"CAST('{value.isoformat(sep=' ')}' AS {column_type})"
+    elif isinstance(value, date):
+        return f"CAST('{value.isoformat()}' AS DATE)"
+    elif isinstance(value, str):
+        return string_literal(value)
+    elif (isinstance(value, int) and not isinstance(value, bool) and
+          MIN_INT64 <= value <= MAX_INT64):
+        # The column is INT64, so unlike pushed down filters, the value need
+        # not be exactly representable as a FLOAT64
+        return str(value)
+    elif isinstance(value, Decimal) and value.is_finite():
+        # BIGNUMERIC values may not fit a NUMERIC exactly
+        _, digits, exponent = value.as_tuple()
+        column_type = (
+            'NUMERIC' if cast(int, exponent) >= -NUMERIC_SCALE and
+            len(digits) + cast(int, exponent) <= NUMERIC_INTEGER_DIGITS else
+            'BIGNUMERIC')
+        return f"CAST('{value:f}' AS {column_type})"
+    elif isinstance(value, float) and math.isfinite(value):
+        return numeric_literal(value)
+    raise MalformedConfigError(
+        f'A watermark_column of type {type(value).__name__} is not supported.')
+
+
+# Typed literal formatted by watermark_literal, with its value & type
+CAST_LITERAL = re.compile(r"CAST\('(.*)' AS (\w+)\)")
+
+# Escape sequence of a string literal formatted by string_literal
+STRING_ESCAPE = re.compile(r'\\(u[0-9a-f]{4}|.)')
+
+
+def watermark_parameter(name: str, literal: str) -> ScalarQueryParameter:
+    """
+    Get a query parameter of the value of a watermark SQL literal, so
+    queries compare against it like the literal does.
+
+    Args:
+        * name: Name of the parameter
+        * literal: SQL literal formatted by watermark_literal
+
+    Returns:
+        * ScalarQueryParameter of the watermark column type
+
+    Raises:
+        * ValueError: if the literal was not formatted by watermark_literal
+    """
+    value: Any
+    match = CAST_LITERAL.fullmatch(literal)
+    if match is not None:
+        text, column_type = match.groups()
+        if column_type in ('TIMESTAMP', 'DATETIME'):
+            value = datetime.fromisoformat(text)
+        elif column_type == 'DATE':
+            value = date.fromisoformat(text)
+        elif column_type in ('NUMERIC', 'BIGNUMERIC'):
+            value = Decimal(text)
+        else:
+            raise ValueError(f'Unsupported watermark literal: {literal}')
+        return ScalarQueryParameter(name, column_type, value)
+    elif literal.startswith("'"):
+        value = STRING_ESCAPE.sub(
+            lambda escape: chr(int(escape[1][1:], 16))
+            if len(escape[1]) > 1 else escape[1], literal[1:-1])
+        return ScalarQueryParameter(name, 'STRING', value)
+    elif re.fullmatch(r'-?\d+', literal):
+        return ScalarQueryParameter(name, 'INT64', int(literal))
+    return ScalarQueryParameter(name, 'FLOAT64', float(literal))
+
+
+class WatermarkStore:
+    """
+    Stores the last watermark validated for each key in a BigQuery state
+    table, which is created if it does not exist.
+
+    Watermarks are stored as SQL literals, so they keep the type of the
+    watermark column.
+
+    Args:
+        * bq_legacy_client: BigQuery Legacy API client
+        * state_table: TableMetadata of the state table
+    """
+
+    def __init__(self, bq_legacy_client: BigQueryLegacyClient,
+                 state_table: TableMetadata) -> None:
+        self.bq_legacy_client = bq_legacy_client
+        self.state_table = state_table
+        self._exists = False
+
+    def _query(self, query: str, **params: str) -> List[Any]:
+        return run_query(self.bq_legacy_client, query, [
+            ScalarQueryParameter(name, 'STRING', value)
+            for name, value in params.items()
+        ])
+
+    def _ensure_exists(self) -> None:
+        if not self._exists and get_table(self.bq_legacy_client,
+                                          self.state_table) is None:
+            create_table(self.bq_legacy_client, self.state_table,
+                         STATE_TABLE_SCHEMA)
+        self._exists = True
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Get the last watermark validated for a key.
+
+        Args:
+            * key: State key
+
+        Returns:
+            * Watermark SQL literal, or None if no run completed yet
+        """
+        self._ensure_exists()
+        rows = self._query(
+            f'SELECT watermark FROM `{self.state_table.full_table_id}` '
+            'WHERE key = @key',
+            key=key)
+        return rows[0]['watermark'] if rows else None
+
+    def set(self, key: str, watermark: str) -> None:
+        """
+        Store the last watermark validated for a key, atomically.
+
+        Args:
+            * key: State key
+            * watermark: Watermark SQL literal
+
+        Returns:
+            * None
+        """
+        self._ensure_exists()
+        self._query(
+            f'MERGE `{self.state_table.full_table_id}` state '
+            'USING (SELECT @key AS key, @watermark AS watermark) run '
+            'ON state.key = run.key '
+            'WHEN MATCHED THEN UPDATE SET watermark = run.watermark, '
+            'updated_at = CURRENT_TIMESTAMP() '
+            'WHEN NOT MATCHED THEN INSERT (key, watermark, updated_at) '
+            'VALUES (run.key, run.watermark, CURRENT_TIMESTAMP())',
+            key=key,
+            watermark=watermark)
+
+
+@dataclass
+class Increment:
+    """
+    Range of watermarks of the rows added since the last validated
+    watermark, fixed when a run starts.
+    """
+    # Store of the validated watermarks
+    store: WatermarkStore
+
+    # State key of the table & columns
+    key: str
+
+    # Storage API row restriction of the rows in the range
+    row_restriction: str
+
+    # Watermark SQL literal to store once the range is validated,
+    # None if there are no new rows
+    watermark: Optional[str]
+
+    # Number of rows in the range
+    total_rows: int
+
+    def commit(self) -> None:
+        """
+        Store the watermark of the range, once all its rows are validated
+        and their failures logged.
+
+        Returns:
+            * None
+        """
+        if self.watermark is not None:
+            self.store.set(self.key, self.watermark)
+
+
+def get_state_key(table_metadata: TableMetadata, watermark_column: str,
+                  columns: List[str]) -> str:
+    """
+    Get the state key of the watermark of some columns of a table, so
+    columns validated separately keep separate watermarks.
+
+    Args:
+        * table_metadata: TableMetadata of the source table
+        * watermark_column: Name of the watermark column
+        * columns: Names of the validated columns
+
+    Returns:
+        * State key
+    """
+    return (f'{table_metadata.full_table_id}/{watermark_column}/' +
+            ','.join(sorted(columns)))
+
+
+def get_increment(bq_legacy_client: BigQueryLegacyClient, store: WatermarkStore,
+                  table_metadata: TableMetadata, watermark_column: str,
+                  columns: List[str]) -> Increment:
+    """
+    Get the range of rows to validate, from the last validated watermark
+    to the current maximum of the watermark column.
+
+    Only the rows after the last validated watermark are queried for the
+    range, so a run never scans the rows validated by previous runs, e.g.
+    when the watermark column partitions or clusters the table.
+
+    The upper bound is fixed before reading, so rows added during the run
+    are validated by the next run, and a failed run is fully retried since
+    its watermark is only stored once validated. Rows with a NULL watermark
+    are never validated.
+
+    Args:
+        * bq_legacy_client: BigQuery Legacy API client
+        * store: WatermarkStore of the validated watermarks
+        * table_metadata: TableMetadata of the source table
+        * watermark_column: Name of the watermark column, e.g. an ingestion
+            timestamp or partition date increasing with new rows
+        * columns: Names of the validated columns
+
+    Returns:
+        * Increment of the rows to validate
+    """
+    key = get_state_key(table_metadata, watermark_column, columns)
+    column = f'`{watermark_column}`'
+    last_watermark = store.get(key)
+    if last_watermark is None:
+        lower_bound = query_lower_bound = f'{column} IS NOT NULL'
+        parameters = []
+    else:
+        # The Storage API does not support query parameters
+        lower_bound = f'{column} > {last_watermark}'
+        query_lower_bound = f'{column} > @watermark'
+        parameters = [watermark_parameter('watermark', last_watermark)]
+
+    rows = run_query(
+        bq_legacy_client,
+        f'SELECT MAX({column}) AS watermark, COUNT(*) AS total_rows '
+        f'FROM `{table_metadata.full_table_id}` '
+        'WHERE ' + combine_row_restrictions(
+            query_lower_bound, table_metadata.partition_filter), parameters)
+    if not rows or rows[0]['watermark'] is None:
+        return Increment(store=store,
+                         key=key,
+                         row_restriction='',
+                         watermark=None,
+                         total_rows=0)
+
+    watermark = watermark_literal(rows[0]['watermark'])
+    return Increment(store=store,
+                     key=key,
+                     row_restriction=f'{lower_bound} AND '
+                     f'{column} <= {watermark}',
+                     watermark=watermark,
+                     total_rows=rows[0]['total_rows'])
@@ -17,21 +17,52 @@ from __future__ import annotations
 
 from abc import ABC
 from abc import abstractmethod
+from contextlib import suppress
+from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
+import hashlib
+import io
 import json
-from typing import Any, cast, Dict, List
-
+import queue
+import threading
+from time import perf_counter
+from time import sleep
+from typing import (Any, Callable, cast, Dict, Generator, get_type_hints, List,
+                    Optional, Tuple, Type)
+
+from flask.typing import ResponseReturnValue
+import pyarrow as pa
 from typing_extensions import TypedDict
 
 from core.auth import AuthConfig
 from core.auth import get_credentials
+from core.bigquery import append_rows
+from core.bigquery import AppendRowsStream
 from core.bigquery import BigQueryLegacyClient
+from core.bigquery import BigQueryWriteClient
+from core.bigquery import build_proto_descriptor
 from core.bigquery import get_bq_legacy_client
+from core.bigquery import get_bq_write_client
 from core.bigquery import get_formatted_timestamp
+from core.bigquery import get_proto_message_class
+from core.bigquery import has_stable_row_order
+from core.bigquery import insert_rows
+from core.bigquery import MAX_REQUEST_BYTES
+from core.bigquery import open_append_rows_stream
+from core.bigquery import RETRYABLE_INSERT_REASONS
 from core.bigquery import TableMetadata
-from core.bigquery import upload_rows
+from core.bigquery import UNSTABLE_ROW_ORDER_MESSAGE
+from core.config import LogConfig
+from core.config import ReadConfig
+from core.helpers import BackgroundFlusher
 from core.helpers import Buffer
+from core.helpers import get_json_size
+from core.http import DQMResponse
+from core.http import handle_malformed_config
+from core.http import handle_server_error
+from core.http import MalformedConfigError
+from core.tracing import start_span
 
 
 class LogMessage(TypedDict, total=False):
@@ -58,30 +89,196 @@ class LogMessage(TypedDict, total=False):
     rule_params: str
     value: str
 
+    # Aggregated fields
+    violation_count: int
+
+    # Position of the failing row among the rows checked, and the partition
+    # it was read from if partitions are checked separately
+    row_offset: int
+    partition_id: str
+
+
+# Python types of the LogMessage fields, i.e. log table columns
+LOG_MESSAGE_TYPES: Dict[str, type] = get_type_hints(LogMessage)
+
+# A buffered log message: its fields shared with other messages, interned
+# by the Logger, with its error, value, row_offset and violation_count
+LogRow = Tuple[LogMessage, str, Any, Optional[int], Optional[int]]
+
+# Estimated bytes of a log row besides its base log, rule_params, error and
+# value, e.g. field names, names of the column and rule, and insert ID
+LOG_ROW_OVERHEAD_BYTES = 256
+
+# Fields which differ between retries of a run, so excluded from insert IDs
+VOLATILE_LOG_FIELDS = frozenset({'run_timestamp_utc'})
+
+
+def get_insert_id(message: LogMessage) -> str:
+    """
+    Get a deterministic insert ID of a log message, the same for the message
+    logged by any retry of a run, e.g. built from the workflow_execution_id,
+    table, column, row_offset and rule of a rule violation.
+
+    Args:
+        * message: LogMessage dictionary
+
+    Returns:
+        * Hex digest of the message fields
+    """
+    key = {
+        field: value
+        for field, value in message.items()
+        if field not in VOLATILE_LOG_FIELDS
+    }
+    return hashlib.sha256(
+        json.dumps(key, sort_keys=True, default=str).encode()).hexdigest()
+
+
+# Seconds to wait on a full stream queue, before checking if it was closed
+STREAM_PUT_TIMEOUT = 0.1
+
 
 class LogType(Enum):
     SYSTEM = "system"
     PARSER = "parser"
     RULE = "rule"
+    # Total failures of an error of an aggregated parser or rule
+    PARSER_SUMMARY = "parser_summary"
+    RULE_SUMMARY = "rule_summary"
+
+
+class LogBackend(Enum):
+    """
+    API used to write logs to the BigQuery log table.
+    """
+    STREAMING_INSERT = "STREAMING_INSERT"
+    STORAGE_WRITE = "STORAGE_WRITE"
+
+
+def get_log_backend(log_config: LogConfig | None) -> LogBackend:
+    """
+    Get the log backend requested in a LogConfig.
+
+    Args:
+        * log_config: optional, LogConfig with log options
+
+    Returns:
+        * LogBackend, STREAMING_INSERT by default
+
+    Raises:
+        * ValueError: if an invalid backend is provided
+    """
+    backend = (log_config or LogConfig()).get('backend',
+                                              LogBackend.STREAMING_INSERT.value)
+    if backend not in LogBackend.__members__:
+        raise ValueError('Invalid log backend specified.')
+    return LogBackend[backend]
+
+
+class StreamFormat(Enum):
+    """
+    Format of the logs streamed back in a response, with its content type.
+    """
+    NDJSON = "application/x-ndjson"
+    ARROW = "application/vnd.apache.arrow.stream"
+
+
+def get_stream_format(log_config: LogConfig | None) -> StreamFormat | None:
+    """
+    Get the stream format requested in a LogConfig.
+
+    Args:
+        * log_config: optional, LogConfig with log options
+
+    Returns:
+        * StreamFormat, or None if logs are not streamed
+
+    Raises:
+        * ValueError: if an invalid stream format is provided
+    """
+    stream_format = (log_config or LogConfig()).get('stream_format')
+    if stream_format is None:
+        return None
+    if stream_format not in StreamFormat.__members__:
+        raise ValueError('Invalid stream format specified.')
+    return StreamFormat[stream_format]
 
 
 class Logger(ABC):
     """
     Logger class containing the base log messages that can be populated with
     error message data to be printed.
+
+    Log messages are buffered as compact LogRows until flushed: the fields
+    shared by the failures of a parser or rule of a column, e.g. the base
+    log and serialized rule_params, are interned once, and only expanded
+    into a LogMessage per row when flushed.
     """
 
     _base_log: LogMessage = {}
+    _base_log_bytes: int = 0
 
     DEFAULT_BATCH_SIZE: int
 
-    _messages: Buffer[LogMessage]
+    # Estimated bytes of a batch, after which it is flushed, or None
+    MAX_BATCH_BYTES: int | None = None
+
+    # Time to flush a batch to adapt the batch size to, up to MAX_BATCH_SIZE,
+    # or None to keep the batch size
+    TARGET_FLUSH_SECONDS: float | None = None
+    MAX_BATCH_SIZE: int | None = None
+
+    # Batches sent in a background thread while logging continues,
+    # or 0 to send them synchronously
+    DEFAULT_MAX_PENDING_BATCHES: int = 0
+
+    # Interned shared fields, after which they are interned again, in case
+    # rule_params are passed as a new dict on every call
+    MAX_INTERNED_FIELDS: int = 10000
 
-    def __init__(self, batch_size: int | None = None) -> None:
+    _messages: Buffer[LogRow]
+    _background_flusher: BackgroundFlusher[LogRow] | None
+
+    # Shared fields by log type, column, parser or rule, id of rule_params
+    # and partition, with the rule_params they were serialized from
+    _fields: Dict[Tuple[str, str, str, int, str | None], Tuple[dict | None,
+                                                               LogMessage]]
+
+    # Batches of log messages flushed, and the time logging was blocked on
+    # flushing them, e.g. waiting for a pending batch to be sent
+    flush_count: int
+    flush_seconds: float
+
+    def __init__(self,
+                 batch_size: int | None = None,
+                 max_pending_batches: int | None = None) -> None:
         batch_size = batch_size or self.DEFAULT_BATCH_SIZE
-        buffer: List[LogMessage] = []
-        self._messages = Buffer[LogMessage](buffer, batch_size,
-                                            self.send_log_messages)
+        if max_pending_batches is None:
+            max_pending_batches = self.DEFAULT_MAX_PENDING_BATCHES
+
+        flusher: Callable[[List[LogRow]], Any] = self._send_log_rows
+        self._background_flusher = None
+        if max_pending_batches > 0:
+            # Rows are expanded into log messages in the background too
+            self._background_flusher = BackgroundFlusher[LogRow](
+                self._send_log_rows, max_pending_batches)
+            flusher = self._background_flusher
+
+        self.flush_count = 0
+        self.flush_seconds = 0.0
+
+        self._fields = {}
+        buffer: List[LogRow] = []
+        self._messages = Buffer[LogRow](
+            buffer,
+            batch_size,
+            self._time_flusher(flusher),
+            max_bytes=self.MAX_BATCH_BYTES,
+            get_size=self._estimate_row_bytes,
+            target_seconds=self.TARGET_FLUSH_SECONDS,
+            size_limit=self.MAX_BATCH_SIZE)
+        # Validators may log from multiple threads, e.g. one per partition
+        self._lock = threading.Lock()
 
     def set_base_log(self, dqm_version_id: str, workflow_execution_id: str,
                      table_metadata: TableMetadata,
@@ -107,25 +304,126 @@ class Logger(ABC):
             table_name=table_metadata.table_name,
             full_table_id=table_metadata.full_table_id,
             run_timestamp_utc=get_formatted_timestamp(run_dt_utc))
+        with self._lock:
+            self._base_log_bytes = len(json.dumps(self._base_log))
+            self._fields.clear()
+
+    def _intern_fields(self,
+                       log_type: LogType,
+                       column: str = '',
+                       name: str = '',
+                       rule_params: dict | None = None,
+                       partition_id: str | None = None) -> LogMessage:
+        """
+        Get the fields shared by the log messages of a parser or rule of a
+        column, building them on first use.
+
+        Note: rule_params are interned by identity, as the same dict is
+        passed for every failure of a rule, so must not be modified.
+
+        Args:
+            * log_type: LogType of the messages
+            * column: optional, column where the parser or rule is applied
+            * name: optional, name of the parser or rule
+            * rule_params: optional, parameters set for the rule
+            * partition_id: optional, partition of the failing rows
 
-    def queue_log_message(self, message: LogMessage) -> bool | Any:
+        Returns:
+            * Shared LogMessage fields, which must not be modified
+        """
+        key = (log_type.value, column, name, id(rule_params), partition_id)
+        interned = self._fields.get(key)
+        if interned is not None and interned[0] is rule_params:
+            return interned[1]
+
+        fields = self._base_log.copy() | LogMessage(log_type=log_type.value)
+        if log_type in (LogType.PARSER, LogType.PARSER_SUMMARY):
+            fields |= LogMessage(column=column, parser=name)
+        elif log_type in (LogType.RULE, LogType.RULE_SUMMARY):
+            fields |= LogMessage(column=column,
+                                 rule=name,
+                                 rule_params=json.dumps(rule_params))
+        if partition_id is not None:
+            fields['partition_id'] = partition_id
+
+        if len(self._fields) >= self.MAX_INTERNED_FIELDS:
+            self._fields.clear()
+        self._fields[key] = (rule_params, fields)
+        return fields
+
+    def _estimate_row_bytes(self, row: LogRow) -> int:
         """
-        Add a log message to the log queue and attempt a flush.
+        Estimate the bytes of the log message of a log row, once encoded.
 
         Args:
-            * message: LogMessage dictionary
+            * row: LogRow of a log message
+
+        Returns:
+            * Estimated bytes
+        """
+        fields, error, value, _, _ = row
+        return (self._base_log_bytes + LOG_ROW_OVERHEAD_BYTES +
+                get_json_size(fields.get('rule_params', '')) +
+                get_json_size(error) + get_json_size(value))
+
+    def _queue_log_row(self, row: LogRow) -> bool | Any:
+        """
+        Add a log row to the log queue and attempt a flush.
+
+        Args:
+            * row: LogRow of a log message
 
         Returns:
             * True, if flushed with no errors
             * False, if not flushed
             * Error value from logger, if flushed with errors
         """
-        return self._messages.push(message)
+        return self._messages.push(row)
+
+    @staticmethod
+    def _expand_log_rows(rows: List[LogRow]) -> List[LogMessage]:
+        """
+        Expand buffered log rows into log messages.
+
+        Args:
+            * rows: List of LogRows
+
+        Returns:
+            * List of LogMessage dictionaries
+        """
+        messages: List[LogMessage] = []
+        for fields, error, value, row_offset, violation_count in rows:
+            message = fields.copy()
+            message['error'] = error
+            if message['log_type'] in (LogType.PARSER.value,
+                                       LogType.RULE.value):
+                message['value'] = value
+            if violation_count is not None:
+                message['violation_count'] = violation_count
+            if row_offset is not None:
+                message['row_offset'] = row_offset
+            messages.append(message)
+        return messages
+
+    def _send_log_rows(self, rows: List[LogRow]) -> None:
+        """
+        Expand buffered log rows, and send their log messages.
+
+        Args:
+            * rows: List of LogRows
+
+        Returns:
+            * None
+        """
+        self.send_log_messages(self._expand_log_rows(rows))
 
     def flush(self, force: bool = False) -> bool | Any:
         """
         Flushes the underlying log message queue.
 
+        If sending in the background, forcing a flush waits until
+        all log messages are sent.
+
         Args:
             * force: If True, force queue to flush
 
@@ -134,7 +432,60 @@ class Logger(ABC):
             * False, if not flushed
             * Error value from logger, if flushed with errors
         """
-        return self._messages.flush(force=force)
+        with self._lock:
+            result = self._messages.flush(force=force)
+            if force and self._background_flusher is not None:
+                start = perf_counter()
+                self._background_flusher.join()
+                self.flush_seconds += perf_counter() - start
+        return result
+
+    def close(self) -> None:
+        """
+        Stop sending log messages in the background, once the batches
+        already queued are sent, e.g. after a run failed before its logs
+        were flushed, so the background thread does not wait forever.
+
+        Unlike a forced flush, buffered log messages are not sent, and
+        errors raised while sending are not re-raised, since the error of
+        the run is raised instead.
+
+        Returns:
+            * None
+        """
+        if self._background_flusher is not None:
+            with self._lock, suppress(Exception):
+                self._background_flusher.join()
+
+    def _time_flusher(
+        self, flusher: Callable[[List[LogRow]],
+                                Any]) -> Callable[[List[LogRow]], Any]:
+        """
+        Wrap a flusher, to count the batches flushed and the time spent,
+        tracing each batch with a span.
+
+        Args:
+            * flusher: Function to be called with the log rows
+
+        Returns:
+            * Timed flusher
+        """
+
+        def flush(rows: List[LogRow]) -> Any:
+            if not rows:
+                return flusher(rows)
+            start = perf_counter()
+            try:
+                with start_span('flush_logs',
+                                messages=len(rows),
+                                background=self._background_flusher
+                                is not None):
+                    return flusher(rows)
+            finally:
+                self.flush_count += 1
+                self.flush_seconds += perf_counter() - start
+
+        return flush
 
     @abstractmethod
     def send_log_messages(self, messages: List[LogMessage]) -> None:
@@ -162,6 +513,74 @@ class Logger(ABC):
         """
         pass
 
+    def _build_system_row(self, error: str) -> LogRow:
+        """
+        Adds system error information to the interned base log fields.
+
+        Args:
+            * error: error that occurred
+
+        Returns:
+            * LogRow of the message
+        """
+        return (self._intern_fields(LogType.SYSTEM), error, None, None, None)
+
+    def _build_parser_row(self,
+                          column: str,
+                          parser: str,
+                          error: str,
+                          value: Any,
+                          violation_count: int | None = None,
+                          row_offset: int | None = None,
+                          partition_id: str | None = None) -> LogRow:
+        """
+        Adds parser error information to the interned fields of the parser.
+
+        Args:
+            * column: column where the rule is applied
+            * parser: parser function that failed and raises this message
+            * value: value that fails to parse
+            * violation_count: optional, number of aggregated failures
+            * row_offset: optional, position of the failing row
+            * partition_id: optional, partition of the failing row
+
+        Returns:
+            * LogRow of the message
+        """
+        fields = self._intern_fields(LogType.PARSER,
+                                     column,
+                                     parser,
+                                     partition_id=partition_id)
+        return (fields, error, value, row_offset, violation_count)
+
+    def _build_rule_row(self,
+                        column: str,
+                        rule: str,
+                        error: str,
+                        value: Any,
+                        rule_params: dict = {},
+                        violation_count: int | None = None,
+                        row_offset: int | None = None,
+                        partition_id: str | None = None) -> LogRow:
+        """
+        Adds rule error information to the interned fields of the rule.
+
+        Args:
+            * column: column where the rule is applied
+            * rule: rule that is violated and raises this message
+            * value: value that violates the rule
+            * rule_params: optional, parameters set for the rule
+            * violation_count: optional, number of aggregated violations
+            * row_offset: optional, position of the failing row
+            * partition_id: optional, partition of the failing row
+
+        Returns:
+            * LogRow of the message
+        """
+        fields = self._intern_fields(LogType.RULE, column, rule, rule_params,
+                                     partition_id)
+        return (fields, error, value, row_offset, violation_count)
+
     def _build_system_message(self, error: str) -> LogMessage:
         """
         Adds system error information to base log message.
@@ -172,13 +591,18 @@ class Logger(ABC):
         Returns:
             * Log: dictionary containing log data
         """
-        return self._base_log.copy() | LogMessage(
-            log_type=LogType.SYSTEM.value,
-            error=error,
-        )
-
-    def _build_parser_message(self, column: str, parser: str, error: str,
-                              value: Any) -> LogMessage:
+        with self._lock:
+            row = self._build_system_row(error)
+        return self._expand_log_rows([row])[0]
+
+    def _build_parser_message(self,
+                              column: str,
+                              parser: str,
+                              error: str,
+                              value: Any,
+                              violation_count: int | None = None,
+                              row_offset: int | None = None,
+                              partition_id: str | None = None) -> LogMessage:
         """
         Adds parser error information to base log message.
 
@@ -186,22 +610,28 @@ class Logger(ABC):
             * column: column where the rule is applied
             * parser: parser function that failed and raises this message
             * value: value that fails to parse
+            * violation_count: optional, number of aggregated failures
+            * row_offset: optional, position of the failing row
+            * partition_id: optional, partition of the failing row
 
         Returns:
             * log: LogMessage dictionary
         """
-        return self._base_log.copy() | LogMessage(log_type=LogType.PARSER.value,
-                                                  column=column,
-                                                  parser=parser,
-                                                  error=error,
-                                                  value=value)
+        with self._lock:
+            row = self._build_parser_row(column, parser, error, value,
+                                         violation_count, row_offset,
+                                         partition_id)
+        return self._expand_log_rows([row])[0]
 
     def _build_rule_message(self,
                             column: str,
                             rule: str,
                             error: str,
                             value: Any,
-                            rule_params: dict = {}) -> LogMessage:
+                            rule_params: dict = {},
+                            violation_count: int | None = None,
+                            row_offset: int | None = None,
+                            partition_id: str | None = None) -> LogMessage:
         """
         Adds rule error information to base log message.
 
@@ -210,18 +640,18 @@ class Logger(ABC):
             * rule: rule that is violated and raises this message
             * value: value that violates the rule
             * rule_params: optional, parameters set for the rule
+            * violation_count: optional, number of aggregated violations
+            * row_offset: optional, position of the failing row
+            * partition_id: optional, partition of the failing row
 
         Returns:
             * log: LogMessage dictionary
         """
-        return self._base_log.copy() | LogMessage(
-            log_type=LogType.RULE.value,
-            column=column,
-            rule=rule,
-            error=error,
-            value=value,
-            rule_params=json.dumps(rule_params),
-        )
+        with self._lock:
+            row = self._build_rule_row(column, rule, error, value, rule_params,
+                                       violation_count, row_offset,
+                                       partition_id)
+        return self._expand_log_rows([row])[0]
 
     def system(self, error: str) -> None:
         """
@@ -234,11 +664,17 @@ class Logger(ABC):
         Returns:
             * None
         """
-
-        log = self._build_system_message(error)
-        self.queue_log_message(log)
-
-    def parser(self, column: str, parser: str, error: str, value: Any) -> None:
+        with self._lock:
+            self._queue_log_row(self._build_system_row(error))
+
+    def parser(self,
+               column: str,
+               parser: str,
+               error: str,
+               value: Any,
+               violation_count: int | None = None,
+               row_offset: int | None = None,
+               partition_id: str | None = None) -> None:
         """
         Adds parser error information to base log message and
         sends it to the logger for writing.
@@ -248,20 +684,28 @@ class Logger(ABC):
             * parser: parser function that failed and raises this message
             * error: error that occurred
             * value: value that fails to parse
+            * violation_count: optional, number of aggregated failures
+            * row_offset: optional, position of the failing row
+            * partition_id: optional, partition of the failing row
 
         Returns:
             * None
         """
-
-        log = self._build_parser_message(column, parser, error, value)
-        self.queue_log_message(log)
+        with self._lock:
+            self._queue_log_row(
+                self._build_parser_row(column, parser, error, value,
+                                       violation_count, row_offset,
+                                       partition_id))
 
     def rule(self,
              column: str,
              rule: str,
              error: str,
              value: Any,
-             rule_params: dict = {}) -> None:
+             rule_params: dict = {},
+             violation_count: int | None = None,
+             row_offset: int | None = None,
+             partition_id: str | None = None) -> None:
         """
         Adds rule error information to base log message and
         sends it to the logger for writing.
@@ -272,19 +716,82 @@ class Logger(ABC):
             * error: error that occurred
             * value: value that violates the rule
             * rule_params: optional, parameters set for the rule
+            * violation_count: optional, number of aggregated violations
+            * row_offset: optional, position of the failing row
+            * partition_id: optional, partition of the failing row
+
+        Returns:
+            * None
+        """
+        with self._lock:
+            self._queue_log_row(
+                self._build_rule_row(column, rule, error, value, rule_params,
+                                     violation_count, row_offset, partition_id))
+
+    def parser_summary(self,
+                       column: str,
+                       parser: str,
+                       error: str,
+                       violation_count: int,
+                       partition_id: str | None = None) -> None:
+        """
+        Adds the total failures of a parser error, counted when aggregated,
+        to base log message and sends it to the logger for writing.
+
+        Args:
+            * column: column where the rule is applied
+            * parser: parser function that failed
+            * error: error that occurred
+            * violation_count: number of failures with the error
+            * partition_id: optional, partition of the failing rows
 
         Returns:
             * None
         """
+        with self._lock:
+            fields = self._intern_fields(LogType.PARSER_SUMMARY,
+                                         column,
+                                         parser,
+                                         partition_id=partition_id)
+            self._queue_log_row((fields, error, None, None, violation_count))
+
+    def rule_summary(self,
+                     column: str,
+                     rule: str,
+                     error: str,
+                     violation_count: int,
+                     rule_params: dict = {},
+                     partition_id: str | None = None) -> None:
+        """
+        Adds the total violations of a rule error, counted when aggregated,
+        to base log message and sends it to the logger for writing.
 
-        log = self._build_rule_message(column, rule, error, value, rule_params)
-        self.queue_log_message(log)
+        Args:
+            * column: column where the rule is applied
+            * rule: rule that is violated
+            * error: error that occurred
+            * violation_count: number of violations with the error
+            * rule_params: optional, parameters set for the rule
+            * partition_id: optional, partition of the failing rows
+
+        Returns:
+            * None
+        """
+        with self._lock:
+            fields = self._intern_fields(LogType.RULE_SUMMARY, column, rule,
+                                         rule_params, partition_id)
+            self._queue_log_row((fields, error, None, None, violation_count))
 
 
 class PrintLogger(Logger):
 
     DEFAULT_BATCH_SIZE = 10
 
+    # Print larger batches while printing is fast
+    MAX_BATCH_BYTES = 1024 * 1024
+    TARGET_FLUSH_SECONDS = 0.1
+    MAX_BATCH_SIZE = 1000
+
     def send_log_messages(self, messages: List[LogMessage]) -> None:
         """
         Prints multiple log messages to be captured by cloud logging.
@@ -315,6 +822,21 @@ class BigQueryLogger(Logger):
 
     DEFAULT_BATCH_SIZE = 1000
 
+    # Insert the previous batch while the next one is being logged
+    DEFAULT_MAX_PENDING_BATCHES = 1
+
+    # Insert larger batches of small rows, while logging is not blocked on
+    # inserting them, within the limits of insertAll requests
+    MAX_BATCH_BYTES = MAX_REQUEST_BYTES
+    TARGET_FLUSH_SECONDS = 1.0
+    MAX_BATCH_SIZE = 10000
+
+    # Attempts to insert a batch with retryable errors, and the backoff
+    # before each retry, multiplied after each one
+    MAX_ATTEMPTS = 5
+    RETRY_INITIAL_SECONDS = 1.0
+    RETRY_MULTIPLIER = 2.0
+
     _bq_client: BigQueryLegacyClient
     _table_metadata: TableMetadata
 
@@ -323,7 +845,8 @@ class BigQueryLogger(Logger):
     def __init__(self,
                  table_metadata: TableMetadata,
                  auth_config: AuthConfig | None = None,
-                 batch_size: int | None = None) -> None:
+                 batch_size: int | None = None,
+                 max_pending_batches: int | None = None) -> None:
         self._table_metadata = table_metadata
 
         credentials = get_credentials(auth_config)
@@ -332,11 +855,15 @@ class BigQueryLogger(Logger):
 
         self._fallback_logger = PrintLogger()
 
-        return super().__init__(batch_size)
+        return super().__init__(batch_size, max_pending_batches)
 
     def send_log_messages(self, messages: List[LogMessage]) -> None:
         """
-        Sends multiple log messages to BigQuery.
+        Sends multiple log messages to BigQuery, with deterministic insert
+        IDs so retries do not duplicate them.
+
+        Rows which fail with a retryable error are inserted again with
+        exponential backoff, up to MAX_ATTEMPTS times in total.
 
         Args:
             * messages: list of LogMessage dictionaries
@@ -347,8 +874,170 @@ class BigQueryLogger(Logger):
         Raises:
             * RuntimeError: if BigQuery insert fails
         """
-        errors = upload_rows(self._bq_client, self._table_metadata,
-                             cast(List[Dict], messages))
+        rows = cast(List[Dict], messages)
+        row_ids = [get_insert_id(message) for message in messages]
+        delay = self.RETRY_INITIAL_SECONDS
+        for attempt in range(1, self.MAX_ATTEMPTS + 1):
+            failed = insert_rows(self._bq_client, self._table_metadata, rows,
+                                 row_ids)
+            if not failed:
+                return
+            retryable = all(
+                error.get('reason') in RETRYABLE_INSERT_REASONS
+                for errors in failed.values()
+                for error in errors)
+            if not retryable or attempt == self.MAX_ATTEMPTS:
+                break
+            rows = [rows[index] for index in sorted(failed)]
+            row_ids = [row_ids[index] for index in sorted(failed)]
+            sleep(delay)
+            delay *= self.RETRY_MULTIPLIER
+
+        # We assume all rows fail with the same error, so only log the
+        # errors of one row to prevent polluting cloud logging
+        for error in next(iter(failed.values())):
+            self._fallback_logger.send_log_message({
+                "log_type": LogType.SYSTEM.value,
+                "error": str(error)
+            })
+        raise RuntimeError('BigQuery logging failed: Check Cloud Logs.')
+
+    def send_log_message(self, message: LogMessage) -> None:
+        """
+        Sends the log message to BigQuery.
+
+        Args:
+            * message: LogMessage dictionary
+
+        Returns:
+            * None
+
+        Raises:
+            * RuntimeError: if BigQuery insert fails
+        """
+        self.send_log_messages([message])
+
+
+class BigQueryWriteLogger(Logger):
+    """
+    Logger appending log messages to BigQuery with the Storage Write API,
+    which is cheaper and faster than streaming inserts for many logs.
+    """
+
+    DEFAULT_BATCH_SIZE = 10000
+
+    # Append the previous batch while the next one is being logged
+    DEFAULT_MAX_PENDING_BATCHES = 1
+
+    # Within the limits of AppendRows requests
+    MAX_BATCH_BYTES = MAX_REQUEST_BYTES
+    TARGET_FLUSH_SECONDS = 1.0
+    MAX_BATCH_SIZE = 100000
+
+    _bq_write_client: BigQueryWriteClient
+    _table_metadata: TableMetadata
+
+    _descriptor: Any
+    _message_class: Type[Any]
+    _append_rows_stream: AppendRowsStream | None
+
+    _fallback_logger: Logger
+
+    def __init__(self,
+                 table_metadata: TableMetadata,
+                 auth_config: AuthConfig | None = None,
+                 batch_size: int | None = None,
+                 max_pending_batches: int | None = None) -> None:
+        self._table_metadata = table_metadata
+
+        credentials = get_credentials(auth_config)
+        self._bq_write_client = get_bq_write_client(credentials)
+
+        self._descriptor = build_proto_descriptor('LogMessage',
+                                                  LOG_MESSAGE_TYPES)
+        self._message_class = get_proto_message_class(self._descriptor)
+        self._append_rows_stream = None
+
+        self._fallback_logger = PrintLogger()
+
+        return super().__init__(batch_size, max_pending_batches)
+
+    def flush(self, force: bool = False) -> bool | Any:
+        """
+        Flushes the underlying log message queue, closing the connection
+        to BigQuery once all log messages are sent if forced.
+
+        Args:
+            * force: If True, force queue to flush
+
+        Returns:
+            * True, if flushed with no errors
+            * False, if not flushed
+            * Error value from logger, if flushed with errors
+        """
+        try:
+            return super().flush(force=force)
+        finally:
+            if force and self._append_rows_stream is not None:
+                self._append_rows_stream.close()
+                self._append_rows_stream = None
+
+    def close(self) -> None:
+        """
+        Stop sending log messages in the background, and close the
+        connection to BigQuery.
+
+        Returns:
+            * None
+        """
+        try:
+            super().close()
+        finally:
+            if self._append_rows_stream is not None:
+                self._append_rows_stream.close()
+                self._append_rows_stream = None
+
+    def _serialize(self, message: LogMessage) -> bytes:
+        """
+        Serialize a log message into a protobuf row of the log table.
+
+        Args:
+            * message: LogMessage dictionary
+
+        Returns:
+            * Serialized row
+        """
+        row = self._message_class()
+        for field, value in message.items():
+            if value is None:
+                continue
+            elif (LOG_MESSAGE_TYPES[field] is str and
+                  not isinstance(value, str)):
+                # Same as the JSON encoding of streaming inserts
+                value = json.dumps(value, default=str)
+            setattr(row, field, value)
+        serialized_row: bytes = row.SerializeToString()
+        return serialized_row
+
+    def send_log_messages(self, messages: List[LogMessage]) -> None:
+        """
+        Sends multiple log messages to BigQuery.
+
+        Args:
+            * messages: list of LogMessage dictionaries
+
+        Returns:
+            * None
+
+        Raises:
+            * RuntimeError: if BigQuery append fails
+        """
+        if self._append_rows_stream is None:
+            self._append_rows_stream = open_append_rows_stream(
+                self._bq_write_client, self._table_metadata, self._descriptor)
+
+        errors = append_rows(self._append_rows_stream,
+                             [self._serialize(message) for message in messages])
         if errors:
             for error in errors:
                 self._fallback_logger.send_log_message({
@@ -368,6 +1057,255 @@ class BigQueryLogger(Logger):
             * None
 
         Raises:
-            * RuntimeError: if BigQuery insert fails
+            * RuntimeError: if BigQuery append fails
         """
         self.send_log_messages([message])
+
+
+@dataclass
+class StreamEnd:
+    """
+    Last entry of a log stream, with the response of the run.
+    """
+    response: DQMResponse
+
+
+class _NDJSONEncoder:
+    """
+    Encodes log messages as newline-delimited JSON, ending with a line for
+    the DQMResponse.
+    """
+
+    def encode(self, messages: List[LogMessage]) -> bytes:
+        return ''.join(
+            json.dumps(message, default=str) + '\n'
+            for message in messages).encode()
+
+    def end(self, response: DQMResponse) -> bytes:
+        return self.encode([cast(LogMessage, response)])
+
+
+class _ArrowEncoder:
+    """
+    Encodes log messages as an Arrow IPC stream of record batches, with the
+    log table schema. The stream ends with an empty batch, with the
+    DQMResponse as JSON in its "response" custom metadata.
+    """
+
+    schema: pa.Schema = pa.schema([
+        (field, pa.int64() if field_type is int else pa.string())
+        for field, field_type in LOG_MESSAGE_TYPES.items()
+    ])
+
+    def __init__(self) -> None:
+        self._sink = io.BytesIO()
+        self._writer = pa.ipc.new_stream(self._sink, self.schema)
+
+    def _drain(self) -> bytes:
+        data = self._sink.getvalue()
+        self._sink.seek(0)
+        self._sink.truncate()
+        return data
+
+    def encode(self, messages: List[LogMessage]) -> bytes:
+        rows = [{
+            field: (json.dumps(value, default=str)
+                    if LOG_MESSAGE_TYPES[field] is str and
+                    not isinstance(value, str) and value is not None else value)
+            for field, value in message.items()
+        }
+                for message in messages]
+        self._writer.write_batch(
+            pa.RecordBatch.from_pylist(rows, schema=self.schema))
+        return self._drain()
+
+    def end(self, response: DQMResponse) -> bytes:
+        self._writer.write_batch(
+            pa.RecordBatch.from_pylist([], schema=self.schema),
+            custom_metadata={'response': json.dumps(response)})
+        self._writer.close()
+        return self._drain()
+
+
+class StreamLogger(Logger):
+    """
+    Logger streaming log messages back to the caller, as the body of the
+    response, while the run continues in a background thread.
+
+    Batches are handed over through a bounded queue, so logging blocks
+    while the caller is slow to read them, and memory stays bounded. If
+    the caller disconnects, logging raises to stop the run.
+
+    Args:
+        * stream_format: StreamFormat of the response body
+        * batch_size: optional, number of log messages per streamed batch
+        * max_pending_batches: optional, number of batches waiting to be
+            streamed, before logging blocks
+    """
+
+    DEFAULT_BATCH_SIZE = 1000
+
+    # Bound the memory of each pending batch, whatever the size of values.
+    # Batch sizes are not adapted, since streaming them waits on the caller
+    MAX_BATCH_BYTES = 4 * 1024 * 1024
+
+    stream_format: StreamFormat
+
+    _batches: queue.Queue[Any]
+    _stop: threading.Event
+
+    def __init__(self,
+                 stream_format: StreamFormat,
+                 batch_size: int | None = None,
+                 max_pending_batches: int | None = None) -> None:
+        self.stream_format = stream_format
+        self._batches = queue.Queue(maxsize=max_pending_batches or 2)
+        self._stop = threading.Event()
+        # Batches are streamed from the queue, not flushed in the background
+        return super().__init__(batch_size, 0)
+
+    def send_log_messages(self, messages: List[LogMessage]) -> None:
+        """
+        Queues multiple log messages to be streamed.
+
+        Args:
+            * messages: list of LogMessage dictionaries
+
+        Returns:
+            * None
+
+        Raises:
+            * RuntimeError: if the caller stopped reading the response
+        """
+        if messages:
+            # Copy, since the buffer is cleared once flushed
+            self._put(list(messages))
+
+    def send_log_message(self, message: LogMessage) -> None:
+        """
+        Queues the log message to be streamed.
+
+        Args:
+            * message: LogMessage dictionary
+
+        Returns:
+            * None
+
+        Raises:
+            * RuntimeError: if the caller stopped reading the response
+        """
+        self.send_log_messages([message])
+
+    def _put(self, entry: Any) -> None:
+        """
+        Queue an entry, blocking until there is space or the stream stopped.
+        """
+        while not self._stop.is_set():
+            try:
+                self._batches.put(entry, timeout=STREAM_PUT_TIMEOUT)
+                return
+            except queue.Full:
+                continue
+        raise RuntimeError('Log stream was closed by the caller.')
+
+    def _run(self, run: Callable[[], ResponseReturnValue]) -> None:
+        """
+        Run the request, then queue its DQMResponse, or the DQMResponse of
+        its error, to end the stream.
+        """
+        try:
+            result = run()
+        except MalformedConfigError as e:
+            result = handle_malformed_config(e)
+        except Exception as e:
+            result = handle_server_error(e)
+        try:
+            # Stream any log messages left by a failed run, before its end
+            self.flush(force=True)
+            self._put(StreamEnd(cast(tuple, result)[0]))
+        except RuntimeError:
+            pass
+
+    def stream(
+            self,
+            run: Callable[[],
+                          ResponseReturnValue]) -> Generator[bytes, None, None]:
+        """
+        Run a request in a background thread, and stream its log messages
+        as they are flushed, followed by its DQMResponse.
+
+        As the response status is sent first, errors are only reported by
+        the final DQMResponse, with the code of the error.
+
+        Args:
+            * run: Function handling the request, which logs to this logger
+
+        Returns:
+            * Iterator of encoded chunks of the response body
+        """
+        encoder: _NDJSONEncoder | _ArrowEncoder = _NDJSONEncoder()
+        if self.stream_format == StreamFormat.ARROW:
+            encoder = _ArrowEncoder()
+        thread = threading.Thread(target=self._run, args=(run,), daemon=True)
+        thread.start()
+        try:
+            entry = self._batches.get()
+            while not isinstance(entry, StreamEnd):
+                yield encoder.encode(entry)
+                entry = self._batches.get()
+            yield encoder.end(entry.response)
+        finally:
+            # Unblocks and stops the run, if the caller disconnected
+            self._stop.set()
+
+
+def get_logger(log_table: TableMetadata | None,
+               auth_config: AuthConfig | None = None,
+               log_config: LogConfig | None = None) -> Logger:
+    """
+    Get a Logger for the given log table, printing to cloud logging
+    if no log table is specified.
+
+    Args:
+        * log_table: optional, TableMetadata of the BigQuery log table
+        * auth_config: optional, AuthConfig for the log table
+        * log_config: optional, LogConfig with log options
+
+    Returns:
+        * StreamLogger if logs are streamed, else BigQueryLogger or
+            BigQueryWriteLogger if a log table is specified, depending on
+            the log backend, else PrintLogger
+
+    Raises:
+        * ValueError: if an invalid log backend or stream format is provided
+    """
+    backend = get_log_backend(log_config)
+    stream_format = get_stream_format(log_config)
+
+    logger: Logger
+    if stream_format is not None:
+        logger = StreamLogger(stream_format)
+    elif not log_table:
+        logger = PrintLogger()
+    elif backend == LogBackend.STORAGE_WRITE:
+        logger = BigQueryWriteLogger(log_table, auth_config)
+    else:
+        logger = BigQueryLogger(log_table, auth_config)
+    return logger
+
+
+def log_read_warnings(logger: Logger, read_config: ReadConfig | None) -> None:
+    """
+    Log a system message for read options which affect the logs of a run,
+    e.g. failures logged again by its retries.
+
+    Args:
+        * logger: Logger of the run, with its base log set
+        * read_config: optional, ReadConfig of the run
+
+    Returns:
+        * None
+    """
+    if not has_stable_row_order(read_config):
+        # Failures are deduplicated by row offset
+        logger.system(UNSTABLE_ROW_ORDER_MESSAGE)
@@ -0,0 +1,195 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from dataclasses import asdict
+from dataclasses import dataclass
+from dataclasses import field
+import json
+import resource
+import sys
+from time import perf_counter
+from typing import Any, cast, Dict, Iterable, Iterator, Optional, TypeVar
+
+from google.cloud.bigquery_storage import BigQueryReadClient
+from google.cloud.bigquery_storage import ReadSession
+
+from core.logging import Logger
+
+T = TypeVar('T')
+
+MetricsDict = Dict[str, Any]
+
+
+def get_peak_rss() -> int:
+    """
+    Get the peak resident set size of the process so far.
+
+    Note: This is the peak of the whole process, e.g. across warm
+    invocations of a Cloud Function.
+
+    Returns:
+        * Peak RSS in bytes
+    """
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS, but in kilobytes on Linux
+    return peak_rss if sys.platform == 'darwin' else peak_rss * 1024
+
+
+@dataclass
+class RunMetrics:
+    """
+    Timings & counters of processing a column, to tell whether it is bound
+    by reading (I/O), parsing & checking rules (CPU), or logging.
+
+    Durations are wall-clock seconds since the metrics were created.
+
+    Args:
+        * read_session_seconds: Time to create the read session
+        * first_row_seconds: Time until the first row (or batch) was read
+        * read_seconds: Time spent reading & decoding rows, including
+            creating the read session
+        * validate_seconds: Time spent parsing & checking rules, including
+            the logging of failures
+        * logger_flushes: Number of batches of log messages flushed
+        * logger_flush_seconds: Time blocked flushing log messages
+        * peak_rss_bytes: Peak RSS of the process
+        * rows: Number of rows read
+        * total_seconds: Time to process the column
+    """
+    read_session_seconds: float = 0.0
+    first_row_seconds: Optional[float] = None
+    read_seconds: float = 0.0
+    validate_seconds: float = 0.0
+    logger_flushes: int = 0
+    logger_flush_seconds: float = 0.0
+    peak_rss_bytes: int = 0
+    rows: int = 0
+    total_seconds: float = 0.0
+
+    _start: float = field(default_factory=perf_counter, repr=False)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.total_seconds if self.total_seconds else 0.0
+
+    def time_iterator(self, iterable: Iterable[T]) -> Iterator[T]:
+        """
+        Time reading the items of an iterable, and processing them: the time
+        spent until the next item is requested is counted as validation.
+
+        Args:
+            * iterable: Iterable of rows, cells or batches of cells
+
+        Returns:
+            * Iterator of the same items
+        """
+        iterator = iter(iterable)
+        while True:
+            start = perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.read_seconds += perf_counter() - start
+                return
+            read = perf_counter()
+            self.read_seconds += read - start
+            if self.first_row_seconds is None:
+                self.first_row_seconds = read - self._start
+            yield item
+            self.validate_seconds += perf_counter() - read
+
+    def time_read_client(
+            self, bq_read_client: BigQueryReadClient) -> BigQueryReadClient:
+        """
+        Wrap a BigQuery Storage API Read client, to time the creation of
+        read sessions.
+
+        Args:
+            * bq_read_client: BigQuery Storage API Read client
+
+        Returns:
+            * Wrapped BigQuery Storage API Read client
+        """
+        return cast(BigQueryReadClient, _TimedReadClient(bq_read_client, self))
+
+    def finish(self, rows: int, logger: Logger) -> None:
+        """
+        Record the totals, once the column is processed.
+
+        Args:
+            * rows: Number of rows read
+            * logger: Logger of the parser & rule failures
+
+        Returns:
+            * None
+        """
+        self.total_seconds = perf_counter() - self._start
+        self.rows = rows
+        self.logger_flushes = logger.flush_count
+        self.logger_flush_seconds = logger.flush_seconds
+        self.peak_rss_bytes = get_peak_rss()
+
+    def to_dict(self) -> MetricsDict:
+        """
+        Convert the metrics to a JSON serializable dictionary.
+
+        Returns:
+            * Dictionary of the metrics, with the rows per second
+        """
+        metrics = asdict(self)
+        del metrics['_start']
+        return metrics | {'rows_per_second': self.rows_per_second}
+
+
+class _TimedReadClient:
+    """
+    BigQuery Storage API Read client, timing the creation of read sessions.
+    """
+
+    def __init__(self, bq_read_client: BigQueryReadClient,
+                 metrics: RunMetrics) -> None:
+        self._bq_read_client = bq_read_client
+        self._metrics = metrics
+
+    def create_read_session(self, *args: Any, **kwargs: Any) -> ReadSession:
+        start = perf_counter()
+        try:
+            return self._bq_read_client.create_read_session(*args, **kwargs)
+        finally:
+            self._metrics.read_session_seconds += perf_counter() - start
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._bq_read_client, name)
+
+
+def log_metrics(metrics: RunMetrics, column: str) -> None:
+    """
+    Print the metrics as a structured log, to be captured by cloud logging.
+
+    Args:
+        * metrics: RunMetrics of a column
+        * column: Name of the column
+
+    Returns:
+        * None
+    """
+    print(
+        json.dumps({
+            'severity': 'INFO',
+            'message': f'Processed column {column}.',
+            'column': column,
+            'metrics': metrics.to_dict()
+        }))
@@ -0,0 +1,283 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+from collections import deque
+from collections.abc import Generator
+from collections.abc import Iterable
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from dataclasses import fields
+from functools import lru_cache
+from itertools import islice
+import json
+import multiprocessing
+import os
+import threading
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from core.bigquery import CellsBatch
+from core.config import ColumnConfig
+from core.logging import Logger
+from core.logging import LogMessage
+from core.validation import ColumnStats
+from core.validation import ColumnValidator
+from core.validation import RulePath
+
+# Number of cells checked at once by a worker process, when checking the
+# cells of a column one by one
+CELLS_CHUNK_SIZE = 10000
+
+# Column validators cached by each worker process
+MAX_WORKER_VALIDATORS = 32
+
+# A failure of a cell: the index of the failed rule, or None for a parser
+# failure, with its error, value and row offset
+Failure = Tuple[Optional[int], str, Any, int]
+
+# Worker processes of the shared pool, which also bounds check_processes
+CPU_COUNT = os.cpu_count() or 1
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    Get the pool of worker processes, with a worker per CPU, shared by the
+    requests of this process so workers are only started once.
+
+    Workers are spawned rather than forked, since forking a process with
+    running threads, e.g. of the server or of a background flusher, may
+    deadlock.
+
+    Returns:
+        * ProcessPoolExecutor
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                CPU_COUNT, mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+
+def chunk_cells(
+        cells: Iterable[Any],
+        chunk_size: int = CELLS_CHUNK_SIZE) -> Generator[List[Any], None, None]:
+    """
+    Group cells into Lists of chunk_size cells, to check them at once.
+
+    Args:
+        * cells: Iterable of cells
+        * chunk_size: Number of cells per chunk
+
+    Returns:
+        * Iterator of Lists of cells
+    """
+    iterator = iter(cells)
+    chunk = list(islice(iterator, chunk_size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, chunk_size))
+
+
+@dataclass
+class ChunkResult:
+    """
+    Outcome of checking a chunk of cells in a worker process.
+    """
+    stats: ColumnStats
+    rule_paths: Dict[str, RulePath]
+    failures: List[Failure]
+
+
+class _FailureRecorder(Logger):
+    """
+    Logger of a worker process, recording the failures of a chunk of cells
+    to be logged by the request process, in order.
+
+    Rules are recorded by index, so they are logged with the rule_params of
+    the request process.
+    """
+
+    DEFAULT_BATCH_SIZE = 1
+
+    failures: List[Failure]
+
+    def __init__(self) -> None:
+        self.failures = []
+        self._rule_indices: Dict[Tuple[str, int], int] = {}
+        super().__init__()
+
+    def set_rules(self, validator: ColumnValidator) -> None:
+        self._rule_indices = {(rule.__name__, id(rule.__kwdefaults__)): i
+                              for i, rule in enumerate(validator.rules)}
+
+    def parser(self,
+               column: str,
+               parser: str,
+               error: str,
+               value: Any,
+               violation_count: int | None = None,
+               row_offset: int | None = None,
+               partition_id: str | None = None) -> None:
+        self.failures.append((None, error, value, row_offset or 0))
+
+    def rule(self,
+             column: str,
+             rule: str,
+             error: str,
+             value: Any,
+             rule_params: dict = {},
+             violation_count: int | None = None,
+             row_offset: int | None = None,
+             partition_id: str | None = None) -> None:
+        self.failures.append((self._rule_indices[(rule, id(rule_params))],
+                              error, value, row_offset or 0))
+
+    def send_log_messages(self, messages: List[LogMessage]) -> None:
+        pass
+
+    def send_log_message(self, message: LogMessage) -> None:
+        pass
+
+
+@lru_cache(maxsize=MAX_WORKER_VALIDATORS)
+def _get_worker_validator(
+        column_config_json: str) -> Tuple[ColumnValidator, _FailureRecorder]:
+    """
+    Get the ColumnValidator of a column in a worker process, compiling its
+    rules once per worker.
+    """
+    recorder = _FailureRecorder()
+    validator = ColumnValidator(json.loads(column_config_json), recorder)
+    recorder.set_rules(validator)
+    return validator, recorder
+
+
+def _check_chunk(column_config_json: str, cells: CellsBatch,
+                 row_offset: int) -> ChunkResult:
+    """
+    Check a chunk of cells in a worker process.
+
+    Args:
+        * column_config_json: ColumnConfig of the column as JSON, without
+            aggregation, since failures are aggregated by the request process
+        * cells: Arrow array, or List of cells checked one by one
+        * row_offset: Offset of the first cell in the rows checked
+
+    Returns:
+        * ChunkResult of the cells
+    """
+    validator, recorder = _get_worker_validator(column_config_json)
+    validator.stats = ColumnStats(rows=row_offset)
+    validator.rule_paths = {}
+    recorder.failures = []
+
+    if isinstance(cells, list):
+        for cell in cells:
+            validator.validate(cell)
+    else:
+        validator.validate_batch(cells)
+
+    validator.stats.rows -= row_offset
+    return ChunkResult(validator.stats, validator.rule_paths, recorder.failures)
+
+
+class ProcessValidator:
+    """
+    Checks the cells of a column in a pool of worker processes, while the
+    caller reads the next chunks, and logs their failures and counts them
+    with the validator of the column in the order of the chunks.
+
+    The parser and rules of a column are pure Python when not vectorized,
+    so checking them in the request thread only uses a single CPU.
+
+    The pool is shared by all requests, so each request only has up to
+    its number of processes chunks checked at once.
+
+    Args:
+        * validator: ColumnValidator of the column
+        * processes: Number of worker processes, or 0 for one per CPU
+    """
+
+    validator: ColumnValidator
+    max_pending: int
+
+    _pool: ProcessPoolExecutor
+    _column_config_json: str
+    _pending: Deque[Future[ChunkResult]]
+
+    def __init__(self, validator: ColumnValidator, processes: int) -> None:
+        self.validator = validator
+        self._pool = get_process_pool()
+        # Bounds the workers used by the request, and the chunks held in
+        # memory
+        self.max_pending = min(processes or CPU_COUNT, CPU_COUNT)
+        column_config = ColumnConfig(column=validator.column_config['column'],
+                                     parser=validator.column_config['parser'],
+                                     rules=validator.column_config['rules'])
+        self._column_config_json = json.dumps(column_config, sort_keys=True)
+        self._pending = deque()
+
+    def _merge(self, result: ChunkResult) -> None:
+        """
+        Log the failures of a checked chunk, and add its counts.
+        """
+        validator = self.validator
+        for rule_index, error, value, row_offset in result.failures:
+            validator.log_failure(rule_index, error, value, row_offset)
+
+        for field in fields(ColumnStats):
+            setattr(
+                validator.stats, field.name,
+                getattr(validator.stats, field.name) +
+                getattr(result.stats, field.name))
+        for rule, path in result.rule_paths.items():
+            if path == RulePath.PYTHON:
+                validator.rule_paths[rule] = path
+            else:
+                validator.rule_paths.setdefault(rule, path)
+
+    def validate_chunks(self, chunks: Iterable[CellsBatch]) -> None:
+        """
+        Check chunks of cells in the worker processes.
+
+        Args:
+            * chunks: Iterable of Arrow arrays, or of Lists of cells checked
+                one by one
+
+        Returns:
+            * None
+
+        Raises:
+            * Any error raised while checking a chunk
+        """
+        row_offset = self.validator.stats.rows
+        try:
+            for cells in chunks:
+                if len(self._pending) >= self.max_pending:
+                    self._merge(self._pending.popleft().result())
+                self._pending.append(
+                    self._pool.submit(_check_chunk, self._column_config_json,
+                                      cells, row_offset))
+                row_offset += len(cells)
+            while self._pending:
+                self._merge(self._pending.popleft().result())
+        finally:
+            for future in self._pending:
+                future.cancel()
+            self._pending.clear()
@@ -0,0 +1,313 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+from dataclasses import dataclass
+from dataclasses import field
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from typing import Any, List, Optional
+
+from google.cloud.bigquery import Client as BigQueryLegacyClient
+from google.cloud.bigquery import ScalarQueryParameter
+from google.cloud.bigquery import Table
+
+from core.bigquery import get_table
+from core.bigquery import run_query
+from core.bigquery import TableMetadata
+from core.config import PartitionConfig
+from core.incremental import get_state_key
+from core.incremental import watermark_literal
+from core.incremental import WatermarkStore
+
+# Number of partitions read in parallel by default
+DEFAULT_MAX_PARALLEL_PARTITIONS = 4
+
+# Response of runs without partitions to check
+NO_PARTITIONS_MESSAGE = 'DQM found no partitions to check.'
+
+# Partition of the rows with a NULL partitioning column
+NULL_PARTITION_ID = '__NULL__'
+
+# Partition of the rows with a partitioning column out of the partitioned
+# range, or in the streaming buffer of ingestion-time partitioned tables
+UNPARTITIONED_PARTITION_ID = '__UNPARTITIONED__'
+
+# Range of the values of time-unit partitioning columns with a partition
+MIN_PARTITION_TIME = datetime(1960, 1, 1)
+MAX_PARTITION_TIME = datetime(2160, 1, 1)
+
+# State key column of the last modification time of the checked partitions
+PARTITIONS_STATE_COLUMN = '__partitions__'
+
+# Formats of the partition IDs of time-unit partitioning types
+PARTITION_ID_FORMATS = {
+    'HOUR': '%Y%m%d%H',
+    'DAY': '%Y%m%d',
+    'MONTH': '%Y%m',
+    'YEAR': '%Y',
+}
+
+
+@dataclass
+class Partition:
+    """
+    Partition of a partitioned table, with the filter reading its rows.
+    """
+    partition_id: str
+
+    # Storage API row restriction of the rows of the partition
+    partition_filter: str
+
+    # Number of rows in the partition
+    total_rows: int
+
+    last_modified_time: datetime
+
+
+def _next_partition_start(start: datetime, partitioning_type: str) -> datetime:
+    """
+    Get the start of the partition following a time-unit partition.
+
+    Args:
+        * start: Start of the partition
+        * partitioning_type: HOUR, DAY, MONTH or YEAR
+
+    Returns:
+        * Start of the next partition
+    """
+    if partitioning_type == 'HOUR':
+        return start + timedelta(hours=1)
+    elif partitioning_type == 'DAY':
+        return start + timedelta(days=1)
+    elif partitioning_type == 'MONTH':
+        return start.replace(year=start.year + start.month // 12,
+                             month=start.month % 12 + 1)
+    else:
+        return start.replace(year=start.year + 1)
+
+
+def _time_literal(value: datetime, column_type: str) -> str:
+    """
+    Format the start of a time-unit partition as a SQL literal of the type
+    of its partitioning column.
+
+    Args:
+        * value: Naive datetime, in UTC
+        * column_type: DATE, DATETIME or TIMESTAMP
+
+    Returns:
+        * SQL literal
+    """
+    if column_type == 'DATE':
+        return watermark_literal(value.date())
+    elif column_type == 'TIMESTAMP':
+        return watermark_literal(value.replace(tzinfo=timezone.utc))
+    else:
+        return watermark_literal(value)
+
+
+def get_partition_filter(table: Table, partition_id: str) -> str:
+    """
+    Build the Storage API row restriction of the rows of a partition.
+
+    Args:
+        * table: Partitioned BigQuery Table
+        * partition_id: ID of the partition, e.g. 20230102 for a day
+
+    Returns:
+        * Row restriction
+
+    Raises:
+        * ValueError: if the table is not partitioned
+    """
+    if table.range_partitioning is not None:
+        column = f'`{table.range_partitioning.field}`'
+        if partition_id == NULL_PARTITION_ID:
+            return f'{column} IS NULL'
+        if partition_id == UNPARTITIONED_PARTITION_ID:
+            partition_range = table.range_partitioning.range_
+            return (f'{column} < {partition_range.start} OR '
+                    f'{column} >= {partition_range.end}')
+        range_start = int(partition_id)
+        range_end = range_start + table.range_partitioning.range_.interval
+        return f'{column} >= {range_start} AND {column} < {range_end}'
+
+    time_partitioning = table.time_partitioning
+    if time_partitioning is None:
+        raise ValueError('Source table is not partitioned.')
+
+    if time_partitioning.field is None:
+        # ingestion-time partitioning pseudo-column
+        column, column_type = '_PARTITIONTIME', 'TIMESTAMP'
+    else:
+        column = f'`{time_partitioning.field}`'
+        column_type = next(field.field_type
+                           for field in table.schema
+                           if field.name == time_partitioning.field)
+    if partition_id == NULL_PARTITION_ID:
+        return f'{column} IS NULL'
+    if partition_id == UNPARTITIONED_PARTITION_ID:
+        if time_partitioning.field is None:
+            # Rows in the streaming buffer
+            return f'{column} IS NULL'
+        return (f'{column} < {_time_literal(MIN_PARTITION_TIME, column_type)} '
+                f'OR {column} >= '
+                f'{_time_literal(MAX_PARTITION_TIME, column_type)}')
+
+    partitioning_type = time_partitioning.type_
+    start = datetime.strptime(partition_id,
+                              PARTITION_ID_FORMATS[partitioning_type])
+    end = _next_partition_start(start, partitioning_type)
+    return (f'{column} >= {_time_literal(start, column_type)} AND '
+            f'{column} < {_time_literal(end, column_type)}')
+
+
+@dataclass
+class PartitionSelection:
+    """
+    Partitions of a table selected for a run, and the state to store
+    once they are checked.
+    """
+    partitions: List[Partition]
+
+    # Store of the last modification time of the checked partitions,
+    # if only checking the changed partitions
+    store: Optional[WatermarkStore] = None
+    key: str = ''
+
+    # Changed partitions left out of the recent partitions, to be selected
+    # again by the next run
+    skipped: List[Partition] = field(default_factory=list)
+
+    def commit(self) -> None:
+        """
+        Store the last modification time of the checked partitions, once
+        all their rows are validated and their failures logged.
+
+        If changed partitions were skipped, the time just before the
+        earliest of their modifications is stored instead, so they are
+        still changed for the next run, which may check some of the
+        partitions again.
+
+        Returns:
+            * None
+        """
+        if self.store is None:
+            return
+        if self.skipped:
+            last_modified_time = min(
+                partition.last_modified_time
+                for partition in self.skipped) - timedelta(microseconds=1)
+        elif self.partitions:
+            last_modified_time = max(
+                partition.last_modified_time for partition in self.partitions)
+        else:
+            return
+        self.store.set(self.key, watermark_literal(last_modified_time))
+
+
+def _query_partitions(bq_legacy_client: BigQueryLegacyClient,
+                      table_metadata: TableMetadata,
+                      modified_since: Optional[str]) -> List[Any]:
+    """
+    Query the partitions of a table with rows, from the most recent one.
+
+    Args:
+        * bq_legacy_client: BigQuery Legacy API client
+        * table_metadata: TableMetadata of the table
+        * modified_since: optional TIMESTAMP SQL literal, to only query the
+            partitions modified after it
+
+    Returns:
+        * List of partition rows
+    """
+    modified = (f'AND last_modified_time > {modified_since} '
+                if modified_since is not None else '')
+    query = ('SELECT partition_id, total_rows, last_modified_time '
+             f'FROM `{table_metadata.project_id}.{table_metadata.dataset_id}'
+             '.INFORMATION_SCHEMA.PARTITIONS` '
+             'WHERE table_name = @table_name AND total_rows > 0 '
+             f'{modified}ORDER BY partition_id DESC')
+    return run_query(bq_legacy_client, query, [
+        ScalarQueryParameter('table_name', 'STRING', table_metadata.table_name)
+    ])
+
+
+def select_partitions(bq_legacy_client: BigQueryLegacyClient,
+                      table_metadata: TableMetadata,
+                      partition_config: PartitionConfig,
+                      store: Optional[WatermarkStore],
+                      columns: List[str]) -> PartitionSelection:
+    """
+    Select the partitions of a table to check, from the most recent one.
+
+    Rows which are not in a partition are selected as the __UNPARTITIONED__
+    partition: rows with a partitioning column out of the partitioned range,
+    or rows in the streaming buffer of ingestion-time partitioned tables.
+
+    Note: Rows in the streaming buffer of a column partitioned table are
+    read with the partition of their column, so they are not checked until
+    it is listed.
+
+    Args:
+        * bq_legacy_client: BigQuery Legacy API client
+        * table_metadata: TableMetadata of the partitioned table
+        * partition_config: PartitionConfig of the partitions to select
+        * store: WatermarkStore, required to only select the partitions
+            changed since the last run
+        * columns: Names of the checked columns
+
+    Returns:
+        * PartitionSelection
+
+    Raises:
+        * ValueError: if the table is not partitioned, or changed partitions
+            are selected without a store
+    """
+    table = get_table(bq_legacy_client, table_metadata)
+    if table is None:
+        raise ValueError('Source table does not exist.')
+
+    selection = PartitionSelection(partitions=[])
+    if partition_config.get('changed', False):
+        if store is None:
+            raise ValueError('Changed partitions require a state_table.')
+        selection.store = store
+        selection.key = get_state_key(table_metadata, PARTITIONS_STATE_COLUMN,
+                                      columns)
+
+    rows = _query_partitions(
+        bq_legacy_client, table_metadata,
+        selection.store.get(selection.key) if selection.store else None)
+    for row in rows:
+        selection.partitions.append(
+            Partition(partition_id=row['partition_id'],
+                      partition_filter=get_partition_filter(
+                          table, row['partition_id']),
+                      total_rows=row['total_rows'],
+                      last_modified_time=row['last_modified_time']))
+
+    if 'recent' in partition_config:
+        recent = [
+            partition for partition in selection.partitions
+            if partition.partition_id not in (NULL_PARTITION_ID,
+                                              UNPARTITIONED_PARTITION_ID)
+        ]
+        selection.partitions = recent[:partition_config['recent']]
+        if selection.store is not None:
+            selection.skipped = recent[partition_config['recent']:]
+
+    return selection
@@ -0,0 +1,119 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from contextlib import contextmanager
+import cProfile
+import marshal
+import pstats
+from typing import Iterator, Optional
+from urllib.parse import quote
+
+from google.auth.transport.requests import AuthorizedSession
+
+from core.auth import Credentials
+from core.config import ProfileConfig
+
+DEFAULT_PROFILE_PREFIX = 'profiles'
+
+GCS_UPLOAD_URL = 'https://storage.googleapis.com/upload/storage/v1/b/{bucket}/o'
+
+
+def get_profile_name(profile_config: ProfileConfig, workflow_execution_id: str,
+                     name: str) -> str:
+    """
+    Get the GCS object name of the profile of a run.
+
+    Args:
+        * profile_config: ProfileConfig
+        * workflow_execution_id: Workflow execution ID of the request
+        * name: Name of what was profiled, e.g. a column
+
+    Returns:
+        * GCS object name
+    """
+    prefix = profile_config.get('prefix', DEFAULT_PROFILE_PREFIX).strip('/')
+    return f'{prefix}/{workflow_execution_id}/{name}.prof'
+
+
+def upload_to_gcs(credentials: Credentials, bucket: str, name: str,
+                  data: bytes) -> None:
+    """
+    Upload data to a GCS object, with the JSON API, as per the
+    [docs](https://cloud.google.com/storage/docs/uploading-objects#rest-upload-objects).
+
+    Args:
+        * credentials: Credentials for User having
+            "Storage Object Creator" permission on the bucket
+        * bucket: Name of the GCS bucket
+        * name: Name of the GCS object
+        * data: Content of the object
+
+    Returns:
+        * None
+
+    Raises:
+        * HTTPError: if the upload fails
+    """
+    session = AuthorizedSession(credentials)
+    response = session.post(
+        GCS_UPLOAD_URL.format(bucket=quote(bucket, safe='')),
+        params={
+            'uploadType': 'media',
+            'name': name
+        },
+        data=data,
+        headers={'Content-Type': 'application/octet-stream'})
+    response.raise_for_status()
+
+
+@contextmanager
+def profile_run(profile_config: Optional[ProfileConfig],
+                credentials: Credentials, workflow_execution_id: str,
+                name: str) -> Iterator[None]:
+    """
+    Profile the code run in the context with cProfile, if a ProfileConfig is
+    given, uploading the stats to GCS once it succeeds. They can be loaded with
+    `pstats.Stats(filename)`, or visualized with e.g. snakeviz.
+
+    Note: Only the calling thread is profiled, e.g. not the threads reading
+    streams in parallel.
+
+    Args:
+        * profile_config: optional, ProfileConfig
+        * credentials: Credentials of the GCS client
+        * workflow_execution_id: Workflow execution ID of the request
+        * name: Name of what is profiled, e.g. a column
+
+    Returns:
+        * Context manager
+    """
+    if profile_config is None:
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+
+    # Same format as pstats.Stats.dump_stats
+    stats = marshal.dumps(
+        pstats.Stats(profiler).stats)  # type: ignore[attr-defined]
+    upload_to_gcs(credentials, profile_config['bucket'],
+                  get_profile_name(profile_config, workflow_execution_id, name),
+                  stats)
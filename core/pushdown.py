@@ -0,0 +1,139 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional
+
+from google.cloud.bigquery import Client as BigQueryLegacyClient
+from google.cloud.bigquery import SchemaField
+
+from core.bigquery import get_table
+from core.bigquery import TableMetadata
+from core.config import ColumnConfig
+from rules.sql import map_parser_to_sql_rules
+
+
+@dataclass
+class Pushdown:
+    """
+    Filter of the rows to read from BigQuery, so only the rows which may fail
+    a parser or rule of the checked columns are sent back.
+    """
+    # Storage API row restriction, similar to a WHERE clause
+    row_restriction: str
+
+    # Number of rows in the table, i.e. including the filtered rows
+    total_rows: int
+
+
+def get_column_predicate(column_config: ColumnConfig,
+                         field: SchemaField) -> Optional[str]:
+    """
+    Build a SQL predicate which is only TRUE for the values of a column
+    that are parsed and satisfy every rule.
+
+    Args:
+        * column_config: ColumnConfig of the column
+        * field: BigQuery SchemaField of the column
+
+    Returns:
+        * SQL predicate, or None if the parser or a rule has no
+            SQL equivalent for the column
+    """
+    column_types, usable_rules = map_parser_to_sql_rules(
+        column_config['parser'])
+    if field.field_type not in column_types or field.mode == 'REPEATED':
+        return None
+
+    column = f"`{column_config['column']}`"
+    # Parsers only fail for NULL values of the supported column types
+    predicates = [f'{column} IS NOT NULL']
+    for rule_config in column_config['rules']:
+        rule_name = rule_config['rule']
+        if rule_name not in usable_rules:
+            return None
+        try:
+            predicate = usable_rules[rule_name](**rule_config.get('args', {}))
+        except NotImplementedError:
+            # e.g. untranslatable regex
+            return None
+        predicates.append(predicate(column))
+
+    return ' AND '.join(predicates)
+
+
+def build_row_restriction(column_configs: List[ColumnConfig],
+                          schema: List[SchemaField]) -> Optional[str]:
+    """
+    Build a Storage API row restriction selecting only the rows where
+    any column may fail its parser or rules.
+
+    Args:
+        * column_configs: List of ColumnConfigs
+        * schema: BigQuery table schema
+
+    Returns:
+        * Row restriction, or None if any column cannot be filtered in SQL,
+            in which case all rows must be read
+    """
+    fields = {field.name: field for field in schema}
+
+    predicates = []
+    for column_config in column_configs:
+        field = fields.get(column_config['column'])
+        if field is None:
+            # e.g. nested columns
+            return None
+        predicate = get_column_predicate(column_config, field)
+        if predicate is None:
+            return None
+        predicates.append(predicate)
+
+    # Checking for NULLs first, no predicate evaluates to NULL
+    return 'NOT (' + ' AND '.join(f'({p})' for p in predicates) + ')'
+
+
+def get_pushdown(bq_legacy_client: BigQueryLegacyClient,
+                 table_metadata: TableMetadata,
+                 column_configs: List[ColumnConfig]) -> Optional[Pushdown]:
+    """
+    Get a Pushdown for the table, if all the columns can be filtered in SQL.
+
+    Note: Tables with a streaming buffer are not filtered, since their
+    number of rows is only an estimate, nor tables read with a partition
+    filter, since only the number of rows of the table is known.
+
+    Args:
+        * bq_legacy_client: BigQuery Legacy API client
+        * table_metadata: TableMetadata object
+        * column_configs: List of ColumnConfigs
+
+    Returns:
+        * Pushdown, or None if all rows must be read
+    """
+    if table_metadata.partition_filter:
+        return None
+
+    table = get_table(bq_legacy_client, table_metadata)
+    if (table is None or table.num_rows is None or
+            table.streaming_buffer is not None):
+        return None
+
+    row_restriction = build_row_restriction(column_configs, table.schema)
+    if row_restriction is None:
+        return None
+
+    return Pushdown(row_restriction=row_restriction, total_rows=table.num_rows)
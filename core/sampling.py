@@ -0,0 +1,301 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+from collections.abc import Generator
+from collections.abc import Iterable
+from enum import Enum
+from itertools import chain
+from itertools import islice
+import math
+import random
+import sys
+from typing import Callable, List, Optional, Tuple, TypeVar
+
+import pyarrow as pa
+
+from core.bigquery import CellsBatch
+from core.config import ReadConfig
+
+T = TypeVar('T')
+Chunk = TypeVar('Chunk')
+
+# Number of rows sampled at once, when sampling rows one by one
+ROWS_CHUNK_SIZE = 1000
+
+# z-score of a two-sided 95% confidence interval
+Z_95 = 1.959964
+
+
+class SamplingMethod(Enum):
+    """
+    How the rows of a table are sampled.
+    """
+    # Each row with the same probability
+    BERNOULLI = 'BERNOULLI'
+    # A fixed number of rows, all subsets being equally likely
+    RESERVOIR = 'RESERVOIR'
+
+
+def _take_items(items: List[T], indices: List[int]) -> List[T]:
+    return [items[index] for index in indices]
+
+
+def _concat_items(chunks: List[List[T]]) -> List[T]:
+    return list(chain.from_iterable(chunks))
+
+
+def _take_cells_batches(cells_batches: List[CellsBatch],
+                        indices: List[int]) -> List[CellsBatch]:
+    return [
+        _take_items(cells, indices) if isinstance(cells, list) else cells.take(
+            pa.array(indices, pa.int64())) for cells in cells_batches
+    ]
+
+
+def _concat_cells_batches(chunks: List[List[CellsBatch]]) -> List[CellsBatch]:
+    columns = zip(*chunks)
+    return [
+        _concat_items(list(cells))
+        if isinstance(cells[0], list) else pa.concat_arrays(list(cells))
+        for cells in columns
+    ]
+
+
+class Sampler:
+    """
+    Uniform random sample of the rows read from a table, which counts all the
+    rows read to extrapolate the outcomes of the sampled rows.
+
+    Rows are skipped in geometrically distributed gaps (Algorithm L for
+    reservoir samples), so sampling costs random draws proportional to the
+    sample size, rather than to the number of rows read.
+
+    Args:
+        * percentage: Probability of sampling each row, in percent
+        * size: Number of rows to sample, out of all the rows read
+        * seed (optional): Seed of the random number generator
+
+    Raises:
+        * ValueError: if neither or both of percentage and size are set,
+            or they are out of range
+    """
+
+    method: SamplingMethod
+    rows_read: int
+    rows_sampled: int
+
+    def __init__(self,
+                 percentage: Optional[float] = None,
+                 size: Optional[int] = None,
+                 seed: Optional[int] = None) -> None:
+        if (percentage is None) == (size is None):
+            raise ValueError(
+                'Specify either a sample percentage or a sample size.')
+
+        self._random = random.Random(seed)
+        self.rows_read = 0
+        self.rows_sampled = 0
+
+        if percentage is not None:
+            if not 0 < percentage <= 100:
+                raise ValueError('Sample percentage must be in (0, 100].')
+            self.method = SamplingMethod.BERNOULLI
+            self._probability = percentage / 100
+            self._next_index = self._gap()
+        elif size is not None:
+            if size < 1:
+                raise ValueError('Sample size must be positive.')
+            self.method = SamplingMethod.RESERVOIR
+            self._size = size
+            self._probability = self._weight()
+            self._next_index = size + self._gap()
+
+    def _weight(self) -> float:
+        """
+        Draw the factor of the reservoir replacement probability,
+        the largest of size uniform random numbers.
+
+        Returns:
+            * Random number in (0, 1]
+        """
+        return math.exp(math.log(1 - self._random.random()) / self._size)
+
+    def _gap(self) -> int:
+        """
+        Draw the number of rows skipped until the next sampled row.
+
+        Returns:
+            * Geometrically distributed number of rows
+        """
+        if self._probability >= 1:
+            return 0
+        elif self._probability <= 0:
+            # the reservoir replacement probability underflowed
+            return sys.maxsize
+        return int(
+            math.log(1 - self._random.random()) /
+            math.log1p(-self._probability))
+
+    def _select(self, size: int) -> List[Tuple[int, Optional[int]]]:
+        """
+        Select the rows to sample among the next rows read.
+
+        Args:
+            * size: Number of rows read
+
+        Returns:
+            * List of (index, slot) Tuples, with the index of a sampled row
+                among the rows read, and the reservoir slot it replaces if
+                sampling a fixed number of rows
+        """
+        offset = self.rows_read
+        end = offset + size
+        self.rows_read = end
+        selected: List[Tuple[int, Optional[int]]] = []
+
+        if self.method == SamplingMethod.BERNOULLI:
+            while self._next_index < end:
+                selected.append((self._next_index - offset, None))
+                self._next_index += 1 + self._gap()
+            return selected
+
+        # the first rows fill the reservoir, then replace random slots
+        for index in range(offset, min(end, self._size)):
+            selected.append((index - offset, index))
+        while self._next_index < end:
+            slot = self._random.randrange(self._size)
+            selected.append((self._next_index - offset, slot))
+            self._probability *= self._weight()
+            self._next_index += 1 + self._gap()
+        return selected
+
+    def _sample(
+            self, chunks: Iterable[Chunk], get_size: Callable[[Chunk], int],
+            take: Callable[[Chunk, List[int]], Chunk],
+            concat: Callable[[List[Chunk]],
+                             Chunk]) -> Generator[Chunk, None, None]:
+        """
+        Sample the rows of chunks of rows.
+
+        Args:
+            * chunks: Iterator of chunks of rows
+            * get_size: Func that gets the number of rows of a chunk
+            * take: Func that takes the rows of a chunk at some indices
+            * concat: Func that concatenates chunks
+
+        Returns:
+            * Iterator of chunks of sampled rows - with a fixed number of
+                rows, a single chunk once all rows are read
+        """
+        reservoir: List[Chunk] = []
+        for chunk in chunks:
+            selected = self._select(get_size(chunk))
+            if self.method == SamplingMethod.BERNOULLI:
+                if selected:
+                    self.rows_sampled += len(selected)
+                    yield take(chunk, [index for index, _ in selected])
+                continue
+
+            for index, slot in selected:
+                row = take(chunk, [index])
+                if slot is not None and slot < len(reservoir):
+                    reservoir[slot] = row
+                else:
+                    reservoir.append(row)
+
+        if reservoir:
+            self.rows_sampled = len(reservoir)
+            yield concat(reservoir)
+
+    def sample_rows(self, rows: Iterable[T]) -> Generator[T, None, None]:
+        """
+        Sample rows, e.g. the cells of each row.
+
+        Args:
+            * rows: Iterator of rows
+
+        Returns:
+            * Iterator of sampled rows
+        """
+        iterator = iter(rows)
+        chunks = iter(lambda: list(islice(iterator, ROWS_CHUNK_SIZE)), [])
+        for chunk in self._sample(chunks, len, _take_items, _concat_items):
+            yield from chunk
+
+    def sample_batches(
+        self, batches: Iterable[List[CellsBatch]]
+    ) -> Generator[List[CellsBatch], None, None]:
+        """
+        Sample the rows of batches of cells of multiple columns.
+
+        Args:
+            * batches: Iterator of Lists of batches of cells
+
+        Returns:
+            * Iterator of Lists of batches of sampled cells
+        """
+        return self._sample(batches,
+                            lambda cells_batches: len(cells_batches[0]),
+                            _take_cells_batches, _concat_cells_batches)
+
+
+def get_sampler(read_config: ReadConfig | None) -> Optional[Sampler]:
+    """
+    Get a Sampler for the rows read, if the ReadConfig requests a sample.
+
+    Args:
+        * read_config: optional ReadConfig
+
+    Returns:
+        * Sampler, or None if all the rows read must be checked
+
+    Raises:
+        * ValueError: if the sampling options are invalid
+    """
+    read_config = read_config or ReadConfig()
+    percentage = read_config.get('sample_percentage')
+    size = read_config.get('sample_size')
+    if percentage is None and size is None:
+        return None
+    return Sampler(percentage, size, read_config.get('sample_seed'))
+
+
+def wilson_interval(successes: int,
+                    trials: int,
+                    z: float = Z_95) -> Tuple[float, float]:
+    """
+    Wilson score confidence interval of a proportion, which is accurate
+    for small samples and proportions close to 0 or 1.
+
+    Args:
+        * successes: Number of successes
+        * trials: Number of trials
+        * z: z-score of the confidence level
+
+    Defaults:
+        * z: 95% confidence level
+
+    Returns:
+        * Tuple of the lower and upper bounds of the proportion
+    """
+    if trials == 0:
+        return 0.0, 1.0
+
+    proportion = successes / trials
+    denominator = 1 + z**2 / trials
+    center = (proportion + z**2 / (2 * trials)) / denominator
+    margin = z * math.sqrt(proportion * (1 - proportion) / trials + z**2 /
+                           (4 * trials**2)) / denominator
+    return max(center - margin, 0.0), min(center + margin, 1.0)
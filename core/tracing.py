@@ -0,0 +1,210 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from contextlib import contextmanager
+import os
+from typing import Any, Dict, Iterator, Mapping, Optional
+import uuid
+
+try:
+    import opentelemetry.context as otel_context
+    import opentelemetry.propagate as propagate
+    import opentelemetry.trace as trace
+except ImportError:  # OpenTelemetry is an optional dependency
+    trace = None
+
+TRACER_NAME = 'dqm'
+
+# Environment variables configuring an exporter for local testing
+TRACE_EXPORTER_ENV = 'DQM_TRACE_EXPORTER'
+TRACE_FILE_ENV = 'DQM_TRACE_FILE'
+DEFAULT_TRACE_FILE = 'traces.jsonl'
+
+Attributes = Dict[str, Any]
+
+
+class _NoopSpan:
+    """
+    Stand-in for spans, when OpenTelemetry is not installed.
+    """
+
+    def is_recording(self) -> bool:
+        return False
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, attributes: Attributes) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+_exporter: Any = None
+
+
+def configure_tracing(exporter: Optional[str] = None) -> Any:
+    """
+    Export spans locally, e.g. for testing, with the OpenTelemetry SDK:
+    * memory: kept in memory, see `get_finished_spans()` of the exporter
+    * file: appended to the file in the DQM_TRACE_FILE environment
+        variable as JSON lines (default: traces.jsonl)
+
+    Otherwise spans go to the tracer provider configured for the process,
+    e.g. by an OpenTelemetry distro, or are dropped if there is none.
+
+    Args:
+        * exporter (optional): memory or file, or None to read it from the
+            DQM_TRACE_EXPORTER environment variable
+
+    Returns:
+        * Span exporter, or None if no exporter is configured
+
+    Raises:
+        * ValueError: if an invalid exporter is provided
+        * ImportError: if the OpenTelemetry SDK is not installed
+    """
+    global _exporter
+
+    exporter = exporter or os.getenv(TRACE_EXPORTER_ENV)
+    if not exporter:
+        return None
+    if exporter not in ('memory', 'file'):
+        raise ValueError('Invalid trace exporter specified.')
+    if _exporter is not None:
+        # The tracer provider can only be set once per process
+        return _exporter
+
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import \
+        InMemorySpanExporter
+
+    if exporter == 'memory':
+        _exporter = InMemorySpanExporter()
+    else:
+        _exporter = ConsoleSpanExporter(
+            out=open(os.getenv(TRACE_FILE_ENV) or DEFAULT_TRACE_FILE, 'a'),
+            formatter=lambda span: span.to_json(indent=None) + os.linesep)
+
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(_exporter))
+    trace.set_tracer_provider(provider)
+    return _exporter
+
+
+def _get_workflow_context(workflow_execution_id: str) -> Any:
+    """
+    Get a remote parent context for the requests of a workflow execution,
+    so all of them share a trace, with the execution ID as trace ID.
+
+    Returns:
+        * Context, or None if the execution ID is not a UUID
+    """
+    try:
+        trace_id = uuid.UUID(workflow_execution_id).hex
+    except ValueError:
+        return None
+    span_context = trace.SpanContext(trace_id=int(trace_id, 16),
+                                     span_id=int(trace_id[:16], 16),
+                                     is_remote=True,
+                                     trace_flags=trace.TraceFlags(
+                                         trace.TraceFlags.SAMPLED))
+    return trace.set_span_in_context(trace.NonRecordingSpan(span_context))
+
+
+@contextmanager
+def trace_request(headers: Mapping[str, str],
+                  workflow_execution_id: str) -> Iterator[None]:
+    """
+    Continue the trace of a request in the context: from its W3C
+    `traceparent` header, or else from its workflow execution ID.
+
+    Args:
+        * headers: HTTP headers of the request
+        * workflow_execution_id: Workflow execution ID of the request
+
+    Returns:
+        * Context manager
+    """
+    if trace is None:
+        yield
+        return
+
+    context = propagate.extract(headers)
+    if not trace.get_current_span(context).get_span_context().is_valid:
+        context = _get_workflow_context(workflow_execution_id) or context
+
+    token = otel_context.attach(context)
+    try:
+        yield
+    finally:
+        otel_context.detach(token)
+
+
+@contextmanager
+def start_span(name: str, **attributes: Any) -> Iterator[Any]:
+    """
+    Trace the code run in the context with a span, child of the current one.
+
+    Args:
+        * name: Name of the span
+        * attributes: Attributes of the span, e.g. row counts
+
+    Returns:
+        * Context manager of the span, to set more attributes
+    """
+    if trace is None:
+        yield _NOOP_SPAN
+        return
+
+    with trace.get_tracer(TRACER_NAME).start_as_current_span(
+            name, attributes=attributes) as span:
+        yield span
+
+
+def get_context() -> Any:
+    """
+    Get the current context, to parent spans started in other threads.
+
+    Returns:
+        * Context, or None if OpenTelemetry is not installed
+    """
+    return otel_context.get_current() if trace is not None else None
+
+
+def start_detached_span(name: str, context: Any, **attributes: Any) -> Any:
+    """
+    Start a span which is not made current, e.g. in a generator or another
+    thread, which must be ended explicitly.
+
+    Args:
+        * name: Name of the span
+        * context: Context of the parent span, from get_context
+        * attributes: Attributes of the span
+
+    Returns:
+        * Span
+    """
+    if trace is None:
+        return _NOOP_SPAN
+    return trace.get_tracer(TRACER_NAME).start_span(name,
+                                                    context=context,
+                                                    attributes=attributes)
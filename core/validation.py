@@ -0,0 +1,435 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from dataclasses import dataclass
+from enum import Enum
+from functools import reduce
+from typing import Any, Dict, List, Optional, Tuple
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from core.aggregation import ViolationAggregator
+from core.bigquery import CellsBatch
+from core.config import ColumnConfig
+from core.config import compile_rule_checker
+from core.config import CompiledChecker
+from core.config import generate_selected_arrow_rules
+from core.config import generate_selected_rules
+from core.logging import Logger
+from core.sampling import wilson_interval
+from rules import map_parser_to_rules
+from rules.arrow import map_parser_to_arrow_rules
+from rules.common import ArrowParser
+from rules.common import ArrowRuleChecker
+from rules.common import RuleChecker
+from rules.common import TypeParser
+
+
+@dataclass
+class ColumnStats:
+    """
+    Counts of the outcomes of processing a column.
+    """
+    rows: int = 0
+    parse_failures: int = 0
+    rule_errors: int = 0
+    check_violations: int = 0
+    # Rows with a parse failure, rule error or rule check violation
+    failed_rows: int = 0
+    # Rows read, but not checked since they were not sampled
+    unsampled_rows: int = 0
+    # Rows filtered out in BigQuery, which satisfy all the rules
+    pushed_down_rows: int = 0
+
+    @property
+    def read_rows(self) -> int:
+        return self.rows + self.unsampled_rows
+
+    @property
+    def total_rows(self) -> int:
+        return self.read_rows + self.pushed_down_rows
+
+    def estimate_failed_rows(self) -> Tuple[float, float, float]:
+        """
+        Extrapolate the number of failed rows of the table from the rows
+        checked, if they were sampled from the rows read.
+
+        Returns:
+            * Tuple of the estimated number of failed rows, and the lower
+                and upper bounds of its 95% confidence interval
+        """
+        lower, upper = wilson_interval(self.failed_rows, self.rows)
+        rate = self.failed_rows / self.rows if self.rows else 0.0
+        return (rate * self.read_rows, lower * self.read_rows,
+                upper * self.read_rows)
+
+    def describe(self) -> str:
+        """
+        Summarize the counts as a human readable message.
+
+        Returns:
+            * Summary message
+        """
+        pushed_down = (f' ({self.pushed_down_rows} passed all rules in '
+                       f'BigQuery)' if self.pushed_down_rows else '')
+        message = (f'DQM processed {self.total_rows} rows{pushed_down}, with '
+                   f'{self.parse_failures} parse failures, '
+                   f'{self.rule_errors} rule errors, '
+                   f'{self.check_violations} rule check violations.')
+        if self.unsampled_rows:
+            estimate, lower, upper = self.estimate_failed_rows()
+            message += (f' Checked a sample of {self.rows} of '
+                        f'{self.read_rows} rows read, with an estimated '
+                        f'{estimate:.0f} failed rows '
+                        f'({estimate / self.total_rows:.2%}), '
+                        f'95% CI: {lower:.0f} to {upper:.0f}.')
+        return message
+
+
+class RulePath(Enum):
+    """
+    How a rule was applied to the values of a column.
+    """
+    PYTHON = 'python'
+    ARROW = 'arrow'
+
+
+class ColumnValidator:
+    """
+    Applies the configured parser and rules of a column to its cells,
+    logging any failures and counting the outcomes.
+
+    If the column has an aggregation config, failures are aggregated
+    until the validator is flushed.
+
+    Failures are logged with the offset of their row among the rows
+    validated, so retries of a run log them with the same insert IDs.
+
+    Args:
+        * column_config: ColumnConfig of the column
+        * logger: Logger for parser & rule failures
+        * partition_id: optional, partition of the rows validated, if
+            partitions are validated separately
+
+    Raises:
+        * ValueError: if non-existent parser or rule names are configured
+    """
+
+    column_config: ColumnConfig
+    column: str
+    rules: List[RuleChecker]
+    arrow_rules: List[Optional[ArrowRuleChecker]]
+    rule_paths: Dict[str, RulePath]
+    logger: Logger | ViolationAggregator
+    partition_id: Optional[str]
+    stats: ColumnStats
+
+    def __init__(self,
+                 column_config: ColumnConfig,
+                 logger: Logger,
+                 partition_id: Optional[str] = None) -> None:
+        self.column_config = column_config
+        self.column = column_config['column']
+        parser, usable_rules = map_parser_to_rules(column_config['parser'])
+        self.parser: TypeParser = parser
+        self.rules = generate_selected_rules(column_config['rules'],
+                                             usable_rules)
+        self.checker: CompiledChecker = compile_rule_checker(parser, self.rules)
+
+        arrow_parser, usable_arrow_rules = map_parser_to_arrow_rules(
+            column_config['parser'])
+        self.arrow_parser: Optional[ArrowParser] = arrow_parser
+        self.arrow_rules = generate_selected_arrow_rules(
+            column_config['rules'], usable_arrow_rules)
+        self.rule_paths = {}
+
+        self.logger = logger
+        if 'aggregation' in column_config:
+            self.logger = ViolationAggregator(logger,
+                                              column_config['aggregation'])
+        self.partition_id = partition_id
+        self.stats = ColumnStats()
+
+    def describe(self) -> str:
+        """
+        Summarize the outcomes of processing the column, and how each rule
+        was applied if the column was validated in batches.
+
+        Returns:
+            * Summary message
+        """
+        message = self.stats.describe()
+        if self.rule_paths:
+            paths = ', '.join(f'{rule}={path.value}'
+                              for rule, path in self.rule_paths.items())
+            message += f' Rule paths: {paths}.'
+        return message
+
+    def flush(self) -> None:
+        """
+        Log the aggregated failures, if the column aggregates them.
+
+        Returns:
+            * None
+        """
+        if isinstance(self.logger, ViolationAggregator):
+            self.logger.flush()
+
+    def log_failure(self, rule_index: Optional[int], error: str, value: Any,
+                    row_offset: int) -> None:
+        """
+        Log a failure of a row which was counted elsewhere, e.g. by a
+        worker process checking the cells of the column.
+
+        Args:
+            * rule_index: index of the failed rule in rules, or None if
+                the parser failed
+            * error: error that occurred
+            * value: cell that fails to parse, or parsed value that fails
+                the rule
+            * row_offset: offset of the row of the value
+
+        Returns:
+            * None
+        """
+        if rule_index is None:
+            self.logger.parser(self.column,
+                               self.parser.__name__,
+                               error,
+                               value,
+                               row_offset=row_offset,
+                               partition_id=self.partition_id)
+        else:
+            self._log_rule(self.rules[rule_index], error, value, row_offset)
+
+    def _log_rule(self, rule: RuleChecker, error: str, value: Any,
+                  row_offset: int) -> None:
+        """
+        Log a rule failure of a row.
+        """
+        self.logger.rule(self.column,
+                         rule.__name__,
+                         error,
+                         value,
+                         rule.__kwdefaults__,
+                         row_offset=row_offset,
+                         partition_id=self.partition_id)
+
+    def _check_rule(self, rule: RuleChecker, value: Any,
+                    row_offset: int) -> bool:
+        """
+        Check a parsed value against a rule.
+
+        Args:
+            * rule: RuleChecker
+            * value: parsed value
+            * row_offset: offset of the row of the value
+
+        Returns:
+            * True if the rule failed
+        """
+        try:
+            result = rule(value)
+        except Exception as e:
+            # rule check failed
+            self._log_rule(rule, str(e), value, row_offset)
+            self.stats.rule_errors += 1
+            return True
+        else:
+            if result is not None:
+                # rule check violated
+                self._log_rule(rule, result, value, row_offset)
+                self.stats.check_violations += 1
+                return True
+            return False
+
+    def _check_cell(self, cell: Any, row_offset: int) -> bool:
+        """
+        Parse a cell and check it against every rule.
+
+        Args:
+            * cell: raw cell value
+            * row_offset: offset of the row of the cell
+
+        Returns:
+            * True if the parser or any rule failed
+        """
+        try:
+            value = self.parser(cell)
+        except Exception as e:
+            # parsing failed
+            self.logger.parser(self.column,
+                               self.parser.__name__,
+                               str(e),
+                               cell,
+                               row_offset=row_offset,
+                               partition_id=self.partition_id)
+            self.stats.parse_failures += 1
+            return True
+        else:
+            failed = False
+            for rule in self.rules:
+                failed |= self._check_rule(rule, value, row_offset)
+            return failed
+
+    def _check_failed_rules(self, cell: Any, mask: int,
+                            row_offset: int) -> None:
+        """
+        Parse a cell again and check it against the rules it failed, to log
+        the failures.
+
+        Args:
+            * cell: raw cell value
+            * mask: bitmask of the failed rules
+            * row_offset: offset of the row of the cell
+
+        Returns:
+            * None
+        """
+        value = self.parser(cell)
+        for i, rule in enumerate(self.rules):
+            if mask >> i & 1:
+                self._check_rule(rule, value, row_offset)
+
+    def validate(self, cell: Any) -> None:
+        """
+        Parse a cell and check it against every rule.
+
+        Cells are checked with the compiled checker of the column, and only
+        the failing cells are checked one rule at a time to log them.
+
+        Args:
+            * cell: raw cell value
+
+        Returns:
+            * None
+        """
+        try:
+            mask = self.checker(cell)
+        except Exception:
+            # the parser or a rule raised, so log its exact error
+            self._check_cell(cell, self.stats.rows)
+            self.stats.failed_rows += 1
+        else:
+            if mask:
+                self._check_failed_rules(cell, mask, self.stats.rows)
+                self.stats.failed_rows += 1
+        self.stats.rows += 1
+
+    def validate_batch(self, cells: CellsBatch) -> None:
+        """
+        Parse a batch of cells and check them against every rule.
+
+        Arrow arrays are parsed and checked with vectorized parsers and
+        rules where available, so only the failing values are handled in
+        Python - otherwise, each cell is validated one by one.
+
+        Args:
+            * cells: Arrow array or List of raw cell values
+
+        Returns:
+            * None
+        """
+        if isinstance(cells, list) or self.arrow_parser is None:
+            self._validate_cells(cells)
+            return
+
+        try:
+            values = self.arrow_parser(cells)
+        except NotImplementedError:
+            self._validate_cells(cells)
+            return
+
+        # Re-parse failures in Python, to log the exact parser error
+        parsed = pc.is_valid(values)
+        unparsed = pc.invert(parsed)
+        for index, cell in zip(
+                pc.indices_nonzero(unparsed).to_pylist(),
+                cells.filter(unparsed).to_pylist()):
+            self._check_cell(cell, self.stats.rows + index)
+
+        values = values.filter(parsed)
+        # Offsets of the parsed values in the batch
+        indices = pc.indices_nonzero(parsed)
+        failed = reduce(pc.or_, [
+            self._check_rule_batch(rule, arrow_rule, values, indices)
+            for rule, arrow_rule in zip(self.rules, self.arrow_rules)
+        ])
+
+        self.stats.failed_rows += (len(cells) - len(values) +
+                                   (pc.sum(failed).as_py() or 0))
+        self.stats.rows += len(cells)
+
+    def _validate_cells(self, cells: CellsBatch) -> None:
+        """
+        Validate a batch of cells one by one.
+
+        Args:
+            * cells: Arrow array or List of raw cell values
+
+        Returns:
+            * None
+        """
+        if not isinstance(cells, list):
+            cells = cells.to_pylist()
+        for cell in cells:
+            self.validate(cell)
+        for rule in self.rules:
+            self.rule_paths[rule.__name__] = RulePath.PYTHON
+
+    def _check_rule_batch(self, rule: RuleChecker,
+                          arrow_rule: Optional[ArrowRuleChecker],
+                          values: pa.Array,
+                          indices: pa.Array) -> pa.BooleanArray:
+        """
+        Check an Arrow array of parsed values against a rule, with its
+        vectorized version if available, or value by value otherwise.
+
+        Args:
+            * rule: RuleChecker
+            * arrow_rule: optional, vectorized ArrowRuleChecker
+            * values: Arrow array of non-null parsed values
+            * indices: Arrow array of the offsets of the values in the batch
+
+        Returns:
+            * Arrow array, True for the values which failed the rule
+        """
+        results = None
+        if arrow_rule is not None:
+            try:
+                results = arrow_rule(values)
+            except Exception:
+                # e.g. unsupported argument types, so check in Python
+                pass
+
+        if results is None:
+            self.rule_paths[rule.__name__] = RulePath.PYTHON
+            return pa.array([
+                self._check_rule(rule, value, self.stats.rows + index)
+                for value, index in zip(values.to_pylist(), indices.to_pylist())
+            ], pa.bool_())
+
+        self.rule_paths.setdefault(rule.__name__, RulePath.ARROW)
+        violated = pc.is_valid(results)
+        errors = results.filter(violated).to_pylist()
+        violating_values = values.filter(violated).to_pylist()
+        violating_indices = indices.filter(violated).to_pylist()
+        for error, value, index in zip(errors, violating_values,
+                                       violating_indices):
+            self._log_rule(rule, error, value, self.stats.rows + index)
+        self.stats.check_violations += len(errors)
+        return violated
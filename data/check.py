@@ -0,0 +1,82 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from datetime import datetime
+import json
+import os
+import sys
+from typing import List
+
+from core import __version__
+from core.bigquery import TableMetadata
+from core.config import ColumnConfig
+from core.files import get_file_cells_batches_iterator
+from core.logging import get_logger
+from core.validation import ColumnValidator
+
+
+def check_file(filename: str,
+               columns: List[ColumnConfig],
+               file_format: str | None = None) -> List[ColumnValidator]:
+    """
+    Check the columns of a local data file, e.g. a generated test data
+    file, printing any failures as logs to the console.
+
+    Args:
+        * filename: Local path to the CSV, NDJSON, Avro or Parquet file
+        * columns: List of ColumnConfigs, as in process_table requests
+        * file_format (optional): Format of the file, if not its extension
+
+    Returns:
+        * List of ColumnValidators, with the counts of each column
+    """
+    logger = get_logger(None)
+    logger.set_base_log(
+        __version__, 'local',
+        TableMetadata('',
+                      '',
+                      os.path.basename(filename),
+                      full_table_id=filename,
+                      table_path=filename), datetime.utcnow())
+
+    validators = [
+        ColumnValidator(column_config, logger) for column_config in columns
+    ]
+    batches = get_file_cells_batches_iterator(
+        filename, [validator.column for validator in validators], file_format)
+    for cells_batches in batches:
+        for validator, cells in zip(validators, cells_batches):
+            validator.validate_batch(cells)
+
+    for validator in validators:
+        validator.flush()
+    logger.flush(force=True)
+    return validators
+
+
+if __name__ == "__main__":
+    with open(os.getenv('COLUMNS', ''), 'r') as f:
+        column_configs = json.load(f)
+
+    validators = check_file(filename=os.getenv('INFILE', ''),
+                            columns=column_configs,
+                            file_format=os.getenv('FORMAT') or None)
+    for validator in validators:
+        print(f'{validator.column}: {validator.describe()}')
+
+    # Fail, e.g. a staging pipeline, if any row failed
+    sys.exit(1 if any(
+        validator.stats.failed_rows for validator in validators) else 0)
@@ -25,8 +25,11 @@ from core.bigquery import build_table_metadata
 from core.bigquery import create_table
 from core.bigquery import get_bq_legacy_client
 from core.bigquery import get_table
+from core.bigquery import MAX_INSERT_ROWS
+from core.bigquery import MAX_REQUEST_BYTES
 from core.bigquery import upload_rows
 from core.helpers import Buffer
+from core.helpers import get_json_size
 
 from .configs import CONFIGS
 from .helpers import Config
@@ -40,6 +43,26 @@ class Action(Enum):
     REPLACE = 'REPLACE'
 
 
+# Time to upload a batch of rows to adapt the batch size to
+UPLOAD_TARGET_SECONDS = 2.0
+
+
+def estimate_row_bytes(row: Row) -> int:
+    """
+    Estimate the bytes of a row, once encoded as JSON.
+
+    Args:
+        * row: Row of CSV values
+
+    Returns:
+        * Estimated bytes
+    """
+    # Quotes, colon and comma around each key and value
+    return sum(
+        get_json_size(key) + get_json_size(value) + 6
+        for key, value in row.items())
+
+
 def upload_file(filename: str,
                 config: Config,
                 full_table_id: str,
@@ -83,10 +106,15 @@ def upload_file(filename: str,
         csv = DictReader(f, fieldnames=columns)
 
         buffer_: List[Row] = []
-        buffer_size = row_count // 100
+        buffer_size = max(row_count // 100, 1)
         buffer = Buffer[Row](
-            buffer_, buffer_size,
-            lambda rows: upload_rows(bq_legacy_client, table_metadata, rows))
+            buffer_,
+            buffer_size,
+            lambda rows: upload_rows(bq_legacy_client, table_metadata, rows),
+            max_bytes=MAX_REQUEST_BYTES,
+            get_size=estimate_row_bytes,
+            target_seconds=UPLOAD_TARGET_SECONDS,
+            size_limit=MAX_INSERT_ROWS)
 
         for row in csv:
             buffer.push(row)
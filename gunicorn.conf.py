@@ -0,0 +1,31 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+import os
+
+# Serves the Flask app as a long-lived server, e.g. on Cloud Run, so
+# credentials, BigQuery clients & worker pools are created once per instance
+# and reused by every request, instead of once per Cloud Function invocation.
+# Run with: gunicorn (this file is loaded from the working directory)
+wsgi_app = 'main:dqm'
+bind = f':{os.environ.get("PORT", "8080")}'
+
+# A single process, so all requests share its cached clients & credentials,
+# with a thread per concurrent request - reads mostly wait on the network
+workers = 1
+threads = int(os.environ.get('DQM_THREADS', '8'))
+
+# Runs are as long as the table reads, so let the platform time them out
+timeout = 0
@@ -22,11 +22,18 @@ from core.http import handle_http_error
 from core.http import handle_malformed_config
 from core.http import handle_server_error
 from core.http import MalformedConfigError
+from core.tracing import configure_tracing
+from routes.process_batch import process_batch
 from routes.process_column import process_column
+from routes.process_table import process_table
+
+configure_tracing()
 
 dqm = Flask(__name__)
 
 dqm.route('/process_column', methods=['POST'])(validate()(process_column))
+dqm.route('/process_table', methods=['POST'])(validate()(process_table))
+dqm.route('/process_batch', methods=['POST'])(validate()(process_batch))
 
 dqm.register_error_handler(MalformedConfigError, handle_malformed_config)
 dqm.register_error_handler(HTTPException, handle_http_error)
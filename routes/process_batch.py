@@ -0,0 +1,154 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, cast, Dict, List, Mapping, Tuple
+
+from flask.typing import ResponseReturnValue
+from pydantic import BaseModel
+
+from core.http import DQMResponse
+from core.http import MalformedConfigError
+from core.logging import get_logger
+from routes.process_column import ProcessColumnRequest
+from routes.process_table import check_table
+from routes.process_table import ProcessTableRequest
+
+# Number of tables read in parallel by default
+DEFAULT_MAX_PARALLEL_READS = 4
+
+
+class ProcessBatchRequest(BaseModel):
+    requests: List[ProcessColumnRequest]
+    max_parallel: int = DEFAULT_MAX_PARALLEL_READS
+
+
+def coalesce_requests(
+        requests: List[ProcessColumnRequest]) -> List[ProcessTableRequest]:
+    """
+    Coalesce the column requests which only differ by their column_config
+    into table requests, so each table is read once for all their columns.
+
+    Args:
+        * requests: List of ProcessColumnRequests
+
+    Returns:
+        * List of ProcessTableRequests, in the order of the first column
+            request of each table
+
+    Raises:
+        * MalformedConfigError: if a request cannot be coalesced
+    """
+    table_requests: Dict[str, ProcessTableRequest] = {}
+    for request in requests:
+        if (request.profile_config is not None or
+                request.checkpoint_config is not None):
+            raise MalformedConfigError(
+                'A profile_config or checkpoint_config cannot be used in a '
+                'batch, send it to /process_column instead.')
+        if 'check_processes' in (request.read_config or {}):
+            raise MalformedConfigError(
+                'check_processes cannot be used in a batch, send the request '
+                'to /process_column instead.')
+        if 'stream_format' in (request.log_config or {}):
+            raise MalformedConfigError(
+                'Logs of a batch cannot be streamed, send the request to '
+                '/process_column instead.')
+
+        key = request.json(exclude={'column_config'}, sort_keys=True)
+        if key not in table_requests:
+            table_requests[key] = ProcessTableRequest(
+                workflow_execution_id=request.workflow_execution_id,
+                auth_config=request.auth_config,
+                source_table=request.source_table,
+                display_source_table=request.display_source_table,
+                log_table=request.log_table,
+                log_config=request.log_config,
+                state_table=request.state_table,
+                cache_table=request.cache_table,
+                force=request.force,
+                read_config=request.read_config,
+                partition_config=None,
+                columns=[])
+        table_requests[key].columns.append(request.column_config)
+
+    return list(table_requests.values())
+
+
+def run_table(body: ProcessTableRequest) -> DQMResponse:
+    """
+    Check the columns of a table request, returning any error as the
+    response of its read, so the other reads of the batch continue.
+
+    Args:
+        * body: ProcessTableRequest of a table
+
+    Returns:
+        * DQMResponse of the read
+    """
+    table = body.display_source_table.full_table_id
+    try:
+        logger = get_logger(body.log_table, body.auth_config, body.log_config)
+        try:
+            response, _ = cast(Tuple[DQMResponse, int],
+                               check_table(body, logger))
+        finally:
+            # Stops sending logs in the background, even if the check failed
+            logger.close()
+    except MalformedConfigError as error:
+        return DQMResponse(name='MalformedConfigError',
+                           description=f'{table}: {error}',
+                           code=400)
+    except Exception as error:
+        return DQMResponse(name=error.__class__.__name__,
+                           description=f'{table}: {error}',
+                           code=500)
+    return response
+
+
+def process_batch(body: ProcessBatchRequest) -> ResponseReturnValue:
+    """
+    Process a batch of column requests, reading each table only once for
+    all of its columns, and several tables in parallel.
+
+    Args:
+        * body: ProcessBatchRequest HTTP request body
+
+    Returns:
+        * DQMResponse for the batch with the response of each read, and a
+            200 status code if every read succeeded, else the highest
+            status code of the reads
+
+    Raises:
+        * MalformedConfigError: if the request body was malformed
+    """
+    if not body.requests:
+        raise MalformedConfigError('No requests specified.')
+    if body.max_parallel < 1:
+        raise MalformedConfigError('max_parallel must be at least 1.')
+
+    table_requests = coalesce_requests(body.requests)
+    with ThreadPoolExecutor(max_workers=body.max_parallel) as executor:
+        results: List[Mapping[str, Any]] = list(
+            executor.map(run_table, table_requests))
+
+    failed = sum(result['code'] != 200 for result in results)
+    code = max(result['code'] for result in results)
+    message = (f'DQM processed {len(body.requests)} column requests with '
+               f'{len(table_requests)} table reads, of which {failed} failed.')
+    return (DQMResponse(name='',
+                        description=message,
+                        code=code,
+                        results=results), code)
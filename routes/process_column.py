@@ -14,24 +14,64 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 from datetime import datetime
-from typing import Optional
+from typing import Iterable, Mapping, Optional
 
+from flask import has_request_context
+from flask import request
+from flask import Response
 from flask.typing import ResponseReturnValue
+from google.cloud.bigquery_storage import BigQueryReadClient
 from pydantic import BaseModel
 
 from core import __version__
 from core.auth import AuthConfig
+from core.auth import Credentials
 from core.auth import get_credentials
+from core.bigquery import CellsBatch
+from core.bigquery import combine_row_restrictions
+from core.bigquery import DataFormat
+from core.bigquery import get_bq_legacy_client
 from core.bigquery import get_bq_read_client
+from core.bigquery import get_cells_batches_iterator
 from core.bigquery import get_cells_iterator
+from core.bigquery import get_data_format
+from core.bigquery import has_stable_row_order
 from core.bigquery import TableMetadata
+from core.checkpoint import Checkpointer
+from core.checkpoint import DEFAULT_CHECKPOINT_INTERVAL_SECONDS
+from core.checkpoint import get_checkpoint_key
+from core.checkpoint import get_checkpoint_store
+from core.config import CheckpointConfig
 from core.config import ColumnConfig
-from core.config import generate_selected_rules
+from core.config import LogConfig
+from core.config import ProfileConfig
+from core.config import ReadConfig
+from core.fingerprint import describe_cached
+from core.fingerprint import get_config_hash
+from core.fingerprint import get_summary_cache
+from core.fingerprint import SummaryCache
 from core.http import DQMResponse
-from core.logging import BigQueryLogger
+from core.http import MalformedConfigError
+from core.incremental import get_increment
+from core.incremental import Increment
+from core.incremental import NO_NEW_ROWS_MESSAGE
+from core.incremental import WatermarkStore
+from core.logging import get_logger
+from core.logging import log_read_warnings
 from core.logging import Logger
-from core.logging import PrintLogger
-from rules import map_parser_to_rules
+from core.logging import StreamLogger
+from core.metrics import log_metrics
+from core.metrics import RunMetrics
+from core.parallel import chunk_cells
+from core.parallel import CPU_COUNT
+from core.parallel import ProcessValidator
+from core.profiling import profile_run
+from core.pushdown import get_pushdown
+from core.sampling import get_sampler
+from core.sampling import Sampler
+from core.tracing import start_span
+from core.tracing import trace_request
+from core.validation import ColumnValidator
 
 
 class ProcessColumnRequest(BaseModel):
@@ -40,15 +80,241 @@ class ProcessColumnRequest(BaseModel):
     source_table: TableMetadata
     display_source_table: TableMetadata
     log_table: Optional[TableMetadata]
+    log_config: Optional[LogConfig]
+    state_table: Optional[TableMetadata]
+    cache_table: Optional[TableMetadata]
+    force: bool = False
+    read_config: Optional[ReadConfig]
+    profile_config: Optional[ProfileConfig]
+    checkpoint_config: Optional[CheckpointConfig]
     column_config: ColumnConfig
 
 
+def validate_column(bq_read_client: BigQueryReadClient,
+                    body: ProcessColumnRequest, validator: ColumnValidator,
+                    row_restriction: str, sampler: Optional[Sampler],
+                    metrics: RunMetrics,
+                    checkpointer: Optional[Checkpointer]) -> None:
+    """
+    Read the column of the specified table, validating every (sampled)
+    cell with its validator, or in worker processes if check_processes is
+    set.
+
+    Args:
+        * bq_read_client: BigQuery Storage API Read client
+        * body: ProcessColumnRequest HTTP request body
+        * validator: ColumnValidator of the column
+        * row_restriction: SQL filter of the rows to read
+        * sampler: optional Sampler of the rows read
+        * metrics: RunMetrics timing the reads & validation
+        * checkpointer: optional Checkpointer, saving the progress of the
+            scan and resuming it from its last checkpoint
+
+    Returns:
+        * None
+
+    Raises:
+        * MalformedConfigError: if check_processes exceeds the CPU count
+    """
+    processes = (body.read_config or ReadConfig()).get('check_processes')
+    if processes is not None and not 0 <= processes <= CPU_COUNT:
+        raise MalformedConfigError(
+            f'check_processes must be between 0 and {CPU_COUNT}, '
+            'the number of CPUs.')
+    if checkpointer is not None:
+        bq_read_client = checkpointer.wrap_read_client(bq_read_client)
+    bq_read_client = metrics.time_read_client(bq_read_client)
+    if get_data_format(body.read_config) == DataFormat.ARROW:
+        batches_iterator = metrics.time_iterator(
+            get_cells_batches_iterator(bq_read_client, body.source_table,
+                                       [validator.column], body.read_config,
+                                       row_restriction))
+        if sampler is not None:
+            batches_iterator = sampler.sample_batches(batches_iterator)
+        if checkpointer is not None:
+            batches_iterator = checkpointer.checkpoint_rows(
+                batches_iterator, validator.stats,
+                lambda cells_batches: len(cells_batches[0]))
+        chunks: Iterable[CellsBatch] = (cells for (cells,) in batches_iterator)
+    else:
+        cells_iterator = metrics.time_iterator(
+            get_cells_iterator(bq_read_client, body.source_table,
+                               validator.column, body.read_config,
+                               row_restriction))
+        if sampler is not None:
+            cells_iterator = sampler.sample_rows(cells_iterator)
+        if checkpointer is not None:
+            cells_iterator = checkpointer.checkpoint_rows(
+                cells_iterator, validator.stats, lambda _: 1)
+        if processes is None:
+            for cell in cells_iterator:
+                validator.validate(cell)
+            return
+        chunks = chunk_cells(cells_iterator)
+
+    if processes is None:
+        for cells in chunks:
+            validator.validate_batch(cells)
+    else:
+        ProcessValidator(validator, processes).validate_chunks(chunks)
+
+
+def get_checkpointer(body: ProcessColumnRequest, credentials: Credentials,
+                     validator: ColumnValidator,
+                     logger: Logger) -> Optional[Checkpointer]:
+    """
+    Get the Checkpointer of the run, if its progress is checkpointed,
+    restoring the counts of the validator from its last checkpoint.
+
+    Args:
+        * body: ProcessColumnRequest HTTP request body
+        * credentials: Credentials of the GCS or BigQuery client
+        * validator: ColumnValidator of the column
+        * logger: Logger for parser & rule failures
+
+    Returns:
+        * Checkpointer, or None if the run is not checkpointed
+
+    Raises:
+        * MalformedConfigError: if the request body was malformed
+    """
+    checkpoint_config = body.checkpoint_config
+    if checkpoint_config is None:
+        return None
+
+    read_config = body.read_config or ReadConfig()
+    # Only a single stream, read in order, resumes from a row offset, and
+    # counts must not lag behind the rows read in worker processes
+    if (not has_stable_row_order(read_config) or
+            get_sampler(read_config) is not None or
+            'watermark_column' in read_config or
+            'check_processes' in read_config or
+            'aggregation' in body.column_config):
+        raise MalformedConfigError(
+            'A checkpoint_config cannot be combined with multiple streams, '
+            'sampling, a watermark_column, check_processes or aggregation.')
+
+    state_store = None
+    if body.state_table is not None:
+        state_store = WatermarkStore(
+            get_bq_legacy_client(body.source_table.project_id, credentials),
+            body.state_table)
+    try:
+        store = get_checkpoint_store(checkpoint_config, credentials,
+                                     state_store)
+    except ValueError as e:
+        raise MalformedConfigError(str(e))
+
+    def flush() -> None:
+        validator.flush()
+        logger.flush(force=True)
+
+    checkpointer = Checkpointer(
+        store,
+        get_checkpoint_key(body.workflow_execution_id,
+                           body.source_table.full_table_id, [validator.column]),
+        flush,
+        checkpoint_config.get('interval_seconds',
+                              DEFAULT_CHECKPOINT_INTERVAL_SECONDS))
+    checkpointer.restore_stats(validator.stats)
+    return checkpointer
+
+
+def get_table_increment(body: ProcessColumnRequest,
+                        credentials: Credentials) -> Optional[Increment]:
+    """
+    Get the Increment of rows added since the last run, for incremental runs.
+
+    Args:
+        * body: ProcessColumnRequest HTTP request body
+        * credentials: Credentials of the BigQuery client
+
+    Returns:
+        * Increment, or None if all rows must be read
+
+    Raises:
+        * MalformedConfigError: if the request body was malformed
+    """
+    read_config = body.read_config or ReadConfig()
+    if 'watermark_column' not in read_config:
+        return None
+    if body.state_table is None:
+        raise MalformedConfigError(
+            'A state_table is required with a watermark_column.')
+
+    bq_legacy_client = get_bq_legacy_client(body.source_table.project_id,
+                                            credentials)
+    return get_increment(bq_legacy_client,
+                         WatermarkStore(bq_legacy_client, body.state_table),
+                         body.source_table, read_config['watermark_column'],
+                         [body.column_config['column']])
+
+
+def get_cache(body: ProcessColumnRequest,
+              credentials: Credentials) -> Optional[SummaryCache]:
+    """
+    Get the SummaryCache of the checked columns, if summaries are cached.
+
+    Args:
+        * body: ProcessColumnRequest HTTP request body
+        * credentials: Credentials of the BigQuery client
+
+    Returns:
+        * SummaryCache, or None if the columns must be checked
+    """
+    read_config = body.read_config or ReadConfig()
+    if body.cache_table is None or 'watermark_column' in read_config:
+        # Incremental runs only check new rows, so are never skipped
+        return None
+
+    config_hashes = [(body.column_config['column'],
+                      get_config_hash(body.column_config, body.read_config,
+                                      body.source_table))]
+    return get_summary_cache(
+        get_bq_legacy_client(body.source_table.project_id, credentials),
+        body.cache_table, body.source_table, config_hashes)
+
+
 def process_column(body: ProcessColumnRequest) -> ResponseReturnValue:
     """
-    Process a given column from the specified table.
+    Process a given column from the specified table, streaming its logs
+    back in the response if a stream_format is given.
+
+    Args:
+        * body: ProcessColumnRequest HTTP request body
+
+    Returns:
+        * DQMResponse for the run with a 200 status code, or a streamed
+            response of its logs followed by its DQMResponse
+
+    Raises:
+        * MalformedConfigError: if the request body was malformed
+    """
+    headers = dict(request.headers) if has_request_context() else {}
+    logger = get_logger(body.log_table, body.auth_config, body.log_config)
+
+    if isinstance(logger, StreamLogger):
+        return Response(
+            logger.stream(lambda: run_column(body, logger, headers)),
+            content_type=logger.stream_format.value)
+    return run_column(body, logger, headers)
+
+
+def run_column(body: ProcessColumnRequest, logger: Logger,
+               headers: Mapping[str, str]) -> ResponseReturnValue:
+    """
+    Run the processing of a column, profiling the run if a profile_config
+    is given.
+
+    The run is traced with a span, in the trace of the request or else of
+    its workflow execution, so the columns of a workflow share a trace.
+
+    The logger is closed once the run is done, even if it failed.
 
     Args:
         * body: ProcessColumnRequest HTTP request body
+        * logger: Logger for parser & rule failures
+        * headers: HTTP headers of the request
 
     Returns:
         * DQMResponse for the run with a 200 status code
@@ -56,66 +322,122 @@ def process_column(body: ProcessColumnRequest) -> ResponseReturnValue:
     Raises:
         * MalformedConfigError: if the request body was malformed
     """
-    credentials = get_credentials(body.auth_config)
+    with trace_request(headers, body.workflow_execution_id), start_span(
+            'process_column',
+            table=body.source_table.full_table_id,
+            column=body.column_config['column']):
+        with start_span('auth'):
+            credentials = get_credentials(body.auth_config)
+
+        with profile_run(body.profile_config, credentials,
+                         body.workflow_execution_id,
+                         body.column_config['column']):
+            try:
+                return check_column(body, credentials, logger)
+            finally:
+                # Stops sending logs in the background, even if the check
+                # failed
+                logger.close()
 
-    logger: Logger
-    if not body.log_table:
-        logger = PrintLogger()
-    else:
-        logger = BigQueryLogger(body.log_table, body.auth_config)
+
+def check_column(body: ProcessColumnRequest, credentials: Credentials,
+                 logger: Logger) -> ResponseReturnValue:
+    """
+    Check a given column from the specified table, measuring the run.
+
+    Args:
+        * body: ProcessColumnRequest HTTP request body
+        * credentials: Credentials of the BigQuery clients
+        * logger: Logger for parser & rule failures
+
+    Returns:
+        * DQMResponse for the run with a 200 status code, with its metrics
+            if the column was read
+
+    Raises:
+        * MalformedConfigError: if the request body was malformed
+    """
+    metrics = RunMetrics()
 
     logger.set_base_log(__version__, body.workflow_execution_id,
                         body.display_source_table, datetime.utcnow())
+    log_read_warnings(logger, body.read_config)
 
     bq_read_client = get_bq_read_client(credentials)
 
-    (parser, usable_rules) = map_parser_to_rules(body.column_config['parser'])
-
-    rules = generate_selected_rules(body.column_config['rules'], usable_rules)
-
-    column_name = body.column_config['column']
-
-    cells_iterator = get_cells_iterator(bq_read_client, body.source_table,
-                                        column_name)
-
-    row_counter = 0
-    parse_failures = 0
-    rule_errors = 0
-    check_violations = 0
-
-    for cell in cells_iterator:
-        try:
-            value = parser(cell)
-        except Exception as e:
-            # parsing failed
-            logger.parser(column_name, parser.__name__, str(e), cell)
-            parse_failures += 1
-        else:
-            for rule in rules:
-                try:
-                    result = rule(value)
-                except Exception as e:
-                    # rule check failed
-                    logger.rule(column_name, rule.__name__, str(e), value,
-                                rule.__kwdefaults__)
-                    rule_errors += 1
-                else:
-                    if result is not None:
-                        # rule check violated
-                        logger.rule(column_name, rule.__name__, result, value,
-                                    rule.__kwdefaults__)
-                        check_violations += 1
-
-        row_counter += 1
+    validator = ColumnValidator(body.column_config, logger)
+    read_config = body.read_config or ReadConfig()
+
+    checkpointer = get_checkpointer(body, credentials, validator, logger)
+    if checkpointer and checkpointer.checkpoint.description is not None:
+        # A retry of a completed run
+        return (DQMResponse(name='',
+                            description=checkpointer.checkpoint.description,
+                            code=200), 200)
+
+    cache = get_cache(body, credentials)
+    summaries = cache.get() if cache and not body.force else None
+    if summaries is not None:
+        message = describe_cached(summaries[0])
+        return (DQMResponse(name='', description=message, code=200), 200)
 
+    increment = get_table_increment(body, credentials)
+    if increment is not None and increment.total_rows == 0:
+        return (DQMResponse(name='', description=NO_NEW_ROWS_MESSAGE,
+                            code=200), 200)
+
+    pushdown = None
+    if read_config.get('pushdown', False):
+        bq_legacy_client = get_bq_legacy_client(body.source_table.project_id,
+                                                credentials)
+        pushdown = get_pushdown(bq_legacy_client, body.source_table,
+                                [body.column_config])
+    if pushdown is not None and increment is not None:
+        pushdown.total_rows = increment.total_rows
+
+    row_restriction = combine_row_restrictions(
+        increment.row_restriction if increment else '',
+        pushdown.row_restriction if pushdown else '')
+
+    sampler = get_sampler(body.read_config)
+
+    with start_span('validate') as span:
+        validate_column(bq_read_client, body, validator, row_restriction,
+                        sampler, metrics, checkpointer)
+        span.set_attributes({
+            'rows': validator.stats.rows,
+            'failed_rows': validator.stats.failed_rows
+        })
+
+    validator.flush()
     logger.flush(force=True)
 
-    if row_counter == 0:
+    if increment is not None:
+        increment.commit()
+
+    if sampler is not None:
+        validator.stats.unsampled_rows = (sampler.rows_read -
+                                          sampler.rows_sampled)
+
+    if pushdown is not None:
+        validator.stats.pushed_down_rows = max(
+            pushdown.total_rows - validator.stats.read_rows, 0)
+
+    metrics.finish(validator.stats.read_rows, logger)
+    log_metrics(metrics, validator.column)
+
+    if validator.stats.total_rows == 0:
         raise RuntimeError('Source table was empty.')
 
-    message = (f'DQM processed {row_counter} rows, with '
-               f'{parse_failures} parse failures, '
-               f'{rule_errors} rule errors, '
-               f'{check_violations} rule check violations.')
+    message = validator.describe()
+
+    if cache is not None:
+        cache.set([message])
+
+    if checkpointer is not None:
+        checkpointer.complete(message)
 
-    return (DQMResponse(name='', description=message, code=200), 200)
+    return (DQMResponse(name='',
+                        description=message,
+                        code=200,
+                        metrics=metrics.to_dict()), 200)
@@ -0,0 +1,406 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from datetime import datetime
+from typing import List, Optional
+
+from flask import Response
+from flask.typing import ResponseReturnValue
+from google.cloud.bigquery_storage import BigQueryReadClient
+from pydantic import BaseModel
+
+from core import __version__
+from core.auth import AuthConfig
+from core.auth import Credentials
+from core.auth import get_credentials
+from core.bigquery import combine_row_restrictions
+from core.bigquery import DataFormat
+from core.bigquery import get_bq_legacy_client
+from core.bigquery import get_bq_read_client
+from core.bigquery import get_cells_batches_iterator
+from core.bigquery import get_data_format
+from core.bigquery import get_row_cells_iterator
+from core.bigquery import TableMetadata
+from core.config import ColumnConfig
+from core.config import LogConfig
+from core.config import PartitionConfig
+from core.config import ReadConfig
+from core.fingerprint import describe_cached
+from core.fingerprint import get_config_hash
+from core.fingerprint import get_summary_cache
+from core.fingerprint import SummaryCache
+from core.http import DQMResponse
+from core.http import MalformedConfigError
+from core.incremental import get_increment
+from core.incremental import Increment
+from core.incremental import NO_NEW_ROWS_MESSAGE
+from core.incremental import WatermarkStore
+from core.logging import get_logger
+from core.logging import log_read_warnings
+from core.logging import Logger
+from core.logging import StreamLogger
+from core.partitions import DEFAULT_MAX_PARALLEL_PARTITIONS
+from core.partitions import NO_PARTITIONS_MESSAGE
+from core.partitions import Partition
+from core.partitions import select_partitions
+from core.pushdown import get_pushdown
+from core.sampling import get_sampler
+from core.sampling import Sampler
+from core.validation import ColumnValidator
+
+
+class ProcessTableRequest(BaseModel):
+    workflow_execution_id: str = 'development'
+    auth_config: Optional[AuthConfig]
+    source_table: TableMetadata
+    display_source_table: TableMetadata
+    log_table: Optional[TableMetadata]
+    log_config: Optional[LogConfig]
+    state_table: Optional[TableMetadata]
+    cache_table: Optional[TableMetadata]
+    force: bool = False
+    read_config: Optional[ReadConfig]
+    partition_config: Optional[PartitionConfig]
+    columns: List[ColumnConfig]
+
+
+def validate_table(bq_read_client: BigQueryReadClient,
+                   table_metadata: TableMetadata,
+                   read_config: Optional[ReadConfig],
+                   validators: List[ColumnValidator], row_restriction: str,
+                   sampler: Optional[Sampler]) -> None:
+    """
+    Read the columns of the specified table with a single read session,
+    validating every (sampled) row with the validator of each column.
+
+    Args:
+        * bq_read_client: BigQuery Storage API Read client
+        * table_metadata: TableMetadata of the source table
+        * read_config: optional ReadConfig
+        * validators: List of ColumnValidators, in the order of the columns
+        * row_restriction: SQL filter of the rows to read
+        * sampler: optional Sampler of the rows read
+
+    Returns:
+        * None
+    """
+    columns = [validator.column for validator in validators]
+    if get_data_format(read_config) == DataFormat.ARROW:
+        batches_iterator = get_cells_batches_iterator(bq_read_client,
+                                                      table_metadata, columns,
+                                                      read_config,
+                                                      row_restriction)
+        if sampler is not None:
+            batches_iterator = sampler.sample_batches(batches_iterator)
+        for cells_batches in batches_iterator:
+            for validator, cells in zip(validators, cells_batches):
+                validator.validate_batch(cells)
+    else:
+        row_cells_iterator = get_row_cells_iterator(bq_read_client,
+                                                    table_metadata, columns,
+                                                    read_config,
+                                                    row_restriction)
+        if sampler is not None:
+            row_cells_iterator = sampler.sample_rows(row_cells_iterator)
+        for row_cells in row_cells_iterator:
+            for validator, cell in zip(validators, row_cells):
+                validator.validate(cell)
+
+
+def get_table_increment(body: ProcessTableRequest,
+                        credentials: Credentials) -> Optional[Increment]:
+    """
+    Get the Increment of rows added since the last run, for incremental runs.
+
+    Args:
+        * body: ProcessTableRequest HTTP request body
+        * credentials: Credentials of the BigQuery client
+
+    Returns:
+        * Increment, or None if all rows must be read
+
+    Raises:
+        * MalformedConfigError: if the request body was malformed
+    """
+    read_config = body.read_config or ReadConfig()
+    if 'watermark_column' not in read_config:
+        return None
+    if body.state_table is None:
+        raise MalformedConfigError(
+            'A state_table is required with a watermark_column.')
+
+    bq_legacy_client = get_bq_legacy_client(body.source_table.project_id,
+                                            credentials)
+    return get_increment(
+        bq_legacy_client, WatermarkStore(bq_legacy_client, body.state_table),
+        body.source_table, read_config['watermark_column'],
+        [column_config['column'] for column_config in body.columns])
+
+
+def get_cache(body: ProcessTableRequest,
+              credentials: Credentials) -> Optional[SummaryCache]:
+    """
+    Get the SummaryCache of the checked columns, if summaries are cached.
+
+    Args:
+        * body: ProcessTableRequest HTTP request body
+        * credentials: Credentials of the BigQuery client
+
+    Returns:
+        * SummaryCache, or None if the columns must be checked
+    """
+    read_config = body.read_config or ReadConfig()
+    if body.cache_table is None or 'watermark_column' in read_config:
+        # Incremental runs only check new rows, so are never skipped
+        return None
+
+    config_hashes = [(column_config['column'],
+                      get_config_hash(column_config, body.read_config,
+                                      body.source_table))
+                     for column_config in body.columns]
+    return get_summary_cache(
+        get_bq_legacy_client(body.source_table.project_id, credentials),
+        body.cache_table, body.source_table, config_hashes)
+
+
+def update_stats(validators: List[ColumnValidator], sampler: Optional[Sampler],
+                 total_rows: Optional[int]) -> None:
+    """
+    Count the rows which were not checked, once the table is read.
+
+    Args:
+        * validators: List of ColumnValidators of the table
+        * sampler: optional Sampler of the rows read
+        * total_rows: Number of rows of the table, if rows were filtered
+            out in BigQuery
+
+    Returns:
+        * None
+    """
+    for validator in validators:
+        if sampler is not None:
+            validator.stats.unsampled_rows = (sampler.rows_read -
+                                              sampler.rows_sampled)
+        if total_rows is not None:
+            validator.stats.pushed_down_rows = max(
+                total_rows - validator.stats.read_rows, 0)
+
+
+def process_partitions(body: ProcessTableRequest,
+                       partition_config: PartitionConfig,
+                       credentials: Credentials, logger: Logger,
+                       bq_read_client: BigQueryReadClient) -> str:
+    """
+    Process the selected partitions of the specified table, reading
+    several partitions in parallel.
+
+    Args:
+        * body: ProcessTableRequest HTTP request body
+        * partition_config: PartitionConfig of the partitions to process
+        * credentials: Credentials of the BigQuery clients
+        * logger: Logger for parser & rule failures
+        * bq_read_client: BigQuery Storage API Read client
+
+    Returns:
+        * Summary message, with a line per partition & column
+
+    Raises:
+        * MalformedConfigError: if the request body was malformed
+    """
+    read_config = body.read_config or ReadConfig()
+    if 'watermark_column' in read_config:
+        raise MalformedConfigError(
+            'A watermark_column cannot be combined with a partition_config.')
+
+    bq_legacy_client = get_bq_legacy_client(body.source_table.project_id,
+                                            credentials)
+    store = None
+    if partition_config.get('changed', False):
+        if body.state_table is None:
+            raise MalformedConfigError(
+                'A state_table is required to check changed partitions.')
+        store = WatermarkStore(bq_legacy_client, body.state_table)
+
+    selection = select_partitions(
+        bq_legacy_client, body.source_table, partition_config, store,
+        [column_config['column'] for column_config in body.columns])
+    if not selection.partitions:
+        return NO_PARTITIONS_MESSAGE
+
+    pushdown = None
+    if read_config.get('pushdown', False):
+        pushdown = get_pushdown(bq_legacy_client, body.source_table,
+                                body.columns)
+    row_restriction = pushdown.row_restriction if pushdown else ''
+
+    validators = {
+        partition.partition_id: [
+            ColumnValidator(column_config, logger, partition.partition_id)
+            for column_config in body.columns
+        ] for partition in selection.partitions
+    }
+
+    def process_partition(partition: Partition) -> None:
+        partition_validators = validators[partition.partition_id]
+        sampler = get_sampler(body.read_config)
+        validate_table(
+            bq_read_client,
+            replace(body.source_table,
+                    partition_filter=partition.partition_filter),
+            body.read_config, partition_validators, row_restriction, sampler)
+        for validator in partition_validators:
+            validator.flush()
+        update_stats(partition_validators, sampler,
+                     partition.total_rows if pushdown else None)
+
+    with ThreadPoolExecutor(max_workers=partition_config.get(
+            'max_parallel', DEFAULT_MAX_PARALLEL_PARTITIONS)) as executor:
+        # Raises the first error of any partition
+        list(executor.map(process_partition, selection.partitions))
+
+    logger.flush(force=True)
+    selection.commit()
+
+    return '\n'.join(
+        f'{validator.column} (partition {partition_id}): '
+        f'{validator.describe()}'
+        for partition_id, partition_validators in validators.items()
+        for validator in partition_validators)
+
+
+def process_table(body: ProcessTableRequest) -> ResponseReturnValue:
+    """
+    Process all the given columns from the specified table, streaming
+    their logs back in the response if a stream_format is given.
+
+    Args:
+        * body: ProcessTableRequest HTTP request body
+
+    Returns:
+        * DQMResponse for the run with a 200 status code, or a streamed
+            response of its logs followed by its DQMResponse
+
+    Raises:
+        * MalformedConfigError: if the request body was malformed
+    """
+    if not body.columns:
+        raise MalformedConfigError('No columns specified.')
+
+    logger = get_logger(body.log_table, body.auth_config, body.log_config)
+
+    def run() -> ResponseReturnValue:
+        try:
+            return check_table(body, logger)
+        finally:
+            # Stops sending logs in the background, even if the check failed
+            logger.close()
+
+    if isinstance(logger, StreamLogger):
+        return Response(logger.stream(run),
+                        content_type=logger.stream_format.value)
+    return run()
+
+
+def check_table(body: ProcessTableRequest,
+                logger: Logger) -> ResponseReturnValue:
+    """
+    Check all the given columns from the specified table,
+    reading the table only once.
+
+    Args:
+        * body: ProcessTableRequest HTTP request body
+        * logger: Logger for parser & rule failures
+
+    Returns:
+        * DQMResponse for the run with a 200 status code
+
+    Raises:
+        * MalformedConfigError: if the request body was malformed
+    """
+    if 'check_processes' in (body.read_config or {}):
+        raise MalformedConfigError(
+            'check_processes is only supported by /process_column.')
+
+    credentials = get_credentials(body.auth_config)
+
+    logger.set_base_log(__version__, body.workflow_execution_id,
+                        body.display_source_table, datetime.utcnow())
+    log_read_warnings(logger, body.read_config)
+
+    bq_read_client = get_bq_read_client(credentials)
+
+    if body.partition_config is not None:
+        message = process_partitions(body, body.partition_config, credentials,
+                                     logger, bq_read_client)
+        return (DQMResponse(name='', description=message, code=200), 200)
+
+    validators = [
+        ColumnValidator(column_config, logger) for column_config in body.columns
+    ]
+
+    read_config = body.read_config or ReadConfig()
+
+    cache = get_cache(body, credentials)
+    summaries = cache.get() if cache and not body.force else None
+    if summaries is not None:
+        message = '\n'.join(
+            f'{column_config["column"]}: {describe_cached(summary)}'
+            for column_config, summary in zip(body.columns, summaries))
+        return (DQMResponse(name='', description=message, code=200), 200)
+
+    increment = get_table_increment(body, credentials)
+    if increment is not None and increment.total_rows == 0:
+        return (DQMResponse(name='', description=NO_NEW_ROWS_MESSAGE,
+                            code=200), 200)
+
+    pushdown = None
+    if read_config.get('pushdown', False):
+        bq_legacy_client = get_bq_legacy_client(body.source_table.project_id,
+                                                credentials)
+        pushdown = get_pushdown(bq_legacy_client, body.source_table,
+                                body.columns)
+    if pushdown is not None and increment is not None:
+        pushdown.total_rows = increment.total_rows
+
+    row_restriction = combine_row_restrictions(
+        increment.row_restriction if increment else '',
+        pushdown.row_restriction if pushdown else '')
+
+    sampler = get_sampler(body.read_config)
+
+    validate_table(bq_read_client, body.source_table, body.read_config,
+                   validators, row_restriction, sampler)
+
+    for validator in validators:
+        validator.flush()
+    logger.flush(force=True)
+
+    if increment is not None:
+        increment.commit()
+
+    update_stats(validators, sampler, pushdown.total_rows if pushdown else None)
+
+    if validators[0].stats.total_rows == 0:
+        raise RuntimeError('Source table was empty.')
+
+    message = '\n'.join(f'{validator.column}: {validator.describe()}'
+                        for validator in validators)
+
+    if cache is not None:
+        cache.set([validator.describe() for validator in validators])
+
+    return (DQMResponse(name='', description=message, code=200), 200)
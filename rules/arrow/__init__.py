@@ -0,0 +1,64 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from typing import Tuple
+
+from rules import func_mapper
+from rules.common import ArrowParser
+from rules.common import ArrowParsersMap
+from rules.common import ArrowRulesMap
+
+from . import numeric
+from . import text
+
+ArrowParsers: ArrowParsersMap = func_mapper(
+    [numeric.parse_float, numeric.parse_int, text.parse_str])
+
+NumericArrowRules: ArrowRulesMap = func_mapper([
+    numeric.is_not_approx_zero, numeric.is_not_negative,
+    numeric.is_within_strict_int_range
+])
+
+TextArrowRules: ArrowRulesMap = func_mapper([
+    text.contains_at_sign, text.fully_matches_regex, text.is_email,
+    text.is_phone_number, text.contains_regex
+])
+
+
+def map_parser_to_arrow_rules(
+        parser_name: str) -> Tuple[ArrowParser | None, ArrowRulesMap]:
+    """
+    Get the vectorized parser and rule mappings matching a parser, where
+    available.
+
+    Args:
+        * parser_name: string
+
+    Returns: Tuple, with
+        * ArrowParser: Func that parses an Arrow array, or None
+        * ArrowRulesMap: Dict of rule name to vectorized rule wrapper
+    """
+    parser = ArrowParsers.get(parser_name)
+
+    usable_rules: ArrowRulesMap
+    if parser_name == 'parse_str':
+        usable_rules = TextArrowRules
+    elif parser_name in ('parse_int', 'parse_float'):
+        usable_rules = NumericArrowRules
+    else:
+        usable_rules = {}
+
+    return parser, usable_rules
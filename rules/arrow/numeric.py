@@ -0,0 +1,119 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import math
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from rules.common import ArrowRuleChecker
+from rules.numeric import IEEE_TOLERANCE
+from rules.numeric import Numeric
+
+# Null output, for values satisfying a rule
+PASSED = pa.scalar(None, pa.string())
+
+# Largest integer exactly representable as a float
+MAX_SAFE_INTEGER = 2**53
+
+
+def parse_int(values: pa.Array) -> pa.Array:
+    """
+    Vectorized parse_int, for integer arrays.
+
+    Args:
+        * values: Arrow array
+
+    Returns:
+        * Integer array, with null where parsing failed
+
+    Raises:
+        * NotImplementedError: if values are not integers
+    """
+    if not pa.types.is_integer(values.type):
+        raise NotImplementedError
+    return values
+
+
+def parse_float(values: pa.Array) -> pa.Array:
+    """
+    Vectorized parse_float, for integer or floating point arrays.
+
+    Args:
+        * values: Arrow array
+
+    Returns:
+        * Float array, with null where parsing failed
+
+    Raises:
+        * NotImplementedError: if values are not integers or floats
+    """
+    if pa.types.is_floating(values.type):
+        return values.cast(pa.float64())
+    elif pa.types.is_integer(values.type):
+        # Unsafe cast rounds large integers, like float()
+        return values.cast(pa.float64(), safe=False)
+    else:
+        raise NotImplementedError
+
+
+def is_within_strict_int_range(lower_bound: int,
+                               upper_bound: int) -> ArrowRuleChecker:
+    """
+    Vectorized is_within_strict_int_range.
+    """
+
+    def _checker(values: pa.Array) -> pa.Array:
+        within = pc.and_(pc.greater(values, lower_bound),
+                         pc.less(values, upper_bound))
+        return pc.if_else(within, PASSED,
+                          'Value is not within the strict range.')
+
+    return _checker
+
+
+def is_not_negative() -> ArrowRuleChecker:
+    """
+    Vectorized is_not_negative.
+    """
+
+    def _checker(values: pa.Array) -> pa.Array:
+        return pc.if_else(pc.greater_equal(values, 0), PASSED,
+                          'Value is a negative number.')
+
+    return _checker
+
+
+def is_not_approx_zero(tolerance: float = IEEE_TOLERANCE) -> ArrowRuleChecker:
+    """
+    Vectorized is_not_approx_zero.
+
+    Note: Compares against both bounds instead of taking the absolute value,
+    which would overflow for the minimum integer.
+    """
+    absolute_tolerance = abs(tolerance)
+
+    def _checker(values: pa.Array) -> pa.Array:
+        bound: Numeric = absolute_tolerance
+        if pa.types.is_integer(values.type) and bound < MAX_SAFE_INTEGER:
+            # Integers cannot be safely compared with a float tolerance
+            bound = math.floor(bound)
+        # NaN compares False, so is not approximately zero - like math.isclose
+        approx_zero = pc.and_(pc.greater_equal(values, -bound),
+                              pc.less_equal(values, bound))
+        return pc.if_else(approx_zero, 'Value is approximately zero.', PASSED)
+
+    return _checker
@@ -0,0 +1,152 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from rules import text
+from rules.common import ArrowRuleChecker
+from rules.common import RuleChecker
+from rules.re2 import translate_full_match_regex
+from rules.re2 import translate_regex
+
+# Null output, for values satisfying a rule
+PASSED = pa.scalar(None, pa.string())
+
+
+def parse_str(values: pa.Array) -> pa.Array:
+    """
+    Vectorized parse_str, for string arrays.
+
+    Args:
+        * values: Arrow array
+
+    Returns:
+        * String array
+
+    Raises:
+        * NotImplementedError: if values are not strings
+    """
+    if not (pa.types.is_string(values.type) or
+            pa.types.is_large_string(values.type)):
+        raise NotImplementedError
+    # str(None) == 'None'
+    return pc.fill_null(values, 'None')
+
+
+def _recheck_failures(values: pa.Array, passed: pa.Array,
+                      rule: RuleChecker) -> pa.Array:
+    """
+    Check the values that did not pass a vectorized pre-check with the
+    Python rule, for exactly the same results.
+
+    Args:
+        * values: string array
+        * passed: boolean array, True where the value passed the rule
+        * rule: RuleChecker to apply to the other values
+
+    Returns:
+        * string array, with null where the value satisfies the rule
+    """
+    failed = pc.invert(passed)
+    errors = [rule(value) for value in values.filter(failed).to_pylist()]
+    return pc.replace_with_mask(pa.nulls(len(values), pa.string()), failed,
+                                pa.array(errors, pa.string()))
+
+
+def _matches_regex_checker(pattern: str, message: str) -> ArrowRuleChecker:
+    """
+    Get a checker for strings that must contain a match for an RE2 pattern.
+    """
+
+    def _checker(values: pa.Array) -> pa.Array:
+        return pc.if_else(pc.match_substring_regex(values, pattern), PASSED,
+                          message)
+
+    return _checker
+
+
+def is_email() -> ArrowRuleChecker:
+    """
+    Vectorized is_email.
+    """
+    pattern = translate_regex(text.EMAIL_REGEX)
+    if pattern is None:
+        raise NotImplementedError
+    return _matches_regex_checker(pattern,
+                                  'String does not resemble an email address.')
+
+
+def contains_at_sign() -> ArrowRuleChecker:
+    """
+    Vectorized contains_at_sign.
+    """
+
+    def _checker(values: pa.Array) -> pa.Array:
+        return pc.if_else(pc.match_substring(values, '@'), PASSED,
+                          'String does not contain the @ character.')
+
+    return _checker
+
+
+def contains_regex(regex: str) -> ArrowRuleChecker:
+    """
+    Vectorized contains_regex.
+
+    Raises:
+        * NotImplementedError: if the regex cannot be translated to RE2
+    """
+    pattern = translate_regex(regex)
+    if pattern is None:
+        raise NotImplementedError
+    return _matches_regex_checker(
+        pattern, 'String does not contain a match for the given pattern.')
+
+
+def fully_matches_regex(regex: str) -> ArrowRuleChecker:
+    """
+    Vectorized fully_matches_regex.
+
+    Raises:
+        * NotImplementedError: if the regex cannot be translated to RE2
+    """
+    pattern = translate_full_match_regex(regex)
+    if pattern is None:
+        raise NotImplementedError
+    return _matches_regex_checker(
+        pattern, 'String is not a full match for the given pattern.')
+
+
+def is_phone_number() -> ArrowRuleChecker:
+    """
+    Vectorized is_phone_number.
+
+    Note: Strings of ASCII digits are checked with Arrow, while other strings
+    are re-checked in Python, since int() also accepts e.g. Unicode digits.
+    """
+    rule = text.is_phone_number()
+
+    def _checker(values: pa.Array) -> pa.Array:
+        digits = pc.replace_substring_regex(values, r'[\-\(\)\.\+\ ]', '')
+        length = pc.utf8_length(digits)
+        candidate = pc.and_(pc.match_substring_regex(digits, r'\A[0-9]+\z'),
+                            pc.and_(pc.greater(length, 9), pc.less(length, 14)))
+        # At most 13 digits, so safe to cast to int64
+        number = pc.if_else(candidate, digits, '0').cast(pa.int64())
+        passed = pc.and_(candidate, pc.greater(number, 999999))
+        return _recheck_failures(values, passed, rule)
+
+    return _checker
@@ -16,6 +16,8 @@ limitations under the License.
 
 from typing import Any, Callable, Dict, TypeVar, Union
 
+import pyarrow as pa
+
 # Stand-in for "Type"
 T = TypeVar('T')
 
@@ -90,3 +92,85 @@ Example -
 
 RuleWrapper = Callable[..., RuleChecker[T]]
 RulesMap = Dict[str, RuleWrapper[T]]
+
+ArrowParser = Callable[[pa.Array], pa.Array]
+"""
+Arrow Parsers
+
+The vectorized equivalent of a TypeParser, with the same name. It will be
+passed an Arrow array of values and should return an array of parsed values,
+with null where parsing failed - those values are then re-parsed with the
+TypeParser, to log the exact error. If the array type is not supported, it
+should raise NotImplementedError, to parse values one by one instead.
+
+Example -
+    def parse_type(values: pa.Array) -> pa.Array:
+        if not pa.types.is_type(values.type):
+            raise NotImplementedError
+        return values
+"""
+
+ArrowParsersMap = Dict[str, ArrowParser]
+
+ArrowRuleChecker = Callable[[pa.Array], pa.Array]
+"""
+Arrow Rule Checkers
+
+The vectorized equivalent of a RuleChecker, with the same name and arguments.
+It will be passed an Arrow array of non-null parsed values and should return
+a string array, with null where the value satisfies the rule and the same
+error message as the RuleChecker otherwise.
+
+If the checker raises an Exception, e.g. for unsupported types or arguments,
+the RuleChecker is applied to each value instead.
+
+Example -
+    def is_foobar(arg_one: type_one, ...) -> ArrowRuleChecker:
+        def _checker(values: pa.Array) -> pa.Array:
+            return pc.if_else(meets_conditions(values, arg_one, ...),
+                              pa.scalar(None, pa.string()),
+                              'Value is not foobar.')
+
+        return _checker
+"""
+
+ArrowRuleWrapper = Callable[..., ArrowRuleChecker]
+"""
+Arrow Rule Wrappers
+
+Generate an ArrowRuleChecker from the rule arguments. They may raise
+NotImplementedError for arguments that cannot be checked in a vectorized way,
+e.g. a regex with no Arrow equivalent, in which case the rule is applied to
+each value by its RuleChecker instead.
+"""
+
+ArrowRulesMap = Dict[str, ArrowRuleWrapper]
+
+SqlRulePredicate = Callable[[str], str]
+"""
+SQL Rule Predicates
+
+The BigQuery SQL equivalent of a RuleChecker, with the same name and arguments.
+It will be passed the quoted name of a column of non-null parsed values and
+should return a boolean SQL expression, which must only be TRUE where the value
+satisfies the rule. Rows where it is not TRUE are read and checked by the
+RuleChecker, so the expression may be stricter than the rule, but never looser.
+
+Example -
+    def is_foobar(arg_one: type_one, ...) -> SqlRulePredicate:
+        def _predicate(column: str) -> str:
+            return f'{column} = {to_sql_literal(arg_one)}'
+
+        return _predicate
+"""
+
+SqlRuleWrapper = Callable[..., SqlRulePredicate]
+"""
+SQL Rule Wrappers
+
+Generate a SqlRulePredicate from the rule arguments. They may raise
+NotImplementedError for arguments that cannot be checked in SQL with exactly
+the same semantics, in which case the rows are not filtered in BigQuery.
+"""
+
+SqlRulesMap = Dict[str, SqlRuleWrapper]
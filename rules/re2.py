@@ -0,0 +1,179 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import re
+from typing import Optional
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Escapes with different semantics in Python & RE2 regular expressions,
+# e.g. Unicode vs ASCII classes, or unsupported in RE2
+UNSUPPORTED_ESCAPES = set('wWsSbBZuUNg0123456789')
+
+# Escapes translated into their RE2 equivalent
+TRANSLATED_ESCAPES = {'d': r'\p{Nd}', 'D': r'\P{Nd}'}
+
+# Inline flags with the same semantics in Python & RE2
+SUPPORTED_FLAGS = re.compile(r'[ims]*(-[ims]+)?[:)]')
+
+
+def _translate_group(regex: str, i: int) -> Optional[str]:
+    """
+    Check the extension notation of a group, i.e. "(?...".
+
+    Returns:
+        * The translated group prefix, or None if unsupported
+    """
+    if regex.startswith('(?:', i) or regex.startswith('(?P<', i):
+        return regex[i:i + 3]
+    elif SUPPORTED_FLAGS.match(regex, i + 2):
+        return '(?'
+    else:
+        # lookarounds, backreferences, conditionals, atomic groups, etc.
+        return None
+
+
+def _translate_escape(regex: str, i: int) -> Optional[str]:
+    """
+    Translate the escape sequence at an index, i.e. "\\...".
+
+    Returns:
+        * The translated escape sequence, or None if unsupported
+    """
+    escaped = regex[i + 1]
+    if escaped in UNSUPPORTED_ESCAPES:
+        return None
+    return TRANSLATED_ESCAPES.get(escaped, regex[i:i + 2])
+
+
+def _is_unsupported(regex: str, i: int, previous: str) -> bool:
+    """
+    Check if the character at an index, outside of a class, has different
+    semantics in Python & RE2.
+
+    Returns:
+        * True if unsupported
+    """
+    char = regex[i]
+    if char == '$':
+        return True
+    elif char == '+' and previous in ('*', '+', '?', '}'):
+        # possessive quantifiers
+        return True
+    elif char == '{' and regex.startswith('{,', i):
+        return True
+    return False
+
+
+def translate_regex(regex: str) -> Optional[str]:
+    """
+    Translate a Python regular expression into an RE2 regular expression,
+    as used by Arrow & BigQuery, that matches exactly the same strings.
+
+    Note: Constructs with different semantics, e.g. "$" which also matches
+    before a trailing newline in Python, or Unicode-aware classes like "\\w",
+    are not translated.
+
+    Args:
+        * regex: Python regular expression
+
+    Returns:
+        * RE2 regular expression, or None if it cannot be translated
+    """
+    re.compile(regex)  # raises on invalid patterns, like the Python rules
+
+    translated = []
+    in_class = False
+    previous = ''
+    i = 0
+    while i < len(regex):
+        char = regex[i]
+        if char == '\\':
+            escape = _translate_escape(regex, i)
+            if escape is None:
+                return None
+            translated.append(escape)
+            previous = regex[i:i + 2]
+            i += 2
+            continue
+        elif in_class:
+            if char == '[' and regex.startswith('[:', i):
+                # POSIX classes are literals in Python
+                return None
+            # "]" is a literal as the first character of a class
+            in_class = char != ']' or previous in ('[', '[^')
+        elif char == '[':
+            in_class = True
+            if regex.startswith('[^', i):
+                translated.append('[^')
+                previous = '[^'
+                i += 2
+                continue
+        elif _is_unsupported(regex, i, previous):
+            return None
+        elif char == '(' and regex.startswith('(?', i):
+            group = _translate_group(regex, i)
+            if group is None:
+                return None
+            translated.append(group)
+            previous = group[-1]
+            i += len(group)
+            continue
+        translated.append(char)
+        previous = char
+        i += 1
+
+    pattern = ''.join(translated)
+    return pattern if _is_valid_re2(pattern) else None
+
+
+def _is_valid_re2(pattern: str) -> bool:
+    """
+    Check if Arrow can compile a regular expression, e.g. within the
+    repetition limits of RE2.
+
+    Returns:
+        * True if valid
+    """
+    try:
+        pc.match_substring_regex(pa.array([], pa.string()), pattern)
+    except pa.ArrowInvalid:
+        return False
+    return True
+
+
+def translate_full_match_regex(regex: str) -> Optional[str]:
+    """
+    Translate a Python regular expression into an RE2 regular expression
+    that matches exactly the strings fully matched by the Python one,
+    i.e. with re.fullmatch.
+
+    Args:
+        * regex: Python regular expression
+
+    Returns:
+        * RE2 regular expression, or None if it cannot be translated
+    """
+    trailing_backslashes = len(regex[:-1]) - len(regex[:-1].rstrip('\\'))
+    if regex.endswith('$') and trailing_backslashes % 2 == 0:
+        # A final "$" always matches at the end of a full match
+        regex = regex[:-1]
+
+    pattern = translate_regex(regex)
+    if pattern is None:
+        return None
+    return rf'\A(?:{pattern})\z'
@@ -0,0 +1,68 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from typing import Dict, Tuple
+
+from rules import func_mapper
+from rules.common import SqlRulesMap
+
+from . import numeric
+from . import text
+
+# BigQuery column types which each parser maps to the same value, without
+# failing for non-null values - as returned by the BigQuery API
+SqlParserTypes: Dict[str, Tuple[str, ...]] = {
+    'parse_int': ('INTEGER', 'INT64'),
+    'parse_float': ('FLOAT', 'FLOAT64'),
+    'parse_str': ('STRING',),
+}
+
+NumericSqlRules: SqlRulesMap = func_mapper([
+    numeric.is_not_approx_zero, numeric.is_not_negative,
+    numeric.is_within_strict_int_range
+])
+
+# is_phone_number is not supported, since int() has no SQL equivalent
+TextSqlRules: SqlRulesMap = func_mapper([
+    text.contains_at_sign, text.fully_matches_regex, text.is_email,
+    text.contains_regex
+])
+
+
+def map_parser_to_sql_rules(
+        parser_name: str) -> Tuple[Tuple[str, ...], SqlRulesMap]:
+    """
+    Get the column types supported by a parser in SQL, and the matching
+    SQL rule mappings, where available.
+
+    Args:
+        * parser_name: string
+
+    Returns: Tuple, with
+        * Tuple of BigQuery column types, empty if not supported
+        * SqlRulesMap: Dict of rule name to SQL rule wrapper
+    """
+    column_types = SqlParserTypes.get(parser_name, ())
+
+    usable_rules: SqlRulesMap
+    if parser_name == 'parse_str':
+        usable_rules = TextSqlRules
+    elif parser_name in ('parse_int', 'parse_float'):
+        usable_rules = NumericSqlRules
+    else:
+        usable_rules = {}
+
+    return column_types, usable_rules
@@ -0,0 +1,73 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import math
+
+# Range of BigQuery INT64 values
+MIN_INT64 = -2**63
+MAX_INT64 = 2**63 - 1
+
+
+def numeric_literal(value: int | float) -> str:
+    """
+    Format a number as a BigQuery SQL literal, which compares against both
+    INT64 & FLOAT64 columns exactly like the number does in Python.
+
+    Args:
+        * value: int or float
+
+    Returns:
+        * SQL literal
+
+    Raises:
+        * NotImplementedError: for other types, non-finite floats, or ints
+            out of the INT64 range or not exactly representable as floats
+    """
+    if isinstance(value, bool):
+        raise NotImplementedError
+    elif isinstance(value, int):
+        # BigQuery compares FLOAT64 columns against INT64 literals as floats
+        if not MIN_INT64 <= value <= MAX_INT64 or float(value) != value:
+            raise NotImplementedError
+        return str(value)
+    elif isinstance(value, float):
+        if not math.isfinite(value):
+            raise NotImplementedError
+        return repr(value)
+    else:
+        raise NotImplementedError
+
+
+def string_literal(value: str) -> str:
+    """
+    Format a string as a quoted BigQuery SQL literal, escaping
+    backslashes, quotes & control characters.
+
+    Args:
+        * value: string
+
+    Returns:
+        * SQL literal
+    """
+    escaped = []
+    for char in value:
+        if char in ('\\', "'"):
+            escaped.append(f'\\{char}')
+        elif ord(char) < 0x20 or ord(char) == 0x7f:
+            escaped.append(f'\\u{ord(char):04x}')
+        else:
+            escaped.append(char)
+    return "'" + ''.join(escaped) + "'"
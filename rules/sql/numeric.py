@@ -0,0 +1,68 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from rules.common import SqlRulePredicate
+from rules.numeric import IEEE_TOLERANCE
+
+from .literals import numeric_literal
+
+
+def is_within_strict_int_range(lower_bound: int,
+                               upper_bound: int) -> SqlRulePredicate:
+    """
+    SQL is_within_strict_int_range.
+
+    Raises:
+        * NotImplementedError: if a bound cannot be compared exactly in SQL
+    """
+    lower = numeric_literal(lower_bound)
+    upper = numeric_literal(upper_bound)
+
+    def _predicate(column: str) -> str:
+        return f'({column} > {lower} AND {column} < {upper})'
+
+    return _predicate
+
+
+def is_not_negative() -> SqlRulePredicate:
+    """
+    SQL is_not_negative.
+    """
+
+    def _predicate(column: str) -> str:
+        return f'{column} >= 0'
+
+    return _predicate
+
+
+def is_not_approx_zero(tolerance: float = IEEE_TOLERANCE) -> SqlRulePredicate:
+    """
+    SQL is_not_approx_zero.
+
+    Note: NaN values satisfy the rule in Python, but not the predicate,
+    so they are always checked in Python.
+
+    Raises:
+        * NotImplementedError: if the tolerance cannot be compared exactly
+            in SQL
+    """
+    upper = numeric_literal(abs(tolerance))
+    lower = numeric_literal(-abs(tolerance))
+
+    def _predicate(column: str) -> str:
+        return f'({column} > {upper} OR {column} < {lower})'
+
+    return _predicate
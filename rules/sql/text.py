@@ -0,0 +1,87 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from rules import text
+from rules.common import SqlRulePredicate
+from rules.re2 import translate_full_match_regex
+from rules.re2 import translate_regex
+
+from .literals import string_literal
+
+
+def _contains_regex_predicate(pattern: str) -> SqlRulePredicate:
+    """
+    Generate a SqlRulePredicate matching an RE2 regular expression.
+
+    Args:
+        * pattern: RE2 regular expression
+
+    Returns:
+        * SqlRulePredicate
+    """
+    literal = string_literal(pattern)
+
+    def _predicate(column: str) -> str:
+        return f'REGEXP_CONTAINS({column}, {literal})'
+
+    return _predicate
+
+
+def is_email() -> SqlRulePredicate:
+    """
+    SQL is_email.
+    """
+    pattern = translate_regex(text.EMAIL_REGEX)
+    if pattern is None:
+        raise NotImplementedError
+    return _contains_regex_predicate(pattern)
+
+
+def contains_at_sign() -> SqlRulePredicate:
+    """
+    SQL contains_at_sign.
+    """
+
+    def _predicate(column: str) -> str:
+        return f"{column} LIKE '%@%'"
+
+    return _predicate
+
+
+def contains_regex(regex: str) -> SqlRulePredicate:
+    """
+    SQL contains_regex.
+
+    Raises:
+        * NotImplementedError: if the regex cannot be translated to RE2
+    """
+    pattern = translate_regex(regex)
+    if pattern is None:
+        raise NotImplementedError
+    return _contains_regex_predicate(pattern)
+
+
+def fully_matches_regex(regex: str) -> SqlRulePredicate:
+    """
+    SQL fully_matches_regex.
+
+    Raises:
+        * NotImplementedError: if the regex cannot be translated to RE2
+    """
+    pattern = translate_full_match_regex(regex)
+    if pattern is None:
+        raise NotImplementedError
+    return _contains_regex_predicate(pattern)
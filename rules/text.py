@@ -35,13 +35,16 @@ def parse_str(value: Any) -> str:
     return str(value)
 
 
+# regex to detect if string is an email address
+EMAIL_REGEX = (r'([A-Za-z0-9]+[.-_])*[A-Za-z0-9]+'
+               r'@[A-Za-z0-9-]+(\.[A-Z|a-z]{2,})+')
+
+
 def is_email() -> RuleChecker[str]:
     """
     Checks if the string is possibly an email address.
     """
-    # regex to detect if string is an email address
-    regex = r'([A-Za-z0-9]+[.-_])*[A-Za-z0-9]+@[A-Za-z0-9-]+(\.[A-Z|a-z]{2,})+'
-    pattern = re.compile(regex)
+    pattern = re.compile(EMAIL_REGEX)
 
     def _checker(string: str) -> RuleOutput:
         if pattern.search(string):
@@ -0,0 +1,95 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import math
+import unittest
+
+import pyarrow as pa
+
+from rules import numeric
+from rules.arrow import numeric as arrow_numeric
+
+MAX_INT = 2**63 - 1
+MIN_INT = -2**63
+
+INTS = [0, 1, -1, 3, 100, 199, 200, -200, MAX_INT, MIN_INT]
+FLOATS = [
+    0.0, -0.0, 1e-9, -1e-9, 1e-8, 0.5, -0.5, 100.0, 150.5, 199.9, 200.0,
+    math.inf, -math.inf, math.nan, 1e300
+]
+
+
+class ArrowNumericParityTest(unittest.TestCase):
+    """
+    Vectorized rules must match the Python rules for every value.
+    """
+
+    def assertParity(self, rule_name, values, **args):
+        rule = getattr(numeric, rule_name)(**args)
+        arrow_rule = getattr(arrow_numeric, rule_name)(**args)
+
+        expected = [rule(value) for value in values]
+        result = arrow_rule(pa.array(values)).to_pylist()
+
+        self.assertEqual(result, expected, msg=rule_name)
+
+    def test_is_within_strict_int_range(self):
+        for values in [INTS, FLOATS]:
+            self.assertParity('is_within_strict_int_range',
+                              values,
+                              lower_bound=100,
+                              upper_bound=200)
+
+    def test_is_not_negative(self):
+        for values in [INTS, FLOATS]:
+            self.assertParity('is_not_negative', values)
+
+    def test_is_not_approx_zero(self):
+        for values in [INTS, FLOATS]:
+            self.assertParity('is_not_approx_zero', values)
+            self.assertParity('is_not_approx_zero', values, tolerance=-1)
+
+    def test_unsupported_arguments_raise(self):
+        arrow_rule = arrow_numeric.is_within_strict_int_range(lower_bound=0,
+                                                              upper_bound=2**70)
+        with self.assertRaises(Exception):
+            arrow_rule(pa.array(INTS))
+
+
+class ArrowNumericParsersTest(unittest.TestCase):
+
+    def test_parse_int(self):
+        values = pa.array([1, None, -3])
+        self.assertEqual(
+            arrow_numeric.parse_int(values).to_pylist(), [1, None, -3])
+
+    def test_parse_int_unsupported_types(self):
+        for values in [pa.array([1.5]), pa.array(['1']), pa.array([True])]:
+            with self.assertRaises(NotImplementedError):
+                arrow_numeric.parse_int(values)
+
+    def test_parse_float(self):
+        for values in [pa.array([1, None, 2**60 + 1]), pa.array([1.5, None])]:
+            parsed = arrow_numeric.parse_float(values)
+            self.assertEqual(parsed.type, pa.float64())
+            self.assertEqual(parsed.to_pylist(), [
+                None if value is None else float(value)
+                for value in values.to_pylist()
+            ])
+
+    def test_parse_float_unsupported_types(self):
+        with self.assertRaises(NotImplementedError):
+            arrow_numeric.parse_float(pa.array(['1.5']))
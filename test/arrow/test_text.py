@@ -0,0 +1,79 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import unittest
+
+import pyarrow as pa
+
+from rules import text
+from rules.arrow import text as arrow_text
+
+STRINGS = [
+    '', 'a', 'a@b.com', 'first.last@example.co.uk', '@', 'no at sign',
+    'Approved', 'not approved', 'x\ny', 'line\n', 'é@é.fr', '123', '١٢٣',
+    '(555) 123-4567', '+44 20 7946 0958', '0000000001234', '1_000_000_000',
+    '12345678901234', ' 5551234567 '
+]
+
+
+class ArrowTextParityTest(unittest.TestCase):
+    """
+    Vectorized rules must match the Python rules for every value.
+    """
+
+    def assertParity(self, rule_name, values, **args):
+        rule = getattr(text, rule_name)(**args)
+        arrow_rule = getattr(arrow_text, rule_name)(**args)
+
+        expected = [rule(value) for value in values]
+        result = arrow_rule(pa.array(values, pa.string())).to_pylist()
+
+        self.assertEqual(result, expected, msg=f'{rule_name} {args}')
+
+    def test_is_email(self):
+        self.assertParity('is_email', STRINGS)
+
+    def test_contains_at_sign(self):
+        self.assertParity('contains_at_sign', STRINGS)
+
+    def test_contains_regex(self):
+        for regex in ['Approved', r'\d{3}', '^a', '(?i)approved', 'y|e']:
+            self.assertParity('contains_regex', STRINGS, regex=regex)
+
+    def test_fully_matches_regex(self):
+        for regex in ['Approved', r'\d+', r'.+\.com$', '(?s).*', 'a|ab']:
+            self.assertParity('fully_matches_regex', STRINGS, regex=regex)
+
+    def test_is_phone_number(self):
+        self.assertParity('is_phone_number', STRINGS)
+
+    def test_untranslatable_regex_raises(self):
+        for rule in [arrow_text.contains_regex, arrow_text.fully_matches_regex]:
+            with self.assertRaises(NotImplementedError):
+                rule(regex=r'\w+')
+
+
+class ArrowTextParsersTest(unittest.TestCase):
+
+    def test_parse_str(self):
+        values = pa.array(['a', None, ''])
+        self.assertEqual(
+            arrow_text.parse_str(values).to_pylist(),
+            [text.parse_str(value) for value in values.to_pylist()])
+
+    def test_parse_str_unsupported_types(self):
+        with self.assertRaises(NotImplementedError):
+            arrow_text.parse_str(pa.array([1, 2]))
@@ -0,0 +1,162 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from datetime import date
+from io import BytesIO
+import json
+import os
+import tempfile
+from typing import cast, Dict, Iterator
+import unittest
+
+from fastavro import parse_schema
+from fastavro import schemaless_reader
+from google.cloud.bigquery_storage import BigQueryReadClient
+from google.cloud.bigquery_storage import ReadSession
+import pyarrow as pa
+
+from benchmarks.cases import CASES
+from benchmarks.cases import generate_rows
+from benchmarks.cases import inject_violations
+from benchmarks.fake_client import FakeReadClient
+from benchmarks.run import compare_results
+from benchmarks.run import load_results
+from benchmarks.run import measure
+from benchmarks.run import percentile
+from benchmarks.run import save_results
+from core.bigquery import create_read_session
+from core.bigquery import DataFormat
+from core.bigquery import get_cells_batches_iterator
+from core.bigquery import TableMetadata
+from core.config import ReadConfig
+from data.configs import CONFIGS
+
+
+class FakeReadClientTest(unittest.TestCase):
+
+    def setUp(self):
+        self.rows = [{
+            'id': i,
+            'name': f'name {i}',
+            'day': date(2023, 1, 1)
+        } for i in range(2500)]
+        self.fake_client = FakeReadClient(
+            {
+                'id': 'INT64',
+                'name': 'STRING',
+                'day': 'DATE'
+            }, self.rows)
+        self.client = cast(BigQueryReadClient, self.fake_client)
+        self.table = TableMetadata('project', 'dataset', 'table')
+        return super().setUp()
+
+    def test_arrow_pages(self):
+        batches = list(
+            get_cells_batches_iterator(self.client, self.table, ['id', 'day'],
+                                       ReadConfig(data_format='ARROW')))
+
+        self.assertEqual([len(ids) for ids, _ in batches], [1000, 1000, 500])
+        self.assertEqual(
+            pa.concat_arrays([ids for ids, _ in batches]).to_pylist(),
+            list(range(2500)))
+        self.assertEqual(batches[0][1][0].as_py(), date(2023, 1, 1))
+
+    def test_avro_pages(self):
+        session = create_read_session(self.client, self.table, ['name'])
+        schema = parse_schema(json.loads(session.avro_schema.schema))
+
+        names = []
+        for stream in session.streams:
+            for response in self.fake_client._gapic_client.read_rows(
+                    stream.name, 0):
+                rows = BytesIO(response.avro_rows.serialized_binary_rows)
+                names += [
+                    cast(Dict, schemaless_reader(rows, schema))['name']
+                    for _ in range(response.row_count)
+                ]
+
+        self.assertEqual(names, [row['name'] for row in self.rows])
+
+    def test_streams(self):
+        session = create_read_session(self.client, self.table, ['id'],
+                                      DataFormat.ARROW,
+                                      ReadConfig(max_stream_count=2))
+
+        self.assertEqual(len(session.streams), 2)
+        self.assertIsInstance(session, ReadSession)
+
+
+class CasesTest(unittest.TestCase):
+
+    def test_generate_rows(self):
+        config = CONFIGS['cm360_floodlight_report']
+
+        rows = generate_rows(config, 5)
+
+        self.assertEqual(rows, generate_rows(config, 5))
+        self.assertIsInstance(rows[0]['date'], date)
+        for case in CASES:
+            self.assertIn(case.column, rows[0])
+
+    def test_inject_violations(self):
+        case = CASES[0]
+        rows = [{case.column: 1} for _ in range(1000)]
+
+        violated = inject_violations(rows, case, 0.1)
+
+        count = sum(
+            row[case.column] == case.violating_value for row in violated)
+        self.assertAlmostEqual(count / 1000, 0.1, delta=0.03)
+        self.assertEqual(inject_violations(rows, case, 0.0), rows)
+
+
+class MeasureTest(unittest.TestCase):
+
+    def run_chunks(self) -> Iterator[int]:
+        for _ in range(10):
+            yield 100
+
+    def test_measure(self):
+        result = measure('chunks', {'size': 100}, self.run_chunks, repeat=2)
+
+        self.assertEqual(result.rows, 1000)
+        self.assertGreater(result.rows_per_second, 0)
+        self.assertLessEqual(result.latency_p50_ms, result.latency_p99_ms)
+        self.assertEqual(result.key, 'chunks (size=100)')
+
+    def test_percentile(self):
+        values = [float(value) for value in range(1, 101)]
+
+        self.assertEqual(percentile(values, 50), 50.0)
+        self.assertEqual(percentile(values, 99), 99.0)
+        self.assertEqual(percentile([], 50), 0.0)
+
+    def test_save_and_compare(self):
+        baseline = [measure('chunks', {}, self.run_chunks)]
+        slower = load_results(self.save(baseline))
+        slower[0].rows_per_second = baseline[0].rows_per_second / 2
+
+        lines, regressions = compare_results(baseline, slower)
+
+        self.assertEqual(regressions, 1)
+        self.assertEqual(lines, ['chunks (): -50.0% rows/s REGRESSION'])
+        self.assertEqual(compare_results(baseline, baseline)[1], 0)
+
+    def save(self, results) -> str:
+        directory = tempfile.mkdtemp()
+        filename = os.path.join(directory, 'results', 'commit.json')
+        save_results(filename, results, commit='commit')
+        return filename
@@ -0,0 +1,147 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from typing import cast
+import unittest
+from unittest.mock import call
+from unittest.mock import MagicMock
+
+from core.aggregation import ViolationAggregator
+from core.config import AggregationConfig
+from core.http import MalformedConfigError
+from core.logging import Logger
+
+
+class ViolationAggregatorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = MagicMock(spec=Logger)
+        self.aggregator = ViolationAggregator(self.logger,
+                                              AggregationConfig(top_k=2))
+        return super().setUp()
+
+    def test_rule_violations(self):
+        for value in [-1, -2, -1, -3, -1, -2]:
+            self.aggregator.rule('amount', 'is_not_negative', 'Negative.',
+                                 value, {})
+        self.logger.rule.assert_not_called()
+
+        self.aggregator.flush()
+
+        self.logger.rule_summary.assert_called_once_with('amount',
+                                                         'is_not_negative',
+                                                         'Negative.',
+                                                         6, {},
+                                                         partition_id=None)
+        self.assertEqual(self.logger.rule.call_args_list, [
+            call('amount',
+                 'is_not_negative',
+                 'Negative.',
+                 -1, {},
+                 violation_count=3,
+                 partition_id=None),
+            call('amount',
+                 'is_not_negative',
+                 'Negative.',
+                 -2, {},
+                 violation_count=2,
+                 partition_id=None),
+        ])
+
+    def test_parser_failures(self):
+        for value in ['x', 'y', 'x']:
+            self.aggregator.parser('amount', 'parse_int', f'Invalid {value}.',
+                                   value)
+
+        self.aggregator.flush()
+
+        self.assertEqual(self.logger.parser_summary.call_args_list, [
+            call('amount', 'parse_int', 'Invalid x.', 2, partition_id=None),
+            call('amount', 'parse_int', 'Invalid y.', 1, partition_id=None),
+        ])
+        self.assertEqual(self.logger.parser.call_args_list, [
+            call('amount',
+                 'parse_int',
+                 'Invalid x.',
+                 'x',
+                 violation_count=2,
+                 partition_id=None),
+            call('amount',
+                 'parse_int',
+                 'Invalid y.',
+                 'y',
+                 violation_count=1,
+                 partition_id=None),
+        ])
+
+    def test_rules_with_params_are_separate(self):
+        for upper_bound in [10, 20]:
+            self.aggregator.rule('amount', 'is_within_strict_int_range',
+                                 'Out of range.', 30, {
+                                     'lower_bound': 0,
+                                     'upper_bound': upper_bound
+                                 })
+
+        self.aggregator.flush()
+
+        self.assertEqual(self.logger.rule_summary.call_count, 2)
+        self.assertEqual(self.logger.rule.call_count, 2)
+
+    def test_partitions_are_separate(self):
+        for partition_id in ['20230101', '20230102']:
+            self.aggregator.rule('amount',
+                                 'is_not_negative',
+                                 'Negative.',
+                                 -1,
+                                 row_offset=0,
+                                 partition_id=partition_id)
+
+        self.aggregator.flush()
+
+        self.assertEqual(
+            [call.kwargs for call in self.logger.rule.call_args_list], [{
+                'violation_count': 1,
+                'partition_id': partition_id
+            } for partition_id in ['20230101', '20230102']])
+
+    def test_unhashable_values(self):
+        self.aggregator.rule('tags', 'contains_at_sign', 'No @.', ['a', 'b'])
+        self.aggregator.rule('tags', 'contains_at_sign', 'No @.', ['a', 'b'])
+
+        self.aggregator.flush()
+
+        self.assertEqual(
+            self.logger.rule.call_args,
+            call('tags',
+                 'contains_at_sign',
+                 'No @.',
+                 '["a", "b"]', {},
+                 violation_count=2,
+                 partition_id=None))
+
+    def test_flush_resets_counts(self):
+        self.aggregator.rule('amount', 'is_not_negative', 'Negative.', -1)
+        self.aggregator.flush()
+        self.aggregator.flush()
+
+        self.assertEqual(self.logger.rule_summary.call_count, 1)
+        self.assertEqual(self.logger.rule.call_count, 1)
+
+    def test_requires_positive_top_k(self):
+        for top_k in [0, -1, 1.5]:
+            with self.assertRaises(MalformedConfigError):
+                ViolationAggregator(self.logger,
+                                    cast(AggregationConfig, {'top_k': top_k}))
@@ -16,22 +16,31 @@ limitations under the License.
 
 from collections.abc import Iterable
 import os
+from typing import cast
 import unittest
 from unittest.mock import MagicMock
 from unittest.mock import patch
 
 from google.cloud.bigquery import Client as BigQueryLegacyClient
 from google.cloud.bigquery_storage import BigQueryReadClient
+import pyarrow as pa
 
 from core.auth import get_default_credentials
 from core.auth import get_service_account_credentials
 from core.auth import ImpersonatedCredentials
 from core.auth import OAuthCredentials
+from core.bigquery import append_rows
+from core.bigquery import build_proto_descriptor
+from core.bigquery import combine_row_restrictions
 from core.bigquery import get_bq_legacy_client
 from core.bigquery import get_bq_read_client
+from core.bigquery import get_cells_batches_iterator
 from core.bigquery import get_cells_iterator
+from core.bigquery import get_proto_message_class
 from core.bigquery import get_readrows_iterator
+from core.bigquery import get_row_cells_iterator
 from core.bigquery import TableMetadata
+from core.config import ReadConfig
 
 
 class BigQueryClientCredentialsTest(unittest.TestCase):
@@ -97,6 +106,79 @@ class BigQueryReadRowsTest(unittest.TestCase):
         self.assertTrue(isinstance(rows, Iterable))
 
 
+class GetReadRowsIteratorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.table_metadata = TableMetadata(project_id="test-project",
+                                            dataset_id="test-dataset",
+                                            table_name="test-table")
+        self.bqs_client = MagicMock(spec=BigQueryReadClient)
+        return super().setUp()
+
+    def _mock_streams(self, streams_rows):
+        session = MagicMock()
+        session.streams = [
+            MagicMock(name=f'stream_{i}') for i in range(len(streams_rows))
+        ]
+        self.bqs_client.create_read_session.return_value = session
+
+        readers = []
+        for rows in streams_rows:
+            reader = MagicMock()
+            reader.rows.return_value.pages = [rows[:2], rows[2:]]
+            reader.rows.return_value.__iter__.return_value = iter(rows)
+            readers.append(reader)
+        self.bqs_client.read_rows.side_effect = readers
+
+    def test_single_stream(self):
+        self._mock_streams([[{"a": 1}, {"a": 2}]])
+        rows = get_readrows_iterator(self.bqs_client, self.table_metadata,
+                                     ["a"])
+        self.assertEqual(list(rows), [{"a": 1}, {"a": 2}])
+        self.assertEqual(
+            self.bqs_client.create_read_session.call_args.
+            kwargs['max_stream_count'], 1)
+
+    def test_empty_table(self):
+        self._mock_streams([])
+        rows = get_readrows_iterator(self.bqs_client, self.table_metadata,
+                                     ["a"])
+        self.assertEqual(list(rows), [])
+
+    def test_parallel_streams_preserve_order(self):
+        streams_rows = [[{"a": i * 10 + j} for j in range(5)] for i in range(3)]
+        self._mock_streams(streams_rows)
+        rows = get_readrows_iterator(self.bqs_client,
+                                     self.table_metadata, ["a"],
+                                     read_config=ReadConfig(max_stream_count=3))
+        self.assertEqual(list(rows), sum(streams_rows, []))
+        self.assertEqual(
+            self.bqs_client.create_read_session.call_args.
+            kwargs['max_stream_count'], 3)
+
+    def test_parallel_streams_unordered(self):
+        streams_rows = [[{"a": i * 10 + j} for j in range(5)] for i in range(3)]
+        self._mock_streams(streams_rows)
+        rows = get_readrows_iterator(self.bqs_client,
+                                     self.table_metadata, ["a"],
+                                     read_config=ReadConfig(
+                                         max_stream_count=3,
+                                         preserve_order=False))
+        self.assertCountEqual(list(rows), sum(streams_rows, []))
+
+    def test_partition_filter(self):
+        self._mock_streams([[{"a": 1}]])
+        self.table_metadata.partition_filter = '`day` = 1'
+        rows = get_readrows_iterator(self.bqs_client,
+                                     self.table_metadata, ["a"],
+                                     row_restriction='`a` > 0')
+        self.assertEqual(list(rows), [{"a": 1}])
+        read_session = self.bqs_client.create_read_session.call_args.kwargs[
+            'read_session']
+        self.assertEqual(read_session.read_options.row_restriction,
+                         '(`day` = 1) AND (`a` > 0)')
+
+
 class TestGetCellsIterator(unittest.TestCase):
 
     @patch('core.bigquery.get_readrows_iterator')
@@ -245,5 +327,128 @@ class TestGetCellsIterator(unittest.TestCase):
         mock_get_readrows_iterator.assert_called_once()
 
 
+class TestGetRowCellsIterator(unittest.TestCase):
+
+    @patch('core.bigquery.get_readrows_iterator')
+    def test_get_row_cells_iterator_reads_once(self,
+                                               mock_get_readrows_iterator):
+        mock_get_readrows_iterator.return_value = iter([
+            {
+                "a":
+                    1,
+                "event_params": [{
+                    "key": "ga_session_number",
+                    "value": {
+                        'int_value': 10
+                    }
+                }]
+            },
+            {
+                "a": 2,
+                "event_params": []
+            },
+        ])
+        mock_table_metadata = TableMetadata(project_id="test-project",
+                                            dataset_id="test-dataset",
+                                            table_name="test-table")
+        result = list(
+            get_row_cells_iterator(
+                MagicMock(spec=BigQueryReadClient), mock_table_metadata, [
+                    "a", "event_params.key[ga_session_number]", "a",
+                    "event_params"
+                ]))
+        self.assertEqual(result, [
+            [
+                1, 10, 1,
+                [{
+                    "key": "ga_session_number",
+                    "value": {
+                        'int_value': 10
+                    }
+                }]
+            ],
+            [2, None, 2, []],
+        ])
+        mock_get_readrows_iterator.assert_called_once()
+        selected_columns = mock_get_readrows_iterator.call_args[0][2]
+        self.assertEqual(selected_columns, ["a", "event_params"])
+
+
+class TestGetCellsBatchesIterator(unittest.TestCase):
+
+    @patch('core.bigquery.get_record_batches_iterator')
+    def test_get_cells_batches_iterator(self, mock_get_record_batches_iterator):
+        mock_get_record_batches_iterator.return_value = iter([
+            pa.RecordBatch.from_pydict({
+                "a": [1, 2],
+                "c": [{
+                    "nested": "x"
+                }, None],
+            })
+        ])
+        mock_table_metadata = TableMetadata(project_id="test-project",
+                                            dataset_id="test-dataset",
+                                            table_name="test-table")
+        result = list(
+            get_cells_batches_iterator(MagicMock(spec=BigQueryReadClient),
+                                       mock_table_metadata, ["a", "c.nested"]))
+
+        self.assertEqual(len(result), 1)
+        simple_cells, nested_cells = result[0]
+        self.assertIsInstance(simple_cells, pa.Array)
+        self.assertEqual(cast(pa.Array, simple_cells).to_pylist(), [1, 2])
+        self.assertEqual(nested_cells, ["x", None])
+        self.assertEqual(mock_get_record_batches_iterator.call_args[0][2],
+                         ["a", "c"])
+
+
 # TODO(psnel) add support for highly nested usecases alternating between
 # repeated and nullable structures.
+
+
+class StorageWriteTest(unittest.TestCase):
+
+    def test_proto_rows(self):
+        message_class = get_proto_message_class(
+            build_proto_descriptor('Row', {
+                'column': str,
+                'count': int
+            }))
+
+        row = message_class(count=3)
+        parsed = message_class.FromString(row.SerializeToString())
+
+        self.assertEqual(parsed.count, 3)
+        # unset fields are appended as NULL
+        self.assertFalse(parsed.HasField('column'))
+
+    @patch('core.bigquery.MAX_REQUEST_BYTES', 5)
+    def test_append_rows_in_chunks(self):
+        append_rows_stream = MagicMock()
+        response = append_rows_stream.send.return_value.result.return_value
+        response.row_errors = []
+
+        errors = append_rows(append_rows_stream, [b'123', b'45', b'6', b'789'])
+
+        self.assertEqual(errors, [])
+        self.assertEqual([
+            list(call[0][0].proto_rows.rows.serialized_rows)
+            for call in append_rows_stream.send.call_args_list
+        ], [[b'123', b'45'], [b'6', b'789']])
+
+    def test_append_rows_errors(self):
+        append_rows_stream = MagicMock()
+        response = append_rows_stream.send.return_value.result.return_value
+        response.row_errors = [MagicMock(message='Invalid row.')]
+
+        self.assertEqual(append_rows(append_rows_stream, [b'1']),
+                         ['Invalid row.'])
+
+
+class CombineRowRestrictionsTest(unittest.TestCase):
+
+    def test_combine(self):
+        self.assertEqual(combine_row_restrictions('', ''), '')
+        self.assertEqual(combine_row_restrictions('a > 1', ''), 'a > 1')
+        self.assertEqual(combine_row_restrictions('a > 1', 'NOT (b)'),
+                         '(a > 1) AND (NOT (b))')
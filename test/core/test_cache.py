@@ -0,0 +1,154 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from datetime import datetime
+from datetime import timedelta
+import unittest
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from core.auth import _credentials_cache
+from core.auth import get_credentials
+from core.auth import refresh_credentials
+from core.bigquery import _clients_cache
+from core.bigquery import get_bq_legacy_client
+from core.bigquery import get_bq_read_client
+from core.cache import LRUCache
+
+
+class LRUCacheTest(unittest.TestCase):
+
+    def test_get_creates_once(self):
+        cache: LRUCache[object] = LRUCache()
+        create = MagicMock(side_effect=object)
+
+        entry = cache.get('key', create)
+
+        self.assertIs(cache.get('key', create), entry)
+        create.assert_called_once()
+
+    def test_evicts_least_recently_used(self):
+        cache: LRUCache[str] = LRUCache(max_size=2)
+        cache.get('a', lambda: 'a')
+        cache.get('b', lambda: 'b')
+        cache.get('a', lambda: 'a')
+        cache.get('c', lambda: 'c')
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get('a', lambda: 'new a'), 'a')
+        self.assertEqual(cache.get('b', lambda: 'new b'), 'new b')
+
+    def test_invalid_size(self):
+        with self.assertRaises(ValueError):
+            LRUCache(max_size=0)
+
+
+@patch('core.auth.default')
+class CredentialsCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        _credentials_cache.clear()
+        return super().setUp()
+
+    def tearDown(self):
+        _credentials_cache.clear()
+        return super().tearDown()
+
+    def set_default_credentials(self, mock_default, token, expiry):
+        credentials = MagicMock(token=token, expiry=expiry)
+        mock_default.return_value = (credentials, 'project')
+        return credentials
+
+    def test_reused(self, mock_default):
+        self.set_default_credentials(mock_default, None, None)
+
+        credentials = get_credentials(None)
+
+        self.assertIs(get_credentials({}), credentials)
+        self.assertIs(get_credentials({'scopes': []}), credentials)
+        mock_default.assert_called_once()
+
+    def test_per_scopes(self, mock_default):
+        mock_default.side_effect = lambda scopes: (MagicMock(token=None), '')
+
+        self.assertIsNot(get_credentials(None),
+                         get_credentials({'scopes': ['scope']}))
+        self.assertIs(get_credentials({'scopes': ['scope', 'scope']}),
+                      get_credentials({'scopes': ['scope']}))
+
+    @patch('core.auth.get_service_account_credentials')
+    def test_per_service_account(self, mock_sa_credentials, mock_default):
+        self.set_default_credentials(mock_default, None, None)
+        mock_sa_credentials.side_effect = lambda *args: MagicMock(token=None)
+
+        credentials = get_credentials({'service_account_email': 'a@b.c'})
+
+        self.assertIs(get_credentials({'service_account_email': 'a@b.c'}),
+                      credentials)
+        self.assertIsNot(get_credentials({'service_account_email': 'd@e.f'}),
+                         credentials)
+        self.assertIsNot(get_credentials(None), credentials)
+
+    def test_refreshed_before_expiry(self, mock_default):
+        credentials = self.set_default_credentials(
+            mock_default, 'token',
+            datetime.utcnow() + timedelta(minutes=1))
+
+        get_credentials(None)
+
+        credentials.refresh.assert_called_once()
+
+    def test_not_refreshed(self, mock_default):
+        credentials = self.set_default_credentials(
+            mock_default, 'token',
+            datetime.utcnow() + timedelta(minutes=30))
+
+        refresh_credentials(get_credentials(None))
+
+        credentials.refresh.assert_not_called()
+
+
+class ClientsCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        _clients_cache.clear()
+        return super().setUp()
+
+    def tearDown(self):
+        _clients_cache.clear()
+        return super().tearDown()
+
+    @patch('core.bigquery.BigQueryLegacyClient')
+    def test_legacy_client_per_project(self, mock_client):
+        credentials = MagicMock()
+        mock_client.side_effect = lambda **kwargs: MagicMock()
+
+        client = get_bq_legacy_client('project', credentials)
+
+        self.assertIs(get_bq_legacy_client('project', credentials), client)
+        self.assertIsNot(get_bq_legacy_client('other', credentials), client)
+        self.assertIsNot(get_bq_legacy_client('project', MagicMock()), client)
+
+    @patch('core.bigquery.BigQueryReadClient')
+    def test_read_client_per_credentials(self, mock_client):
+        credentials = MagicMock()
+        mock_client.side_effect = lambda **kwargs: MagicMock()
+
+        client = get_bq_read_client(credentials)
+
+        self.assertIs(get_bq_read_client(credentials), client)
+        self.assertIsNot(get_bq_read_client(MagicMock()), client)
+        mock_client.assert_any_call(credentials=credentials)
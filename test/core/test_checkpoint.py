@@ -0,0 +1,155 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import tempfile
+from typing import cast
+import unittest
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from google.cloud.bigquery_storage import BigQueryReadClient
+from google.cloud.bigquery_storage import ReadSession
+
+from core.checkpoint import BigQueryCheckpointStore
+from core.checkpoint import Checkpoint
+from core.checkpoint import Checkpointer
+from core.checkpoint import FileCheckpointStore
+from core.checkpoint import GCSCheckpointStore
+from core.checkpoint import get_checkpoint_key
+from core.checkpoint import get_checkpoint_store
+from core.config import CheckpointConfig
+from core.validation import ColumnStats
+
+
+class CheckpointStoreTest(unittest.TestCase):
+
+    def test_file_store(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = FileCheckpointStore(directory)
+            key = get_checkpoint_key('execution', 'project.dataset.table',
+                                     ['amount'])
+
+            self.assertIsNone(store.get(key))
+            store.set(key, Checkpoint(offset=10).to_json())
+            store.set(key, Checkpoint(offset=20).to_json())
+
+            self.assertEqual(
+                Checkpoint.from_json(cast(str, store.get(key))).offset, 20)
+
+    @patch('core.checkpoint.AuthorizedSession')
+    def test_gcs_store_missing_checkpoint(self, mock_session):
+        mock_session.return_value.get.return_value.status_code = 404
+
+        store = GCSCheckpointStore(MagicMock(), 'bucket', '/checkpoints/')
+
+        self.assertIsNone(store.get('execution/table/amount'))
+        self.assertEqual(
+            mock_session.return_value.get.call_args[0][0],
+            'https://storage.googleapis.com/storage/v1/b/bucket/o/'
+            'checkpoints%2Fexecution%2Ftable%2Famount.json')
+
+    def test_get_checkpoint_store(self):
+        state_store = MagicMock()
+
+        self.assertIsInstance(
+            get_checkpoint_store(CheckpointConfig(bucket='bucket'), MagicMock(),
+                                 state_store), GCSCheckpointStore)
+        self.assertIsInstance(
+            get_checkpoint_store(CheckpointConfig(directory='checkpoints'),
+                                 MagicMock(), None), FileCheckpointStore)
+        self.assertIsInstance(
+            get_checkpoint_store(CheckpointConfig(), MagicMock(), state_store),
+            BigQueryCheckpointStore)
+        with self.assertRaises(ValueError):
+            get_checkpoint_store(CheckpointConfig(), MagicMock(), None)
+
+
+class CheckpointerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.store = MagicMock()
+        self.store.get.return_value = None
+        self.flush = MagicMock()
+        return super().setUp()
+
+    def get_checkpointer(self) -> Checkpointer:
+        return Checkpointer(self.store, 'key', self.flush, interval_seconds=0)
+
+    def test_checkpoint_rows(self):
+        checkpointer = self.get_checkpointer()
+        stats = ColumnStats()
+
+        for _ in checkpointer.checkpoint_rows(range(2500), stats, lambda _: 1):
+            stats.rows += 1
+
+        self.assertEqual(self.flush.call_count, 2)
+        checkpoint = Checkpoint.from_json(self.store.set.call_args[0][1])
+        self.assertEqual(checkpoint.offset, 2000)
+        self.assertEqual(checkpoint.stats['rows'], 2000)
+
+    def test_restore(self):
+        self.store.get.return_value = Checkpoint(offset=2000,
+                                                 stats={
+                                                     'rows': 2000,
+                                                     'failed_rows': 3
+                                                 }).to_json()
+        checkpointer = self.get_checkpointer()
+        stats = ColumnStats()
+
+        checkpointer.restore_stats(stats)
+        for _ in checkpointer.checkpoint_rows(range(1500), stats, lambda _: 1):
+            stats.rows += 1
+
+        self.assertEqual(stats.failed_rows, 3)
+        self.assertEqual(stats.rows, 3500)
+        # Checkpoints continue from the restored offset
+        offsets = [
+            Checkpoint.from_json(call[0][1]).offset
+            for call in self.store.set.call_args_list
+        ]
+        self.assertEqual(offsets, [3000])
+
+    def test_read_client(self):
+        client = MagicMock()
+        client.create_read_session.return_value = ReadSession(
+            name='session', streams=[{
+                'name': 'session/streams/0'
+            }])
+        checkpointer = self.get_checkpointer()
+        checkpointer.wrap_read_client(cast(BigQueryReadClient,
+                                           client)).create_read_session()
+        checkpointer.save(1000, ColumnStats())
+
+        # A retried request reuses the session, from the offset
+        self.store.get.return_value = self.store.set.call_args[0][1]
+        client.reset_mock()
+        read_client = self.get_checkpointer().wrap_read_client(
+            cast(BigQueryReadClient, client))
+        session = read_client.create_read_session()
+        read_client.read_rows(session.streams[0].name)
+
+        client.create_read_session.assert_not_called()
+        self.assertEqual(session.name, 'session')
+        client.read_rows.assert_called_once_with('session/streams/0', 1000)
+
+    def test_complete(self):
+        checkpointer = self.get_checkpointer()
+
+        checkpointer.complete('Done.')
+
+        self.assertEqual(
+            Checkpoint.from_json(self.store.set.call_args[0][1]).description,
+            'Done.')
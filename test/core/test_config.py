@@ -17,11 +17,13 @@ limitations under the License.
 from typing import cast
 import unittest
 
+from core.config import compile_rule_checker
 from core.config import generate_selected_rules
 from core.config import RuleConfig
 from rules import NumericRules
 from rules import RulesMap
 from rules import TextRules
+from rules.numeric import parse_int
 
 
 class GenerateSelectedRulesTest(unittest.TestCase):
@@ -87,3 +89,32 @@ class GenerateSelectedRulesTest(unittest.TestCase):
 
         self.assertIsNotNone(generated_rule("otherpattern"))
         self.assertIsNone(generated_rule("testpattern"))
+
+
+class CompileRuleCheckerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.checker = compile_rule_checker(
+            parse_int,
+            generate_selected_rules([
+                RuleConfig(rule='is_not_negative'),
+                RuleConfig(rule='is_within_strict_int_range',
+                           args={
+                               'lower_bound': -10,
+                               'upper_bound': 10
+                           })
+            ], NumericRules))
+        return super().setUp()
+
+    def test_bitmask(self):
+        self.assertEqual(self.checker('5'), 0)
+        self.assertEqual(self.checker('-5'), 0b01)
+        self.assertEqual(self.checker('50'), 0b10)
+        self.assertEqual(self.checker('-50'), 0b11)
+
+    def test_raises(self):
+        with self.assertRaises(ValueError):
+            self.checker('five')
+
+    def test_no_rules(self):
+        self.assertEqual(compile_rule_checker(parse_int, [])('5'), 0)
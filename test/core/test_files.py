@@ -0,0 +1,174 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import csv
+import json
+import os
+import tempfile
+from typing import Any, Dict, List
+import unittest
+
+import fastavro
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from core.files import FileFormat
+from core.files import get_file_cells_batches_iterator
+from core.files import get_file_cells_iterator
+from core.files import get_file_format
+
+ROWS: List[Dict[str, Any]] = [{
+    'id': i,
+    'email': f'user{i}@example.com' if i % 3 else None,
+    'address': {
+        'city': f'city {i}'
+    },
+} for i in range(25)]
+
+
+class GetFileFormatTest(unittest.TestCase):
+
+    def test_extension(self):
+        self.assertEqual(get_file_format('data/test.CSV'), FileFormat.CSV)
+        self.assertEqual(get_file_format('rows.jsonl'), FileFormat.NDJSON)
+        self.assertEqual(get_file_format('rows.parquet'), FileFormat.PARQUET)
+
+    def test_explicit_format(self):
+        self.assertEqual(get_file_format('rows.txt', 'AVRO'), FileFormat.AVRO)
+
+    def test_invalid_format(self):
+        with self.assertRaises(ValueError):
+            get_file_format('rows.txt')
+        with self.assertRaises(ValueError):
+            get_file_format('rows.csv', 'ORC')
+
+
+class GetFileCellsBatchesIteratorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        return super().setUp()
+
+    def tearDown(self):
+        self.directory.cleanup()
+        return super().tearDown()
+
+    def get_path(self, name: str) -> str:
+        return os.path.join(self.directory.name, name)
+
+    def write_csv(self) -> str:
+        path = self.get_path('rows.csv')
+        with open(path, 'w') as f:
+            writer = csv.DictWriter(f, fieldnames=['id', 'email'])
+            writer.writeheader()
+            writer.writerows({
+                'id': row['id'],
+                'email': row['email']
+            } for row in ROWS)
+        return path
+
+    def write_ndjson(self) -> str:
+        path = self.get_path('rows.ndjson')
+        with open(path, 'w') as f:
+            f.writelines(json.dumps(row) + '\n' for row in ROWS)
+        return path
+
+    def write_avro(self) -> str:
+        path = self.get_path('rows.avro')
+        schema = fastavro.parse_schema({
+            'type':
+                'record',
+            'name':
+                'Row',
+            'fields': [{
+                'name': 'id',
+                'type': 'long'
+            }, {
+                'name': 'email',
+                'type': ['null', 'string']
+            }, {
+                'name': 'address',
+                'type': {
+                    'type': 'record',
+                    'name': 'Address',
+                    'fields': [{
+                        'name': 'city',
+                        'type': 'string'
+                    }]
+                }
+            }]
+        })
+        with open(path, 'wb') as f:
+            fastavro.writer(f, schema, ROWS)
+        return path
+
+    def write_parquet(self) -> str:
+        path = self.get_path('rows.parquet')
+        pq.write_table(pa.Table.from_pylist(ROWS), path, row_group_size=10)
+        return path
+
+    def read_cells(self, path: str, columns: List[str]) -> List[List[Any]]:
+        cells: List[List[Any]] = [[] for _ in columns]
+        for cells_batches in get_file_cells_batches_iterator(path,
+                                                             columns,
+                                                             batch_size=10):
+            for column_cells, cells_batch in zip(cells, cells_batches):
+                column_cells.extend(cells_batch if isinstance(
+                    cells_batch, list) else cells_batch.to_pylist())
+        return cells
+
+    def test_csv(self):
+        ids, emails = self.read_cells(self.write_csv(), ['id', 'email'])
+
+        # CSV values are strings, and empty values are null
+        self.assertEqual(ids, [str(row['id']) for row in ROWS])
+        self.assertEqual(emails, [row['email'] for row in ROWS])
+
+    def test_csv_batches_are_arrow_arrays(self):
+        (cells,) = next(
+            get_file_cells_batches_iterator(self.write_csv(), ['id']))
+
+        self.assertIsInstance(cells, pa.Array)
+
+    def test_ndjson(self):
+        self.assertEqual(
+            self.read_cells(self.write_ndjson(), ['id', 'address.city']),
+            [[row['id'] for row in ROWS],
+             [row['address']['city'] for row in ROWS]])
+
+    def test_avro(self):
+        self.assertEqual(
+            self.read_cells(self.write_avro(), ['email', 'address.city']),
+            [[row['email'] for row in ROWS],
+             [row['address']['city'] for row in ROWS]])
+
+    def test_parquet(self):
+        batches = list(
+            get_file_cells_batches_iterator(self.write_parquet(),
+                                            ['id', 'address.city'],
+                                            batch_size=10))
+
+        self.assertEqual(len(batches), 3)
+        self.assertIsInstance(batches[0][0], pa.Array)
+        self.assertEqual(
+            self.read_cells(self.write_parquet(), ['id', 'address.city']),
+            [[row['id'] for row in ROWS],
+             [row['address']['city'] for row in ROWS]])
+
+    def test_cells_iterator(self):
+        self.assertEqual(
+            list(get_file_cells_iterator(self.write_parquet(), 'email')),
+            [row['email'] for row in ROWS])
@@ -0,0 +1,189 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from datetime import datetime
+from datetime import timezone
+from typing import cast
+import unittest
+from unittest.mock import MagicMock
+
+from google.cloud.exceptions import NotFound
+
+from core.bigquery import TableMetadata
+from core.config import ColumnConfig
+from core.config import ReadConfig
+from core.config import RuleConfig
+from core.fingerprint import get_config_hash
+from core.fingerprint import get_summary_cache
+from core.fingerprint import SummaryCache
+
+
+class GetConfigHashTest(unittest.TestCase):
+
+    def setUp(self):
+        self.column_config = ColumnConfig(
+            column='amount',
+            parser='parse_int',
+            rules=[RuleConfig(rule='is_not_negative')])
+        self.table_metadata = TableMetadata('project', 'dataset', 'table')
+        return super().setUp()
+
+    def test_stable(self):
+        self.assertEqual(
+            get_config_hash(self.column_config, None, self.table_metadata),
+            get_config_hash(
+                cast(ColumnConfig, dict(reversed(self.column_config.items()))),
+                None, self.table_metadata))
+
+    def test_changes(self):
+        config_hash = get_config_hash(self.column_config, None,
+                                      self.table_metadata)
+
+        self.assertNotEqual(
+            config_hash,
+            get_config_hash(self.column_config, ReadConfig(sample_percentage=1),
+                            self.table_metadata))
+        self.column_config['rules'].append(
+            RuleConfig(rule='is_not_approx_zero'))
+        self.assertNotEqual(
+            config_hash,
+            get_config_hash(self.column_config, None, self.table_metadata))
+
+
+class SummaryCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client = MagicMock()
+        self.table = self.client.get_table.return_value
+        self.table.modified = datetime(2023, 1, 2, tzinfo=timezone.utc)
+        self.table.num_rows = 10
+        self.table.streaming_buffer = None
+        self.source_table = TableMetadata('project', 'dataset', 'table')
+        self.cache_table = TableMetadata('project', 'dataset', 'cache')
+        return super().setUp()
+
+    def get_cache(self) -> SummaryCache:
+        return cast(SummaryCache, self.get_summary_cache())
+
+    def get_summary_cache(self):
+        return get_summary_cache(self.client, self.cache_table,
+                                 self.source_table, [('a', 'hash_a'),
+                                                     ('b', 'hash_b')])
+
+    def set_cached_rows(self, rows):
+        self.client.query.return_value.result.return_value = rows
+
+    def test_hit(self):
+        self.set_cached_rows([{
+            'key': 'project.dataset.table/a/hash_a',
+            'config_hash': 'hash_a',
+            'summary': 'Summary a.'
+        }, {
+            'key': 'project.dataset.table/b/hash_b',
+            'config_hash': 'hash_b',
+            'summary': 'Summary b.'
+        }])
+
+        summaries = self.get_cache().get()
+
+        self.assertEqual(summaries, ['Summary a.', 'Summary b.'])
+        parameters = {
+            parameter.name: parameter for parameter in
+            self.client.query.call_args.kwargs['job_config'].query_parameters
+        }
+        self.assertEqual(parameters['num_rows'].value, 10)
+        self.assertEqual(parameters['last_modified_time'].value,
+                         self.table.modified)
+
+    def test_miss(self):
+        self.set_cached_rows([{
+            'key': 'project.dataset.table/a/hash_a',
+            'config_hash': 'hash_a',
+            'summary': 'Summary a.'
+        }, {
+            'key': 'project.dataset.table/b/hash_b',
+            'config_hash': 'changed',
+            'summary': 'Summary b.'
+        }])
+
+        self.assertIsNone(self.get_cache().get())
+
+    def test_same_column_with_different_configs(self):
+        self.set_cached_rows([{
+            'key': 'project.dataset.table/a/hash_a',
+            'config_hash': 'hash_a',
+            'summary': 'Summary a.'
+        }, {
+            'key': 'project.dataset.table/a/hash_a2',
+            'config_hash': 'hash_a2',
+            'summary': 'Summary a2.'
+        }])
+        cache = cast(
+            SummaryCache,
+            get_summary_cache(self.client, self.cache_table, self.source_table,
+                              [('a', 'hash_a'), ('a', 'hash_a2')]))
+
+        self.assertEqual(cache.get(), ['Summary a.', 'Summary a2.'])
+
+    def test_set(self):
+        self.set_cached_rows([])
+
+        self.get_cache().set(['Summary a.', 'Summary b.'])
+
+        job_config = self.client.query.call_args.kwargs['job_config']
+        parameters = {
+            parameter.name: parameter.values
+            for parameter in job_config.query_parameters
+            if hasattr(parameter, 'values')
+        }
+        self.assertEqual(
+            parameters, {
+                'keys': [
+                    'project.dataset.table/a/hash_a',
+                    'project.dataset.table/b/hash_b'
+                ],
+                'config_hashes': ['hash_a', 'hash_b'],
+                'summaries': ['Summary a.', 'Summary b.']
+            })
+        self.assertIn('MERGE `project.dataset.cache`',
+                      self.client.query.call_args[0][0])
+
+    def test_identical_configs_are_merged_once(self):
+        self.set_cached_rows([])
+        cache = cast(
+            SummaryCache,
+            get_summary_cache(self.client, self.cache_table, self.source_table,
+                              [('a', 'hash_a'), ('a', 'hash_a')]))
+
+        cache.set(['Summary a.', 'Summary a.'])
+
+        job_config = self.client.query.call_args.kwargs['job_config']
+        keys = next(parameter.values
+                    for parameter in job_config.query_parameters
+                    if parameter.name == 'keys')
+        self.assertEqual(keys, ['project.dataset.table/a/hash_a'])
+
+    def test_creates_cache_table(self):
+        self.client.get_table.side_effect = [self.table, NotFound('cache')]
+
+        self.get_summary_cache()
+
+        self.client.create_table.assert_called_once()
+
+    def test_streaming_tables_are_not_cached(self):
+        self.table.streaming_buffer = MagicMock()
+
+        self.assertIsNone(self.get_summary_cache())
@@ -0,0 +1,264 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import json
+import threading
+import time
+import unittest
+
+from core.helpers import BackgroundFlusher
+from core.helpers import Buffer
+from core.helpers import get_json_size
+from core.helpers import iterate_in_parallel
+from core.helpers import SpaceSaving
+
+
+def _slow_range(start, stop, delay=0.001):
+    for i in range(start, stop):
+        time.sleep(delay)
+        yield i
+
+
+def _failing_range(stop):
+    yield from range(stop)
+    raise RuntimeError('Stream broke.')
+
+
+class IterateInParallelTest(unittest.TestCase):
+
+    def test_preserves_order(self):
+        iterables = [_slow_range(0, 10), range(10, 20), _slow_range(20, 30)]
+        result = list(iterate_in_parallel(iterables, preserve_order=True))
+        self.assertEqual(result, list(range(30)))
+
+    def test_unordered_yields_all_items(self):
+        iterables = [_slow_range(0, 10), range(10, 20), _slow_range(20, 30)]
+        result = list(iterate_in_parallel(iterables, preserve_order=False))
+        self.assertCountEqual(result, list(range(30)))
+
+    def test_empty_iterables(self):
+        self.assertEqual(list(iterate_in_parallel([])), [])
+        self.assertEqual(list(iterate_in_parallel([[], []])), [])
+
+    def test_reraises_errors(self):
+        for preserve_order in [True, False]:
+            with self.assertRaises(RuntimeError):
+                list(
+                    iterate_in_parallel([range(5), _failing_range(5)],
+                                        preserve_order=preserve_order))
+
+    def test_bounded_buffering(self):
+        produced = []
+
+        def _tracked_range(stop):
+            for i in range(stop):
+                produced.append(i)
+                yield i
+
+        iterator = iterate_in_parallel([_tracked_range(1000)], max_buffered=2)
+        next(iterator)
+        time.sleep(0.1)
+        # one item consumed, max_buffered queued & one blocked on the queue
+        self.assertLessEqual(len(produced), 4)
+        iterator.close()
+
+    def test_close_stops_threads(self):
+        thread_count = threading.active_count()
+        iterator = iterate_in_parallel(
+            [_slow_range(0, 10000),
+             _slow_range(0, 10000)])
+        next(iterator)
+        iterator.close()
+        self.assertEqual(threading.active_count(), thread_count)
+
+
+class GetJsonSizeTest(unittest.TestCase):
+
+    def test_ascii(self):
+        self.assertEqual(get_json_size('abc'), 3)
+        self.assertEqual(get_json_size(123), 3)
+        self.assertEqual(get_json_size('a"b\n'), 6)
+
+    def test_multi_byte(self):
+        for value in ['é', '日本', '😀', '\x01']:
+            self.assertEqual(get_json_size(value), len(json.dumps(value)) - 2)
+            self.assertGreaterEqual(get_json_size(value),
+                                    len(value.encode('utf-8')))
+
+
+class BufferTest(unittest.TestCase):
+
+    def setUp(self):
+        self.flushed: list[list[str]] = []
+        return super().setUp()
+
+    def flush(self, items):
+        self.flushed.append(list(items))
+
+    def test_flushes_over_max_size(self):
+        buffer = Buffer[str]([], 2, self.flush)
+        for item in 'abcd':
+            buffer.push(item)
+        buffer.flush(force=True)
+
+        self.assertEqual(self.flushed, [['a', 'b', 'c'], ['d']])
+
+    def test_flushes_before_max_bytes(self):
+        buffer = Buffer[str]([], 100, self.flush, max_bytes=10, get_size=len)
+        for item in ['aaaa', 'bbbb', 'cccc', 'dddddddddddd', 'ee']:
+            buffer.push(item)
+        self.assertEqual(buffer.bytes, 2)
+        buffer.flush(force=True)
+
+        # an item larger than max_bytes is flushed alone
+        self.assertEqual(self.flushed,
+                         [['aaaa', 'bbbb'], ['cccc'], ['dddddddddddd'], ['ee']])
+        self.assertEqual(buffer.bytes, 0)
+
+    def test_max_bytes_requires_get_size(self):
+        with self.assertRaises(ValueError):
+            Buffer[str]([], 100, self.flush, max_bytes=10)
+
+    def test_grows_while_fast(self):
+        buffer = Buffer[str]([], 1, self.flush, target_seconds=60, size_limit=5)
+        for item in 'abcdefghijklmnop':
+            buffer.push(item)
+
+        self.assertEqual([len(batch) for batch in self.flushed], [2, 3, 5, 6])
+        self.assertEqual(buffer.max_size, 5)
+
+    def test_shrinks_while_slow(self):
+
+        def slow_flush(items):
+            time.sleep(0.01)
+            self.flush(items)
+
+        buffer = Buffer[str]([], 8, slow_flush, target_seconds=0.001)
+        for item in 'abcdefghijklmnopqrs':
+            buffer.push(item)
+
+        self.assertEqual([len(batch) for batch in self.flushed], [9, 5, 3, 2])
+        self.assertEqual(buffer.max_size, 1)
+
+    def test_forced_flush_does_not_adapt(self):
+        buffer = Buffer[str]([], 4, self.flush, target_seconds=60)
+        buffer.push('a')
+        buffer.flush(force=True)
+
+        self.assertEqual(buffer.max_size, 4)
+
+
+class BackgroundFlusherTest(unittest.TestCase):
+
+    def test_flushes_batches_in_order(self):
+        flushed: list[list[int]] = []
+        flusher = BackgroundFlusher[int](flushed.append, max_pending=2)
+
+        batch = [1, 2]
+        flusher(batch)
+        # the caller may reuse its list once queued
+        batch.clear()
+        flusher([3])
+        flusher.join()
+
+        self.assertEqual(flushed, [[1, 2], [3]])
+        self.assertIsNone(flusher._thread)
+
+    def test_caller_continues_while_flushing(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_flush(items):
+            started.set()
+            release.wait()
+
+        flusher = BackgroundFlusher[int](slow_flush, max_pending=1)
+        flusher([1])
+        started.wait()
+        # one batch is being flushed and one can wait, without blocking
+        flusher([2])
+
+        blocked = threading.Thread(target=flusher, args=([3],))
+        blocked.start()
+        blocked.join(timeout=0.1)
+        self.assertTrue(blocked.is_alive())
+
+        release.set()
+        blocked.join()
+        flusher.join()
+
+    def test_errors_are_reraised(self):
+
+        def failing_flush(items):
+            raise RuntimeError('insert failed')
+
+        flusher = BackgroundFlusher[int](failing_flush)
+        flusher([1])
+        with self.assertRaises(RuntimeError):
+            flusher.join()
+        with self.assertRaises(RuntimeError):
+            flusher([2])
+
+
+class SpaceSavingTest(unittest.TestCase):
+
+    def test_exact_counts_within_capacity(self):
+        counter = SpaceSaving[str](capacity=3)
+        for item in 'abacab':
+            counter.add(item)
+
+        self.assertEqual(counter.most_common(2), [('a', 3), ('b', 2)])
+
+    def test_bounded_heavy_hitters(self):
+        counter = SpaceSaving[int](capacity=10)
+        for i in range(1000):
+            counter.add(i % 3 if i % 2 else i)
+
+        self.assertEqual(len(counter.counts), 10)
+        # items more frequent than 1 / capacity are always counted
+        self.assertCountEqual([item for item, _ in counter.most_common(3)],
+                              [0, 1, 2])
+        for item, count in counter.most_common(3):
+            self.assertGreaterEqual(count, 166)
+
+    def test_evicts_least_frequent(self):
+        counter = SpaceSaving[str](capacity=3)
+        for item in 'aaabbc':
+            counter.add(item)
+        counter.add('a', 2)
+        counter.add('d')
+
+        # c had the smallest count, so d inherits it
+        self.assertEqual(counter.counts, {'a': 5, 'b': 2, 'd': 2})
+        counter.add('e')
+        self.assertEqual(len(counter.counts), 3)
+        self.assertEqual(counter.counts['e'], 3)
+        self.assertEqual(len(counter._heap), 3)
+
+    def test_many_distinct_items(self):
+        counter = SpaceSaving[int](capacity=100)
+        for i in range(100000):
+            counter.add(0 if i % 10 == 0 else i)
+
+        self.assertEqual(len(counter.counts), 100)
+        self.assertEqual(len(counter._heap), 100)
+        self.assertEqual(counter.most_common(1)[0][0], 0)
+        self.assertEqual(sum(counter.counts.values()), 100000)
+
+    def test_requires_capacity(self):
+        for capacity in [0, -1]:
+            with self.assertRaises(ValueError):
+                SpaceSaving[int](capacity=capacity)
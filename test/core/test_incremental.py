@@ -0,0 +1,194 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from datetime import date
+from datetime import datetime
+from datetime import timezone
+from decimal import Decimal
+import unittest
+from unittest.mock import MagicMock
+
+from google.cloud.exceptions import NotFound
+
+from core.bigquery import TableMetadata
+from core.http import MalformedConfigError
+from core.incremental import get_increment
+from core.incremental import get_state_key
+from core.incremental import watermark_literal
+from core.incremental import watermark_parameter
+from core.incremental import WatermarkStore
+
+
+class WatermarkLiteralTest(unittest.TestCase):
+
+    def test_literals(self):
+        self.assertEqual(
+            watermark_literal(datetime(2023, 1, 2, 3, 4, 5,
+                                       tzinfo=timezone.utc)),
+            "CAST('2023-01-02 03:04:05+00:00' AS TIMESTAMP)")
+        self.assertEqual(watermark_literal(datetime(2023, 1, 2, 3, 4, 5)),
+                         "CAST('2023-01-02 03:04:05' AS DATETIME)")
+        self.assertEqual(watermark_literal(date(2023, 1, 2)),
+                         "CAST('2023-01-02' AS DATE)")
+        self.assertEqual(watermark_literal(42), '42')
+        self.assertEqual(watermark_literal("it's"), "'it\\'s'")
+        self.assertEqual(watermark_literal(1.5), '1.5')
+
+    def test_large_ints(self):
+        # Not exactly representable as floats, e.g. nanosecond timestamps
+        self.assertEqual(watermark_literal(2**60 + 1), str(2**60 + 1))
+
+    def test_decimals(self):
+        self.assertEqual(watermark_literal(Decimal('12.5')),
+                         "CAST('12.5' AS NUMERIC)")
+        self.assertEqual(watermark_literal(Decimal('1E+3')),
+                         "CAST('1000' AS NUMERIC)")
+        self.assertEqual(watermark_literal(Decimal('0.0000000001')),
+                         "CAST('0.0000000001' AS BIGNUMERIC)")
+        self.assertEqual(watermark_literal(Decimal(10**30)),
+                         f"CAST('{10**30}' AS BIGNUMERIC)")
+
+    def test_unsupported(self):
+        for value in [b'bytes', True, 2**63, float('nan')]:
+            with self.assertRaises(MalformedConfigError):
+                watermark_literal(value)
+
+
+class WatermarkParameterTest(unittest.TestCase):
+
+    def test_round_trips(self):
+        for value, column_type in [
+            (datetime(2023, 1, 2, 3, 4, 5, 6,
+                      tzinfo=timezone.utc), 'TIMESTAMP'),
+            (datetime(2023, 1, 2, 3, 4, 5), 'DATETIME'),
+            (date(2023, 1, 2), 'DATE'),
+            (2**60 + 1, 'INT64'),
+            (-42, 'INT64'),
+            ("it's\\u0041\n", 'STRING'),
+            (1.5, 'FLOAT64'),
+            (Decimal('12.5'), 'NUMERIC'),
+            (Decimal(10**30), 'BIGNUMERIC'),
+        ]:
+            parameter = watermark_parameter('watermark',
+                                            watermark_literal(value))
+            self.assertEqual(parameter.name, 'watermark')
+            self.assertEqual(parameter.type_, column_type)
+            self.assertEqual(parameter.value, value)
+
+    def test_unsupported(self):
+        for literal in ["CAST('x' AS BYTES)", 'TRUE']:
+            with self.assertRaises(ValueError):
+                watermark_parameter('watermark', literal)
+
+
+class GetIncrementTest(unittest.TestCase):
+
+    def setUp(self):
+        self.table = TableMetadata('project', 'dataset', 'table')
+        self.client = MagicMock()
+        self.store = MagicMock(spec=WatermarkStore)
+        return super().setUp()
+
+    def set_query_result(self, watermark, total_rows):
+        self.client.query.return_value.result.return_value = [{
+            'watermark': watermark,
+            'total_rows': total_rows
+        }]
+
+    def test_first_run(self):
+        self.store.get.return_value = None
+        self.set_query_result(date(2023, 1, 2), 100)
+
+        increment = get_increment(self.client, self.store, self.table, 'day',
+                                  ['b', 'a'])
+
+        self.assertEqual(increment.key, 'project.dataset.table/day/a,b')
+        self.assertEqual(
+            increment.row_restriction,
+            "`day` IS NOT NULL AND `day` <= CAST('2023-01-02' AS DATE)")
+        self.assertEqual(increment.total_rows, 100)
+        self.assertIn('WHERE `day` IS NOT NULL',
+                      self.client.query.call_args[0][0])
+
+    def test_next_run(self):
+        self.store.get.return_value = "CAST('2023-01-02' AS DATE)"
+        self.set_query_result(date(2023, 1, 3), 10)
+
+        increment = get_increment(self.client, self.store, self.table, 'day',
+                                  ['a'])
+
+        self.assertEqual(
+            increment.row_restriction, "`day` > CAST('2023-01-02' AS DATE) AND "
+            "`day` <= CAST('2023-01-03' AS DATE)")
+        # only the rows after the stored watermark are queried
+        self.assertIn('WHERE `day` > @watermark',
+                      self.client.query.call_args[0][0])
+        job_config = self.client.query.call_args.kwargs['job_config']
+        self.assertEqual(job_config.query_parameters[0].value, date(2023, 1, 2))
+        self.store.set.assert_not_called()
+
+        increment.commit()
+
+        self.store.set.assert_called_once_with('project.dataset.table/day/a',
+                                               "CAST('2023-01-03' AS DATE)")
+
+    def test_no_new_rows(self):
+        self.store.get.return_value = '5'
+        self.set_query_result(None, 0)
+
+        increment = get_increment(self.client, self.store, self.table, 'id',
+                                  ['a'])
+        increment.commit()
+
+        self.assertEqual(increment.total_rows, 0)
+        self.store.set.assert_not_called()
+
+    def test_state_keys(self):
+        self.assertNotEqual(get_state_key(self.table, 'day', ['a']),
+                            get_state_key(self.table, 'day', ['a', 'b']))
+
+
+class WatermarkStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client = MagicMock()
+        self.store = WatermarkStore(
+            self.client, TableMetadata('project', 'dataset', 'state'))
+        return super().setUp()
+
+    def test_get(self):
+        self.client.query.return_value.result.return_value = [{
+            'watermark': '5'
+        }]
+
+        self.assertEqual(self.store.get('key'), '5')
+        job_config = self.client.query.call_args.kwargs['job_config']
+        self.assertEqual(job_config.query_parameters[0].value, 'key')
+
+    def test_get_missing(self):
+        self.client.query.return_value.result.return_value = []
+
+        self.assertIsNone(self.store.get('key'))
+
+    def test_set_creates_table(self):
+        self.client.get_table.side_effect = NotFound('state')
+
+        self.store.set('key', '5')
+        self.store.set('key', '6')
+
+        self.client.create_table.assert_called_once()
+        self.assertIn('MERGE `project.dataset.state`',
+                      self.client.query.call_args[0][0])
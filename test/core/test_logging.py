@@ -16,11 +16,30 @@ limitations under the License.
 
 from datetime import datetime
 import json
-from typing import Any
+import threading
+from typing import Any, cast, List, Tuple
 import unittest
+from unittest.mock import MagicMock
+from unittest.mock import patch
 
+import pyarrow as pa
+
+from core.bigquery import build_proto_descriptor
+from core.bigquery import get_proto_message_class
 from core.bigquery import TableMetadata
+from core.config import LogConfig
+from core.http import DQMResponse
+from core.http import MalformedConfigError
+from core.logging import BigQueryLogger
+from core.logging import BigQueryWriteLogger
+from core.logging import get_insert_id
+from core.logging import get_logger
+from core.logging import LOG_MESSAGE_TYPES
+from core.logging import Logger
+from core.logging import LogMessage
 from core.logging import PrintLogger
+from core.logging import StreamFormat
+from core.logging import StreamLogger
 
 
 class PrintLoggerTest(unittest.TestCase):
@@ -85,6 +104,14 @@ class PrintLoggerTest(unittest.TestCase):
             self.logger._build_parser_message(column, parser, error, value),
             self.test_log)
 
+        self.test_log['violation_count'] = 3
+        self.assertEqual(
+            self.logger._build_parser_message(column,
+                                              parser,
+                                              error,
+                                              value,
+                                              violation_count=3), self.test_log)
+
     def test_build_rule_message(self):
         column = 'name'
         rule = 'isName'
@@ -135,3 +162,523 @@ class PrintLoggerTest(unittest.TestCase):
                                             error,
                                             value,
                                             rule_params=params), self.test_log)
+
+
+class ListLogger(Logger):
+
+    DEFAULT_BATCH_SIZE = 2
+
+    def __init__(self,
+                 max_pending_batches: int | None = None,
+                 batch_size: int | None = None) -> None:
+        self.batches: list[list[LogMessage]] = []
+        super().__init__(batch_size, max_pending_batches)
+
+    def send_log_messages(self, messages: list[LogMessage]) -> None:
+        self.batches.append(list(messages))
+
+    def send_log_message(self, message: LogMessage) -> None:
+        self.send_log_messages([message])
+
+
+class BackgroundLoggerTest(unittest.TestCase):
+
+    def test_force_flush_waits_for_all_messages(self):
+        for max_pending_batches in [0, 1]:
+            logger = ListLogger(max_pending_batches)
+            for i in range(7):
+                logger.system(str(i))
+            logger.flush(force=True)
+
+            self.assertEqual([
+                message['error']
+                for batch in logger.batches
+                for message in batch
+            ], [str(i) for i in range(7)])
+
+    def test_logging_from_threads(self):
+        logger = ListLogger(max_pending_batches=1)
+
+        def log_messages(thread: int) -> None:
+            for i in range(100):
+                logger.system(f'{thread}-{i}')
+
+        threads = [
+            threading.Thread(target=log_messages, args=(thread,))
+            for thread in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        logger.flush(force=True)
+
+        self.assertCountEqual(
+            [message['error'] for batch in logger.batches for message in batch],
+            [f'{thread}-{i}' for thread in range(4) for i in range(100)])
+
+    def test_flush_count(self):
+        for max_pending_batches in [0, 1]:
+            logger = ListLogger(max_pending_batches)
+            for i in range(7):
+                logger.system(str(i))
+            logger.flush(force=True)
+            logger.flush(force=True)
+
+            # Forcing a flush of an empty queue does not count
+            self.assertEqual(logger.flush_count,
+                             len([batch for batch in logger.batches if batch]))
+            self.assertGreater(logger.flush_seconds, 0)
+
+    def test_large_values_are_flushed_in_smaller_batches(self):
+
+        class BytesLogger(ListLogger):
+            MAX_BATCH_BYTES = 3000
+
+        logger = BytesLogger(batch_size=100)
+        for value in ['x' * 1500, 'y' * 1500, 'z', 'w']:
+            logger.rule('column', 'rule', 'Rule failed.', value)
+        logger.flush(force=True)
+
+        self.assertEqual([len(batch) for batch in logger.batches], [1, 3])
+
+    def test_multi_byte_values_are_measured_encoded(self):
+
+        class BytesLogger(ListLogger):
+            MAX_BATCH_BYTES = 3000
+
+        logger = BytesLogger(batch_size=100)
+        # 400 characters, but 2400 bytes once escaped as JSON
+        for _ in range(4):
+            logger.rule('column', 'rule', 'Rule failed.', 'é' * 400)
+        logger.flush(force=True)
+
+        self.assertEqual([len(batch) for batch in logger.batches], [1] * 4)
+        for batch in logger.batches:
+            self.assertLessEqual(len(json.dumps(batch)),
+                                 BytesLogger.MAX_BATCH_BYTES)
+
+    @patch.object(ListLogger, 'send_log_messages', side_effect=RuntimeError)
+    def test_errors_are_raised_on_flush(self, _):
+        logger = ListLogger(max_pending_batches=1)
+        for i in range(3):
+            logger.system(str(i))
+        with self.assertRaises(RuntimeError):
+            logger.flush(force=True)
+
+    def test_close_stops_the_background_thread(self):
+        logger = ListLogger(max_pending_batches=1)
+        for i in range(3):
+            logger.system(str(i))
+        flusher = logger._background_flusher
+        assert flusher is not None
+        self.assertIsNotNone(flusher._thread)
+
+        logger.close()
+
+        self.assertIsNone(flusher._thread)
+        self.assertTrue(logger.batches)
+
+    @patch.object(ListLogger, 'send_log_messages', side_effect=RuntimeError)
+    def test_close_ignores_errors(self, _):
+        logger = ListLogger(max_pending_batches=1)
+        for i in range(3):
+            logger.system(str(i))
+
+        logger.close()
+
+        self.assertIsNone(cast(Any, logger._background_flusher)._thread)
+
+
+class LogRowsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = ListLogger(batch_size=100)
+        self.logger.set_base_log('1.0.0', '1234567890',
+                                 TableMetadata('project', 'dataset', 'table'),
+                                 datetime(2022, 10, 20))
+        self.params = {'lower_bound': 0}
+        return super().setUp()
+
+    def test_shared_fields_are_interned(self):
+        for value in [-1, -2]:
+            self.logger.rule('amount', 'is_within', 'Out of range.', value,
+                             self.params)
+        self.logger.rule('amount',
+                         'is_within',
+                         'Out of range.',
+                         -3,
+                         self.params,
+                         partition_id='20230101')
+
+        rows = self.logger._messages.queue
+        self.assertIs(rows[0][0], rows[1][0])
+        self.assertIsNot(rows[0][0], rows[2][0])
+        self.assertEqual(len(self.logger._fields), 2)
+
+    def test_flushed_messages(self):
+        self.logger.system('Something went wrong!')
+        self.logger.parser('amount',
+                           'parse_int',
+                           'Not an int.',
+                           None,
+                           row_offset=3)
+        self.logger.rule('amount',
+                         'is_within',
+                         'Out of range.',
+                         -1,
+                         self.params,
+                         violation_count=2,
+                         partition_id='20230101')
+        self.logger.flush(force=True)
+
+        self.assertEqual(self.logger.batches, [[
+            self.logger._build_system_message('Something went wrong!'),
+            self.logger._build_parser_message(
+                'amount', 'parse_int', 'Not an int.', None, row_offset=3),
+            self.logger._build_rule_message('amount',
+                                            'is_within',
+                                            'Out of range.',
+                                            -1,
+                                            self.params,
+                                            violation_count=2,
+                                            partition_id='20230101')
+        ]])
+        self.assertNotIn('value', self.logger.batches[0][0])
+        self.assertIsNone(self.logger.batches[0][1]['value'])
+        self.assertEqual(self.logger.batches[0][2]['rule_params'],
+                         '{"lower_bound": 0}')
+
+    def test_summary_messages(self):
+        self.logger.parser_summary('amount', 'parse_int', 'Not an int.', 4)
+        self.logger.rule_summary('amount',
+                                 'is_within',
+                                 'Out of range.',
+                                 2,
+                                 self.params,
+                                 partition_id='20230101')
+        self.logger.rule('amount',
+                         'is_within',
+                         'Out of range.',
+                         None,
+                         self.params,
+                         violation_count=2,
+                         partition_id='20230101')
+        self.logger.flush(force=True)
+
+        parser_summary, rule_summary, rule = self.logger.batches[0]
+        self.assertEqual(parser_summary['log_type'], 'parser_summary')
+        self.assertEqual(parser_summary['parser'], 'parse_int')
+        self.assertEqual(parser_summary['violation_count'], 4)
+        self.assertEqual(rule_summary['log_type'], 'rule_summary')
+        self.assertEqual(rule_summary['rule_params'], '{"lower_bound": 0}')
+        self.assertEqual(rule_summary['partition_id'], '20230101')
+        # a summary has no value, unlike a failing null value
+        self.assertNotIn('value', rule_summary)
+        self.assertIn('value', rule)
+        self.assertNotIn('row_offset', rule_summary)
+
+    def test_set_base_log_interns_again(self):
+        self.logger.system('Before.')
+        self.logger.set_base_log('1.0.0', 'other',
+                                 TableMetadata('project', 'dataset', 'table'),
+                                 datetime(2022, 10, 20))
+        self.logger.system('After.')
+        self.logger.flush(force=True)
+
+        self.assertEqual([
+            message['workflow_execution_id']
+            for message in self.logger.batches[0]
+        ], ['1234567890', 'other'])
+
+    def test_max_interned_fields(self):
+        self.logger.MAX_INTERNED_FIELDS = 2
+        for value in range(5):
+            # a new dict of params on every call
+            self.logger.rule('amount', 'is_within', 'Out of range.', value,
+                             {'lower_bound': 0})
+            self.assertLessEqual(len(self.logger._fields), 2)
+        self.logger.flush(force=True)
+
+        self.assertEqual(len(self.logger.batches[0]), 5)
+
+
+@patch('core.logging.get_credentials')
+class GetLoggerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.log_table = TableMetadata(project_id='test_project',
+                                       dataset_id='test_dataset',
+                                       table_name='logs')
+        return super().setUp()
+
+    def test_print_logger(self, _):
+        self.assertIsInstance(get_logger(None), PrintLogger)
+
+    @patch('core.logging.get_bq_legacy_client')
+    def test_streaming_insert_backend(self, _, __):
+        for log_config in [None, LogConfig(backend='STREAMING_INSERT')]:
+            self.assertIsInstance(
+                get_logger(self.log_table, log_config=log_config),
+                BigQueryLogger)
+
+    @patch('core.logging.get_bq_write_client')
+    def test_storage_write_backend(self, _, __):
+        self.assertIsInstance(
+            get_logger(self.log_table, log_config={'backend': 'STORAGE_WRITE'}),
+            BigQueryWriteLogger)
+
+    def test_invalid_backend(self, _):
+        with self.assertRaises(ValueError):
+            get_logger(self.log_table, log_config={'backend': 'EMAIL'})
+
+    def test_stream_logger(self, _):
+        logger = get_logger(self.log_table,
+                            log_config={'stream_format': 'ARROW'})
+
+        self.assertIsInstance(logger, StreamLogger)
+        self.assertEqual(
+            cast(StreamLogger, logger).stream_format, StreamFormat.ARROW)
+        with self.assertRaises(ValueError):
+            get_logger(None, log_config={'stream_format': 'CSV'})
+
+
+class StreamLoggerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = StreamLogger(StreamFormat.NDJSON, batch_size=2)
+        return super().setUp()
+
+    def run_column(self) -> Any:
+        for i in range(5):
+            self.logger.rule('column', 'is_positive', 'Negative.', -i)
+        self.logger.flush(force=True)
+        return (DQMResponse(name='', description='Done.', code=200), 200)
+
+    def test_ndjson(self):
+        chunks = list(self.logger.stream(self.run_column))
+
+        # A full batch, the forced flush, then the response
+        self.assertEqual(len(chunks), 3)
+        lines = [json.loads(line) for line in b''.join(chunks).splitlines()]
+        self.assertEqual([line['value'] for line in lines[:-1]],
+                         [0, -1, -2, -3, -4])
+        self.assertEqual(lines[-1], {
+            'name': '',
+            'description': 'Done.',
+            'code': 200
+        })
+
+    def test_arrow(self):
+        self.logger.stream_format = StreamFormat.ARROW
+
+        data = b''.join(self.logger.stream(self.run_column))
+
+        reader = pa.ipc.open_stream(data)
+        batches = []
+        while True:
+            try:
+                batches.append(reader.read_next_batch_with_custom_metadata())
+            except StopIteration:
+                break
+        table = pa.Table.from_batches([batch for batch, _ in batches])
+        self.assertEqual(
+            table.column('value').to_pylist(), ['0', '-1', '-2', '-3', '-4'])
+        self.assertEqual(table.schema.field('violation_count').type, pa.int64())
+        response = json.loads(batches[-1][1][b'response'])
+        self.assertEqual(response['description'], 'Done.')
+
+    def test_errors_end_the_stream(self):
+
+        def run_column() -> Any:
+            self.logger.system('Started.')
+            raise MalformedConfigError('No rules specified.')
+
+        lines = [
+            json.loads(line)
+            for line in b''.join(self.logger.stream(run_column)).splitlines()
+        ]
+
+        self.assertEqual(lines[0]['error'], 'Started.')
+        self.assertEqual(lines[-1]['code'], 400)
+        self.assertEqual(lines[-1]['description'], 'No rules specified.')
+
+    def test_closing_the_stream_stops_the_run(self):
+        stopped = threading.Event()
+
+        def run_column() -> Any:
+            try:
+                while True:
+                    self.logger.system('Running.')
+            except RuntimeError:
+                stopped.set()
+                raise
+
+        chunks = self.logger.stream(run_column)
+        next(chunks)
+        chunks.close()
+
+        self.assertTrue(stopped.wait(timeout=5))
+
+
+class GetInsertIdTest(unittest.TestCase):
+
+    def setUp(self):
+        self.message = LogMessage(workflow_execution_id='1234567890',
+                                  run_timestamp_utc='2022-10-20T10:30:20',
+                                  full_table_id='project.dataset.table',
+                                  log_type='rule',
+                                  column='amount',
+                                  rule='is_not_negative',
+                                  rule_params='{}',
+                                  error='Negative.',
+                                  value='-5',
+                                  row_offset=42)
+        return super().setUp()
+
+    def test_same_for_retries(self):
+        retry = self.message | LogMessage(
+            run_timestamp_utc='2022-10-20T11:00:00')
+
+        self.assertEqual(get_insert_id(retry), get_insert_id(self.message))
+        self.assertEqual(len(get_insert_id(self.message)), 64)
+
+    def test_differs_by_row(self):
+        for other in [
+                self.message | LogMessage(row_offset=43),
+                self.message | LogMessage(partition_id='20230101'),
+                self.message | LogMessage(workflow_execution_id='other'),
+                self.message | LogMessage(rule='is_not_approx_zero')
+        ]:
+            self.assertNotEqual(get_insert_id(other),
+                                get_insert_id(self.message))
+
+
+@patch('core.logging.sleep')
+@patch('core.logging.insert_rows')
+@patch('core.logging.get_bq_legacy_client')
+@patch('core.logging.get_credentials')
+class BigQueryLoggerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.table_metadata = TableMetadata(project_id='test_project',
+                                            dataset_id='test_dataset',
+                                            table_name='logs')
+        return super().setUp()
+
+    def get_logger(self):
+        logger = BigQueryLogger(self.table_metadata, max_pending_batches=0)
+        logger._fallback_logger = MagicMock(spec=Logger)
+        for offset in range(3):
+            logger.rule('amount',
+                        'is_not_negative',
+                        'Negative.',
+                        -5,
+                        row_offset=offset)
+        return logger
+
+    def test_insert_ids(self, _, __, mock_insert_rows, mock_sleep):
+        inserted: List[Tuple[LogMessage, str]] = []
+
+        def insert_rows(_, __, rows, row_ids):
+            inserted.extend(zip(list(rows), row_ids))
+            return {}
+
+        mock_insert_rows.side_effect = insert_rows
+        self.get_logger().flush(force=True)
+
+        self.assertEqual(len(inserted), 3)
+        for row, row_id in inserted:
+            self.assertEqual(row_id, get_insert_id(row))
+        self.assertEqual(len({row_id for _, row_id in inserted}), 3)
+        mock_sleep.assert_not_called()
+
+    def test_retries_failed_rows(self, _, __, mock_insert_rows, mock_sleep):
+        timeout = [{'reason': 'timeout', 'message': 'Timed out.'}]
+        mock_insert_rows.side_effect = [{
+            1: timeout,
+            2: timeout
+        }, {
+            0: timeout
+        }, {}]
+        self.get_logger().flush(force=True)
+
+        self.assertEqual(mock_insert_rows.call_count, 3)
+        first_ids = mock_insert_rows.call_args_list[0][0][3]
+        self.assertEqual(mock_insert_rows.call_args_list[1][0][3],
+                         first_ids[1:])
+        self.assertEqual(mock_insert_rows.call_args_list[2][0][3],
+                         first_ids[1:2])
+        self.assertEqual([call[0][0] for call in mock_sleep.call_args_list],
+                         [1.0, 2.0])
+
+    def test_gives_up(self, _, __, mock_insert_rows, mock_sleep):
+        mock_insert_rows.return_value = {0: [{'reason': 'backendError'}]}
+        logger = self.get_logger()
+
+        with self.assertRaises(RuntimeError):
+            logger.flush(force=True)
+        self.assertEqual(mock_insert_rows.call_count,
+                         BigQueryLogger.MAX_ATTEMPTS)
+        logger._fallback_logger.send_log_message.assert_called_once()
+
+    def test_invalid_rows_are_not_retried(self, _, __, mock_insert_rows,
+                                          mock_sleep):
+        mock_insert_rows.return_value = {
+            0: [{
+                'reason': 'invalid'
+            }],
+            1: [{
+                'reason': 'stopped'
+            }]
+        }
+
+        with self.assertRaises(RuntimeError):
+            self.get_logger().flush(force=True)
+        mock_insert_rows.assert_called_once()
+        mock_sleep.assert_not_called()
+
+
+@patch('core.logging.append_rows', return_value=[])
+@patch('core.logging.open_append_rows_stream')
+@patch('core.logging.get_bq_write_client')
+@patch('core.logging.get_credentials')
+class BigQueryWriteLoggerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.table_metadata = TableMetadata(project_id='test_project',
+                                            dataset_id='test_dataset',
+                                            table_name='logs')
+        self.message_class = get_proto_message_class(
+            build_proto_descriptor('LogMessage', LOG_MESSAGE_TYPES))
+        return super().setUp()
+
+    def test_appends_proto_rows(self, _, __, mock_open_stream,
+                                mock_append_rows):
+        logger = BigQueryWriteLogger(self.table_metadata, batch_size=2)
+        logger.rule('amount', 'is_not_negative', 'Negative.', -5, {'a': 1})
+        logger.parser('amount', 'parse_int', 'Invalid.', None)
+        logger.flush(force=True)
+
+        mock_open_stream.assert_called_once()
+        rows = [
+            self.message_class.FromString(row)
+            for call in mock_append_rows.call_args_list
+            for row in call[0][1]
+        ]
+        self.assertEqual([row.value for row in rows], ['-5', ''])
+        self.assertFalse(rows[1].HasField('value'))
+        self.assertEqual(rows[0].rule_params, '{"a": 1}')
+        self.assertEqual(rows[1].log_type, 'parser')
+        # the connection is closed once all logs are sent
+        mock_open_stream.return_value.close.assert_called_once()
+
+    def test_append_errors(self, _, __, ___, mock_append_rows):
+        mock_append_rows.return_value = ['Invalid row.']
+        logger = BigQueryWriteLogger(self.table_metadata)
+        logger._fallback_logger = MagicMock(spec=Logger)
+        logger.system('Something went wrong!')
+
+        with self.assertRaises(RuntimeError):
+            logger.flush(force=True)
+        logger._fallback_logger.send_log_message.assert_called_once()
@@ -0,0 +1,91 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import time
+import unittest
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from core.config import ProfileConfig
+from core.logging import Logger
+from core.metrics import RunMetrics
+from core.profiling import get_profile_name
+from core.profiling import upload_to_gcs
+
+
+class RunMetricsTest(unittest.TestCase):
+
+    def test_time_iterator(self):
+        metrics = RunMetrics()
+
+        for _ in metrics.time_iterator(range(3)):
+            time.sleep(0.01)
+
+        self.assertGreaterEqual(metrics.validate_seconds, 0.03)
+        self.assertLess(metrics.read_seconds, metrics.validate_seconds)
+        self.assertIsNotNone(metrics.first_row_seconds)
+
+    def test_time_read_client(self):
+        client = MagicMock()
+        client.create_read_session.side_effect = lambda **kwargs: time.sleep(
+            0.01)
+        metrics = RunMetrics()
+
+        timed_client = metrics.time_read_client(client)
+        timed_client.create_read_session(parent='project')
+        timed_client.read_rows('stream')
+
+        self.assertGreaterEqual(metrics.read_session_seconds, 0.01)
+        client.create_read_session.assert_called_once_with(parent='project')
+        client.read_rows.assert_called_once_with('stream')
+
+    def test_finish(self):
+        logger = MagicMock(spec=Logger, flush_count=2, flush_seconds=0.5)
+        metrics = RunMetrics()
+
+        metrics.finish(100, logger)
+        result = metrics.to_dict()
+
+        self.assertEqual(result['rows'], 100)
+        self.assertEqual(result['logger_flushes'], 2)
+        self.assertEqual(result['logger_flush_seconds'], 0.5)
+        self.assertGreater(result['rows_per_second'], 0)
+        self.assertGreater(result['peak_rss_bytes'], 0)
+        self.assertNotIn('_start', result)
+
+
+class ProfilingTest(unittest.TestCase):
+
+    def test_get_profile_name(self):
+        self.assertEqual(
+            get_profile_name(ProfileConfig(bucket='bucket'), 'execution',
+                             'amount'), 'profiles/execution/amount.prof')
+        self.assertEqual(
+            get_profile_name(ProfileConfig(bucket='bucket', prefix='/dqm/'),
+                             'execution', 'amount'),
+            'dqm/execution/amount.prof')
+
+    @patch('core.profiling.AuthorizedSession')
+    def test_upload_to_gcs(self, mock_session):
+        upload_to_gcs(MagicMock(), 'bucket', 'profiles/a.prof', b'data')
+
+        post = mock_session.return_value.post
+        self.assertEqual(
+            post.call_args[0][0],
+            'https://storage.googleapis.com/upload/storage/v1/b/bucket/o')
+        self.assertEqual(post.call_args.kwargs['params']['name'],
+                         'profiles/a.prof')
+        post.return_value.raise_for_status.assert_called_once()
@@ -0,0 +1,120 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import unittest
+from unittest.mock import MagicMock
+
+import pyarrow as pa
+
+from core.config import AggregationConfig
+from core.config import ColumnConfig
+from core.config import RuleConfig
+from core.logging import Logger
+from core.parallel import chunk_cells
+from core.parallel import ProcessValidator
+from core.validation import ColumnValidator
+
+# Worker processes of the tests, sharing a single pool
+PROCESSES = 2
+
+
+class ChunkCellsTest(unittest.TestCase):
+
+    def test_chunks(self):
+        self.assertEqual(list(chunk_cells(range(5), 2)), [[0, 1], [2, 3], [4]])
+        self.assertEqual(list(chunk_cells([], 2)), [])
+
+
+class ProcessValidatorTest(unittest.TestCase):
+    """
+    Checking chunks in worker processes must log the same messages, in the
+    same order, and count the same outcomes as checking them in process.
+    """
+
+    def setUp(self):
+        self.column_config = ColumnConfig(
+            column='amount',
+            parser='parse_int',
+            rules=[
+                RuleConfig(rule='is_not_negative'),
+                RuleConfig(rule='is_within_strict_int_range',
+                           args={
+                               'lower_bound': -10,
+                               'upper_bound': 10
+                           })
+            ])
+        return super().setUp()
+
+    def assertProcessParity(self, chunks, partition_id=None):
+        logger = MagicMock(spec=Logger)
+        validator = ColumnValidator(self.column_config, logger, partition_id)
+        for cells in chunks:
+            if isinstance(cells, list):
+                for cell in cells:
+                    validator.validate(cell)
+            else:
+                validator.validate_batch(cells)
+
+        process_logger = MagicMock(spec=Logger)
+        process_validator = ColumnValidator(self.column_config, process_logger,
+                                            partition_id)
+        ProcessValidator(process_validator, PROCESSES).validate_chunks(chunks)
+
+        self.assertEqual(process_validator.stats, validator.stats)
+        self.assertEqual(process_validator.rule_paths, validator.rule_paths)
+        self.assertEqual(process_logger.method_calls, logger.method_calls)
+        return process_validator, process_logger
+
+    def test_cells(self):
+        validator, logger = self.assertProcessParity(
+            [['5', 'x', '-50'], ['11', '-1', None]] * 3)
+        self.assertEqual(validator.stats.rows, 18)
+        self.assertEqual(logger.rule.call_args.kwargs['row_offset'], 16)
+        # rule params are logged from the validator of the request
+        self.assertIs(logger.rule.call_args[0][4],
+                      validator.rules[0].__kwdefaults__)
+
+    def test_arrow_batches(self):
+        self.assertProcessParity(
+            [pa.array([5, -50, None, 0]),
+             pa.array([11, -3, 2**62])], '20230101')
+
+    def test_aggregation(self):
+        self.column_config['aggregation'] = AggregationConfig(top_k=1)
+        logger = MagicMock(spec=Logger)
+        validator = ColumnValidator(self.column_config, logger)
+
+        ProcessValidator(validator, PROCESSES).validate_chunks([['-1', '-2'],
+                                                                ['-1']])
+        logger.rule.assert_not_called()
+        validator.flush()
+
+        self.assertEqual(validator.stats.check_violations, 3)
+        self.assertEqual(logger.rule_summary.call_args.args[3], 3)
+        self.assertEqual(logger.rule.call_args.kwargs, {
+            'violation_count': 2,
+            'partition_id': None
+        })
+
+    def test_resumes_from_stats(self):
+        logger = MagicMock(spec=Logger)
+        validator = ColumnValidator(self.column_config, logger)
+        validator.stats.rows = 100
+
+        ProcessValidator(validator, PROCESSES).validate_chunks([['1', 'x']])
+
+        self.assertEqual(validator.stats.rows, 102)
+        self.assertEqual(logger.parser.call_args.kwargs['row_offset'], 101)
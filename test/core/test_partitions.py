@@ -0,0 +1,185 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from datetime import datetime
+from datetime import timezone
+import unittest
+from unittest.mock import MagicMock
+
+from google.cloud.bigquery import PartitionRange
+from google.cloud.bigquery import RangePartitioning
+from google.cloud.bigquery import SchemaField
+from google.cloud.bigquery import Table
+from google.cloud.bigquery import TimePartitioning
+
+from core.bigquery import TableMetadata
+from core.config import PartitionConfig
+from core.incremental import WatermarkStore
+from core.partitions import get_partition_filter
+from core.partitions import select_partitions
+
+
+def build_table(field_type: str = 'DATE',
+                partitioning_type: str = 'DAY') -> Table:
+    table = Table('project.dataset.table',
+                  schema=[SchemaField('day', field_type)])
+    table.time_partitioning = TimePartitioning(type_=partitioning_type,
+                                               field='day')
+    return table
+
+
+class GetPartitionFilterTest(unittest.TestCase):
+
+    def test_date_column(self):
+        self.assertEqual(
+            get_partition_filter(build_table(), '20231231'),
+            "`day` >= CAST('2023-12-31' AS DATE) AND "
+            "`day` < CAST('2024-01-01' AS DATE)")
+
+    def test_timestamp_column(self):
+        self.assertEqual(
+            get_partition_filter(build_table('TIMESTAMP', 'HOUR'),
+                                 '2023010223'),
+            "`day` >= CAST('2023-01-02 23:00:00+00:00' AS TIMESTAMP) AND "
+            "`day` < CAST('2023-01-03 00:00:00+00:00' AS TIMESTAMP)")
+
+    def test_monthly_datetime_column(self):
+        self.assertEqual(
+            get_partition_filter(build_table('DATETIME', 'MONTH'), '202312'),
+            "`day` >= CAST('2023-12-01 00:00:00' AS DATETIME) AND "
+            "`day` < CAST('2024-01-01 00:00:00' AS DATETIME)")
+
+    def test_ingestion_time(self):
+        table = Table('project.dataset.table')
+        table.time_partitioning = TimePartitioning(type_='YEAR')
+
+        self.assertEqual(
+            get_partition_filter(table, '2023'),
+            "_PARTITIONTIME >= CAST('2023-01-01 00:00:00+00:00' AS TIMESTAMP) "
+            "AND _PARTITIONTIME < CAST('2024-01-01 00:00:00+00:00' AS "
+            "TIMESTAMP)")
+
+    def test_integer_range(self):
+        table = Table('project.dataset.table')
+        table.range_partitioning = RangePartitioning(range_=PartitionRange(
+            start=0, end=100, interval=10),
+                                                     field='id')
+
+        self.assertEqual(get_partition_filter(table, '20'),
+                         '`id` >= 20 AND `id` < 30')
+        self.assertEqual(get_partition_filter(table, '__NULL__'),
+                         '`id` IS NULL')
+        self.assertEqual(get_partition_filter(table, '__UNPARTITIONED__'),
+                         '`id` < 0 OR `id` >= 100')
+
+    def test_unpartitioned(self):
+        self.assertEqual(
+            get_partition_filter(build_table(), '__UNPARTITIONED__'),
+            "`day` < CAST('1960-01-01' AS DATE) OR "
+            "`day` >= CAST('2160-01-01' AS DATE)")
+
+        table = Table('project.dataset.table')
+        table.time_partitioning = TimePartitioning(type_='DAY')
+        self.assertEqual(get_partition_filter(table, '__UNPARTITIONED__'),
+                         '_PARTITIONTIME IS NULL')
+
+    def test_not_partitioned(self):
+        with self.assertRaises(ValueError):
+            get_partition_filter(Table('project.dataset.table'), '20230102')
+
+
+class SelectPartitionsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.table_metadata = TableMetadata('project', 'dataset', 'table')
+        self.client = MagicMock()
+        self.client.get_table.return_value = build_table()
+        self.client.query.return_value.result.return_value = [
+            self.build_row('__UNPARTITIONED__', 1),
+            self.build_row('__NULL__', 2),
+            self.build_row('20230103', 3),
+            self.build_row('20230102', 2),
+            self.build_row('20230101', 1),
+        ]
+        return super().setUp()
+
+    def build_row(self, partition_id, day):
+        return {
+            'partition_id': partition_id,
+            'total_rows': 10,
+            'last_modified_time': datetime(2023, 1, day, tzinfo=timezone.utc)
+        }
+
+    def test_all_partitions(self):
+        selection = select_partitions(self.client, self.table_metadata,
+                                      PartitionConfig(), None, ['a'])
+
+        self.assertEqual(
+            [partition.partition_id for partition in selection.partitions], [
+                '__UNPARTITIONED__', '__NULL__', '20230103', '20230102',
+                '20230101'
+            ])
+        self.assertEqual(selection.partitions[1].partition_filter,
+                         '`day` IS NULL')
+        self.assertIn('INFORMATION_SCHEMA.PARTITIONS',
+                      self.client.query.call_args[0][0])
+
+    def test_recent_partitions(self):
+        selection = select_partitions(self.client, self.table_metadata,
+                                      PartitionConfig(recent=2), None, ['a'])
+
+        self.assertEqual(
+            [partition.partition_id for partition in selection.partitions],
+            ['20230103', '20230102'])
+
+    def test_changed_partitions(self):
+        store = MagicMock(spec=WatermarkStore)
+        store.get.return_value = "CAST('2023-01-01' AS TIMESTAMP)"
+
+        selection = select_partitions(self.client, self.table_metadata,
+                                      PartitionConfig(changed=True), store,
+                                      ['a'])
+        self.assertIn("last_modified_time > CAST('2023-01-01' AS TIMESTAMP)",
+                      self.client.query.call_args[0][0])
+        store.set.assert_not_called()
+
+        selection.commit()
+
+        store.set.assert_called_once_with(
+            'project.dataset.table/__partitions__/a',
+            "CAST('2023-01-03 00:00:00+00:00' AS TIMESTAMP)")
+
+    def test_more_changed_partitions_than_recent(self):
+        store = MagicMock(spec=WatermarkStore)
+        store.get.return_value = None
+
+        selection = select_partitions(self.client, self.table_metadata,
+                                      PartitionConfig(changed=True, recent=1),
+                                      store, ['a'])
+        selection.commit()
+
+        self.assertEqual(
+            [partition.partition_id for partition in selection.partitions],
+            ['20230103'])
+        # 20230102 & 20230101 are still changed for the next run
+        store.set.assert_called_once_with(
+            'project.dataset.table/__partitions__/a',
+            "CAST('2022-12-31 23:59:59.999999+00:00' AS TIMESTAMP)")
+
+    def test_changed_partitions_require_store(self):
+        with self.assertRaises(ValueError):
+            select_partitions(self.client, self.table_metadata,
+                              PartitionConfig(changed=True), None, ['a'])
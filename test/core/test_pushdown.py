@@ -0,0 +1,139 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import unittest
+
+from google.cloud.bigquery import SchemaField
+
+from core.config import ColumnConfig
+from core.config import RuleConfig
+from core.pushdown import build_row_restriction
+from core.pushdown import get_column_predicate
+
+SCHEMA = [
+    SchemaField('amount', 'INTEGER'),
+    SchemaField('price', 'FLOAT'),
+    SchemaField('email', 'STRING'),
+    SchemaField('tags', 'STRING', mode='REPEATED'),
+]
+FIELDS = {field.name: field for field in SCHEMA}
+
+
+class GetColumnPredicateTest(unittest.TestCase):
+
+    def test_numeric_rules(self):
+        column_config = ColumnConfig(column='amount',
+                                     parser='parse_int',
+                                     rules=[
+                                         RuleConfig(rule='is_not_negative'),
+                                         RuleConfig(rule='is_not_approx_zero',
+                                                    args={'tolerance': -1}),
+                                         RuleConfig(
+                                             rule='is_within_strict_int_range',
+                                             args={
+                                                 'lower_bound': -10,
+                                                 'upper_bound': 10
+                                             }),
+                                     ])
+
+        self.assertEqual(
+            get_column_predicate(column_config, FIELDS['amount']),
+            '`amount` IS NOT NULL AND `amount` >= 0 AND '
+            '(`amount` > 1 OR `amount` < -1) AND '
+            '(`amount` > -10 AND `amount` < 10)')
+
+    def test_text_rules(self):
+        column_config = ColumnConfig(column='email',
+                                     parser='parse_str',
+                                     rules=[
+                                         RuleConfig(rule='contains_at_sign'),
+                                         RuleConfig(rule='fully_matches_regex',
+                                                    args={'regex': r"\d+'s$"}),
+                                     ])
+
+        self.assertEqual(
+            get_column_predicate(column_config, FIELDS['email']),
+            "`email` IS NOT NULL AND `email` LIKE '%@%' AND "
+            "REGEXP_CONTAINS(`email`, '\\\\A(?:\\\\p{Nd}+\\'s)\\\\z')")
+
+    def test_unsupported_columns(self):
+        for column_config, field in [
+            (ColumnConfig(column='price',
+                          parser='parse_int',
+                          rules=[RuleConfig(rule='is_not_negative')]),
+             FIELDS['price']),
+            (ColumnConfig(column='amount',
+                          parser='parse_float',
+                          rules=[RuleConfig(rule='is_not_negative')]),
+             FIELDS['amount']),
+            (ColumnConfig(column='tags',
+                          parser='parse_str',
+                          rules=[RuleConfig(rule='contains_at_sign')]),
+             FIELDS['tags']),
+        ]:
+            self.assertIsNone(get_column_predicate(column_config, field))
+
+    def test_unsupported_rules(self):
+        for rule_config in [
+                RuleConfig(rule='is_phone_number'),
+                RuleConfig(rule='contains_regex', args={'regex': r'\w'}),
+        ]:
+            column_config = ColumnConfig(
+                column='email',
+                parser='parse_str',
+                rules=[RuleConfig(rule='contains_at_sign'), rule_config])
+            self.assertIsNone(
+                get_column_predicate(column_config, FIELDS['email']))
+
+    def test_unsupported_arguments(self):
+        column_config = ColumnConfig(column='price',
+                                     parser='parse_float',
+                                     rules=[
+                                         RuleConfig(
+                                             rule='is_within_strict_int_range',
+                                             args={
+                                                 'lower_bound': 0,
+                                                 'upper_bound': 2**53 + 1
+                                             })
+                                     ])
+        self.assertIsNone(get_column_predicate(column_config, FIELDS['price']))
+
+
+class BuildRowRestrictionTest(unittest.TestCase):
+
+    def test_row_restriction(self):
+        self.assertEqual(
+            build_row_restriction([
+                ColumnConfig(column='amount',
+                             parser='parse_int',
+                             rules=[RuleConfig(rule='is_not_negative')]),
+                ColumnConfig(column='price',
+                             parser='parse_float',
+                             rules=[RuleConfig(rule='is_not_negative')]),
+            ], SCHEMA), 'NOT ((`amount` IS NOT NULL AND `amount` >= 0) AND '
+            '(`price` IS NOT NULL AND `price` >= 0))')
+
+    def test_any_unsupported_column(self):
+        for column in ['email', 'missing', 'amount.nested']:
+            self.assertIsNone(
+                build_row_restriction([
+                    ColumnConfig(column='amount',
+                                 parser='parse_int',
+                                 rules=[RuleConfig(rule='is_not_negative')]),
+                    ColumnConfig(column=column,
+                                 parser='parse_int',
+                                 rules=[RuleConfig(rule='is_not_negative')]),
+                ], SCHEMA))
@@ -0,0 +1,121 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from collections import Counter
+from typing import cast
+import unittest
+
+import pyarrow as pa
+
+from core.config import ReadConfig
+from core.sampling import get_sampler
+from core.sampling import Sampler
+from core.sampling import SamplingMethod
+from core.sampling import wilson_interval
+
+
+class SamplerTest(unittest.TestCase):
+
+    def test_bernoulli_sample(self):
+        sampler = Sampler(percentage=10, seed=0)
+
+        sample = list(sampler.sample_rows(range(100000)))
+
+        self.assertEqual(sampler.method, SamplingMethod.BERNOULLI)
+        self.assertEqual(sampler.rows_read, 100000)
+        self.assertEqual(sampler.rows_sampled, len(sample))
+        self.assertAlmostEqual(len(sample) / 100000, 0.1, delta=0.005)
+        self.assertEqual(sample, sorted(set(sample)))
+
+    def test_full_percentage(self):
+        sampler = Sampler(percentage=100)
+
+        self.assertEqual(list(sampler.sample_rows(range(2500))),
+                         list(range(2500)))
+
+    def test_reservoir_sample(self):
+        sampler = Sampler(size=100, seed=0)
+
+        sample = list(sampler.sample_rows(range(100000)))
+
+        self.assertEqual(sampler.method, SamplingMethod.RESERVOIR)
+        self.assertEqual(sampler.rows_read, 100000)
+        self.assertEqual(sampler.rows_sampled, 100)
+        self.assertEqual(len(set(sample)), 100)
+        # a uniform sample has rows from across the whole table
+        self.assertGreater(max(sample), 50000)
+
+    def test_reservoir_sample_is_uniform(self):
+        counts: Counter = Counter()
+        for seed in range(2000):
+            counts.update(Sampler(size=2, seed=seed).sample_rows(range(10)))
+
+        for row in range(10):
+            self.assertAlmostEqual(counts[row] / 2000, 0.2, delta=0.04)
+
+    def test_reservoir_larger_than_rows(self):
+        sampler = Sampler(size=10)
+
+        self.assertCountEqual(sampler.sample_rows(range(5)), range(5))
+        self.assertEqual(sampler.rows_sampled, 5)
+
+    def test_sample_batches(self):
+        batches = [[pa.array(range(i, i + 100)),
+                    list(range(i, i + 100))] for i in range(0, 1000, 100)]
+
+        for sampler in [Sampler(percentage=20, seed=0), Sampler(size=20)]:
+            sample = list(sampler.sample_batches(batches))
+
+            arrays = [cast(pa.Array, array).to_pylist() for array, _ in sample]
+            lists = [cells for _, cells in sample]
+            self.assertEqual(arrays, lists)
+            self.assertEqual(sum(map(len, lists)), sampler.rows_sampled)
+            self.assertEqual(sampler.rows_read, 1000)
+
+    def test_seed(self):
+        self.assertEqual(
+            list(Sampler(size=10, seed=1).sample_rows(range(1000))),
+            list(Sampler(size=10, seed=1).sample_rows(range(1000))))
+
+    def test_invalid_options(self):
+        for percentage, size in [(None, None), (10, 10), (0, None), (101, None),
+                                 (None, 0)]:
+            with self.assertRaises(ValueError):
+                Sampler(percentage, size)
+
+    def test_get_sampler(self):
+        self.assertIsNone(get_sampler(None))
+        self.assertIsNone(get_sampler(ReadConfig(max_stream_count=2)))
+        sampler = get_sampler(ReadConfig(sample_percentage=1.5))
+        self.assertEqual(getattr(sampler, 'method'), SamplingMethod.BERNOULLI)
+
+
+class WilsonIntervalTest(unittest.TestCase):
+
+    def test_interval(self):
+        lower, upper = wilson_interval(10, 100)
+
+        self.assertAlmostEqual(lower, 0.0552, places=4)
+        self.assertAlmostEqual(upper, 0.1744, places=4)
+
+    def test_no_successes(self):
+        lower, upper = wilson_interval(0, 100)
+
+        self.assertEqual(lower, 0.0)
+        self.assertAlmostEqual(upper, 0.037, places=3)
+
+    def test_no_trials(self):
+        self.assertEqual(wilson_interval(0, 0), (0.0, 1.0))
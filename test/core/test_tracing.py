@@ -0,0 +1,124 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from typing import Any, cast
+import unittest
+import uuid
+
+from google.cloud.bigquery_storage import BigQueryReadClient
+
+from benchmarks.fake_client import FakeReadClient
+from core.bigquery import get_cells_batches_iterator
+from core.bigquery import TableMetadata
+from core.config import ReadConfig
+from core.tracing import configure_tracing
+from core.tracing import start_detached_span
+from core.tracing import start_span
+from core.tracing import trace
+from core.tracing import trace_request
+
+try:
+    import opentelemetry.sdk.trace  # noqa: F401
+    HAS_SDK = True
+except ImportError:
+    HAS_SDK = False
+
+TRACEPARENT = '00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01'
+
+
+class NoopTest(unittest.TestCase):
+
+    def test_spans(self):
+        with trace_request({}, 'development'), start_span('span',
+                                                          rows=1) as span:
+            span.set_attribute('bytes', 1)
+        start_detached_span('span', None).end()
+
+    def test_not_configured(self):
+        self.assertIsNone(configure_tracing(''))
+
+    def test_invalid_exporter(self):
+        with self.assertRaises(ValueError):
+            configure_tracing('stdout')
+
+
+@unittest.skipIf(trace is None, 'OpenTelemetry is not installed')
+class TraceRequestTest(unittest.TestCase):
+
+    def get_span_context(self) -> Any:
+        return trace.get_current_span().get_span_context()
+
+    def test_workflow_execution_id(self):
+        execution_id = str(uuid.uuid4())
+
+        with trace_request({}, execution_id):
+            span_context = self.get_span_context()
+
+        self.assertEqual(span_context.trace_id, uuid.UUID(execution_id).int)
+        self.assertTrue(span_context.trace_flags.sampled)
+        self.assertFalse(self.get_span_context().is_valid)
+
+    def test_traceparent(self):
+        with trace_request({'traceparent': TRACEPARENT}, str(uuid.uuid4())):
+            span_context = self.get_span_context()
+
+        self.assertEqual(span_context.trace_id,
+                         0x0af7651916cd43dd8448eb211c80319c)
+        self.assertEqual(span_context.span_id, 0xb7ad6b7169203331)
+
+    def test_not_uuid(self):
+        with trace_request({}, 'development'):
+            self.assertFalse(self.get_span_context().is_valid)
+
+
+@unittest.skipUnless(HAS_SDK, 'OpenTelemetry SDK is not installed')
+class SpansTest(unittest.TestCase):
+
+    def setUp(self):
+        self.exporter = configure_tracing('memory')
+        self.exporter.clear()
+        rows = [{'id': i} for i in range(2500)]
+        self.client = cast(BigQueryReadClient,
+                           FakeReadClient({'id': 'INT64'}, rows))
+        self.table = TableMetadata('project', 'dataset', 'table')
+        return super().setUp()
+
+    def test_read_spans(self):
+        execution_id = str(uuid.uuid4())
+
+        with trace_request({}, execution_id), start_span('process_column'):
+            batches = list(
+                get_cells_batches_iterator(
+                    self.client, self.table, ['id'],
+                    ReadConfig(data_format='ARROW', max_stream_count=3)))
+
+        self.assertEqual(sum(len(cells) for (cells,) in batches), 2500)
+        spans = self.exporter.get_finished_spans()
+        (root,) = [span for span in spans if span.name == 'process_column']
+        self.assertEqual(root.context.trace_id, uuid.UUID(execution_id).int)
+
+        (session,) = [
+            span for span in spans if span.name == 'create_read_session'
+        ]
+        self.assertEqual(session.attributes['streams'], 3)
+        self.assertEqual(session.parent.span_id, root.context.span_id)
+
+        streams = [span for span in spans if span.name == 'read_stream']
+        self.assertEqual(len(streams), 3)
+        self.assertEqual(sum(span.attributes['rows'] for span in streams), 2500)
+        for span in streams:
+            self.assertEqual(span.parent.span_id, root.context.span_id)
+            self.assertGreater(span.attributes['bytes'], 0)
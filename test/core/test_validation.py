@@ -0,0 +1,320 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import math
+import unittest
+from unittest.mock import MagicMock
+
+import pyarrow as pa
+
+from core.config import AggregationConfig
+from core.config import ColumnConfig
+from core.config import RuleConfig
+from core.logging import Logger
+from core.validation import ColumnStats
+from core.validation import ColumnValidator
+from core.validation import RulePath
+
+
+class ColumnValidatorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = MagicMock(spec=Logger)
+        self.validator = ColumnValidator(
+            ColumnConfig(column='amount',
+                         parser='parse_int',
+                         rules=[
+                             RuleConfig(rule='is_not_negative'),
+                             RuleConfig(rule='is_within_strict_int_range',
+                                        args={
+                                            'lower_bound': -10,
+                                            'upper_bound': 10
+                                        })
+                         ]), self.logger)
+        return super().setUp()
+
+    def test_valid_cell(self):
+        self.validator.validate('5')
+
+        self.assertEqual(self.validator.stats.rows, 1)
+        self.assertEqual(self.validator.stats.check_violations, 0)
+        self.logger.rule.assert_not_called()
+        self.logger.parser.assert_not_called()
+
+    def test_parse_failure(self):
+        self.validator.validate('five')
+
+        self.assertEqual(self.validator.stats.parse_failures, 1)
+        self.logger.parser.assert_called_once()
+        self.logger.rule.assert_not_called()
+
+    def test_rule_violations(self):
+        self.validator.validate(-50)
+
+        self.assertEqual(self.validator.stats.check_violations, 2)
+        self.assertEqual(self.logger.rule.call_count, 2)
+        self.assertEqual(self.logger.rule.call_args[0][4], {
+            'lower_bound': -10,
+            'upper_bound': 10
+        })
+
+    def test_single_rule_violation(self):
+        self.validator.validate('-5')
+
+        self.assertEqual(self.validator.stats.check_violations, 1)
+        self.assertEqual(self.validator.stats.failed_rows, 1)
+        self.logger.rule.assert_called_once()
+        self.assertEqual(self.logger.rule.call_args[0][1], 'is_not_negative')
+
+    def test_row_offsets(self):
+        for cell in ['5', 'five', '-5']:
+            self.validator.validate(cell)
+
+        self.assertEqual(self.logger.parser.call_args.kwargs, {
+            'row_offset': 1,
+            'partition_id': None
+        })
+        self.assertEqual(self.logger.rule.call_args.kwargs, {
+            'row_offset': 2,
+            'partition_id': None
+        })
+
+    def test_rule_errors(self):
+        # comparing None against numeric bounds raises a TypeError
+        self.validator.parser = lambda cell: cell
+        self.validator.validate(None)
+
+        self.assertEqual(self.validator.stats.rule_errors, 2)
+
+    def test_describe(self):
+        for cell in ['1', '-1', 'x']:
+            self.validator.validate(cell)
+
+        self.assertEqual(
+            self.validator.stats.describe(),
+            'DQM processed 3 rows, with 1 parse failures, '
+            '0 rule errors, 1 rule check violations.')
+
+    def test_failed_rows(self):
+        for cell in ['1', '-50', 'x', '-1']:
+            self.validator.validate(cell)
+
+        self.assertEqual(self.validator.stats.check_violations, 3)
+        self.assertEqual(self.validator.stats.failed_rows, 3)
+
+    def test_describe_sample(self):
+        stats = ColumnStats(rows=100, failed_rows=10, unsampled_rows=900)
+
+        estimate, lower, upper = stats.estimate_failed_rows()
+        self.assertEqual(estimate, 100)
+        self.assertLess(lower, estimate)
+        self.assertGreater(upper, estimate)
+        self.assertTrue(stats.describe().endswith(
+            'Checked a sample of 100 of 1000 rows read, with an '
+            'estimated 100 failed rows (10.00%), 95% CI: 55 to 174.'))
+
+    def test_log_failure(self):
+        self.validator.log_failure(None, 'Not an int.', 'five', 3)
+        self.validator.log_failure(1, 'Out of range.', 20, 4)
+
+        self.logger.parser.assert_called_once_with('amount',
+                                                   'parse_int',
+                                                   'Not an int.',
+                                                   'five',
+                                                   row_offset=3,
+                                                   partition_id=None)
+        self.logger.rule.assert_called_once_with('amount',
+                                                 'is_within_strict_int_range',
+                                                 'Out of range.',
+                                                 20, {
+                                                     'lower_bound': -10,
+                                                     'upper_bound': 10
+                                                 },
+                                                 row_offset=4,
+                                                 partition_id=None)
+        # the failures were counted where they were checked
+        self.assertEqual(self.validator.stats.failed_rows, 0)
+
+    def test_aggregation(self):
+        config = ColumnConfig(column='amount',
+                              parser='parse_int',
+                              rules=[RuleConfig(rule='is_not_negative')],
+                              aggregation=AggregationConfig(top_k=1))
+        validator = ColumnValidator(config, self.logger)
+        for cell in ['-1', '-2', '-1', '3']:
+            validator.validate(cell)
+        self.logger.rule.assert_not_called()
+
+        validator.flush()
+
+        self.assertEqual(validator.stats.check_violations, 3)
+        self.logger.rule_summary.assert_called_once()
+        self.assertEqual(self.logger.rule.call_count, 1)
+        self.assertEqual(self.logger.rule.call_args.kwargs, {
+            'violation_count': 2,
+            'partition_id': None
+        })
+
+
+class ColumnValidatorBatchTest(unittest.TestCase):
+    """
+    Validating Arrow batches must log the same messages and counts
+    as validating cells one by one.
+    """
+
+    def assertBatchParity(self, column_config, cells):
+        logger = MagicMock(spec=Logger)
+        validator = ColumnValidator(column_config, logger)
+        for cell in cells.to_pylist():
+            validator.validate(cell)
+
+        batch_logger = MagicMock(spec=Logger)
+        batch_validator = ColumnValidator(column_config, batch_logger)
+        batch_validator.validate_batch(cells[:3])
+        batch_validator.validate_batch(cells[3:])
+
+        self.assertEqual(batch_validator.stats, validator.stats)
+        self.assertCountEqual(batch_logger.rule.call_args_list,
+                              logger.rule.call_args_list)
+        self.assertCountEqual(batch_logger.parser.call_args_list,
+                              logger.parser.call_args_list)
+        return batch_validator
+
+    def test_int_column(self):
+        validator = self.assertBatchParity(
+            ColumnConfig(column='amount',
+                         parser='parse_int',
+                         rules=[
+                             RuleConfig(rule='is_not_negative'),
+                             RuleConfig(rule='is_not_approx_zero'),
+                             RuleConfig(rule='is_within_strict_int_range',
+                                        args={
+                                            'lower_bound': -10,
+                                            'upper_bound': 10
+                                        })
+                         ]), pa.array([5, -50, None, 0, 11, -3, None, 2**62]))
+        self.assertEqual(validator.stats.failed_rows, 7)
+        self.assertEqual(
+            validator.rule_paths, {
+                'is_not_negative': RulePath.ARROW,
+                'is_not_approx_zero': RulePath.ARROW,
+                'is_within_strict_int_range': RulePath.ARROW,
+            })
+
+    def test_row_offsets(self):
+        validator = self.assertBatchParity(
+            ColumnConfig(column='amount',
+                         parser='parse_int',
+                         rules=[RuleConfig(rule='is_not_negative')]),
+            pa.array(['1', 'x', '-1', '2', '-3']))
+        self.assertEqual(validator.stats.failed_rows, 3)
+
+    def test_partition_id(self):
+        logger = MagicMock(spec=Logger)
+        validator = ColumnValidator(
+            ColumnConfig(column='amount',
+                         parser='parse_int',
+                         rules=[RuleConfig(rule='is_not_negative')]), logger,
+            '20230101')
+        validator.validate_batch(pa.array([1, -1]))
+
+        self.assertEqual(logger.rule.call_args.kwargs, {
+            'row_offset': 1,
+            'partition_id': '20230101'
+        })
+
+    def test_float_column(self):
+        self.assertBatchParity(
+            ColumnConfig(column='amount',
+                         parser='parse_float',
+                         rules=[
+                             RuleConfig(rule='is_not_negative'),
+                             RuleConfig(rule='is_not_approx_zero',
+                                        args={'tolerance': 0.1}),
+                         ]), pa.array([0.05, -1.5, None, math.inf, -0.0, 3]))
+
+    def test_unsupported_arguments_fall_back(self):
+        validator = self.assertBatchParity(
+            ColumnConfig(column='amount',
+                         parser='parse_int',
+                         rules=[
+                             RuleConfig(rule='is_within_strict_int_range',
+                                        args={
+                                            'lower_bound': 0,
+                                            'upper_bound': 2**70
+                                        })
+                         ]), pa.array([5, -50, None, 0, 11]))
+        self.assertEqual(validator.rule_paths,
+                         {'is_within_strict_int_range': RulePath.PYTHON})
+
+    def test_unsupported_type_falls_back(self):
+        validator = self.assertBatchParity(
+            ColumnConfig(column='amount',
+                         parser='parse_int',
+                         rules=[RuleConfig(rule='is_not_negative')]),
+            pa.array(['5', '-50', None, 'x', '11']))
+        self.assertEqual(validator.rule_paths,
+                         {'is_not_negative': RulePath.PYTHON})
+
+    def test_cells_list(self):
+        logger = MagicMock(spec=Logger)
+        validator = ColumnValidator(
+            ColumnConfig(column='amount',
+                         parser='parse_int',
+                         rules=[RuleConfig(rule='is_not_negative')]), logger)
+        validator.validate_batch([5, -50, None, 0])
+
+        self.assertEqual(validator.stats.rows, 4)
+        self.assertEqual(validator.stats.parse_failures, 1)
+        self.assertEqual(validator.stats.check_violations, 1)
+        self.assertEqual(validator.rule_paths,
+                         {'is_not_negative': RulePath.PYTHON})
+
+    def test_text_column(self):
+        validator = self.assertBatchParity(
+            ColumnConfig(column='contact',
+                         parser='parse_str',
+                         rules=[
+                             RuleConfig(rule='is_email'),
+                             RuleConfig(rule='contains_regex',
+                                        args={'regex': r'\d{3}'}),
+                             RuleConfig(rule='fully_matches_regex',
+                                        args={'regex': r'(\w+)@\1'}),
+                         ]),
+            pa.array(['a@b.com', 'x', None, '١٢٣', 'ab@ab', '']))
+        self.assertEqual(
+            validator.rule_paths, {
+                'is_email': RulePath.ARROW,
+                'contains_regex': RulePath.ARROW,
+                'fully_matches_regex': RulePath.PYTHON,
+            })
+
+    def test_describe_rule_paths(self):
+        validator = ColumnValidator(
+            ColumnConfig(column='contact',
+                         parser='parse_str',
+                         rules=[
+                             RuleConfig(rule='contains_at_sign'),
+                             RuleConfig(rule='contains_regex',
+                                        args={'regex': r'\bx'}),
+                         ]), MagicMock(spec=Logger))
+        validator.validate_batch(pa.array(['a@b', 'x']))
+
+        self.assertEqual(
+            validator.describe(),
+            'DQM processed 2 rows, with 0 parse failures, '
+            '0 rule errors, 2 rule check violations. '
+            'Rule paths: contains_at_sign=arrow, contains_regex=python.')
@@ -0,0 +1,149 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from typing import Any, cast, Dict, List
+import unittest
+from unittest.mock import patch
+
+from main import dqm
+
+
+def get_request(table_name: str, column: str, parser: str,
+                rule: str) -> Dict[str, Any]:
+    table = {
+        'project_id': 'test-project',
+        'dataset_id': 'test-dataset',
+        'table_name': table_name
+    }
+    return {
+        'source_table': table,
+        'display_source_table': table,
+        'column_config': {
+            'column': column,
+            'parser': parser,
+            'rules': [{
+                'rule': rule
+            }]
+        }
+    }
+
+
+class ProcessBatchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client = dqm.test_client()
+        self.body: Dict[str, Any] = {
+            'requests': [
+                get_request('orders', 'amount', 'parse_int', 'is_not_negative'),
+                get_request('users', 'email', 'parse_str', 'contains_at_sign'),
+                get_request('orders', 'email', 'parse_str', 'contains_at_sign'),
+            ]
+        }
+        self.tables: Dict[str, List[list]] = {
+            'orders': [[1, 'john@doe.com'], [-1, 'john.doe.com']],
+            'users': [['jane@doe.com']],
+        }
+        return super().setUp()
+
+    def get_row_cells_iterator(self, _, table_metadata, columns, *__):
+        return iter(self.tables[table_metadata.table_name])
+
+    @patch('routes.process_table.get_row_cells_iterator')
+    @patch('routes.process_table.get_bq_read_client')
+    @patch('routes.process_table.get_credentials')
+    def test_process_batch(self, _, __, mock_get_row_cells_iterator):
+        mock_get_row_cells_iterator.side_effect = self.get_row_cells_iterator
+
+        response = self.client.post('/process_batch', json=self.body)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mock_get_row_cells_iterator.call_count, 2)
+        columns = sorted((call[0][1].table_name, call[0][2])
+                         for call in mock_get_row_cells_iterator.call_args_list)
+        self.assertEqual(columns, [('orders', ['amount', 'email']),
+                                   ('users', ['email'])])
+        body = cast(dict, response.json)
+        self.assertEqual(
+            body['description'], 'DQM processed 3 column requests with 2 '
+            'table reads, of which 0 failed.')
+        results: List[dict] = body['results']
+        self.assertEqual(results[0]['description'].split('\n'), [
+            'amount: DQM processed 2 rows, with 0 parse failures, '
+            '0 rule errors, 1 rule check violations.',
+            'email: DQM processed 2 rows, with 0 parse failures, '
+            '0 rule errors, 1 rule check violations.'
+        ])
+        self.assertEqual(
+            results[1]['description'],
+            'email: DQM processed 1 rows, with 0 parse failures, '
+            '0 rule errors, 0 rule check violations.')
+
+    @patch('routes.process_table.get_row_cells_iterator')
+    @patch('routes.process_table.get_bq_read_client')
+    @patch('routes.process_table.get_credentials')
+    def test_failed_read(self, _, __, mock_get_row_cells_iterator):
+        mock_get_row_cells_iterator.side_effect = self.get_row_cells_iterator
+        self.tables['users'] = []
+
+        response = self.client.post('/process_batch', json=self.body)
+
+        self.assertEqual(response.status_code, 500)
+        results: List[dict] = cast(dict, response.json)['results']
+        self.assertEqual([result['code'] for result in results], [200, 500])
+        self.assertEqual(
+            results[1]['description'], 'test-project.test-dataset.users: '
+            'Source table was empty.')
+
+    @patch('routes.process_table.get_row_cells_iterator')
+    @patch('routes.process_table.get_bq_read_client')
+    @patch('routes.process_table.get_credentials')
+    def test_different_configs_are_read_separately(self, _, __,
+                                                   mock_get_row_cells_iterator):
+        mock_get_row_cells_iterator.side_effect = self.get_row_cells_iterator
+        self.body['requests'][2]['read_config'] = {'sample_seed': 1}
+
+        response = self.client.post('/process_batch', json=self.body)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mock_get_row_cells_iterator.call_count, 3)
+
+    def test_no_requests(self):
+        self.body['requests'] = []
+
+        response = self.client.post('/process_batch', json=self.body)
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_stream_format(self):
+        self.body['requests'][0]['log_config'] = {'stream_format': 'NDJSON'}
+
+        response = self.client.post('/process_batch', json=self.body)
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_check_processes(self):
+        self.body['requests'][0]['read_config'] = {'check_processes': 1}
+
+        response = self.client.post('/process_batch', json=self.body)
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_checkpoint_config(self):
+        self.body['requests'][0]['checkpoint_config'] = {'directory': '/tmp'}
+
+        response = self.client.post('/process_batch', json=self.body)
+
+        self.assertEqual(response.status_code, 400)
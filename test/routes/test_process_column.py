@@ -0,0 +1,305 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from datetime import datetime
+import json
+import marshal
+import tempfile
+from typing import Any, cast, Dict
+import unittest
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from google.cloud.bigquery import ArrayQueryParameter
+
+from core.bigquery import UNSTABLE_ROW_ORDER_MESSAGE
+from core.logging import PrintLogger
+from main import dqm
+
+
+class FakeCacheClient:
+    """
+    BigQuery Legacy API client, serving a cache table from memory.
+    """
+
+    def __init__(self) -> None:
+        self.rows: Dict[str, Dict[str, str]] = {}
+
+    def get_table(self, _):
+        return MagicMock(modified=datetime(2023, 1, 1),
+                         num_rows=10,
+                         streaming_buffer=None)
+
+    def query(self, query, job_config):
+        parameters = {
+            parameter.name: parameter.values
+            for parameter in job_config.query_parameters
+            if isinstance(parameter, ArrayQueryParameter)
+        }
+        if query.startswith('MERGE'):
+            for key, config_hash, summary in zip(parameters['keys'],
+                                                 parameters['config_hashes'],
+                                                 parameters['summaries']):
+                self.rows[key] = {
+                    'key': key,
+                    'config_hash': config_hash,
+                    'summary': summary
+                }
+            return MagicMock(result=lambda: [])
+        rows = [
+            row for key, row in self.rows.items() if key in parameters['keys']
+        ]
+        return MagicMock(result=lambda: rows)
+
+
+@patch('routes.process_column.get_cells_iterator')
+@patch('routes.process_column.get_bq_read_client')
+@patch('routes.process_column.get_credentials')
+class ProcessColumnTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client = dqm.test_client()
+        self.body: Dict[str, Any] = {
+            'workflow_execution_id': 'execution',
+            'source_table': {
+                'project_id': 'test-project',
+                'dataset_id': 'test-dataset',
+                'table_name': 'test-table'
+            },
+            'display_source_table': {
+                'project_id': 'test-project',
+                'dataset_id': 'test-dataset',
+                'table_name': 'test-table'
+            },
+            'column_config': {
+                'column': 'amount',
+                'parser': 'parse_int',
+                'rules': [{
+                    'rule': 'is_not_negative'
+                }]
+            }
+        }
+        return super().setUp()
+
+    def test_metrics(self, _, __, mock_get_cells_iterator):
+        mock_get_cells_iterator.return_value = iter([1, -1, 'x'])
+
+        response = self.client.post('/process_column', json=self.body)
+
+        self.assertEqual(response.status_code, 200)
+        body = cast(dict, response.json)
+        self.assertEqual(
+            body['description'], 'DQM processed 3 rows, with 1 parse failures, '
+            '0 rule errors, 1 rule check violations.')
+        metrics = body['metrics']
+        self.assertEqual(metrics['rows'], 3)
+        self.assertGreater(metrics['rows_per_second'], 0)
+        self.assertIsNotNone(metrics['first_row_seconds'])
+        self.assertGreaterEqual(metrics['total_seconds'],
+                                metrics['read_seconds'])
+        self.assertGreater(metrics['peak_rss_bytes'], 0)
+
+    @patch('routes.process_column.get_bq_legacy_client')
+    def test_cached_configs_of_one_column(self, mock_get_bq_legacy_client, _,
+                                          __, mock_get_cells_iterator):
+        mock_get_bq_legacy_client.return_value = FakeCacheClient()
+        mock_get_cells_iterator.side_effect = lambda *_, **__: iter([1, -1])
+        self.body['cache_table'] = {
+            'project_id': 'test-project',
+            'dataset_id': 'test-dataset',
+            'table_name': 'cache'
+        }
+        in_range = dict(self.body,
+                        column_config={
+                            'column':
+                                'amount',
+                            'parser':
+                                'parse_int',
+                            'rules': [{
+                                'rule': 'is_within_strict_int_range',
+                                'args': {
+                                    'lower_bound': -10,
+                                    'upper_bound': 2
+                                }
+                            }]
+                        })
+
+        descriptions = [
+            cast(dict,
+                 self.client.post('/process_column',
+                                  json=body).json)['description']
+            for body in [self.body, in_range] * 2
+        ]
+
+        self.assertEqual(mock_get_cells_iterator.call_count, 2)
+        self.assertEqual(descriptions[2:], [
+            f'{description} (Cached, since the table is unchanged.)'
+            for description in descriptions[:2]
+        ])
+        self.assertNotEqual(descriptions[0], descriptions[1])
+
+    @patch('core.profiling.upload_to_gcs')
+    def test_profile(self, mock_upload_to_gcs, _, __, mock_get_cells_iterator):
+        mock_get_cells_iterator.return_value = iter([1])
+        self.body['profile_config'] = {'bucket': 'bucket'}
+
+        response = self.client.post('/process_column', json=self.body)
+
+        self.assertEqual(response.status_code, 200)
+        mock_upload_to_gcs.assert_called_once()
+        _, bucket, name, data = mock_upload_to_gcs.call_args[0]
+        self.assertEqual(bucket, 'bucket')
+        self.assertEqual(name, 'profiles/execution/amount.prof')
+        self.assertIsInstance(marshal.loads(data), dict)
+
+    @patch('core.profiling.upload_to_gcs')
+    def test_no_profile(self, mock_upload_to_gcs, _, __,
+                        mock_get_cells_iterator):
+        mock_get_cells_iterator.return_value = iter([1])
+
+        self.client.post('/process_column', json=self.body)
+
+        mock_upload_to_gcs.assert_not_called()
+
+    def test_stream(self, _, __, mock_get_cells_iterator):
+        mock_get_cells_iterator.return_value = iter([1, -1, 'x'])
+        self.body['log_config'] = {'stream_format': 'NDJSON'}
+
+        response = self.client.post('/process_column', json=self.body)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content_type, 'application/x-ndjson')
+        lines = [json.loads(line) for line in response.data.splitlines()]
+        self.assertEqual([line['log_type'] for line in lines[:-1]],
+                         ['rule', 'parser'])
+        self.assertEqual(lines[0]['value'], -1)
+        self.assertEqual(lines[0]['workflow_execution_id'], 'execution')
+        self.assertEqual(lines[-1]['code'], 200)
+        self.assertEqual(lines[-1]['metrics']['rows'], 3)
+
+    def test_stream_error(self, _, __, mock_get_cells_iterator):
+        mock_get_cells_iterator.return_value = iter([])
+        self.body['log_config'] = {'stream_format': 'NDJSON'}
+
+        response = self.client.post('/process_column', json=self.body)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            json.loads(response.data), {
+                'name': 'RuntimeError',
+                'description': 'Source table was empty.',
+                'code': 500
+            })
+
+    def test_resume_from_checkpoint(self, _, __, mock_get_cells_iterator):
+
+        def timeout_after(rows: int):
+            yield from [-1] * rows
+            raise TimeoutError('Function timed out.')
+
+        with tempfile.TemporaryDirectory() as directory:
+            self.body['checkpoint_config'] = {
+                'directory': directory,
+                'interval_seconds': 0
+            }
+            mock_get_cells_iterator.return_value = timeout_after(2500)
+            response = self.client.post('/process_column', json=self.body)
+            self.assertEqual(response.status_code, 500)
+
+            # The retry continues from the last checkpoint, at 2000 rows
+            mock_get_cells_iterator.return_value = iter([1] * 500)
+            response = self.client.post('/process_column', json=self.body)
+            self.assertEqual(response.status_code, 200)
+            description = cast(dict, response.json)['description']
+            self.assertEqual(
+                description, 'DQM processed 2500 rows, with 0 parse failures, '
+                '0 rule errors, 2000 rule check violations.')
+
+            # A retry of the completed run returns its response
+            mock_get_cells_iterator.reset_mock()
+            response = self.client.post('/process_column', json=self.body)
+            self.assertEqual(
+                cast(dict, response.json)['description'], description)
+            mock_get_cells_iterator.assert_not_called()
+
+    @patch('routes.process_column.get_logger')
+    def test_logger_is_closed_on_errors(self, mock_get_logger, _, __,
+                                        mock_get_cells_iterator):
+        mock_get_cells_iterator.side_effect = RuntimeError('Read failed.')
+
+        response = self.client.post('/process_column', json=self.body)
+
+        self.assertEqual(response.status_code, 500)
+        mock_get_logger.return_value.close.assert_called_once()
+
+    @patch.object(PrintLogger, 'system')
+    def test_multiple_streams_warn_of_duplicates(self, mock_system, _, __,
+                                                 mock_get_cells_iterator):
+        mock_get_cells_iterator.return_value = iter([1, -1])
+
+        self.client.post('/process_column', json=self.body)
+        mock_system.assert_not_called()
+
+        mock_get_cells_iterator.return_value = iter([1, -1])
+        self.body['read_config'] = {'max_stream_count': 2}
+        response = self.client.post('/process_column', json=self.body)
+
+        self.assertEqual(response.status_code, 200)
+        mock_system.assert_called_once_with(UNSTABLE_ROW_ORDER_MESSAGE)
+
+    def test_zero_top_k(self, _, __, ___):
+        self.body['column_config']['aggregation'] = {'top_k': 0}
+
+        response = self.client.post('/process_column', json=self.body)
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_checkpoint_with_sampling(self, _, __, ___):
+        self.body['checkpoint_config'] = {'directory': 'checkpoints'}
+        self.body['read_config'] = {'sample_percentage': 10}
+
+        response = self.client.post('/process_column', json=self.body)
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_check_processes(self, _, __, mock_get_cells_iterator):
+        mock_get_cells_iterator.return_value = iter([1, -1, 'x'])
+        self.body['read_config'] = {'check_processes': 1}
+
+        response = self.client.post('/process_column', json=self.body)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            cast(dict, response.json)['description'],
+            'DQM processed 3 rows, with 1 parse failures, '
+            '0 rule errors, 1 rule check violations.')
+
+    @patch('routes.process_column.CPU_COUNT', 2)
+    def test_too_many_check_processes(self, _, __, mock_get_cells_iterator):
+        self.body['read_config'] = {'check_processes': 3}
+
+        response = self.client.post('/process_column', json=self.body)
+
+        self.assertEqual(response.status_code, 400)
+        mock_get_cells_iterator.assert_not_called()
+
+    def test_checkpoint_with_check_processes(self, _, __, ___):
+        self.body['checkpoint_config'] = {'directory': 'checkpoints'}
+        self.body['read_config'] = {'check_processes': 2}
+
+        response = self.client.post('/process_column', json=self.body)
+
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,345 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from datetime import datetime
+from typing import Any, cast, Dict
+import unittest
+from unittest.mock import patch
+
+import pyarrow as pa
+
+from core.partitions import Partition
+from core.pushdown import Pushdown
+from main import dqm
+
+
+class ProcessTableTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client = dqm.test_client()
+        self.body: Dict[str, Any] = {
+            'source_table': {
+                'project_id': 'test-project',
+                'dataset_id': 'test-dataset',
+                'table_name': 'test-table'
+            },
+            'display_source_table': {
+                'project_id': 'test-project',
+                'dataset_id': 'test-dataset',
+                'table_name': 'test-table'
+            },
+            'columns': [{
+                'column': 'amount',
+                'parser': 'parse_int',
+                'rules': [{
+                    'rule': 'is_not_negative'
+                }]
+            }, {
+                'column': 'email',
+                'parser': 'parse_str',
+                'rules': [{
+                    'rule': 'contains_at_sign'
+                }]
+            }]
+        }
+        return super().setUp()
+
+    @patch('routes.process_table.get_row_cells_iterator')
+    @patch('routes.process_table.get_bq_read_client')
+    @patch('routes.process_table.get_credentials')
+    def test_process_table(self, _, __, mock_get_row_cells_iterator):
+        mock_get_row_cells_iterator.return_value = iter([
+            [1, 'john@doe.com'],
+            [-1, 'john.doe.com'],
+            ['x', 'jane@doe.com'],
+        ])
+
+        response = self.client.post('/process_table', json=self.body)
+
+        self.assertEqual(response.status_code, 200)
+        mock_get_row_cells_iterator.assert_called_once()
+        self.assertEqual(mock_get_row_cells_iterator.call_args[0][2],
+                         ['amount', 'email'])
+        self.assertEqual(
+            cast(dict, response.json)['description'].split('\n'), [
+                'amount: DQM processed 3 rows, with 1 parse failures, '
+                '0 rule errors, 1 rule check violations.',
+                'email: DQM processed 3 rows, with 0 parse failures, '
+                '0 rule errors, 1 rule check violations.'
+            ])
+
+    @patch('routes.process_table.get_row_cells_iterator')
+    @patch('routes.process_table.get_bq_read_client')
+    @patch('routes.process_table.get_credentials')
+    def test_empty_table(self, _, __, mock_get_row_cells_iterator):
+        mock_get_row_cells_iterator.return_value = iter([])
+
+        response = self.client.post('/process_table', json=self.body)
+
+        self.assertEqual(response.status_code, 500)
+
+    @patch('routes.process_table.get_row_cells_iterator')
+    @patch('routes.process_table.get_bq_read_client')
+    @patch('routes.process_table.get_credentials')
+    def test_stream_arrow(self, _, __, mock_get_row_cells_iterator):
+        mock_get_row_cells_iterator.return_value = iter([
+            [1, 'john@doe.com'],
+            [-1, 'john.doe.com'],
+        ])
+        self.body['log_config'] = {'stream_format': 'ARROW'}
+
+        response = self.client.post('/process_table', json=self.body)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content_type,
+                         'application/vnd.apache.arrow.stream')
+        logs = pa.ipc.open_stream(response.data).read_all()
+        self.assertEqual(logs.column('column').to_pylist(), ['amount', 'email'])
+        self.assertEqual(
+            logs.column('value').to_pylist(), ['-1', 'john.doe.com'])
+
+    @patch('routes.process_table.get_row_cells_iterator')
+    @patch('routes.process_table.get_pushdown')
+    @patch('routes.process_table.get_bq_legacy_client')
+    @patch('routes.process_table.get_bq_read_client')
+    @patch('routes.process_table.get_credentials')
+    def test_pushdown(self, _, __, ___, mock_get_pushdown,
+                      mock_get_row_cells_iterator):
+        self.body['read_config'] = {'pushdown': True}
+        mock_get_pushdown.return_value = Pushdown(row_restriction='NOT (x)',
+                                                  total_rows=10)
+        mock_get_row_cells_iterator.return_value = iter([
+            [-1, 'john.doe.com'],
+        ])
+
+        response = self.client.post('/process_table', json=self.body)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mock_get_row_cells_iterator.call_args[0][4], 'NOT (x)')
+        self.assertEqual(
+            cast(dict, response.json)['description'].split('\n'), [
+                'amount: DQM processed 10 rows (9 passed all rules in '
+                'BigQuery), with 0 parse failures, 0 rule errors, '
+                '1 rule check violations.',
+                'email: DQM processed 10 rows (9 passed all rules in '
+                'BigQuery), with 0 parse failures, 0 rule errors, '
+                '1 rule check violations.'
+            ])
+
+    @patch('routes.process_table.get_row_cells_iterator')
+    @patch('routes.process_table.get_pushdown')
+    @patch('routes.process_table.get_bq_legacy_client')
+    @patch('routes.process_table.get_bq_read_client')
+    @patch('routes.process_table.get_credentials')
+    def test_pushdown_clean_table(self, _, __, ___, mock_get_pushdown,
+                                  mock_get_row_cells_iterator):
+        self.body['read_config'] = {'pushdown': True}
+        mock_get_pushdown.return_value = Pushdown(row_restriction='NOT (x)',
+                                                  total_rows=10)
+        mock_get_row_cells_iterator.return_value = iter([])
+
+        response = self.client.post('/process_table', json=self.body)
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_no_columns(self):
+        self.body['columns'] = []
+
+        response = self.client.post('/process_table', json=self.body)
+
+        self.assertEqual(response.status_code, 400)
+
+    @patch('routes.process_table.get_row_cells_iterator')
+    @patch('routes.process_table.get_bq_read_client')
+    @patch('routes.process_table.get_credentials')
+    def test_sample_size(self, _, __, mock_get_row_cells_iterator):
+        self.body['read_config'] = {'sample_size': 10, 'sample_seed': 0}
+        mock_get_row_cells_iterator.return_value = iter(
+            [[-1, 'john@doe.com'] for _ in range(100)])
+
+        response = self.client.post('/process_table', json=self.body)
+
+        self.assertEqual(response.status_code, 200)
+        amount, email = cast(dict, response.json)['description'].split('\n')
+        self.assertIn(
+            '10 rule check violations. Checked a sample of 10 of '
+            '100 rows read, with an estimated 100 failed rows '
+            '(100.00%)', amount)
+        self.assertIn('estimated 0 failed rows (0.00%)', email)
+
+    @patch('routes.process_table.get_row_cells_iterator')
+    @patch('routes.process_table.get_increment')
+    @patch('routes.process_table.get_bq_legacy_client')
+    @patch('routes.process_table.get_bq_read_client')
+    @patch('routes.process_table.get_credentials')
+    def test_increment(self, _, __, ___, mock_get_increment,
+                       mock_get_row_cells_iterator):
+        self.body['read_config'] = {'watermark_column': 'day'}
+        self.body['state_table'] = self.body['source_table']
+        increment = mock_get_increment.return_value
+        increment.row_restriction = '`day` > 1'
+        increment.total_rows = 1
+        mock_get_row_cells_iterator.return_value = iter([[1, 'john@doe.com']])
+
+        response = self.client.post('/process_table', json=self.body)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mock_get_increment.call_args[0][3], 'day')
+        self.assertEqual(mock_get_row_cells_iterator.call_args[0][4],
+                         '`day` > 1')
+        increment.commit.assert_called_once()
+
+    @patch('routes.process_table.get_row_cells_iterator')
+    @patch('routes.process_table.get_increment')
+    @patch('routes.process_table.get_bq_legacy_client')
+    @patch('routes.process_table.get_bq_read_client')
+    @patch('routes.process_table.get_credentials')
+    def test_increment_failed_run(self, _, __, ___, mock_get_increment,
+                                  mock_get_row_cells_iterator):
+        self.body['read_config'] = {'watermark_column': 'day'}
+        self.body['state_table'] = self.body['source_table']
+        mock_get_increment.return_value.total_rows = 1
+        mock_get_row_cells_iterator.side_effect = RuntimeError('Read failed.')
+
+        response = self.client.post('/process_table', json=self.body)
+
+        self.assertEqual(response.status_code, 500)
+        mock_get_increment.return_value.commit.assert_not_called()
+
+    @patch('routes.process_table.get_row_cells_iterator')
+    @patch('routes.process_table.get_increment')
+    @patch('routes.process_table.get_bq_legacy_client')
+    @patch('routes.process_table.get_bq_read_client')
+    @patch('routes.process_table.get_credentials')
+    def test_increment_without_new_rows(self, _, __, ___, mock_get_increment,
+                                        mock_get_row_cells_iterator):
+        self.body['read_config'] = {'watermark_column': 'day'}
+        self.body['state_table'] = self.body['source_table']
+        mock_get_increment.return_value.total_rows = 0
+
+        response = self.client.post('/process_table', json=self.body)
+
+        self.assertEqual(response.status_code, 200)
+        mock_get_row_cells_iterator.assert_not_called()
+
+    @patch('routes.process_table.get_bq_read_client')
+    @patch('routes.process_table.get_credentials')
+    def test_increment_without_state_table(self, _, __):
+        self.body['read_config'] = {'watermark_column': 'day'}
+
+        response = self.client.post('/process_table', json=self.body)
+
+        self.assertEqual(response.status_code, 400)
+
+    @patch('routes.process_table.get_row_cells_iterator')
+    @patch('routes.process_table.select_partitions')
+    @patch('routes.process_table.get_bq_legacy_client')
+    @patch('routes.process_table.get_bq_read_client')
+    @patch('routes.process_table.get_credentials')
+    def test_partitions(self, _, __, ___, mock_select_partitions,
+                        mock_get_row_cells_iterator):
+        self.body['partition_config'] = {'recent': 2}
+        selection = mock_select_partitions.return_value
+        selection.partitions = [
+            Partition('20230102', '`day` = 2', 1, datetime.now()),
+            Partition('20230101', '`day` = 1', 1, datetime.now()),
+        ]
+        rows = {
+            '`day` = 2': [[-1, 'john@doe.com']],
+            '`day` = 1': [[1, 'john@doe.com']],
+        }
+        mock_get_row_cells_iterator.side_effect = (
+            lambda _, table_metadata, *__: iter(rows[table_metadata.
+                                                     partition_filter]))
+
+        response = self.client.post('/process_table', json=self.body)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mock_get_row_cells_iterator.call_count, 2)
+        selection.commit.assert_called_once()
+        lines = cast(dict, response.json)['description'].split('\n')
+        self.assertEqual(len(lines), 4)
+        self.assertIn(
+            'amount (partition 20230102): DQM processed 1 rows, with '
+            '0 parse failures, 0 rule errors, 1 rule check violations.', lines)
+        self.assertIn(
+            'amount (partition 20230101): DQM processed 1 rows, with '
+            '0 parse failures, 0 rule errors, 0 rule check violations.', lines)
+
+    @patch('routes.process_table.get_row_cells_iterator')
+    @patch('routes.process_table.get_bq_read_client')
+    @patch('routes.process_table.get_credentials')
+    def test_check_processes(self, _, __, mock_get_row_cells_iterator):
+        self.body['read_config'] = {'check_processes': 1}
+
+        response = self.client.post('/process_table', json=self.body)
+
+        self.assertEqual(response.status_code, 400)
+        mock_get_row_cells_iterator.assert_not_called()
+
+    @patch('routes.process_table.get_bq_legacy_client')
+    @patch('routes.process_table.get_bq_read_client')
+    @patch('routes.process_table.get_credentials')
+    def test_changed_partitions_without_state_table(self, _, __, ___):
+        self.body['partition_config'] = {'changed': True}
+
+        response = self.client.post('/process_table', json=self.body)
+
+        self.assertEqual(response.status_code, 400)
+
+    @patch('routes.process_table.get_row_cells_iterator')
+    @patch('routes.process_table.get_summary_cache')
+    @patch('routes.process_table.get_bq_legacy_client')
+    @patch('routes.process_table.get_bq_read_client')
+    @patch('routes.process_table.get_credentials')
+    def test_cached_summaries(self, _, __, ___, mock_get_summary_cache,
+                              mock_get_row_cells_iterator):
+        self.body['cache_table'] = self.body['source_table']
+        cache = mock_get_summary_cache.return_value
+        cache.get.return_value = ['Summary.', 'Summary.']
+
+        response = self.client.post('/process_table', json=self.body)
+
+        self.assertEqual(response.status_code, 200)
+        mock_get_row_cells_iterator.assert_not_called()
+        self.assertEqual(
+            cast(dict, response.json)['description'].split('\n'), [
+                'amount: Summary. (Cached, since the table is unchanged.)',
+                'email: Summary. (Cached, since the table is unchanged.)'
+            ])
+
+    @patch('routes.process_table.get_row_cells_iterator')
+    @patch('routes.process_table.get_summary_cache')
+    @patch('routes.process_table.get_bq_legacy_client')
+    @patch('routes.process_table.get_bq_read_client')
+    @patch('routes.process_table.get_credentials')
+    def test_force_skips_cache(self, _, __, ___, mock_get_summary_cache,
+                               mock_get_row_cells_iterator):
+        self.body['cache_table'] = self.body['source_table']
+        self.body['force'] = True
+        cache = mock_get_summary_cache.return_value
+        mock_get_row_cells_iterator.return_value = iter([[1, 'john@doe.com']])
+
+        response = self.client.post('/process_table', json=self.body)
+
+        self.assertEqual(response.status_code, 200)
+        cache.get.assert_not_called()
+        cache.set.assert_called_once_with([
+            'DQM processed 1 rows, with 0 parse failures, '
+            '0 rule errors, 0 rule check violations.',
+            'DQM processed 1 rows, with 0 parse failures, '
+            '0 rule errors, 0 rule check violations.'
+        ])
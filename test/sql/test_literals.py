@@ -0,0 +1,52 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from typing import Any, List
+import unittest
+
+from rules.sql import literals
+
+
+class NumericLiteralTest(unittest.TestCase):
+
+    def test_numeric_literal(self):
+        for value, expected in [(0, '0'), (-5, '-5'), (2**60, str(2**60)),
+                                (0.5, '0.5'), (1e-08, '1e-08'),
+                                (-1e300, '-1e+300')]:
+            self.assertEqual(literals.numeric_literal(value), expected)
+
+    def test_unsupported_values_raise(self):
+        values: List[Any] = [
+            True, 2**63, 2**53 + 1,
+            float('inf'),
+            float('nan'), '1', None
+        ]
+        for value in values:
+            with self.assertRaises(NotImplementedError, msg=repr(value)):
+                literals.numeric_literal(value)
+
+
+class StringLiteralTest(unittest.TestCase):
+
+    def test_string_literal(self):
+        for value, expected in [
+            ('abc', "'abc'"),
+            ("it's", r"'it\'s'"),
+            (r'\d+', r"'\\d+'"),
+            ('a\nb', r"'a\u000ab'"),
+            ('é', "'é'"),
+        ]:
+            self.assertEqual(literals.string_literal(value), expected)
@@ -0,0 +1,58 @@
+"""
+Copyright 2023 Google LLC
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    https://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import re
+import unittest
+
+from rules import re2
+
+
+class TranslateRegexTest(unittest.TestCase):
+
+    def test_translated(self):
+        for regex, expected in [
+            ('Approved', 'Approved'),
+            (r'\d+', r'\p{Nd}+'),
+            (r'[^\D]', r'[^\P{Nd}]'),
+            ('(?i)approved', '(?i)approved'),
+            ('(?P<year>[0-9]{4})', '(?P<year>[0-9]{4})'),
+            ('[]a]b', '[]a]b'),
+            ('^a', '^a'),
+            (r'a\.b', r'a\.b'),
+        ]:
+            self.assertEqual(re2.translate_regex(regex), expected, msg=regex)
+
+    def test_not_translated(self):
+        for regex in [
+                'a$', r'\w+', r'\bword', r'\s', '(?=a)', '(?<!a)b', r'(a)\1',
+                '(?x)a b', 'a++', 'a{,3}', 'a(?#comment)'
+        ]:
+            self.assertIsNone(re2.translate_regex(regex), msg=regex)
+
+    def test_invalid_regex_raises(self):
+        with self.assertRaises(re.error):
+            re2.translate_regex('(a')
+
+    def test_full_match_translated(self):
+        for regex, expected in [
+            ('gmail.com$', r'\A(?:gmail.com)\z'),
+            (r'a\$', r'\A(?:a\$)\z'),
+            (r'a\\$', r'\A(?:a\\)\z'),
+        ]:
+            self.assertEqual(re2.translate_full_match_regex(regex),
+                             expected,
+                             msg=regex)
+        self.assertIsNone(re2.translate_full_match_regex('a$|b'))